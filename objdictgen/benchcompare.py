@@ -0,0 +1,377 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+from types import *
+import os, sys, re, math, hashlib
+
+from benchmark import SaveResults, LoadResults
+
+ScriptDirectory = os.path.split(os.path.realpath(__file__))[0]
+
+# Folder where the baselines of each machine are stored
+BASELINES_FOLDER = os.path.join(ScriptDirectory, "benchmarks")
+
+# Machine informations identifying a machine. Host name and kernel release are
+# left out so that rebuilt containers and updated systems keep their baseline
+FINGERPRINT_KEYS = ["system", "machine", "processor", "cpus", "implementation", "python"]
+
+# Default relative slowdown of the median time tolerated
+DEFAULT_THRESHOLD = 0.10
+
+# Default significance level of the Mann-Whitney test
+DEFAULT_ALPHA = 0.05
+
+# Biggest samples for which the exact distribution of U is computed
+EXACT_MAX_SIZE = 50
+
+# Comparison status, the ones failing the comparison first
+REGRESSION = "REGRESSION"
+ERROR = "ERROR"
+FASTER = "faster"
+UNCHANGED = "unchanged"
+NEW = "new"
+MISSING = "missing"
+FAILING_STATUS = [REGRESSION, ERROR]
+STATUS_ORDER = [REGRESSION, ERROR, FASTER, UNCHANGED, NEW, MISSING]
+
+#-------------------------------------------------------------------------------
+#                            Machine Fingerprint
+#-------------------------------------------------------------------------------
+
+"""
+Return the fingerprint of the machine described by machine informations of
+benchmark results, made of its system and architecture followed by a hash of
+its identifying informations
+"""
+def GetMachineFingerprint(machine):
+    identity = "\n".join(["%s=%s"%(key, machine.get(key)) for key in FINGERPRINT_KEYS])
+    prefix = re.sub("[^a-z0-9_]+", "_", ("%s_%s"%(machine.get("system"), machine.get("machine"))).lower())
+    return "%s_%s"%(prefix.strip("_"), hashlib.sha1(identity).hexdigest()[:12])
+
+"""
+Return the path of the baseline file of a machine fingerprint
+"""
+def GetBaselinePath(fingerprint, folder = BASELINES_FOLDER):
+    return os.path.join(folder, "%s.json"%fingerprint)
+
+#-------------------------------------------------------------------------------
+#                             Mann-Whitney Test
+#-------------------------------------------------------------------------------
+
+"""
+Return the ranks of values, tied values having the mean of their ranks, and the
+sizes of the groups of tied values
+"""
+def ComputeRanks(values):
+    order = sorted(xrange(len(values)), key = lambda i: values[i])
+    ranks = [0.] * len(values)
+    ties = []
+    start = 0
+    while start < len(order):
+        end = start
+        while end + 1 < len(order) and values[order[end + 1]] == values[order[start]]:
+            end += 1
+        for i in xrange(start, end + 1):
+            ranks[order[i]] = (start + end) / 2. + 1
+        if end > start:
+            ties.append(end - start + 1)
+        start = end + 1
+    return ranks, ties
+
+"""
+Return the number of arrangements of samples of sizes m and n giving each value
+of U, when there are no ties
+"""
+def GetUDistribution(m, n):
+    # previous[j] is the distribution for samples of sizes i - 1 and j: the
+    # greatest value is either in the first sample, beating the j values of the
+    # second one, or in the second sample
+    previous = [[1] for j in xrange(n + 1)]
+    for i in xrange(1, m + 1):
+        current = [[1]]
+        for j in xrange(1, n + 1):
+            counts = [0] * (i * j + 1)
+            for u, count in enumerate(previous[j]):
+                counts[u + j] += count
+            for u, count in enumerate(current[j - 1]):
+                counts[u] += count
+            current.append(counts)
+        previous = current
+    return previous[n]
+
+"""
+Mann-Whitney U test of sample against reference. Return U of sample and the
+one-sided p-values of sample being greater and of sample being smaller than
+reference. The distribution of U is exact for small samples without ties, and
+approximated by a normal distribution with tie correction otherwise
+"""
+def MannWhitneyTest(sample, reference):
+    m, n = len(sample), len(reference)
+    if m == 0 or n == 0:
+        raise ValueError, "Mann-Whitney test needs two non empty samples"
+    ranks, ties = ComputeRanks(list(sample) + list(reference))
+    u = sum(ranks[:m]) - m * (m + 1) / 2.
+    if not ties and m + n <= EXACT_MAX_SIZE:
+        counts = GetUDistribution(m, n)
+        total = float(sum(counts))
+        u = int(round(u))
+        return u, sum(counts[u:]) / total, sum(counts[:u + 1]) / total
+    total = m + n
+    mean = m * n / 2.
+    variance = m * n / 12. * ((total + 1) - sum([t ** 3 - t for t in ties]) / float(total * (total - 1)))
+    if variance <= 0:
+        return u, 1., 1.
+    stdev = math.sqrt(variance)
+    # Continuity correction of half a unit of U
+    greater = 0.5 * math.erfc((u - mean - 0.5) / stdev / math.sqrt(2))
+    smaller = 0.5 * math.erfc((mean - u - 0.5) / stdev / math.sqrt(2))
+    return u, min(greater, 1.), min(smaller, 1.)
+
+"""
+Return the smallest one-sided p-value the Mann-Whitney test can give for
+samples of sizes m and n
+"""
+def GetMinimumPValue(m, n):
+    return 1. / math.exp(math.lgamma(m + n + 1) - math.lgamma(m + 1) - math.lgamma(n + 1))
+
+#-------------------------------------------------------------------------------
+#                                Comparison
+#-------------------------------------------------------------------------------
+
+"""
+Compare benchmark results with baseline ones. A benchmark regresses when its
+median time is more than threshold slower and the test finds it significantly
+slower at the alpha level. Return the list of comparisons in results order,
+benchmarks of baseline missing in results at the end
+"""
+def CompareResults(results, baseline, threshold = DEFAULT_THRESHOLD, alpha = DEFAULT_ALPHA):
+    references = dict([(result["name"], result) for result in baseline["results"]])
+    comparisons = []
+    names = set()
+    for result in results["results"]:
+        name = result["name"]
+        names.add(name)
+        reference = references.get(name)
+        comparison = {"name" : name, "baseline" : None, "current" : None, "delta" : None,
+                      "pvalue" : None, "reachable" : True, "error" : result.get("error")}
+        if "error" not in result:
+            comparison["current"] = result["median"]
+        if reference is not None and "error" not in reference:
+            comparison["baseline"] = reference["median"]
+        if "error" in result:
+            # A hot path failing where it used to work is worse than slow
+            if reference is not None and "error" not in reference:
+                comparison["status"] = ERROR
+            else:
+                comparison["status"] = NEW
+        elif comparison["baseline"] is None:
+            comparison["status"] = NEW
+        else:
+            sample, reference_times = result["times"], reference["times"]
+            u, greater, smaller = MannWhitneyTest(sample, reference_times)
+            delta = result["median"] / reference["median"] - 1
+            comparison["delta"] = delta
+            comparison["reachable"] = GetMinimumPValue(len(sample), len(reference_times)) < alpha
+            if delta > threshold and greater < alpha:
+                comparison["status"] = REGRESSION
+            elif delta < -threshold and smaller < alpha:
+                comparison["status"] = FASTER
+            else:
+                comparison["status"] = UNCHANGED
+            if delta >= 0:
+                comparison["pvalue"] = greater
+            else:
+                comparison["pvalue"] = smaller
+        comparisons.append(comparison)
+    for reference in baseline["results"]:
+        if reference["name"] not in names:
+            comparisons.append({"name" : reference["name"], "baseline" : reference.get("median"),
+                                "current" : None, "delta" : None, "pvalue" : None, "reachable" : True,
+                                "error" : None, "status" : MISSING})
+    return comparisons
+
+"""
+Return True if one of the comparisons fails
+"""
+def HasFailures(comparisons):
+    for comparison in comparisons:
+        if comparison["status"] in FAILING_STATUS:
+            return True
+    return False
+
+"""
+Return baseline with the results of benchmarks run in results replaced, so that
+a partial run doesn't lose the other benchmarks of baseline
+"""
+def MergeResults(baseline, results):
+    if baseline is None:
+        return results
+    merged = dict(results)
+    names = [result["name"] for result in results["results"]]
+    merged["results"] = [result for result in baseline["results"] if result["name"] not in names] + results["results"]
+    return merged
+
+#-------------------------------------------------------------------------------
+#                                  Report
+#-------------------------------------------------------------------------------
+
+"""
+Return the text of a duration in seconds with a suitable unit
+"""
+def FormatTime(seconds):
+    if seconds is None:
+        return "-"
+    for unit, factor in [("s", 1.), ("ms", 1e-3), ("us", 1e-6)]:
+        if seconds >= factor:
+            return "%.3f %s"%(seconds / factor, unit)
+    return "%.1f ns"%(seconds / 1e-9)
+
+"""
+Return a table of the comparisons, failing ones first. If changes_only, the
+unchanged benchmarks are left out
+"""
+def GenerateComparisonTable(comparisons, changes_only = False):
+    rows = [("Benchmark", "Baseline", "Current", "Delta", "p-value", "Status")]
+    ordered = sorted(comparisons, key = lambda comparison: STATUS_ORDER.index(comparison["status"]))
+    for comparison in ordered:
+        if changes_only and comparison["status"] == UNCHANGED:
+            continue
+        if comparison["delta"] is not None:
+            delta = "%+.1f%%"%(comparison["delta"] * 100)
+        else:
+            delta = "-"
+        if comparison["pvalue"] is not None:
+            pvalue = "%.4f"%comparison["pvalue"]
+            if not comparison["reachable"]:
+                pvalue += "*"
+        else:
+            pvalue = "-"
+        status = comparison["status"]
+        if comparison["error"] is not None:
+            status += " (%s)"%comparison["error"]
+        rows.append((comparison["name"], FormatTime(comparison["baseline"]), FormatTime(comparison["current"]),
+                     delta, pvalue, status))
+    widths = [max([len(row[column]) for row in rows]) for column in xrange(6)]
+    lines = []
+    for number, row in enumerate(rows):
+        cells = [row[0].ljust(widths[0])] + [cell.rjust(width) for cell, width in zip(row[1:5], widths[1:5])] + [row[5]]
+        lines.append("  ".join(cells))
+        if number == 0:
+            lines.append("  ".join(["-" * width for width in widths]))
+    return "\n".join(lines)
+
+"""
+Return a summary line counting comparisons of each status
+"""
+def GenerateSummary(comparisons):
+    counts = []
+    for status in STATUS_ORDER:
+        number = len([comparison for comparison in comparisons if comparison["status"] == status])
+        if number > 0:
+            counts.append("%d %s"%(number, status.lower()))
+    return ", ".join(counts)
+
+def usage():
+    print _("\nUsage of benchcompare.py :")
+    print "\n   %s [options] ResultsFile [BaselineFile]\n"%sys.argv[0]
+    print _("   ResultsFile : JSON results of benchmark.py")
+    print _("   BaselineFile : JSON results to compare with (default baseline of the machine results come from)")
+    print _("   -d, --baselines : folder of the machine baselines (default %s)")%BASELINES_FOLDER
+    print _("   -t, --threshold : tolerated slowdown of median time in percent (default %g)")%(DEFAULT_THRESHOLD * 100)
+    print _("   -a, --alpha : significance level of Mann-Whitney test (default %g)")%DEFAULT_ALPHA
+    print _("   -c, --changes : only show benchmarks that changed")
+    print _("   -u, --update : store results as the baseline of their machine instead of failing\n")
+
+if __name__ == '__main__':
+    import getopt, __builtin__
+    __builtin__.__dict__['_'] = lambda x: x
+
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "hd:t:a:cu", ["help", "baselines=", "threshold=", "alpha=", "changes", "update"])
+    except getopt.GetoptError:
+        usage()
+        sys.exit(2)
+    if len(args) not in [1, 2]:
+        usage()
+        sys.exit(2)
+
+    folder = BASELINES_FOLDER
+    threshold = DEFAULT_THRESHOLD
+    alpha = DEFAULT_ALPHA
+    changes_only = False
+    update = False
+    for o, a in opts:
+        if o in ("-h", "--help"):
+            usage()
+            sys.exit()
+        elif o in ("-d", "--baselines"):
+            folder = a
+        elif o in ("-t", "--threshold"):
+            threshold = float(a) / 100
+        elif o in ("-a", "--alpha"):
+            alpha = float(a)
+        elif o in ("-c", "--changes"):
+            changes_only = True
+        elif o in ("-u", "--update"):
+            update = True
+
+    try:
+        results = LoadResults(args[0])
+        fingerprint = GetMachineFingerprint(results["machine"])
+        if len(args) == 2:
+            baselinepath = args[1]
+        else:
+            baselinepath = GetBaselinePath(fingerprint, folder)
+        baseline = None
+        if os.path.isfile(baselinepath):
+            baseline = LoadResults(baselinepath)
+    except (IOError, ValueError), message:
+        print message
+        sys.exit(2)
+
+    failed = False
+    if baseline is None:
+        print _("No baseline for machine %s in %s")%(fingerprint, folder)
+    else:
+        print _("Comparing %s with %s")%(args[0], baselinepath)
+        print _("Threshold %g%%, significance level %g\n")%(threshold * 100, alpha)
+        comparisons = CompareResults(results, baseline, threshold, alpha)
+        print GenerateComparisonTable(comparisons, changes_only)
+        print "\n" + GenerateSummary(comparisons)
+        if len([comparison for comparison in comparisons if not comparison["reachable"]]) > 0:
+            print _("* too few repetitions for any difference to be significant at this level")
+        failed = HasFailures(comparisons)
+
+    if update:
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        if len(args) == 2:
+            path = baselinepath
+        else:
+            path = GetBaselinePath(fingerprint, folder)
+        SaveResults(MergeResults(baseline, results), path)
+        print _("Baseline of machine %s stored in %s")%(fingerprint, path)
+    elif failed:
+        sys.exit(1)
+    elif baseline is None:
+        print _("Run with --update to store these results as its baseline")
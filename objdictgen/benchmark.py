@@ -0,0 +1,435 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+from types import *
+import os, sys, re, gc, glob, math, time, shutil, tempfile, platform, json
+from timeit import default_timer
+
+from gnosis.xml.pickle import *
+from gnosis.xml.pickle.util import setParanoia
+setParanoia(0)
+
+from nodemanager import NodeManager
+import eds_utils, gen_cfile, synthod
+
+ScriptDirectory = os.path.split(os.path.realpath(__file__))[0]
+
+# Version of the format of benchmark results
+RESULTS_FORMAT = 1
+
+# Default number of objects of synthetic dictionaries
+SYNTHETIC_SIZES = [1000]
+
+#-------------------------------------------------------------------------------
+#                              Time Measurement
+#-------------------------------------------------------------------------------
+
+"""
+Return the time in seconds taken by number calls of function, garbage collector
+being disabled like timeit does
+"""
+def TimeCalls(function, number):
+    gcold = gc.isenabled()
+    gc.disable()
+    try:
+        start = default_timer()
+        for i in xrange(number):
+            function()
+        return default_timer() - start
+    finally:
+        if gcold:
+            gc.enable()
+
+"""
+Return the statistics of a list of times
+"""
+def ComputeStatistics(times):
+    count = len(times)
+    ordered = sorted(times)
+    mean = sum(times) / count
+    if count % 2:
+        median = ordered[count / 2]
+    else:
+        median = (ordered[count / 2 - 1] + ordered[count / 2]) / 2
+    if count > 1:
+        variance = sum([(value - mean) ** 2 for value in times]) / (count - 1)
+    else:
+        variance = 0.
+    return {"mean" : mean, "median" : median, "variance" : variance,
+            "stdev" : math.sqrt(variance), "min" : ordered[0], "max" : ordered[-1]}
+
+"""
+Return the number of calls of function making a repetition last at least
+min_time, chosen while warming up
+"""
+def CalibrateFunction(function, warmup = 1, min_time = 0.05):
+    number = 1
+    duration = TimeCalls(function, number)
+    while duration < min_time:
+        number = max(number * 2, int(math.ceil(min_time * number / max(duration, 1e-9))))
+        duration = TimeCalls(function, number)
+    for i in xrange(warmup - 1):
+        TimeCalls(function, number)
+    return number
+
+"""
+Measure function. Return the number of calls of a repetition and the list of
+the mean time of a call in each repetition
+"""
+def MeasureFunction(function, warmup = 1, repetitions = 10, min_time = 0.05):
+    number = CalibrateFunction(function, warmup, min_time)
+    return number, [TimeCalls(function, number) / number for i in xrange(repetitions)]
+
+"""
+Return the informations describing the machine benchmarks are run on
+"""
+def GetMachineInfos():
+    infos = {"hostname" : platform.node(),
+             "system" : platform.system(),
+             "release" : platform.release(),
+             "machine" : platform.machine(),
+             "processor" : platform.processor(),
+             "python" : platform.python_version(),
+             "implementation" : platform.python_implementation()}
+    try:
+        import multiprocessing
+        infos["cpus"] = multiprocessing.cpu_count()
+    except (ImportError, NotImplementedError):
+        infos["cpus"] = None
+    if os.path.isfile("/proc/cpuinfo"):
+        for line in open("/proc/cpuinfo"):
+            if line.startswith("model name"):
+                infos["processor"] = line.split(":", 1)[1].strip()
+                break
+    return infos
+
+#-------------------------------------------------------------------------------
+#                                 Datasets
+#-------------------------------------------------------------------------------
+
+"""
+Class describing a dictionary benchmarks are run on. Its .od and EDS files are
+written in folder, EDSPath is None if the EDS file can't be generated
+"""
+
+class BenchmarkDataset:
+
+    def __init__(self, name, node, manager, folder):
+        self.Name = name
+        self.Node = node
+        self.Manager = manager
+        basepath = os.path.join(folder, re.sub("[^A-Za-z0-9_]", "_", name))
+        self.ODPath = basepath + ".od"
+        self.SavePath = basepath + "_saved.od"
+        self.CHeaderPath = basepath + ".h"
+        file = open(self.ODPath, "w")
+        dump(node, file)
+        file.close()
+        self.EDSPath = basepath + ".eds"
+        if eds_utils.GenerateEDSFile(self.EDSPath, node) is not None:
+            self.EDSPath = None
+
+"""
+Return the node of the example shipped with objdictgen
+"""
+def LoadExampleNode(manager):
+    result = manager.OpenFileInCurrent(os.path.join(ScriptDirectory, "examples", "example_objdict.od"))
+    if isinstance(result, (StringType, UnicodeType)):
+        raise ValueError, result
+    return manager.GetCurrentNodeCopy()
+
+"""
+Return a slave node using profile with all the entries the profile defines
+"""
+def BuildProfileNode(manager, profilepath):
+    profile = os.path.splitext(os.path.basename(profilepath))[0]
+    result = manager.CreateNewNode(profile.replace("-", ""), 0x01, "slave", "", profile, profilepath, "Heartbeat", [])
+    if isinstance(result, (StringType, UnicodeType)):
+        raise ValueError, result
+    indexes = [index for index in manager.CurrentNode.GetProfile().keys() if not manager.CurrentNode.IsEntry(index)]
+    indexes.sort()
+    manager.ManageEntriesOfCurrent(indexes, [])
+    return manager.GetCurrentNodeCopy()
+
+"""
+Return a synthetic node with objects manufacturer objects, every PDO line and a
+master DCF, generated with a fixed seed so that runs measure the same node
+"""
+def BuildSyntheticNode(manager, objects):
+    synthod.GenerateSyntheticNode(manager, "Synthetic%d"%objects, objects = objects)
+    return manager.GetCurrentNodeCopy()
+
+"""
+Return the list of datasets made of the example, a node for each profile of
+config folder and synthetic dictionaries of the sizes given
+"""
+def BuildDatasets(folder, synthetic_sizes = SYNTHETIC_SIZES, profiles = True):
+    manager = NodeManager()
+    datasets = [BenchmarkDataset("example_objdict", LoadExampleNode(manager), manager, folder)]
+    if profiles:
+        for profilepath in sorted(glob.glob(os.path.join(ScriptDirectory, "config", "*.prf"))):
+            name = os.path.splitext(os.path.basename(profilepath))[0]
+            datasets.append(BenchmarkDataset("profile_%s"%name, BuildProfileNode(manager, profilepath), manager, folder))
+    for size in synthetic_sizes:
+        datasets.append(BenchmarkDataset("synthetic_%d"%size, BuildSyntheticNode(manager, size), manager, folder))
+    return datasets
+
+#-------------------------------------------------------------------------------
+#                                Benchmarks
+#-------------------------------------------------------------------------------
+
+"""
+Each benchmark function takes a dataset and returns the function to measure,
+None if the benchmark can't be run on this dataset
+"""
+
+def BenchParseEDSFile(dataset):
+    if dataset.EDSPath is not None:
+        return lambda: eds_utils.ParseEDSFile(dataset.EDSPath)
+
+def BenchGenerateNode(dataset):
+    if dataset.EDSPath is not None:
+        return lambda: eds_utils.GenerateNode(dataset.EDSPath)
+
+def BenchGenerateEDSContent(dataset):
+    return lambda: eds_utils.GenerateFileContent(dataset.Node, dataset.EDSPath or "")
+
+def BenchGenerateCContent(dataset):
+    return lambda: gen_cfile.GenerateFileContent(dataset.Node, os.path.basename(dataset.CHeaderPath))
+
+def BenchLoadOD(dataset):
+    def LoadOD():
+        file = open(dataset.ODPath, "r")
+        node = load(file)
+        file.close()
+        node.ResolveProfiles()
+    return LoadOD
+
+def BenchSaveOD(dataset):
+    def SaveOD():
+        file = open(dataset.SavePath, "w")
+        dump(dataset.Node, file)
+        file.close()
+    return SaveOD
+
+def BenchCopy(dataset):
+    return dataset.Node.Copy
+
+def BenchGetEntryInfos(dataset):
+    node = dataset.Node
+    indexes = node.GetIndexes()
+    def GetEntryInfos():
+        for index in indexes:
+            node.GetEntryInfos(index)
+    return GetEntryInfos
+
+def BenchGetSubentryInfos(dataset):
+    node = dataset.Node
+    subentries = []
+    for index in node.GetIndexes():
+        values = node.GetEntry(index, compute = False)
+        if isinstance(values, ListType):
+            subentries.extend([(index, subindex) for subindex in xrange(len(values))])
+        else:
+            subentries.append((index, 0))
+    def GetSubentryInfos():
+        for index, subindex in subentries:
+            node.GetSubentryInfos(index, subindex)
+    return GetSubentryInfos
+
+def BenchGetNodeEntryValues(dataset):
+    node, manager = dataset.Node, dataset.Manager
+    indexes = node.GetIndexes()
+    def GetNodeEntryValues():
+        for index in indexes:
+            manager.GetNodeEntryValues(node, index)
+    return GetNodeEntryValues
+
+BENCHMARKS = [("eds_utils.ParseEDSFile", BenchParseEDSFile),
+              ("eds_utils.GenerateNode", BenchGenerateNode),
+              ("eds_utils.GenerateFileContent", BenchGenerateEDSContent),
+              ("gen_cfile.GenerateFileContent", BenchGenerateCContent),
+              ("od.load", BenchLoadOD),
+              ("od.save", BenchSaveOD),
+              ("Node.Copy", BenchCopy),
+              ("Node.GetEntryInfos", BenchGetEntryInfos),
+              ("Node.GetSubentryInfos", BenchGetSubentryInfos),
+              ("NodeManager.GetNodeEntryValues", BenchGetNodeEntryValues)]
+
+"""
+Run the benchmarks whose "benchmark[dataset]" name matches pattern on the
+datasets. Callback is called with this name before each benchmark. Return the
+list of results, the result of a benchmark raising an exception only giving it
+in "error".
+Repetitions are interleaved, each one running every benchmark once, so that a
+slower period of the machine spreads over all the benchmarks instead of
+shifting the times of the ones run at that moment
+"""
+def RunBenchmarks(datasets, warmup = 1, repetitions = 10, min_time = 0.05, pattern = None, callback = None):
+    if pattern is not None:
+        pattern = re.compile(pattern)
+    results = []
+    measured = []
+    for dataset in datasets:
+        for name, setup in BENCHMARKS:
+            fullname = "%s[%s]"%(name, dataset.Name)
+            if pattern is not None and not pattern.search(fullname):
+                continue
+            function = setup(dataset)
+            if function is None:
+                continue
+            if callback is not None:
+                callback(fullname)
+            result = {"name" : fullname, "benchmark" : name, "dataset" : dataset.Name,
+                      "warmup" : warmup, "repetitions" : repetitions}
+            try:
+                result["number"] = CalibrateFunction(function, warmup, min_time)
+            except Exception, exception:
+                SetBenchmarkError(result, exception)
+            else:
+                result["times"] = []
+                measured.append((function, result))
+            results.append(result)
+    for i in xrange(repetitions):
+        for function, result in measured:
+            if "error" not in result:
+                try:
+                    result["times"].append(TimeCalls(function, result["number"]) / result["number"])
+                except Exception, exception:
+                    SetBenchmarkError(result, exception)
+    for function, result in measured:
+        if "error" not in result:
+            result.update(ComputeStatistics(result["times"]))
+    return results
+
+"""
+Replace the measures of result by the error raised by its benchmark. A failing
+hot path is reported without stopping the suite
+"""
+def SetBenchmarkError(result, exception):
+    message = (str(exception).strip().splitlines() or [""])[0]
+    result["error"] = "%s: %s"%(exception.__class__.__name__, message)
+    result.pop("number", None)
+    result.pop("times", None)
+
+"""
+Run the benchmarks on the example, the profiles and synthetic dictionaries of
+the sizes given and return the results ready to be saved in JSON
+"""
+def RunBenchmarkSuite(synthetic_sizes = SYNTHETIC_SIZES, profiles = True, warmup = 1, repetitions = 10, min_time = 0.05, pattern = None, callback = None):
+    folder = tempfile.mkdtemp(prefix = "objdictgen_benchmark")
+    try:
+        datasets = BuildDatasets(folder, synthetic_sizes, profiles)
+        results = RunBenchmarks(datasets, warmup, repetitions, min_time, pattern, callback)
+    finally:
+        shutil.rmtree(folder, True)
+    return {"format" : RESULTS_FORMAT,
+            "date" : time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "machine" : GetMachineInfos(),
+            "settings" : {"warmup" : warmup, "repetitions" : repetitions, "min_time" : min_time,
+                          "synthetic_sizes" : synthetic_sizes, "profiles" : profiles},
+            "results" : results}
+
+"""
+Write benchmark results in a JSON file
+"""
+def SaveResults(results, filepath):
+    file = open(filepath, "w")
+    json.dump(results, file, indent = 1, sort_keys = True)
+    file.close()
+
+"""
+Return benchmark results read from a JSON file
+"""
+def LoadResults(filepath):
+    file = open(filepath, "r")
+    results = json.load(file)
+    file.close()
+    if results.get("format") != RESULTS_FORMAT:
+        raise ValueError, "\"%s\" isn't a benchmark results file of format %d"%(filepath, RESULTS_FORMAT)
+    return results
+
+def usage():
+    print _("\nUsage of benchmark.py :")
+    print "\n   %s [options]\n"%sys.argv[0]
+    print _("   -o, --output : JSON file where results are written (default standard output)")
+    print _("   -w, --warmup : number of warmup runs of each benchmark (default 1)")
+    print _("   -r, --repetitions : number of measured repetitions of each benchmark (default 10)")
+    print _("   -t, --min-time : minimum duration in seconds of a repetition (default 0.05)")
+    print _("   -s, --sizes : comma separated numbers of objects of synthetic dictionaries (default 1000)")
+    print _("   -f, --filter : regular expression selecting the \"benchmark[dataset]\" to run")
+    print _("   -n, --no-profiles : don't run benchmarks on the profiles of config folder\n")
+
+if __name__ == '__main__':
+    import getopt, __builtin__
+    # Loading a node needs translation function in other modules too
+    __builtin__.__dict__['_'] = lambda x: x
+
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "ho:w:r:t:s:f:n", ["help", "output=", "warmup=", "repetitions=", "min-time=", "sizes=", "filter=", "no-profiles"])
+    except getopt.GetoptError:
+        usage()
+        sys.exit(2)
+    if len(args) != 0:
+        usage()
+        sys.exit()
+
+    output = None
+    warmup = 1
+    repetitions = 10
+    min_time = 0.05
+    sizes = SYNTHETIC_SIZES
+    pattern = None
+    profiles = True
+    for o, a in opts:
+        if o in ("-h", "--help"):
+            usage()
+            sys.exit()
+        elif o in ("-o", "--output"):
+            output = a
+        elif o in ("-w", "--warmup"):
+            warmup = int(a)
+        elif o in ("-r", "--repetitions"):
+            repetitions = int(a)
+        elif o in ("-t", "--min-time"):
+            min_time = float(a)
+        elif o in ("-s", "--sizes"):
+            sizes = [int(size) for size in a.split(",") if size != ""]
+        elif o in ("-f", "--filter"):
+            pattern = a
+        elif o in ("-n", "--no-profiles"):
+            profiles = False
+
+    def Progress(name):
+        sys.stderr.write("%s\n"%name)
+
+    try:
+        results = RunBenchmarkSuite(sizes, profiles, warmup, repetitions, min_time, pattern, Progress)
+    except ValueError, message:
+        print message
+        sys.exit(-1)
+    if output is not None:
+        SaveResults(results, output)
+    else:
+        json.dump(results, sys.stdout, indent = 1, sort_keys = True)
+        print
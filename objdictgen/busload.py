@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+from types import *
+from networkcheck import GetCanID, GetSyncCanID, COBID_INVALID, COBID_EXTENDED, COBID_SYNC_PRODUCER
+
+#-------------------------------------------------------------------------------
+#                              CAN Frame Length
+#-------------------------------------------------------------------------------
+
+# Baudrates defined by CiA 301
+Baudrates = [10000, 20000, 50000, 125000, 250000, 500000, 800000, 1000000]
+
+"""
+Return the number of bits on the bus of a data frame with the number of data
+bytes given, including interframe space. If stuffing is True, the maximum
+number of stuff bits is added (one every four bits after the first one, on the
+part of the frame from SOF to CRC)
+"""
+def GetFrameBits(length, extended = False, stuffing = True):
+    if extended:
+        stuffable = 54 + 8 * length
+    else:
+        stuffable = 34 + 8 * length
+    # Stuffable part + CRC delimiter, ACK, EOF and interframe space
+    bits = stuffable + 13
+    if stuffing:
+        bits += (stuffable - 1) / 4
+    return bits
+
+#-------------------------------------------------------------------------------
+#                            Network Frames Extraction
+#-------------------------------------------------------------------------------
+
+"""
+Return the value of an entry of a node in a NetworkIndex if it's a number,
+default otherwise
+"""
+def GetNumberValue(index, nodeid, entry_index, subIndex, default = 0):
+    value = index.GetNodeEntry(nodeid, entry_index, subIndex)
+    if isinstance(value, (IntType, LongType)):
+        return value
+    return default
+
+"""
+Return the number of data bytes of a TPDO of a node in a NetworkIndex, computed
+from the mapping entry of the TPDO communication index given
+"""
+def GetTPDOLength(index, nodeid, comm_index):
+    bits = 0
+    for value in (index.GetNodeEntry(nodeid, comm_index + 0x200) or [0])[1:]:
+        if isinstance(value, (IntType, LongType)):
+            bits += value & 0xFF
+    return min((bits + 7) / 8, 8)
+
+"""
+Return the frames sent by the nodes of a NetworkIndex. Each frame is a
+dictionary with:
+  - "nodeid", "index", "service" and "cobid" identifying the frame
+  - "length" and "bits" of the frame
+  - "sync" the number of SYNC periods between two frames for synchronous frames
+  - "period" the time in seconds between two frames for the other ones
+  - "unbounded" True for event driven frames without event timer nor inhibit
+    time, their period can't be known and they are not counted in bus load
+"""
+def GetIndexFrames(index, stuffing = True):
+    frames = []
+    for (nodeid, comm_index), cobid_value in index.GetRangeValues(0x1800, 0x19FF, 1).iteritems():
+        cobid = GetCanID(cobid_value)
+        if cobid is None:
+            continue
+        length = GetTPDOLength(index, nodeid, comm_index)
+        frame = {"nodeid" : nodeid, "index" : comm_index, "service" : "TPDO", "cobid" : cobid,
+                 "length" : length, "bits" : GetFrameBits(length, cobid_value & COBID_EXTENDED != 0, stuffing),
+                 "sync" : None, "period" : None, "unbounded" : False}
+        transmission = GetNumberValue(index, nodeid, comm_index, 2, 255)
+        if transmission == 0:
+            # Acyclic synchronous, worst case is a transmission every SYNC
+            frame["sync"] = 1
+        elif transmission <= 240:
+            frame["sync"] = transmission
+        elif transmission in [252, 253]:
+            # Only transmitted on remote request
+            continue
+        else:
+            event_timer = GetNumberValue(index, nodeid, comm_index, 5)
+            inhibit_time = GetNumberValue(index, nodeid, comm_index, 3)
+            if inhibit_time > 0:
+                # Inhibit time is the shortest period in event driven mode
+                frame["period"] = inhibit_time / 10000.
+            elif event_timer > 0:
+                frame["period"] = event_timer / 1000.
+            else:
+                frame["unbounded"] = True
+        frames.append(frame)
+    for nodeid, value in index.GetEntryValues(0x1005, 0).iteritems():
+        cobid = GetSyncCanID(value)
+        if cobid is not None and value & COBID_SYNC_PRODUCER:
+            frames.append({"nodeid" : nodeid, "index" : 0x1005, "service" : "SYNC", "cobid" : cobid,
+                           "length" : 0, "bits" : GetFrameBits(0, value & COBID_EXTENDED != 0, stuffing),
+                           "sync" : 1, "period" : None, "unbounded" : False})
+    for nodeid, value in index.GetEntryValues(0x1017, 0).iteritems():
+        if isinstance(value, (IntType, LongType)) and value > 0:
+            frames.append({"nodeid" : nodeid, "index" : 0x1017, "service" : "Heartbeat", "cobid" : 0x700 + nodeid,
+                           "length" : 1, "bits" : GetFrameBits(1, False, stuffing),
+                           "sync" : None, "period" : value / 1000., "unbounded" : False})
+    return frames
+
+"""
+Return the SYNC period in seconds defined by the SYNC producer of the indexes
+given, None if there isn't any
+"""
+def GetIndexesSyncPeriod(indexes):
+    for index in indexes:
+        for nodeid, value in index.GetEntryValues(0x1005, 0).iteritems():
+            if isinstance(value, (IntType, LongType)) and value & COBID_SYNC_PRODUCER:
+                period = GetNumberValue(index, nodeid, 0x1006, 0)
+                if period > 0:
+                    return period / 1000000.
+    return None
+
+#-------------------------------------------------------------------------------
+#                          Definition of BusLoad Object
+#-------------------------------------------------------------------------------
+
+"""
+Class computing the bus load of a list of frames. The bits sent per second are
+split in a part independent of SYNC period and a part sent every SYNC period,
+so that load for any baudrate and SYNC period is computed without looking at
+the frames again.
+"""
+
+class BusLoad:
+
+    def __init__(self, frames, syncperiod = None):
+        self.Frames = frames
+        self.SyncPeriod = syncperiod
+        # Bits sent every second by frames with a fixed period
+        self.PeriodicBits = 0.
+        # Bits sent every SYNC period by synchronous frames
+        self.SyncBits = 0.
+        for frame in frames:
+            if frame["period"] is not None:
+                self.PeriodicBits += frame["bits"] / frame["period"]
+            elif frame["sync"] is not None:
+                self.SyncBits += float(frame["bits"]) / frame["sync"]
+
+    def GetSyncPeriod(self, syncperiod = None):
+        if syncperiod is None:
+            return self.SyncPeriod
+        return syncperiod
+
+    """
+    Return the number of frames sent per second by a frame, 0 if unknown
+    """
+    def GetFrameRate(self, frame, syncperiod = None):
+        syncperiod = self.GetSyncPeriod(syncperiod)
+        if frame["period"] is not None:
+            return 1. / frame["period"]
+        elif frame["sync"] is not None and syncperiod:
+            return 1. / (frame["sync"] * syncperiod)
+        return 0.
+
+    """
+    Return the number of bits sent per second on the bus
+    """
+    def GetBitRate(self, syncperiod = None):
+        syncperiod = self.GetSyncPeriod(syncperiod)
+        if syncperiod:
+            return self.PeriodicBits + self.SyncBits / syncperiod
+        return self.PeriodicBits
+
+    """
+    Return the total bus load (1.0 is a full bus)
+    """
+    def GetTotalLoad(self, baudrate, syncperiod = None):
+        return self.GetBitRate(syncperiod) / baudrate
+
+    """
+    Return the bus load for every baudrate and SYNC period given as a
+    dictionary {(baudrate, syncperiod) : load}
+    """
+    def Sweep(self, baudrates = Baudrates, syncperiods = None):
+        if syncperiods is None:
+            syncperiods = [self.SyncPeriod]
+        result = {}
+        for syncperiod in syncperiods:
+            bitrate = self.GetBitRate(syncperiod)
+            for baudrate in baudrates:
+                result[(baudrate, syncperiod)] = bitrate / baudrate
+        return result
+
+    """
+    Return the smallest baudrate for which bus load doesn't exceed the limit
+    given, None if there isn't any
+    """
+    def GetMinimalBaudrate(self, limit = 0.7, baudrates = Baudrates, syncperiod = None):
+        bitrate = self.GetBitRate(syncperiod)
+        for baudrate in baudrates:
+            if bitrate / baudrate <= limit:
+                return baudrate
+        return None
+
+    """
+    Return the load of the frames grouped by key as a dictionary
+    {key : (frames per second, bits per second, load)}
+    """
+    def GetLoadsBy(self, key, baudrate, syncperiod = None):
+        result = {}
+        for frame in self.Frames:
+            rate = self.GetFrameRate(frame, syncperiod)
+            frames, bits, load = result.get(frame[key], (0., 0., 0.))
+            result[frame[key]] = (frames + rate, bits + rate * frame["bits"], load + rate * frame["bits"] / baudrate)
+        return result
+
+    """
+    Return the load of each node as a dictionary
+    {nodeid : (frames per second, bits per second, load)}
+    """
+    def GetNodeLoads(self, baudrate, syncperiod = None):
+        return self.GetLoadsBy("nodeid", baudrate, syncperiod)
+
+    """
+    Return the load of each COB ID as a dictionary
+    {cobid : (frames per second, bits per second, load)}
+    """
+    def GetCobIDLoads(self, baudrate, syncperiod = None):
+        return self.GetLoadsBy("cobid", baudrate, syncperiod)
+
+    """
+    Return the frames whose period can't be known
+    """
+    def GetUnboundedFrames(self):
+        return [frame for frame in self.Frames if frame["unbounded"]]
+
+    """
+    Return a text report of bus load for the baudrate given
+    """
+    def GetReport(self, baudrate, syncperiod = None):
+        syncperiod = self.GetSyncPeriod(syncperiod)
+        lines = []
+        if syncperiod:
+            lines.append(_("Bus load at %d bit/s with a SYNC period of %.3f ms")%(baudrate, syncperiod * 1000))
+        else:
+            lines.append(_("Bus load at %d bit/s without SYNC")%baudrate)
+        lines.append("")
+        lines.append(_("Node   Frames/s     Bits/s   Load"))
+        nodeloads = self.GetNodeLoads(baudrate, syncperiod)
+        nodeids = nodeloads.keys()
+        nodeids.sort()
+        for nodeid in nodeids:
+            frames, bits, load = nodeloads[nodeid]
+            lines.append("0x%2.2X %10.1f %10.0f %5.1f%%"%(nodeid, frames, bits, load * 100))
+        lines.append("")
+        lines.append(_("COB ID Frames/s     Bits/s   Load"))
+        cobidloads = self.GetCobIDLoads(baudrate, syncperiod)
+        cobids = cobidloads.keys()
+        cobids.sort()
+        for cobid in cobids:
+            frames, bits, load = cobidloads[cobid]
+            lines.append("0x%3.3X %10.1f %10.0f %5.1f%%"%(cobid, frames, bits, load * 100))
+        lines.append("")
+        lines.append(_("Total: %.0f bit/s, %.1f%% of bus")%(self.GetBitRate(syncperiod), self.GetTotalLoad(baudrate, syncperiod) * 100))
+        for frame in self.GetUnboundedFrames():
+            lines.append(_("Warning: %s 0x%4.4X of node 0x%2.2X is event driven without event timer nor inhibit time")%(frame["service"], frame["index"], frame["nodeid"]))
+        return "\n".join(lines)
+
+"""
+Return the BusLoad of the slaves and the master node of a NodeList
+"""
+def GetNetworkBusLoad(nodelist, stuffing = True):
+    indexes = nodelist.GetNetworkIndexes()
+    frames = []
+    for index in indexes:
+        frames.extend(GetIndexFrames(index, stuffing))
+    return BusLoad(frames, GetIndexesSyncPeriod(indexes))
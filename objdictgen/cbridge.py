@@ -0,0 +1,720 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+from types import *
+import os, sys, time, subprocess
+import ctypes
+
+import gen_cfile
+from virtualcan import CanEndpoint
+from sdoserver import GetObjectTable
+import pdocodec
+
+# Root of the CanFestival sources
+StackDirectory = os.path.join(os.path.split(os.path.realpath(__file__))[0], "..")
+
+# Stack modules linked with the object dictionary
+STACK_SOURCES = ["objacces", "lifegrd", "sdo", "pdo", "sync", "nmtSlave",
+    "nmtMaster", "states", "timer", "dcf", "emcy"]
+
+# Defines written in config.h, with the defaults of configure
+STACK_CONFIG = [("MAX_CAN_BUS_ID", 1),
+                ("SDO_MAX_LENGTH_TRANSFER", 32),
+                ("SDO_BLOCK_SIZE", 16),
+                ("SDO_MAX_SIMULTANEOUS_TRANSFERS", 4),
+                ("NMT_MAX_NODE_ID", 128),
+                ("SDO_TIMEOUT_MS", 3000),
+                ("MAX_NB_TIMER", 32),
+                ("EMCY_MAX_ERRORS", 8),
+                ("LSS_TIMEOUT_MS", 1000),
+                ("LSS_FS_TIMEOUT_MS", 100)]
+
+# Defines also giving a REPEAT_<define>_TIMES macro
+STACK_REPEATED = ["SDO_MAX_SIMULTANEOUS_TRANSFERS", "NMT_MAX_NODE_ID", "EMCY_MAX_ERRORS"]
+
+# Number of frames sent by stack that the bridge keeps until they are read
+BRIDGE_QUEUE_SIZE = 1024
+
+# NMT states of stack
+STATE_INITIALISATION = 0x00
+STATE_STOPPED = 0x04
+STATE_OPERATIONAL = 0x05
+STATE_PRE_OPERATIONAL = 0x7F
+
+# Abort codes of stack used by the bridge
+OD_SUCCESSFUL = 0x00000000
+SDOABT_OUT_OF_MEMORY = 0x05040005
+
+TIMEVAL_MAX = (1 << 64) - 1
+
+#-------------------------------------------------------------------------------
+#                            Library Generation
+#-------------------------------------------------------------------------------
+
+"""
+Content of the file replacing the CAN and timer drivers. Stack is run in the
+caller thread on a simulated clock advanced by bridge_advance, frames sent by
+stack are kept in a queue read by bridge_pop_frame.
+"""
+
+bridge_template = """/* File generated by cbridge.py */
+
+#include <string.h>
+#include "%(HeaderName)s"
+
+static CO_Data* bridge_data = &%(NodeName)s_Data;
+
+/* Simulated clock in us */
+static TIMEVAL bridge_now = 0;
+static TIMEVAL bridge_last_signal = 0;
+static TIMEVAL bridge_alarm = TIMEVAL_MAX;
+
+/* Frames sent by stack */
+static Message bridge_queue[%(QueueSize)d];
+static unsigned int bridge_queue_first = 0;
+static unsigned int bridge_queue_count = 0;
+static int bridge_capture = 1;
+static unsigned long bridge_sent = 0;
+static unsigned long bridge_dropped = 0;
+
+/**************************************************************************/
+/* Timer driver                                                           */
+/**************************************************************************/
+
+void EnterMutex(void) {}
+
+void LeaveMutex(void) {}
+
+void setTimer(TIMEVAL value)
+{
+	if (value > TIMEVAL_MAX - bridge_now)
+		bridge_alarm = TIMEVAL_MAX;
+	else
+		bridge_alarm = bridge_now + value;
+}
+
+TIMEVAL getElapsedTime(void)
+{
+	return bridge_now - bridge_last_signal;
+}
+
+/**************************************************************************/
+/* CAN driver                                                             */
+/**************************************************************************/
+
+UNS8 canSend(CAN_PORT port, Message *m)
+{
+	(void)port;
+	bridge_sent++;
+	if (!bridge_capture)
+		return 0;
+	if (bridge_queue_count == %(QueueSize)d) {
+		/* Transmit buffer full */
+		bridge_dropped++;
+		return 1;
+	}
+	bridge_queue[(bridge_queue_first + bridge_queue_count) %% %(QueueSize)d] = *m;
+	bridge_queue_count++;
+	return 0;
+}
+
+/**************************************************************************/
+/* Bridge functions                                                       */
+/**************************************************************************/
+
+void bridge_init(UNS8 nodeId)
+{
+	setNodeId(bridge_data, nodeId);
+	setState(bridge_data, Initialisation);
+}
+
+UNS8 bridge_set_state(UNS8 state)
+{
+	return setState(bridge_data, (e_nodeState)state);
+}
+
+UNS8 bridge_get_state(void)
+{
+	return (UNS8)getState(bridge_data);
+}
+
+void bridge_dispatch(Message *m)
+{
+	canDispatch(bridge_data, m);
+}
+
+void bridge_dispatch_many(Message *frames, unsigned int count, unsigned int repeat)
+{
+	unsigned int i, j;
+	for (j = 0; j < repeat; j++)
+		for (i = 0; i < count; i++)
+			canDispatch(bridge_data, &frames[i]);
+}
+
+int bridge_pop_frame(Message *m)
+{
+	if (bridge_queue_count == 0)
+		return 0;
+	*m = bridge_queue[bridge_queue_first];
+	bridge_queue_first = (bridge_queue_first + 1) %% %(QueueSize)d;
+	bridge_queue_count--;
+	return 1;
+}
+
+void bridge_set_capture(int capture)
+{
+	bridge_capture = capture;
+	if (!capture)
+		bridge_queue_count = 0;
+}
+
+void bridge_get_counters(unsigned long *sent, unsigned long *dropped)
+{
+	*sent = bridge_sent;
+	*dropped = bridge_dropped;
+}
+
+UNS32 bridge_read(UNS16 index, UNS8 subIndex, void *data, UNS32 *size, UNS8 *dataType)
+{
+	return _getODentry(bridge_data, index, subIndex, data, size, dataType, 0, 0);
+}
+
+UNS32 bridge_write(UNS16 index, UNS8 subIndex, void *data, UNS32 *size)
+{
+	return _setODentry(bridge_data, index, subIndex, data, size, 0, 0);
+}
+
+unsigned long bridge_scan(const UNS16 *indexes, unsigned int count, unsigned int repeat)
+{
+	unsigned int i, j;
+	unsigned long found = 0;
+	UNS32 errorCode;
+	ODCallback_t *callbacks;
+	for (j = 0; j < repeat; j++)
+		for (i = 0; i < count; i++)
+			if ((*bridge_data->scanIndexOD)(indexes[i], &errorCode, &callbacks) != NULL)
+				found++;
+	return found;
+}
+
+void bridge_send_pdo_event(unsigned int repeat)
+{
+	unsigned int j;
+	for (j = 0; j < repeat; j++)
+		sendPDOevent(bridge_data);
+}
+
+TIMEVAL bridge_get_time(void)
+{
+	return bridge_now;
+}
+
+TIMEVAL bridge_get_alarm(void)
+{
+	return bridge_alarm;
+}
+
+void bridge_advance(TIMEVAL duration)
+{
+	TIMEVAL date = bridge_now + duration;
+	while (bridge_alarm <= date) {
+		bridge_now = bridge_last_signal = bridge_alarm;
+		bridge_alarm = TIMEVAL_MAX;
+		TimeDispatch();
+	}
+	bridge_now = date;
+}
+"""
+
+"""
+Return the content of config.h, config overriding the defaults of STACK_CONFIG
+"""
+def GenerateConfigContent(config = {}):
+    content = "/* File generated by cbridge.py */\n\n#ifndef _CONFIG_H_\n#define _CONFIG_H_\n\n"
+    values = {}
+    for name, default in STACK_CONFIG:
+        values[name] = config.get(name, default)
+        content += "#define %s %s\n"%(name, values[name])
+    for name in config:
+        if name not in values:
+            content += "#define %s %s\n"%(name, config[name])
+    content += "\n"
+    for name in STACK_REPEATED:
+        content += "#define REPEAT_%s_TIMES(repeat)\\\n%s\n"%(name, " repeat" * int(values[name]))
+    content += "\n#endif /* _CONFIG_H_ */\n"
+    return content
+
+"""
+Generate the object dictionary of node in build_dir and compile it with the
+stack into a shared library. config overrides the defines of config.h, LSS is
+only linked if it defines CO_ENABLE_LSS. Return
+the path of the library, raise ValueError if it can't be built
+"""
+def BuildStackLibrary(node, build_dir, split = False, config = {}, cflags = ["-O2"], compiler = "gcc"):
+    if not os.path.isdir(build_dir):
+        os.makedirs(build_dir)
+    name = node.GetNodeName()
+    if name == "":
+        raise ValueError, "Node must have a name to be compiled"
+    filepath = os.path.join(build_dir, "%s.c"%name)
+    result = gen_cfile.GenerateFile(filepath, node, split = split)
+    if result is not None:
+        raise ValueError, result
+    sources = [filepath]
+    if split:
+        sources.extend([os.path.join(build_dir, "%s_%s.c"%(name, category)) for category in gen_cfile.split_files])
+
+    gen_cfile.WriteFileIfChanged(os.path.join(build_dir, "config.h"), GenerateConfigContent(config))
+    bridgepath = os.path.join(build_dir, "%s_bridge.c"%name)
+    gen_cfile.WriteFileIfChanged(bridgepath, bridge_template%{"NodeName" : name,
+        "HeaderName" : "%s.h"%name, "QueueSize" : BRIDGE_QUEUE_SIZE})
+    sources.append(bridgepath)
+    modules = STACK_SOURCES[:]
+    if "CO_ENABLE_LSS" in config:
+        modules.append("lss")
+    sources.extend([os.path.join(StackDirectory, "src", "%s.c"%module) for module in modules])
+
+    librarypath = os.path.join(build_dir, "lib%s%s.so"%(name, ["", "_split"][split]))
+    includes = [build_dir] + [os.path.join(StackDirectory, "include", folder) for folder in ["", "unix", "timers_unix"]]
+    command = [compiler, "-shared", "-fPIC", "-Wl,-Bsymbolic", "-Wl,--no-undefined"] + cflags
+    command += ["-I%s"%path for path in includes]
+    command += ["-o", librarypath] + sources
+    process = subprocess.Popen(command, stdout = subprocess.PIPE, stderr = subprocess.STDOUT)
+    output = process.communicate()[0]
+    if process.returncode != 0:
+        raise ValueError, "Unable to build \"%s\"\n%s"%(librarypath, output)
+    return librarypath
+
+#-------------------------------------------------------------------------------
+#                          Definition of StackBridge Object
+#-------------------------------------------------------------------------------
+
+"""
+Message structure of stack
+"""
+
+class Message(ctypes.Structure):
+    _fields_ = [("cob_id", ctypes.c_uint16),
+                ("rtr", ctypes.c_uint8),
+                ("len", ctypes.c_uint8),
+                ("data", ctypes.c_uint8 * 8)]
+
+"""
+Return the Message of a COB ID and its data
+"""
+def BuildMessage(cobid, data = "", rtr = False):
+    message = Message(cobid, rtr and 1 or 0, len(data))
+    ctypes.memmove(message.data, data, len(data))
+    return message
+
+"""
+Class driving the stack compiled in a library by BuildStackLibrary. Node is the
+node the library was built from, needed to give values of entries in their type
+"""
+
+class StackBridge:
+
+    def __init__(self, librarypath, node = None):
+        self.Node = node
+        self.Library = library = ctypes.CDLL(os.path.realpath(librarypath))
+        for name, restype, argtypes in [
+                ("bridge_init", None, [ctypes.c_uint8]),
+                ("bridge_set_state", ctypes.c_uint8, [ctypes.c_uint8]),
+                ("bridge_get_state", ctypes.c_uint8, []),
+                ("bridge_dispatch", None, [ctypes.POINTER(Message)]),
+                ("bridge_dispatch_many", None, [ctypes.POINTER(Message), ctypes.c_uint, ctypes.c_uint]),
+                ("bridge_pop_frame", ctypes.c_int, [ctypes.POINTER(Message)]),
+                ("bridge_set_capture", None, [ctypes.c_int]),
+                ("bridge_get_counters", None, [ctypes.POINTER(ctypes.c_ulong), ctypes.POINTER(ctypes.c_ulong)]),
+                ("bridge_read", ctypes.c_uint32, [ctypes.c_uint16, ctypes.c_uint8, ctypes.c_void_p, ctypes.POINTER(ctypes.c_uint32), ctypes.POINTER(ctypes.c_uint8)]),
+                ("bridge_write", ctypes.c_uint32, [ctypes.c_uint16, ctypes.c_uint8, ctypes.c_void_p, ctypes.POINTER(ctypes.c_uint32)]),
+                ("bridge_scan", ctypes.c_ulong, [ctypes.POINTER(ctypes.c_uint16), ctypes.c_uint, ctypes.c_uint]),
+                ("bridge_send_pdo_event", None, [ctypes.c_uint]),
+                ("bridge_get_time", ctypes.c_uint64, []),
+                ("bridge_get_alarm", ctypes.c_uint64, []),
+                ("bridge_advance", None, [ctypes.c_uint64])]:
+            function = getattr(library, name)
+            function.restype = restype
+            function.argtypes = argtypes
+
+    """
+    Boot the node with nodeid, it sends its boot-up message and enters
+    pre-operational state
+    """
+    def Init(self, nodeid):
+        self.Library.bridge_init(nodeid)
+
+    def SetState(self, state):
+        return self.Library.bridge_set_state(state)
+
+    def GetState(self):
+        return self.Library.bridge_get_state()
+
+#-------------------------------------------------------------------------------
+#                                  Frames
+#-------------------------------------------------------------------------------
+
+    """
+    Give a frame received from the bus to stack
+    """
+    def Dispatch(self, cobid, data = "", rtr = False):
+        self.Library.bridge_dispatch(ctypes.byref(BuildMessage(cobid, data, rtr)))
+
+    """
+    Return an array of messages built from a list of (cobid, data) that can be
+    given to DispatchMany
+    """
+    def BuildMessages(self, frames):
+        messages = (Message * len(frames))()
+        for i, (cobid, data) in enumerate(frames):
+            messages[i] = BuildMessage(cobid, data)
+        return messages
+
+    """
+    Give repeat times all the messages to stack, without going back to Python
+    between them
+    """
+    def DispatchMany(self, messages, repeat = 1):
+        self.Library.bridge_dispatch_many(messages, len(messages), repeat)
+
+    """
+    Return the list of (cobid, data, rtr) of the frames sent by stack since
+    last call
+    """
+    def GetSentFrames(self):
+        frames = []
+        message = Message()
+        while self.Library.bridge_pop_frame(ctypes.byref(message)):
+            frames.append((message.cob_id, ctypes.string_at(message.data, message.len), message.rtr != 0))
+        return frames
+
+    """
+    Set if frames sent by stack are kept for GetSentFrames, they are only
+    counted otherwise
+    """
+    def SetCapture(self, capture):
+        self.Library.bridge_set_capture(capture and 1 or 0)
+
+    """
+    Return the number of frames sent by stack and the number of them dropped
+    because GetSentFrames wasn't called often enough
+    """
+    def GetCounters(self):
+        sent, dropped = ctypes.c_ulong(), ctypes.c_ulong()
+        self.Library.bridge_get_counters(ctypes.byref(sent), ctypes.byref(dropped))
+        return sent.value, dropped.value
+
+#-------------------------------------------------------------------------------
+#                             Object Dictionary
+#-------------------------------------------------------------------------------
+
+    """
+    Return the abort code of reading a subentry in the dictionary of stack,
+    and the data and data type read
+    """
+    def ReadEntry(self, index, subindex, size = 64):
+        while True:
+            databuffer = ctypes.create_string_buffer(size)
+            expected = ctypes.c_uint32(size)
+            datatype = ctypes.c_uint8()
+            code = self.Library.bridge_read(index, subindex, databuffer, ctypes.byref(expected), ctypes.byref(datatype))
+            if code == SDOABT_OUT_OF_MEMORY and expected.value > size:
+                size = expected.value
+            elif code != OD_SUCCESSFUL:
+                return code, None, None
+            else:
+                return code, databuffer.raw[:expected.value], datatype.value
+
+    """
+    Write data in a subentry of the dictionary of stack, return the abort code
+    """
+    def WriteEntry(self, index, subindex, data):
+        databuffer = ctypes.create_string_buffer(data, len(data))
+        expected = ctypes.c_uint32(len(data))
+        return self.Library.bridge_write(index, subindex, databuffer, ctypes.byref(expected))
+
+    """
+    Return the value of a subentry decoded with its type in node, None if it
+    can't be read
+    """
+    def GetValue(self, index, subindex):
+        coding = GetObjectTable(self.Node).GetObject(index, subindex)
+        if not isinstance(coding, TupleType):
+            return None
+        code, data, datatype = self.ReadEntry(index, subindex)
+        if code != OD_SUCCESSFUL:
+            return None
+        return coding[0].Decode(data)
+
+    """
+    Set the value of a subentry encoded with its type in node, return the abort
+    code
+    """
+    def SetValue(self, index, subindex, value):
+        coding = GetObjectTable(self.Node).GetObject(index, subindex)
+        if not isinstance(coding, TupleType):
+            return coding
+        return self.WriteEntry(index, subindex, coding[0].Encode(value))
+
+#-------------------------------------------------------------------------------
+#                                 Timers
+#-------------------------------------------------------------------------------
+
+    """
+    Return the simulated time of stack in us
+    """
+    def GetTime(self):
+        return self.Library.bridge_get_time()
+
+    """
+    Return the date in us of the next timer of stack, None if there isn't any
+    """
+    def GetAlarm(self):
+        alarm = self.Library.bridge_get_alarm()
+        if alarm == TIMEVAL_MAX:
+            return None
+        return alarm
+
+    """
+    Advance the simulated time of stack of duration us, executing the timers
+    expiring meanwhile
+    """
+    def Advance(self, duration):
+        self.Library.bridge_advance(duration)
+
+    def AdvanceTo(self, date):
+        self.Advance(max(date - self.GetTime(), 0))
+
+#-------------------------------------------------------------------------------
+#                                Benchmarks
+#-------------------------------------------------------------------------------
+
+    """
+    Return the mean time in seconds of a scanIndexOD call for indexes
+    """
+    def BenchmarkScan(self, indexes, repeat = 1000):
+        array = (ctypes.c_uint16 * len(indexes))(*indexes)
+        start = time.time()
+        self.Library.bridge_scan(array, len(indexes), repeat)
+        return (time.time() - start) / (len(indexes) * repeat)
+
+    """
+    Return the mean time in seconds of stack processing one of the frames given
+    as a list of (cobid, data). Frames sent by stack are only counted
+    """
+    def BenchmarkDispatch(self, frames, repeat = 1000):
+        messages = self.BuildMessages(frames)
+        self.SetCapture(False)
+        start = time.time()
+        self.DispatchMany(messages, repeat)
+        duration = time.time() - start
+        self.SetCapture(True)
+        return duration / (len(frames) * repeat)
+
+    """
+    Return the mean time in seconds of stack sending its event driven PDOs
+    """
+    def BenchmarkPDOEvent(self, repeat = 1000):
+        self.SetCapture(False)
+        start = time.time()
+        self.Library.bridge_send_pdo_event(repeat)
+        duration = time.time() - start
+        self.SetCapture(True)
+        return duration / repeat
+
+#-------------------------------------------------------------------------------
+#                          Definition of StackEndpoint Object
+#-------------------------------------------------------------------------------
+
+"""
+Endpoint connecting the stack driven by a StackBridge to a VirtualCanBus. The
+clock of stack follows the one of bus, frames it sends are transmitted on bus
+"""
+
+class StackEndpoint(CanEndpoint):
+
+    def __init__(self, bridge, nodeid, name = "", queue_size = 32):
+        CanEndpoint.__init__(self, name, queue_size)
+        self.Bridge = bridge
+        self.NodeID = nodeid
+        self.Alarm = None
+        self.AlarmEvent = None
+
+    def OnAttach(self, bus):
+        self.Synchronize()
+        self.Bridge.Init(self.NodeID)
+        self.Update()
+
+    """
+    Advance the clock of stack to the time of bus
+    """
+    def Synchronize(self):
+        self.Bridge.AdvanceTo(int(round(self.Bus.GetTime() * 1000000)))
+
+    """
+    Transmit the frames sent by stack and schedule its next timer on bus
+    """
+    def Update(self):
+        for cobid, data, rtr in self.Bridge.GetSentFrames():
+            self.Send(cobid, data, rtr = rtr)
+        alarm = self.Bridge.GetAlarm()
+        if alarm != self.Alarm:
+            self.Bus.Cancel(self.AlarmEvent)
+            self.Alarm = alarm
+            if alarm is not None:
+                self.AlarmEvent = self.Bus.ScheduleAt(alarm / 1000000., self.OnAlarm)
+            else:
+                self.AlarmEvent = None
+
+    def OnAlarm(self):
+        self.Alarm = self.AlarmEvent = None
+        self.Synchronize()
+        self.Update()
+
+    def Receive(self, frame):
+        if frame.Extended:
+            return
+        self.Synchronize()
+        self.Bridge.Dispatch(frame.CobID, frame.Data, frame.RTR)
+        self.Update()
+
+#-------------------------------------------------------------------------------
+#                            Node Benchmarks
+#-------------------------------------------------------------------------------
+
+"""
+Return the list of (cobid, data) of expedited upload requests of all the
+readable subentries of node up to 4 bytes, None if node has no SDO server
+"""
+def BuildUploadRequests(node, nodeid):
+    if not node.IsEntry(0x1200):
+        return None
+    table = GetObjectTable(node)
+    cobid = 0x600 + nodeid
+    frames = []
+    for index in node.GetIndexes():
+        values = node.GetEntry(index, compute = False)
+        if isinstance(values, ListType):
+            subindexes = range(len(values))
+        else:
+            subindexes = [0]
+        for subindex in subindexes:
+            result = table.GetObject(index, subindex)
+            if isinstance(result, TupleType):
+                coding, readable, writable = result
+                if readable and coding.Size is not None and coding.Size <= 4:
+                    frames.append((cobid, "\x40%c%c%c\x00\x00\x00\x00"%(index & 0xFF, index >> 8, subindex)))
+    return frames
+
+"""
+Return the list of (cobid, data) of the RPDOs of node
+"""
+def BuildRPDOFrames(node):
+    frames = []
+    for cobid, layout in pdocodec.CompileNodePdos(node, False).iteritems():
+        frames.append((cobid, "\x00" * layout.GetLength()))
+    frames.sort()
+    return frames
+
+"""
+Build node with stack and return the mean time in seconds of scanIndexOD calls,
+SDO expedited uploads, RPDOs and SYNC processings. Benchmarks impossible with
+node are None
+"""
+def BenchmarkNode(node, build_dir, split = False, nodeid = 1, repeat = 1000, config = {}, cflags = ["-O2"]):
+    bridge = StackBridge(BuildStackLibrary(node, build_dir, split, config, cflags), node)
+    bridge.Init(nodeid)
+    bridge.GetSentFrames()
+    results = {}
+    indexes = node.GetIndexes()
+    results["scanIndexOD"] = bridge.BenchmarkScan(indexes, repeat)
+    requests = BuildUploadRequests(node, nodeid)
+    if requests:
+        results["sdo"] = bridge.BenchmarkDispatch(requests, max(1, repeat / 10))
+    else:
+        results["sdo"] = None
+    bridge.SetState(STATE_OPERATIONAL)
+    bridge.GetSentFrames()
+    frames = BuildRPDOFrames(node)
+    if frames:
+        results["rpdo"] = bridge.BenchmarkDispatch(frames, repeat)
+    else:
+        results["rpdo"] = None
+    results["sync"] = bridge.BenchmarkDispatch([(0x080, "")], repeat)
+    return results
+
+BENCHMARK_NAMES = ["scanIndexOD", "sdo", "rpdo", "sync"]
+
+def usage():
+    print _("\nUsage of cbridge.py :")
+    print "\n   %s [options] NodeFile\n"%sys.argv[0]
+    print _("   NodeFile : object dictionary file (.od) of the node")
+    print _("   -b, --build : folder where the libraries are built (default build_bridge)")
+    print _("   -i, --nodeid : node ID of the node (default 1)")
+    print _("   -r, --repeat : number of repetitions of each benchmark (default 1000)\n")
+
+if __name__ == '__main__':
+    import getopt, __builtin__
+    # Loading a node needs translation function in other modules too
+    __builtin__.__dict__['_'] = lambda x: x
+
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "hb:i:r:", ["help", "build=", "nodeid=", "repeat="])
+    except getopt.GetoptError:
+        usage()
+        sys.exit(2)
+    if len(args) != 1:
+        usage()
+        sys.exit()
+
+    build_dir = "build_bridge"
+    nodeid = 1
+    repeat = 1000
+    for o, a in opts:
+        if o in ("-h", "--help"):
+            usage()
+            sys.exit()
+        elif o in ("-b", "--build"):
+            build_dir = a
+        elif o in ("-i", "--nodeid"):
+            nodeid = int(a, 0)
+        elif o in ("-r", "--repeat"):
+            repeat = int(a)
+
+    from nodemanager import NodeManager
+    manager = NodeManager()
+    result = manager.OpenFileInCurrent(args[0])
+    if isinstance(result, (StringType, UnicodeType)):
+        print result
+        sys.exit(-1)
+    node = manager.GetCurrentNodeCopy()
+    results = {}
+    for split in [False, True]:
+        try:
+            results[split] = BenchmarkNode(node, build_dir, split, nodeid, repeat)
+        except ValueError, message:
+            print message
+            sys.exit(-1)
+    print "%-12s %14s %14s"%("", _("single file"), _("split"))
+    for name in BENCHMARK_NAMES:
+        print "%-12s %s"%(name, " ".join([results[split][name] is None and "%14s"%"-" or "%11.3f us"%(results[split][name] * 1000000) for split in [False, True]]))
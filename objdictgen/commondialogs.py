@@ -26,7 +26,7 @@ import wx.grid
 
 import os
 
-from node import BE_to_LE, LE_to_BE
+from concisedcf import ConciseDCF, EncodeConciseDCF
 
 ScriptDirectory = os.path.split(__file__)[0]
 
@@ -1564,28 +1564,13 @@ class DCFEntryValuesDialog(wx.Dialog):
     def SetValues(self, values):
         self.Values = []
         if values != "":
-            data = values[4:]
-            current = 0
-            for i in xrange(BE_to_LE(values[:4])):
-                value = {}
-                value["Index"] = BE_to_LE(data[current:current+2])
-                value["Subindex"] = BE_to_LE(data[current+2:current+3])
-                size = BE_to_LE(data[current+3:current+7])
-                value["Size"] = size
-                value["Value"] = BE_to_LE(data[current+7:current+7+size])
-                current += 7 + size
-                self.Values.append(value)
+            for index, subindex, size, value in ConciseDCF(values).GetParameters():
+                self.Values.append({"Index" : index, "Subindex" : subindex, "Size" : size, "Value" : value})
         self.RefreshValues()
     
     def GetValues(self):
         if len(self.Values) > 0:
-            value = LE_to_BE(len(self.Values), 4)
-            for row in self.Values:
-                value += LE_to_BE(row["Index"], 2)
-                value += LE_to_BE(row["Subindex"], 1)
-                value += LE_to_BE(row["Size"], 4)
-                value += LE_to_BE(row["Value"], row["Size"])
-            return value
+            return EncodeConciseDCF([(row["Index"], row["Subindex"], row["Size"], row["Value"]) for row in self.Values])
         return ""
     
     def RefreshValues(self):
@@ -0,0 +1,313 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+from types import *
+import struct
+from endianness import LittleEndianToInt, LittleEndianToIntFrom, IntToLittleEndian, MixedToLittleEndian
+
+#-------------------------------------------------------------------------------
+#                          Concise DCF Encoding
+#-------------------------------------------------------------------------------
+
+# A concise DCF is the number of parameters followed by the parameters, each one
+# being index, subindex, data size and data, all in little endian
+COUNT_FORMAT = "<I"
+COUNT_SIZE = struct.calcsize(COUNT_FORMAT)
+HEADER_FORMAT = "<HBI"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+"""
+Return the data of a parameter of the size given. Integers are converted in
+little endian (negative values in two's complement), strings are truncated or
+padded with null characters
+"""
+def EncodeData(value, size):
+    if isinstance(value, StringTypes):
+        return str(value)[:size].ljust(size, "\x00")
+    return IntToLittleEndian(value, size)
+
+"""
+Return the integer value of the little endian data given
+"""
+def DecodeData(data):
+    return LittleEndianToInt(data)
+
+"""
+Return a parameter of a concise DCF
+"""
+def EncodeRecord(index, subindex, size, value):
+    return EncodeRecords([(index, subindex, size, value)])
+
+"""
+Return the parameters given, a list of (index, subindex, size, value), as they
+are stored in a concise DCF. All the integers are converted at once
+"""
+def EncodeRecords(records):
+    parts = []
+    values = []
+    for index, subindex, size, value in records:
+        values.extend([(index, 2), (subindex, 1), (size, 4)])
+        if isinstance(value, StringTypes):
+            parts.append(MixedToLittleEndian(values))
+            parts.append(EncodeData(value, size))
+            values = []
+        else:
+            values.append((value, size))
+    parts.append(MixedToLittleEndian(values))
+    return "".join(parts)
+
+"""
+Return a concise DCF containing the parameters given, a list of
+(index, subindex, size, value)
+"""
+def EncodeConciseDCF(records):
+    return struct.pack(COUNT_FORMAT, len(records)) + EncodeRecords(records)
+
+"""
+Return the number of parameters of a concise DCF
+"""
+def GetRecordsNumber(dcf):
+    if len(dcf) < COUNT_SIZE:
+        return 0
+    return struct.unpack_from(COUNT_FORMAT, dcf)[0]
+
+"""
+Return the parameters of a concise DCF as a list of (index, subindex, size, value)
+"""
+def DecodeConciseDCF(dcf):
+    records = []
+    offset = COUNT_SIZE
+    for i in xrange(GetRecordsNumber(dcf)):
+        index, subindex, size = struct.unpack_from(HEADER_FORMAT, dcf, offset)
+        offset += HEADER_SIZE
+        records.append((index, subindex, size, DecodeData(dcf[offset:offset + size])))
+        offset += size
+    return records
+
+"""
+Return a concise DCF with the parameters given added at its end, without decoding
+the parameters already defined
+"""
+def ExtendConciseDCF(dcf, records):
+    return struct.pack(COUNT_FORMAT, GetRecordsNumber(dcf) + len(records)) + dcf[COUNT_SIZE:] + EncodeRecords(records)
+
+"""
+Return a concise DCF with a parameter added at its end
+"""
+def AppendRecord(dcf, index, subindex, size, value):
+    return ExtendConciseDCF(dcf, [(index, subindex, size, value)])
+
+#-------------------------------------------------------------------------------
+#                          Definition of DCFBuilder Object
+#-------------------------------------------------------------------------------
+
+"""
+Class accumulating the parameters to download into several nodes and building
+all their concise DCF in one pass. Parameters are kept in the order they are
+added since the order of a DCF matters (e.g. a PDO must be disabled before its
+mapping is modified)
+"""
+
+class DCFBuilder:
+
+    def __init__(self):
+        # For each node ID, list of (index, subindex, size, value)
+        self.Records = {}
+
+    def Add(self, nodeid, index, subindex, size, value):
+        self.Records.setdefault(nodeid, []).append((index, subindex, size, value))
+
+    """
+    Add a list of (nodeid, index, subindex, size, value)
+    """
+    def AddRecords(self, records):
+        for record in records:
+            self.Add(*record)
+
+    """
+    Add the parameters of an existing concise DCF of a node
+    """
+    def AddConciseDCF(self, nodeid, dcf):
+        for index, subindex, size, value in DecodeConciseDCF(dcf):
+            self.Add(nodeid, index, subindex, size, value)
+
+    def GetNodeIDs(self):
+        nodeids = self.Records.keys()
+        nodeids.sort()
+        return nodeids
+
+    def GetRecords(self, nodeid):
+        return self.Records.get(nodeid, [])[:]
+
+    def IsEmpty(self):
+        return len(self.Records) == 0
+
+    """
+    Return the concise DCF of each node as a dictionary {nodeid : dcf}. If
+    existing DCFs are given, parameters are added at the end of them, or replace
+    the parameters already defined with the same index and subindex if replace
+    is True
+    """
+    def Encode(self, existing = {}, replace = False):
+        result = {}
+        for nodeid, records in self.Records.iteritems():
+            if replace:
+                dcf = ConciseDCF(existing.get(nodeid, ""))
+                for index, subindex, size, value in records:
+                    dcf.SetValue(index, subindex, value, size)
+                result[nodeid] = dcf.GetString()
+            else:
+                result[nodeid] = ExtendConciseDCF(existing.get(nodeid, ""), records)
+        return result
+
+#-------------------------------------------------------------------------------
+#                          Definition of ConciseDCF Object
+#-------------------------------------------------------------------------------
+
+"""
+Class giving random access to the parameters of a concise DCF. The DCF is
+indexed without copying it, values are read directly in the DCF data and a
+parameter keeping the same size is modified in place. The data is only copied
+the first time it's modified, and moved only when a parameter size changes or
+a parameter is added.
+"""
+
+class ConciseDCF:
+
+    def __init__(self, dcf = ""):
+        if isinstance(dcf, StringTypes):
+            dcf = str(dcf)
+        self.Buffer = dcf
+        # List of [index, subindex, size, data offset] for each parameter
+        self.Records = []
+        # Positions in records of each (index, subindex), a parameter can be
+        # defined several times, the last one being the one really applied
+        self.Positions = {}
+        self.BuildIndex()
+
+    def BuildIndex(self):
+        self.Records = []
+        self.Positions = {}
+        length = len(self.Buffer)
+        if length == 0:
+            return
+        if length < COUNT_SIZE:
+            raise ValueError, "Concise DCF is too short"
+        offset = COUNT_SIZE
+        for position in xrange(struct.unpack_from(COUNT_FORMAT, self.Buffer)[0]):
+            if offset + HEADER_SIZE > length:
+                raise ValueError, "Concise DCF is truncated at parameter %d"%(position + 1)
+            index, subindex, size = struct.unpack_from(HEADER_FORMAT, self.Buffer, offset)
+            offset += HEADER_SIZE
+            if offset + size > length:
+                raise ValueError, "Concise DCF is truncated at parameter %d"%(position + 1)
+            self.Records.append([index, subindex, size, offset])
+            self.Positions.setdefault((index, subindex), []).append(position)
+            offset += size
+
+    def __len__(self):
+        return len(self.Records)
+
+    def HasParameter(self, index, subindex):
+        return (index, subindex) in self.Positions
+
+    def GetParameterRecord(self, index, subindex):
+        positions = self.Positions.get((index, subindex), None)
+        if positions is None:
+            return None
+        return self.Records[positions[-1]]
+
+    """
+    Return the size of a parameter, None if not defined
+    """
+    def GetSize(self, index, subindex):
+        record = self.GetParameterRecord(index, subindex)
+        if record is None:
+            return None
+        return record[2]
+
+    """
+    Return a read only view on the data of a parameter, None if not defined.
+    DCF can't be resized while the view exists
+    """
+    def GetData(self, index, subindex):
+        record = self.GetParameterRecord(index, subindex)
+        if record is None:
+            return None
+        return memoryview(self.Buffer)[record[3]:record[3] + record[2]]
+
+    """
+    Return the integer value of a parameter, None if not defined
+    """
+    def GetValue(self, index, subindex):
+        record = self.GetParameterRecord(index, subindex)
+        if record is None:
+            return None
+        if isinstance(self.Buffer, StringType):
+            return DecodeData(self.Buffer[record[3]:record[3] + record[2]])
+        return LittleEndianToIntFrom(self.Buffer, record[3], record[2])
+
+    """
+    Return the list of (index, subindex, size, value) of all the parameters
+    """
+    def GetParameters(self):
+        return [(index, subindex, size, DecodeData(str(self.Buffer[offset:offset + size])))
+                for index, subindex, size, offset in self.Records]
+
+    def MakeWritable(self):
+        if not isinstance(self.Buffer, bytearray):
+            self.Buffer = bytearray(self.Buffer)
+            if len(self.Buffer) == 0:
+                self.Buffer.extend(struct.pack(COUNT_FORMAT, 0))
+
+    """
+    Set the value of a parameter. Parameter is modified in place if size isn't
+    given or doesn't change, it's added at the end of the DCF if not defined
+    """
+    def SetValue(self, index, subindex, value, size = None):
+        record = self.GetParameterRecord(index, subindex)
+        self.MakeWritable()
+        if record is None:
+            if size is None:
+                raise ValueError, "Size of new parameter 0x%4.4X sub 0x%2.2X must be given"%(index, subindex)
+            position = len(self.Records)
+            self.Buffer.extend(EncodeRecord(index, subindex, size, value))
+            self.Records.append([index, subindex, size, len(self.Buffer) - size])
+            self.Positions.setdefault((index, subindex), []).append(position)
+            struct.pack_into(COUNT_FORMAT, self.Buffer, 0, len(self.Records))
+        elif size is None or size == record[2]:
+            self.Buffer[record[3]:record[3] + record[2]] = EncodeData(value, record[2])
+        else:
+            # Parameter is encoded again and following parameters are moved
+            start = record[3] - HEADER_SIZE
+            self.Buffer[start:record[3] + record[2]] = EncodeRecord(index, subindex, size, value)
+            delta = size - record[2]
+            record[2] = size
+            for following in self.Records[self.Records.index(record) + 1:]:
+                following[3] += delta
+
+    """
+    Return the concise DCF as a string
+    """
+    def GetString(self):
+        return str(self.Buffer)
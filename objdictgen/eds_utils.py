@@ -22,8 +22,9 @@
 #Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
 
 
-import node
+import node, profiles
 from node import nosub, var, array, rec, plurivar, pluriarray, plurirec
+from odtypes import CUSTOM_TYPES_MIN, CUSTOM_TYPES_MAX
 try:
     set
 except NameError:
@@ -125,7 +126,7 @@ def GetDefaultValue(Node, index, subIndex = None):
 # an EDS file
 SECTION_KEYNAMES = ["FILEINFO", "DEVICEINFO", "DUMMYUSAGE", "COMMENTS", 
                     "MANDATORYOBJECTS", "OPTIONALOBJECTS", "MANUFACTUREROBJECTS",
-                    "STANDARDDATATYPES", "SUPPORTEDMODULES"]
+                    "STANDARDDATATYPES", "SUPPORTEDMODULES", "DEVICECOMISSIONING"]
 
 
 # Function that extract sections from a file and returns a dictionary of the informations
@@ -252,14 +253,17 @@ def ParseCPJFile(filepath):
 # Function that parse an EDS file and returns a dictionary of the informations
 def ParseEDSFile(filepath):
     eds_dict = {}
+    # Entries which values have to be verified once all types are known
+    verifications = []
     # Read file text
     eds_file = open(filepath,'r').read()
     sections = ExtractSections(eds_file)
     
     # Parse assignments for each section
     for section_name, assignments in sections:
-        # Reset values of entry
+        # Reset values of entry and their text in file
         values = {}
+        texts = {}
         
         # Search if the section name match an index or subindex expression
         index_result = index_model.match(section_name.upper())
@@ -360,6 +364,7 @@ def ParseEDSFile(filepath):
                                 raise SyntaxError, _("Invalid value \"%s\" for keyname \"%s\" of section \"[%s]\"")%(value, keyname, section_name)
                             else:
                                 values[keyname.upper()] = computed_value
+                                texts[keyname.upper()] = value
                         else:
                             values[keyname.upper()] = computed_value
             # All lines that are not empty and are neither a comment neither not a valid assignment
@@ -394,19 +399,34 @@ def ParseEDSFile(filepath):
                     attributes = _("Attribute \"%s\" is")%unsupported.pop()
                 raise SyntaxError, _("Error on section \"[%s]\":\n%s unsupported for a %s entry")%(section_name, attributes, ENTRY_TYPES[values["OBJECTTYPE"]]["name"])
             
-            VerifyValue(values, section_name, "ParameterValue")
-            VerifyValue(values, section_name, "DefaultValue")
-            
+            verifications.append((values, section_name, texts))
+    
+    for values, section_name, texts in verifications:
+        datatype = GetBaseDataType(eds_dict, values.get("DATATYPE"))
+        VerifyValue(values, section_name, "ParameterValue", texts, datatype)
+        VerifyValue(values, section_name, "DefaultValue", texts, datatype)
+    
     return eds_dict
 
-def VerifyValue(values, section_name, param):
+# Function that gives the standard data type a user defined type is based on,
+# user types being records giving it in their first subindex
+def GetBaseDataType(eds_dict, datatype):
+    if CUSTOM_TYPES_MIN <= datatype <= CUSTOM_TYPES_MAX and datatype in eds_dict:
+        return eds_dict[datatype]["subindexes"].get(1, {}).get("DEFAULTVALUE", datatype)
+    return datatype
+
+def VerifyValue(values, section_name, param, texts = {}, datatype = None):
     if param.upper() in values:
         try:
-            if values["DATATYPE"] in (0x09, 0x0A, 0x0B, 0x0F):
+            if datatype is None:
+                datatype = values["DATATYPE"]
+            if datatype == 0x0F and texts.get(param.upper(), "").startswith("0x"):
+                values[param.upper()] = ParseDomainValueText(texts[param.upper()])
+            elif datatype in (0x09, 0x0A, 0x0B, 0x0F):
                 values[param.upper()] = str(values[param.upper()])
-            elif values["DATATYPE"] in (0x08, 0x11):
+            elif datatype in (0x08, 0x11):
                 values[param.upper()] = float(values[param.upper()])
-            elif values["DATATYPE"] == 0x01:
+            elif datatype == 0x01:
                 values[param.upper()] = {0 : False, 1 : True}[values[param.upper()]]
             else:
                 if not isinstance(values[param.upper()], (IntType, LongType)) and values[param.upper()].upper().find("$NODEID") == -1:
@@ -415,6 +435,13 @@ def VerifyValue(values, section_name, param):
             raise SyntaxError, _("Error on section \"[%s]\":\n%s incompatible with DataType")%(section_name, param)
 
 
+# Function that decodes the text of a DOMAIN value written in hexadecimal
+def ParseDomainValueText(text):
+    digits = text[2:]
+    if len(digits) % 2 != 0:
+        raise ValueError, "Odd number of hexadecimal digits"
+    return "".join([chr(int(digits[i:i + 2], 16)) for i in xrange(0, len(digits), 2)])
+
 # Function that write an EDS file after generate it's content
 def WriteFile(filepath, content):
     # Open file in write mode
@@ -425,8 +452,9 @@ def WriteFile(filepath, content):
     cfile.close()
 
 
-# Function that generate the EDS file content for the current node in the manager
-def GenerateFileContent(Node, filepath):
+# Function that generate the EDS file content for the current node in the manager.
+# If dcf is True, a DCF is generated with the values computed for the node ID
+def GenerateFileContent(Node, filepath, dcf = False):
     # Dictionary of each index contents
     indexContents = {}
     
@@ -496,6 +524,12 @@ def GenerateFileContent(Node, filepath):
     # LSS not supported as soon as DS-302 was not fully implemented
     fileContent += "LSS_Supported=0\n"
     
+    # Generate DeviceComissioning section with the node ID values are computed for
+    if dcf:
+        fileContent += "\n[DeviceComissioning]\n"
+        fileContent += "NodeID=0x%2.2X\n"%nodeid
+        fileContent += "NodeName=%s\n"%nodename
+    
     # Generate Dummy Usage section
     fileContent += "\n[DummyUsage]\n"
     fileContent += "Dummy0001=0\n"
@@ -528,6 +562,8 @@ def GenerateFileContent(Node, filepath):
         # Extract infos and values for the entry
         entry_infos = Node.GetEntryInfos(entry)
         values = Node.GetEntry(entry, compute = False)
+        if dcf:
+            parameters = Node.GetEntry(entry)
         # Define section name
         text = "\n[%X]\n"%entry
         # If there is only one value, it's a VAR entry
@@ -541,8 +577,12 @@ def GenerateFileContent(Node, filepath):
             text += "AccessType=%s\n"%subentry_infos["access"]
             if subentry_infos["type"] == 1:
                 text += "DefaultValue=%s\n"%BOOL_TRANSLATE[values]
+            elif subentry_infos["type"] == 0x0F:
+                text += "DefaultValue=%s\n"%GetDomainValueText(values)
             else:
                 text += "DefaultValue=%s\n"%values
+            if dcf:
+                text += "ParameterValue=%s\n"%GetParameterValueText(subentry_infos["type"], parameters)
             text += "PDOMapping=%s\n"%BOOL_TRANSLATE[subentry_infos["pdo"]]
         else:
             # Generate EDS informations for the entry
@@ -568,8 +608,12 @@ def GenerateFileContent(Node, filepath):
                     subtext += "AccessType=%s\n"%subentry_infos["access"]
                     if subentry_infos["type"] == 1:
                         subtext += "DefaultValue=%s\n"%BOOL_TRANSLATE[value]
+                    elif subentry_infos["type"] == 0x0F:
+                        subtext += "DefaultValue=%s\n"%GetDomainValueText(value)
                     else:
                         subtext += "DefaultValue=%s\n"%value
+                    if dcf:
+                        subtext += "ParameterValue=%s\n"%GetParameterValueText(subentry_infos["type"], parameters[subentry])
                     subtext += "PDOMapping=%s\n"%BOOL_TRANSLATE[subentry_infos["pdo"]]
                     # Increment number of subindex defined 
                     nb_subentry += 1
@@ -628,6 +672,35 @@ def GenerateFileContent(Node, filepath):
     return fileContent
 
 
+# Function that gives the text of a value computed for a DCF
+def GetParameterValueText(typeindex, value):
+    if typeindex == 1:
+        return BOOL_TRANSLATE[value]
+    elif typeindex == 0x0F:
+        return GetDomainValueText(value)
+    elif isinstance(value, (IntType, LongType)):
+        return "0x%X"%value
+    return value
+
+# Function that gives the text of a DOMAIN value, written in hexadecimal when
+# its content wouldn't be read back as the same text
+def GetDomainValueText(value):
+    if value == "" or value == value.strip() and value[0] not in "-0123456789$" and \
+       min([32 <= ord(char) < 127 for char in value]):
+        return value
+    return "0x" + "".join(["%2.2X"%ord(char) for char in value])
+
+# Function that generates DCF file from a node, values being computed for its node ID
+def GenerateDCFFile(filepath, node):
+    try:
+        # Generate file content
+        content = GenerateFileContent(node, filepath, True)
+        # Write file
+        WriteFile(filepath, content)
+        return None
+    except ValueError, message:
+        return _("Unable to generate DCF file\n%s")%message
+
 # Function that generates EDS file from current node edited
 def GenerateEDSFile(filepath, node):
     try:
@@ -674,10 +747,10 @@ def GenerateNode(filepath, nodeID = 0):
             if os.path.isfile(ProfilePath):
                 try:
                     # Load Profile
-                    execfile(ProfilePath)
+                    Mapping, AddMenuEntries = profiles.LoadProfile(ProfilePath)
                     Node.SetProfileName(ProfileName)
                     Node.SetProfile(Mapping)
-                    Node.SetSpecificMenu(AddMenuEntries)
+                    Node.SetSpecificMenu(profiles.CopyMenuEntries(AddMenuEntries))
                 except:
                     pass
         # Read all entries in the EDS dictionary 
@@ -708,8 +781,13 @@ def GenerateNode(filepath, nodeID = 0):
                     elif values["OBJECTTYPE"] in [8, 9]:
                         # Extract maximum subindex number defined
                         max_subindex = max(values["subindexes"].keys())
-                        # Add mapping for entry
-                        Node.AddMappingEntry(entry, name = values["PARAMETERNAME"], struct = 3)
+                        # Add mapping for entry, user defined types giving the
+                        # default value of their base type
+                        if CUSTOM_TYPES_MIN <= entry <= CUSTOM_TYPES_MAX:
+                            default = Node.GetTypeDefaultValue(GetBaseDataType(eds_dict, entry))
+                            Node.AddMappingEntry(entry, name = values["PARAMETERNAME"], struct = 3, default = default)
+                        else:
+                            Node.AddMappingEntry(entry, name = values["PARAMETERNAME"], struct = 3)
                         # Add mapping for first subindex
                         Node.AddMappingEntry(entry, 0, values = {"name" : "Number of Entries", "type" : 0x05, "access" : "ro", "pdo" : False})
                         # Add mapping for other subindexes
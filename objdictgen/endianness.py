@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+from types import *
+import struct, binascii
+
+#-------------------------------------------------------------------------------
+#                        Little Endian Conversion
+#-------------------------------------------------------------------------------
+
+# Formats of the unsigned integer sizes that struct can convert directly
+UNSIGNED_FORMATS = {1 : "B", 2 : "H", 4 : "I", 8 : "Q"}
+
+"""
+Return the integer value of little endian data (string or buffer)
+"""
+def LittleEndianToInt(data):
+    format = UNSIGNED_FORMATS.get(len(data), None)
+    if format is not None:
+        return struct.unpack("<" + format, data)[0]
+    if len(data) == 0:
+        return 0
+    return int(binascii.hexlify(str(data)[::-1]), 16)
+
+"""
+Return the integer value of the little endian data of the size given at offset
+in a buffer, without copying it
+"""
+def LittleEndianToIntFrom(buffer, offset, size):
+    format = UNSIGNED_FORMATS.get(size, None)
+    if format is not None:
+        return struct.unpack_from("<" + format, buffer, offset)[0]
+    return LittleEndianToInt(str(buffer[offset:offset + size]))
+
+"""
+Return the little endian data of the size given for an integer value. Values
+that don't fit in size are truncated, negative values are given in two's
+complement
+"""
+def IntToLittleEndian(value, size):
+    value &= (1L << (8 * size)) - 1
+    format = UNSIGNED_FORMATS.get(size, None)
+    if format is not None:
+        return struct.pack("<" + format, value)
+    if size == 0:
+        return ""
+    return binascii.unhexlify("%0*X"%(size * 2, value))[::-1]
+
+#-------------------------------------------------------------------------------
+#                        Batch Little Endian Conversion
+#-------------------------------------------------------------------------------
+
+"""
+Return the list of the integer values of an array of little endian elements of
+the size given. If count isn't given, the whole data is converted
+"""
+def LittleEndianArrayToInts(data, size, count = None, offset = 0):
+    if count is None:
+        count = (len(data) - offset) / size
+    format = UNSIGNED_FORMATS.get(size, None)
+    if format is not None:
+        return list(struct.unpack_from("<%d%s"%(count, format), data, offset))
+    return [LittleEndianToInt(str(data[start:start + size]))
+            for start in xrange(offset, offset + count * size, size)]
+
+"""
+Return the little endian data of an array of integer values of the size given
+"""
+def IntsToLittleEndianArray(values, size):
+    format = UNSIGNED_FORMATS.get(size, None)
+    if format is not None:
+        mask = (1L << (8 * size)) - 1
+        return struct.pack("<%d%s"%(len(values), format), *[value & mask for value in values])
+    return "".join([IntToLittleEndian(value, size) for value in values])
+
+"""
+Return the little endian data of a list of values of different sizes, given as
+a list of (value, size)
+"""
+def MixedToLittleEndian(values):
+    format = "<"
+    args = []
+    parts = []
+    for value, size in values:
+        if size in UNSIGNED_FORMATS:
+            format += UNSIGNED_FORMATS[size]
+            args.append(value & ((1L << (8 * size)) - 1))
+        else:
+            # Sizes not supported by struct are converted separately
+            if len(args) > 0:
+                parts.append(struct.pack(format, *args))
+                format, args = "<", []
+            parts.append(IntToLittleEndian(value, size))
+    if len(args) > 0:
+        parts.append(struct.pack(format, *args))
+    return "".join(parts)
@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+from gnosis.xml.pickle import *
+from gnosis.xml.pickle.util import setParanoia
+setParanoia(0)
+
+from node import *
+import eds_utils, gen_cfile
+
+from types import *
+import os, sys
+
+#-------------------------------------------------------------------------------
+#                          Node Variants Definition
+#-------------------------------------------------------------------------------
+
+# Outputs that can be generated for each variant with their file extension
+Outputs = {"c" : ".c", "eds" : ".eds", "dcf" : ".dcf"}
+
+# Default name of the files of a variant, extension being added
+DEFAULT_NAME_FORMAT = "%(name)s_%(nodeid)02X"
+
+"""
+Return the node defined in an .od or an EDS file, or an error message
+"""
+def LoadNodeFile(filepath):
+    if not os.path.isfile(filepath):
+        return _("%s is not a valid file!")%filepath
+    if os.path.splitext(filepath)[1].lower() == ".eds":
+        return eds_utils.GenerateNode(filepath)
+    try:
+        file = open(filepath, "r")
+        node = load(file)
+        file.close()
+        node.ResolveProfiles()
+        return node
+    except:
+        return _("Unable to load file \"%s\"!")%filepath
+
+"""
+Return the list of node IDs described by a text like "1-10,0x20,0x30-0x3F", or
+an error message
+"""
+def ParseNodeIDs(text):
+    nodeids = []
+    for part in text.split(","):
+        try:
+            bounds = [int(bound, 0) for bound in part.split("-")]
+        except ValueError:
+            return _("Invalid node ID \"%s\"")%part
+        if len(bounds) == 1:
+            bounds.append(bounds[0])
+        elif len(bounds) != 2:
+            return _("Invalid node ID range \"%s\"")%part
+        for nodeid in xrange(bounds[0], bounds[1] + 1):
+            if not 0 < nodeid <= 127:
+                return _("Node ID 0x%2.2X is out of range")%nodeid
+            if nodeid not in nodeids:
+                nodeids.append(nodeid)
+    return nodeids
+
+"""
+Return the overrides {nodeid : {(index, subindex) : value}} with the override
+described by a text like "NODEIDS:INDEX:SUBINDEX=VALUE" added, or an error
+message. NODEIDS is like in ParseNodeIDs or "*" for all nodes, value is a number
+or a $NODEID formula
+"""
+def ParseOverride(text, nodeids, overrides = {}):
+    result = dict([(nodeid, values.copy()) for nodeid, values in overrides.iteritems()])
+    try:
+        target, value = text.split("=", 1)
+        ids, index, subindex = target.split(":")
+        index, subindex = int(index, 16), int(subindex, 16)
+    except ValueError:
+        return _("Invalid parameter override \"%s\"")%text
+    value = value.strip()
+    if value.upper().startswith("$NODEID"):
+        value = "\"%s\""%value
+    else:
+        try:
+            value = int(value, 0)
+        except ValueError:
+            pass
+    if ids == "*":
+        ids = nodeids
+    else:
+        ids = ParseNodeIDs(ids)
+        if isinstance(ids, (StringType, UnicodeType)):
+            return ids
+    for nodeid in ids:
+        result.setdefault(nodeid, {})[(index, subindex)] = value
+    return result
+
+"""
+Return the variant of a node for a node ID, with the values given in overrides
+{(index, subindex) : value}, or an error message. Variant shares the entries of
+the node, only the values depending on node ID are computed for the variant
+"""
+def GetNodeVariant(node, nodeid, overrides = {}):
+    variant = NodeOverlay(node, nodeid)
+    for (index, subindex), value in overrides.iteritems():
+        if not variant.SetEntry(index, subindex, value):
+            return _("Node has no entry 0x%4.4X sub 0x%2.2X")%(index, subindex)
+    return variant
+
+#-------------------------------------------------------------------------------
+#                          Node Variants Generation
+#-------------------------------------------------------------------------------
+
+"""
+Generate the files of the variant of a node for a node ID. Return the list of
+files generated, or an error message
+"""
+def GenerateVariantFiles(node, nodeid, folder, outputs = ["c"], overrides = {}, name_format = DEFAULT_NAME_FORMAT, split = False):
+    variant = GetNodeVariant(node, nodeid, overrides)
+    if isinstance(variant, (StringType, UnicodeType)):
+        return _("Node 0x%2.2X: %s")%(nodeid, variant)
+    basename = os.path.join(folder, name_format%{"name" : node.GetNodeName(), "nodeid" : nodeid})
+    files = []
+    for output in outputs:
+        filepath = basename + Outputs[output]
+        if output == "c":
+            result = gen_cfile.GenerateFile(filepath, variant, split = split)
+        elif output == "eds":
+            result = eds_utils.GenerateEDSFile(filepath, variant)
+        else:
+            result = eds_utils.GenerateDCFFile(filepath, variant)
+        if result is not None:
+            return _("Node 0x%2.2X: %s")%(nodeid, result)
+        files.append(filepath)
+    return files
+
+# Node and options shared by the variants generated in a process
+FleetArguments = None
+
+"""
+Define the node and options of the variants generated in the current process.
+Used as initializer of the generation processes, so that they get the node
+without relying on the module state inherited from this one
+"""
+def InitFleetProcess(arguments):
+    global FleetArguments
+    import __builtin__
+    # Processes that aren't forked don't have translation function
+    if "_" not in __builtin__.__dict__:
+        __builtin__.__dict__['_'] = lambda x: x
+    FleetArguments = arguments
+
+def GenerateFleetVariant(nodeid):
+    node, folder, outputs, overrides, name_format, split = FleetArguments
+    return GenerateVariantFiles(node, nodeid, folder, outputs, overrides.get(nodeid, {}), name_format, split)
+
+"""
+Generate the files of the variants of a node for every node ID given, in jobs
+processes in parallel. Node is loaded only once and shared by all the
+variants. Return the dictionary {nodeid : list of files or error message}
+"""
+def GenerateFleet(node, nodeids, folder, outputs = ["c"], overrides = {}, name_format = DEFAULT_NAME_FORMAT, split = False, jobs = 1):
+    for output in outputs:
+        if output not in Outputs:
+            raise ValueError, "Unknown output \"%s\""%output
+    arguments = (node, folder, outputs, overrides, name_format, split)
+    if jobs > 1 and len(nodeids) > 1:
+        # C generator uses module globals, variants are generated in separate
+        # processes that get the node loaded in this one
+        import multiprocessing
+        pool = multiprocessing.Pool(min(jobs, len(nodeids)), InitFleetProcess, (arguments,))
+        try:
+            results = pool.map(GenerateFleetVariant, nodeids)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        InitFleetProcess(arguments)
+        try:
+            results = map(GenerateFleetVariant, nodeids)
+        finally:
+            InitFleetProcess(None)
+    return dict(zip(nodeids, results))
+
+#-------------------------------------------------------------------------------
+#                              Command Line
+#-------------------------------------------------------------------------------
+
+def usage():
+    print _("\nUsage of fleet.py :")
+    print "\n   %s [options] InputFile OutputFolder NodeIDs\n"%sys.argv[0]
+    print _("   InputFile : .od or .eds file of the node")
+    print _("   NodeIDs : node IDs of the variants, e.g. 1-10,0x20")
+    print _("   -o, --output : outputs to generate, among c, eds and dcf (default c)")
+    print _("   -p, --param NODEIDS:INDEX:SUBINDEX=VALUE : override a value for some nodes (* for all)")
+    print _("   -n, --name : name of the files of a variant (default %s)")%DEFAULT_NAME_FORMAT
+    print _("   -s, --split : split the Object Dictionary into several C files")
+    print _("   -j, --jobs : number of variants generated in parallel\n")
+
+if __name__ == '__main__':
+    import getopt, __builtin__
+    # Loading and generating nodes needs translation function in other modules too
+    __builtin__.__dict__['_'] = lambda x: x
+
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "ho:p:n:sj:", ["help", "output=", "param=", "name=", "split", "jobs="])
+    except getopt.GetoptError:
+        usage()
+        sys.exit(2)
+    if len(args) != 3:
+        usage()
+        sys.exit()
+    fileIn, folder, text = args
+
+    nodeids = ParseNodeIDs(text)
+    if isinstance(nodeids, (StringType, UnicodeType)):
+        print nodeids
+        sys.exit(-1)
+
+    outputs = ["c"]
+    overrides = {}
+    name_format = DEFAULT_NAME_FORMAT
+    split = False
+    jobs = 1
+    for o, a in opts:
+        if o in ("-h", "--help"):
+            usage()
+            sys.exit()
+        elif o in ("-o", "--output"):
+            outputs = [output.strip().lower() for output in a.split(",")]
+            for output in outputs:
+                if output not in Outputs:
+                    print _("Unknown output \"%s\"")%output
+                    sys.exit(-1)
+        elif o in ("-p", "--param"):
+            overrides = ParseOverride(a, nodeids, overrides)
+            if isinstance(overrides, (StringType, UnicodeType)):
+                print overrides
+                sys.exit(-1)
+        elif o in ("-n", "--name"):
+            name_format = a
+        elif o in ("-s", "--split"):
+            split = True
+        elif o in ("-j", "--jobs"):
+            try:
+                jobs = int(a)
+            except ValueError:
+                jobs = 0
+            if jobs < 1:
+                print _("Invalid number of jobs \"%s\"")%a
+                usage()
+                sys.exit(2)
+
+    print _("Parsing input file")
+    node = LoadNodeFile(fileIn)
+    if isinstance(node, (StringType, UnicodeType)):
+        print node
+        sys.exit(-1)
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+    print _("Writing %d variants")%len(nodeids)
+    results = GenerateFleet(node, nodeids, folder, outputs, overrides, name_format, split, jobs)
+    errors = [result for nodeid, result in results.iteritems() if isinstance(result, (StringType, UnicodeType))]
+    for error in errors:
+        print error
+    if len(errors) > 0:
+        sys.exit(-1)
+    print _("All done")
@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+from types import *
+import ast, re
+
+#-------------------------------------------------------------------------------
+#                          Node ID Formulas Parsing
+#-------------------------------------------------------------------------------
+
+# A value depending on node ID is stored as a Python expression giving either a
+# number or a formula string like "$NODEID+0x180". The expression can use the
+# number of the entry in its range ("base"). Formulas are generally a sum of
+# numbers and node ID terms, other ones like "($NODEID+0x180)|0x40000000" being
+# evaluated as integer expressions.
+
+NODEID = "$NODEID"
+
+FORMULA_TOKEN = re.compile("\s*(\$NODEID|0X[0-9A-F]+L?|[0-9]+L?|[-+*])")
+
+# Name given to node ID in the compiled integer expressions. Formulas are upper
+# case, so it can't be confused with a name written in the formula
+NODEID_NAME = "nodeid"
+
+# Syntax nodes allowed in integer expressions, power is excluded since it can
+# build huge numbers
+EXPRESSION_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Num, ast.Load,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.LShift,
+    ast.RShift, ast.BitOr, ast.BitXor, ast.BitAnd, ast.UAdd, ast.USub, ast.Invert)
+
+# Syntax nodes allowed in stored values in addition to the ones of integer
+# expressions, a stored value being like {True:"$NODEID+0x%X80"%(base+1),False:0}[base<4]
+STORED_VALUE_NODES = EXPRESSION_NODES + (ast.Str, ast.Dict, ast.Tuple,
+    ast.Subscript, ast.Index, ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE,
+    ast.Gt, ast.GtE, ast.IfExp, ast.BoolOp, ast.And, ast.Or, ast.Not)
+
+"""
+Compile an expression into a code object, raise ValueError if expression
+contains other syntax nodes than the ones given or other names than the ones
+given
+"""
+def CompileExpression(text, nodes, names):
+    try:
+        tree = ast.parse(text.strip(), mode = "eval")
+    except SyntaxError:
+        raise ValueError, "Invalid expression \"%s\""%text
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            if node.id not in names:
+                raise ValueError, "Invalid name \"%s\" in expression \"%s\""%(node.id, text)
+        elif not isinstance(node, nodes):
+            raise ValueError, "Invalid expression \"%s\""%text
+    return compile(tree, "<expression>", "eval")
+
+"""
+Class recording a formula compiled in the form constant + factor * node ID
+"""
+
+class NodeIDFormula:
+
+    def __init__(self, constant, factor):
+        self.Constant = constant
+        self.Factor = factor
+
+    def Evaluate(self, nodeid):
+        return self.Constant + self.Factor * nodeid
+
+    def __eq__(self, other):
+        return isinstance(other, NodeIDFormula) and (self.Constant, self.Factor) == (other.Constant, other.Factor)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return "NodeIDFormula(0x%X, %d)"%(self.Constant, self.Factor)
+
+"""
+Class recording a formula that isn't a linear function of node ID, evaluated as
+an integer expression of node ID
+"""
+
+class ExpressionFormula:
+
+    def __init__(self, text):
+        self.Text = text.upper()
+        try:
+            self.Code = CompileExpression(self.Text.replace(NODEID, NODEID_NAME),
+                EXPRESSION_NODES, [NODEID_NAME])
+        except ValueError:
+            raise ValueError, "Invalid formula \"%s\""%text
+        # Verify that formula gives a number
+        self.Evaluate(0)
+
+    def Evaluate(self, nodeid):
+        try:
+            result = eval(self.Code, {"__builtins__" : {}}, {NODEID_NAME : nodeid})
+        except Exception:
+            raise ValueError, "Invalid formula \"%s\""%self.Text
+        if not isinstance(result, (IntType, LongType)):
+            raise ValueError, "Formula \"%s\" doesn't give an integer"%self.Text
+        return result
+
+    def __eq__(self, other):
+        return isinstance(other, ExpressionFormula) and self.Text == other.Text
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return "ExpressionFormula(%r)"%self.Text
+
+"""
+Return True if value is a value depending on node ID
+"""
+def IsFormula(value):
+    return isinstance(value, (StringType, UnicodeType)) and value.upper().find(NODEID) != -1
+
+"""
+Return the list of tokens of a formula, raise ValueError if formula contains
+anything else than numbers, node ID and operators
+"""
+def GetFormulaTokens(text):
+    text = text.upper().strip()
+    tokens = []
+    position = 0
+    while position < len(text):
+        result = FORMULA_TOKEN.match(text, position)
+        if result is None:
+            raise ValueError, "Invalid formula \"%s\""%text
+        tokens.append(result.group(1))
+        position = result.end()
+    return tokens
+
+"""
+Parse a formula string and return its NodeIDFormula, raise ValueError if
+formula isn't a linear function of node ID
+"""
+def ParseFormula(text):
+    constant = factor = 0
+    sign = 1
+    term = [1, 0]
+    expected_value = True
+    tokens = GetFormulaTokens(text)
+    if len(tokens) == 0 or tokens[-1] in ["+", "-", "*"]:
+        raise ValueError, "Invalid formula \"%s\""%text
+    for token in tokens + ["+"]:
+        if expected_value:
+            if token in ["+", "-"] and term == [1, 0]:
+                if token == "-":
+                    sign = -sign
+                continue
+            if token == NODEID:
+                term[1] += 1
+            elif token not in ["+", "-", "*"]:
+                term[0] *= int(token.rstrip("L"), 0)
+            else:
+                raise ValueError, "Invalid formula \"%s\""%text
+            expected_value = False
+        elif token == "*":
+            expected_value = True
+        else:
+            if term[1] > 1:
+                raise ValueError, "Formula \"%s\" isn't linear"%text
+            if term[1] == 1:
+                factor += sign * term[0]
+            else:
+                constant += sign * term[0]
+            sign = {"+" : 1, "-" : -1}[token]
+            term = [1, 0]
+            expected_value = True
+    return NodeIDFormula(constant, factor)
+
+# Formulas already parsed {text : formula or error message}
+CompiledFormulas = {}
+
+"""
+Return the NodeIDFormula of a formula string, or its ExpressionFormula if it
+isn't a linear function of node ID. Each formula is parsed only once
+"""
+def CompileFormula(text):
+    result = CompiledFormulas.get(text, None)
+    if result is None:
+        try:
+            result = ParseFormula(text)
+        except ValueError:
+            try:
+                result = ExpressionFormula(text)
+            except ValueError, message:
+                result = str(message)
+        CompiledFormulas[text] = result
+    if isinstance(result, StringType):
+        raise ValueError, result
+    return result
+
+#-------------------------------------------------------------------------------
+#                          Stored Values Evaluation
+#-------------------------------------------------------------------------------
+
+# Stored values are generally a quoted formula, only other expressions need to
+# be evaluated
+QUOTED_FORMULA = re.compile("^\s*([\"'])([^\"'\\\\]*)\\1\s*$")
+
+# Stored values already compiled {value : code object or error message}
+CompiledStoredValues = {}
+
+# Expressions already evaluated {(expression, base) : value}
+EvaluatedExpressions = {}
+
+"""
+Return the code object of a stored value, raise ValueError if stored value
+isn't a valid expression of the entry number. Each stored value is compiled
+only once
+"""
+def CompileStoredValue(value):
+    result = CompiledStoredValues.get(value, None)
+    if result is None:
+        try:
+            result = CompileExpression(value, STORED_VALUE_NODES, ["base", "True", "False"])
+        except ValueError, message:
+            result = str(message)
+        CompiledStoredValues[value] = result
+    if isinstance(result, StringType):
+        raise ValueError, result
+    return result
+
+"""
+Return the value of a stored value depending on node ID: a formula string or a
+number if the value doesn't depend on node ID for the entry number given. Raise
+ValueError if the stored value is invalid
+"""
+def EvaluateStoredValue(value, base = 0):
+    result = QUOTED_FORMULA.match(value)
+    if result is not None:
+        return result.group(2)
+    key = (value, base)
+    if key not in EvaluatedExpressions:
+        code = CompileStoredValue(value)
+        try:
+            EvaluatedExpressions[key] = eval(code, {"__builtins__" : {}, "True" : True, "False" : False}, {"base" : base})
+        except Exception:
+            raise ValueError, "Invalid stored value \"%s\""%value
+    return EvaluatedExpressions[key]
+
+"""
+Return True if a stored value needs the entry number to be evaluated
+"""
+def NeedsBase(value):
+    return QUOTED_FORMULA.match(value) is None
@@ -27,6 +27,7 @@ from types import *
 import re, os
 
 word_model = re.compile('([a-zA-Z_0-9]*)')
+start_with_digit_model = re.compile(r'^(\d.*)')
 type_model = re.compile('([\_A-Z]*)([0-9]*)')
 range_model = re.compile('([\_A-Z]*)([0-9]*)\[([\-0-9]*)-([\-0-9]*)\]')
 
@@ -42,9 +43,8 @@ default_string_size = 10
 
 #Verify that the name does not start with a digit
 def UnDigitName(name):
-    start_with_digit = re.compile(r'^(\d.*)')
-    if start_with_digit.match(name):
-        return start_with_digit.sub(r'_\1', name)
+    if start_with_digit_model.match(name):
+        return start_with_digit_model.sub(r'_\1', name)
     return name
 
 
@@ -53,6 +53,59 @@ def FormatName(name):
     wordlist = [word for word in word_model.findall(name) if word != '']
     return "_".join(wordlist)
 
+"""
+Class recording the C symbols generated for an Object Dictionary. Names are
+formatted only once per generation and every symbol defined is recorded with
+the entry it comes from, so that two entries giving the same C symbol are
+detected before the C file is written.
+"""
+
+class SymbolTable:
+    
+    def __init__(self):
+        self.FormattedNames = {}
+        self.UnDigitNames = {}
+        self.Symbols = {}
+        self.Collisions = []
+    
+    def FormatName(self, name):
+        result = self.FormattedNames.get(name, None)
+        if result is None:
+            result = self.FormattedNames[name] = FormatName(name)
+        return result
+    
+    def UnDigitName(self, name):
+        result = self.UnDigitNames.get(name, None)
+        if result is None:
+            result = self.UnDigitNames[name] = UnDigitName(name)
+        return result
+    
+    """
+    Record that symbol is defined for entry (index, subIndex). If subIndex is
+    None, the symbol stands for the whole entry.
+    """
+    def Declare(self, symbol, index, subIndex = None):
+        owner = self.Symbols.get(symbol, None)
+        if owner is None:
+            self.Symbols[symbol] = (index, subIndex)
+        elif owner != (index, subIndex):
+            self.Collisions.append((symbol, owner, (index, subIndex)))
+    
+    def HasCollisions(self):
+        return len(self.Collisions) > 0
+    
+    def GetCollisionsMessage(self):
+        lines = []
+        for symbol, first, second in self.Collisions:
+            lines.append(_("!!! C symbol \"%s\" is generated for %s and %s")%(symbol, 
+                FormatEntryReference(*first), FormatEntryReference(*second)))
+        return "\n".join(lines)
+
+def FormatEntryReference(index, subIndex = None):
+    if subIndex is None:
+        return _("index 0x%04X")%index
+    return _("index 0x%04X subindex 0x%02X")%(index, subIndex)
+
 # Extract the informations from a given type name
 def GetValidTypeInfos(typename, items=[]):
     if typename in internal_types:
@@ -94,8 +147,10 @@ def ComputeValue(type, value):
         return "\"%s\""%value, ""
     elif type == "domain":
         return "\"%s\""%''.join(["\\x%2.2x"%ord(char) for char in value]), ""
-    elif type.startswith("real"):
+    elif type.startswith("real") or isinstance(value, float):
         return "%f"%value, ""
+    elif value < 0:
+        return "-0x%X"%-value, "\t/* %s */"%str(value)
     else:
         return "0x%X"%value, "\t/* %s */"%str(value)
 
@@ -110,8 +165,10 @@ def GetTypeName(Node, typenumber):
         raise ValueError, _("""!!! Datatype with value "0x%4.4X" isn't defined in CanFestival.""")%typenumber
     return typename
 
-def GenerateFileContent(Node, headerfilepath, pointers_dict = {}):
+def GenerateFileParts(Node, pointers_dict = {}):
     """
+    Compute the C code fragments of the Object Dictionary, before they are
+    assembled into one or several files
     pointers_dict = {(Idx,Sidx):"VariableName",...}
     """
     global type
@@ -130,6 +187,9 @@ def GenerateFileContent(Node, headerfilepath, pointers_dict = {}):
     
     default_string_size = Node.GetDefaultStringSize()
     
+    # C symbols generated for the node
+    symbols = SymbolTable()
+    
     # Compiling lists of indexes
     rangelist = [idx for idx in Node.GetIndexes() if 0 <= idx <= 0x260]
     listIndex = [idx for idx in Node.GetIndexes() if 0x1000 <= idx <= 0xFFFF]
@@ -169,7 +229,6 @@ def GenerateFileContent(Node, headerfilepath, pointers_dict = {}):
             strSwitch += "      if (*(%s*)value > (%s)%s) return OD_VALUE_TOO_HIGH;\n"%(typeinfos[0],typeinfos[0],str(maxvalue))
             strSwitch += "    break;\n"
 
-    valueRangeContent += strDefine
     valueRangeContent += "\nUNS32 %(NodeName)s_valueRangeTest (UNS8 typeValue, void * value)\n{"%texts
     valueRangeContent += "\n  switch (typeValue) {\n"
     valueRangeContent += strSwitch
@@ -179,15 +238,19 @@ def GenerateFileContent(Node, headerfilepath, pointers_dict = {}):
 #            Creation of the mapped variables and object dictionary
 #-------------------------------------------------------------------------------
 
-    mappedVariableContent = ""
-    pointedVariableContent = ""
+    mappedVariableContents = {}
+    pointedVariableContents = {}
     strDeclareHeader = ""
     strDeclareCallback = ""
     indexContents = {}
     indexCallbacks = {}
+    indexCallbackNames = {}
+    indexLengths = {}
     for index in listIndex:
         texts["index"] = index
         strIndex = ""
+        strMapped = ""
+        strPointed = ""
         entry_infos = Node.GetEntryInfos(index)
 	params_infos = Node.GetParamsEntry(index)
         texts["EntryName"] = entry_infos["name"].encode('ascii','replace')
@@ -216,17 +279,12 @@ def GenerateFileContent(Node, headerfilepath, pointers_dict = {}):
 			texts["suffixe"] = "[%d]"%typeinfos[1]
             else:
                 texts["suffixe"] = ""
-            if values<0 :
-				texts["value"], texts["comment"] = ComputeValue(typeinfos[2], -values)
-            else:
-				texts["value"], texts["comment"] = ComputeValue(typeinfos[2], values)
+            texts["value"], texts["comment"] = ComputeValue(typeinfos[2], values)
             if index in variablelist:
-                texts["name"] = UnDigitName(FormatName(subentry_infos["name"]))
+                texts["name"] = symbols.UnDigitName(symbols.FormatName(subentry_infos["name"]))
+                symbols.Declare(texts["name"], index, 0)
                 strDeclareHeader += "extern %(subIndexType)s %(name)s%(suffixe)s;\t\t/* Mapped at index 0x%(index)04X, subindex 0x00*/\n"%texts
-                if values>=0 :
-					mappedVariableContent += "%(subIndexType)s %(name)s%(suffixe)s = %(value)s;\t\t/* Mapped at index 0x%(index)04X, subindex 0x00 */\n"%texts
-                else:
-					mappedVariableContent += "%(subIndexType)s %(name)s%(suffixe)s = -%(value)s;\t\t/* Mapped at index 0x%(index)04X, subindex 0x00 */\n"%texts
+                strMapped += "%(subIndexType)s %(name)s%(suffixe)s = %(value)s;\t\t/* Mapped at index 0x%(index)04X, subindex 0x00 */\n"%texts
             else:
                 strIndex += "                    %(subIndexType)s %(NodeName)s_obj%(index)04X%(suffixe)s = %(value)s;%(comment)s\n"%texts
             values = [values]
@@ -262,14 +320,15 @@ def GenerateFileContent(Node, headerfilepath, pointers_dict = {}):
                     texts["type_suffixe"] = ""
                 texts["length"] = values[0]
                 if index in variablelist:
-                    texts["name"] = UnDigitName(FormatName(entry_infos["name"]))
+                    texts["name"] = symbols.UnDigitName(symbols.FormatName(entry_infos["name"]))
+                    symbols.Declare(texts["name"], index)
                     texts["values_count"] =  str(len(values)-1)
                     if subentry_infos["access"].upper() == "CONST":
                         strDeclareHeader += "extern %(subIndexType)s%(type_suffixe)s %(name)s[%(values_count)s];\t\t/* Mapped at index 0x%(index)04X, subindex 0x01 - 0x%(length)02X */\n"%texts
-                        mappedVariableContent += "%(subIndexType)s%(type_suffixe)s %(name)s[] =\t\t/* Mapped at index 0x%(index)04X, subindex 0x01 - 0x%(length)02X */\n  {\n"%texts
+                        strMapped += "%(subIndexType)s%(type_suffixe)s %(name)s[] =\t\t/* Mapped at index 0x%(index)04X, subindex 0x01 - 0x%(length)02X */\n  {\n"%texts
                     else:
                         strDeclareHeader += "extern %(subIndexType)s %(name)s[%(values_count)s]%(suffixe)s;\t\t/* Mapped at index 0x%(index)04X, subindex 0x01 - 0x%(length)02X */\n"%texts
-                        mappedVariableContent += "%(subIndexType)s %(name)s[]%(suffixe)s =\t\t/* Mapped at index 0x%(index)04X, subindex 0x01 - 0x%(length)02X */\n  {\n"%texts
+                        strMapped += "%(subIndexType)s %(name)s[]%(suffixe)s =\t\t/* Mapped at index 0x%(index)04X, subindex 0x01 - 0x%(length)02X */\n  {\n"%texts
                     for subIndex, value in enumerate(values):
                         sep = ","
                         if subIndex > 0:
@@ -279,10 +338,10 @@ def GenerateFileContent(Node, headerfilepath, pointers_dict = {}):
                             if len(value) is 2 and typename is "DOMAIN":
                                 raise ValueError("\nDomain variable not initialized\nindex : 0x%04X\nsubindex : 0x%02X"%(index, subIndex))
                             if subentry_infos["access"].upper() == "CONST" and typeinfos[2] == "visible_string":
-                                mappedVariableContent += "    (const CONSTSTORE char[]){%s}%s%s\n"%(value, sep, comment)
+                                strMapped += "    (const CONSTSTORE char[]){%s}%s%s\n"%(value, sep, comment)
                             else:
-                                mappedVariableContent += "    %s%s%s\n"%(value, sep, comment)
-                    mappedVariableContent += "  };\n"
+                                strMapped += "    %s%s%s\n"%(value, sep, comment)
+                    strMapped += "  };\n"
                 else:
                     strIndex += "                    %(subIndexType)s%(type_suffixe)s %(NodeName)s_obj%(index)04X[] = \n                    {\n"%texts
                     for subIndex, value in enumerate(values):
@@ -295,7 +354,7 @@ def GenerateFileContent(Node, headerfilepath, pointers_dict = {}):
                     strIndex += "                    };\n"
             else:
                 
-                texts["parent"] = UnDigitName(FormatName(entry_infos["name"]))
+                texts["parent"] = symbols.UnDigitName(symbols.FormatName(entry_infos["name"]))
                 # Entry type is RECORD
                 for subIndex, value in enumerate(values):
                     texts["subIndex"] = subIndex
@@ -316,29 +375,32 @@ def GenerateFileContent(Node, headerfilepath, pointers_dict = {}):
                         else:
                             texts["suffixe"] = ""
                         texts["value"], texts["comment"] = ComputeValue(typeinfos[2], value)
-                        texts["name"] = FormatName(subentry_infos["name"])
+                        texts["name"] = symbols.FormatName(subentry_infos["name"])
                         if index in variablelist:
+                            symbols.Declare("%(parent)s_%(name)s"%texts, index, subIndex)
                             strDeclareHeader += "extern ";
                             if subentry_infos["access"].upper() == "CONST":
-                                mappedVariableContent += "const CONSTSTORE ";
+                                strMapped += "const CONSTSTORE ";
                                 strDeclareHeader += "const CONSTSTORE ";
                             strDeclareHeader += "%(subIndexType)s %(parent)s_%(name)s%(suffixe)s;\t\t/* Mapped at index 0x%(index)04X, subindex 0x%(subIndex)02X */\n"%texts
-                            mappedVariableContent += "%(subIndexType)s %(parent)s_%(name)s%(suffixe)s = %(value)s;\t\t/* Mapped at index 0x%(index)04X, subindex 0x%(subIndex)02X */\n"%texts
+                            strMapped += "%(subIndexType)s %(parent)s_%(name)s%(suffixe)s = %(value)s;\t\t/* Mapped at index 0x%(index)04X, subindex 0x%(subIndex)02X */\n"%texts
                         else:
                             strIndex += "                    %(subIndexType)s %(NodeName)s_obj%(index)04X_%(name)s%(suffixe)s = %(value)s;%(comment)s\n"%texts
         
         # Generating Dictionary C++ entry
         if callbacks:
             if index in variablelist:
-                name = FormatName(entry_infos["name"])
+                name = symbols.FormatName(entry_infos["name"])
             else:
                 name = "%(NodeName)s_Index%(index)04X"%texts
-            name=UnDigitName(name);
+            name=symbols.UnDigitName(name);
+            symbols.Declare("%s_callbacks"%name, index)
             strIndex += "                    ODCallback_t %s_callbacks[] = \n                     {\n"%name
             for subIndex in xrange(len(values)):
                 strIndex += "                       NULL,\n"
             strIndex += "                     };\n"
             indexCallbacks[index] = "*callbacks = %s_callbacks; "%name
+            indexCallbackNames[index] = name
         else:
             indexCallbacks[index] = ""
         strIndex += "                    const CONSTSTORE subindex %(NodeName)s_Index%(index)04X[] = \n                     {\n"%texts
@@ -360,19 +422,19 @@ def GenerateFileContent(Node, headerfilepath, pointers_dict = {}):
                 if entry_infos["struct"] & OD_MultipleSubindexes:
                     name = "%(NodeName)s_highestSubIndex_obj%(index)04X"%texts
                 elif index in variablelist:
-                    name = FormatName(subentry_infos["name"])
+                    name = symbols.FormatName(subentry_infos["name"])
                 else:
-                    name = FormatName("%s_obj%04X"%(texts["NodeName"], texts["index"]))
+                    name = symbols.FormatName("%s_obj%04X"%(texts["NodeName"], texts["index"]))
             elif entry_infos["struct"] & OD_IdenticalSubindexes:
                 if index in variablelist:
-                    name = "%s[%d]"%(FormatName(entry_infos["name"]), subIndex - 1)
+                    name = "%s[%d]"%(symbols.FormatName(entry_infos["name"]), subIndex - 1)
                 else:
                     name = "%s_obj%04X[%d]"%(texts["NodeName"], texts["index"], subIndex - 1)
             else:
                 if index in variablelist:
-                    name = FormatName("%s_%s"%(entry_infos["name"],subentry_infos["name"]))
+                    name = symbols.FormatName("%s_%s"%(entry_infos["name"],subentry_infos["name"]))
                 else:
-                    name = "%s_obj%04X_%s"%(texts["NodeName"], texts["index"], FormatName(subentry_infos["name"]))
+                    name = "%s_obj%04X_%s"%(texts["NodeName"], texts["index"], symbols.FormatName(subentry_infos["name"]))
             if typeinfos[2] == "visible_string":
                 if params_infos["buffer_size"] != "":
 		  sizeof = params_infos["buffer_size"]
@@ -388,14 +450,21 @@ def GenerateFileContent(Node, headerfilepath, pointers_dict = {}):
             else:
                 save = ""
             if subentry_infos["access"].upper() == "CONST":
-                strIndex += "                       { %s%s, %s, %s, .pObjectConst=&%s }%s\n"%(subentry_infos["access"].upper(),save,typeinfos[2],sizeof,UnDigitName(name),sep)
+                strIndex += "                       { %s%s, %s, %s, .pObjectConst=&%s }%s\n"%(subentry_infos["access"].upper(),save,typeinfos[2],sizeof,symbols.UnDigitName(name),sep)
             else:
-                strIndex += "                       { %s%s, %s, %s, .pObject=&%s }%s\n"%(subentry_infos["access"].upper(),save,typeinfos[2],sizeof,UnDigitName(name),sep)
+                strIndex += "                       { %s%s, %s, %s, .pObject=&%s }%s\n"%(subentry_infos["access"].upper(),save,typeinfos[2],sizeof,symbols.UnDigitName(name),sep)
             pointer_name = pointers_dict.get((index, subIndex), None)
             if pointer_name is not None:
-                pointedVariableContent += "%s* %s = &%s;\n"%(typeinfos[0], pointer_name, name)
+                strPointed += "%s* %s = &%s;\n"%(typeinfos[0], pointer_name, name)
         strIndex += "                     };\n"
         indexContents[index] = strIndex
+        mappedVariableContents[index] = strMapped
+        indexLengths[index] = len(values)
+        pointedVariableContents[index] = strPointed
+    
+    # Report all the entries giving the same C symbol before anything is written
+    if symbols.HasCollisions():
+        raise ValueError, symbols.GetCollisionsMessage()
         
 #-------------------------------------------------------------------------------
 #                     Declaration of Particular Parameters
@@ -509,27 +578,26 @@ def GenerateFileContent(Node, headerfilepath, pointers_dict = {}):
             strQuickIndex += "  %d%s /* %s */\n"%(quick_index[index_cat][cat],sep,cat)
         strQuickIndex += "};\n"
 
+    parts = {"listIndex" : listIndex,
+             "valueRangeDefines" : strDefine,
+             "valueRangeContent" : valueRangeContent,
+             "mappedVariableContents" : mappedVariableContents,
+             "pointedVariableContents" : pointedVariableContents,
+             "indexContents" : indexContents,
+             "indexCallbackNames" : indexCallbackNames,
+             "indexLengths" : indexLengths,
+             "declareIndex" : strDeclareIndex,
+             "declareSwitch" : strDeclareSwitch,
+             "quickIndex" : strQuickIndex,
+             "declareHeader" : strDeclareHeader}
+    return texts, parts
+
 #-------------------------------------------------------------------------------
-#                            Write File Content
+#                           Common File Sections
 #-------------------------------------------------------------------------------
 
-    fileContent = generated_tag + """
-#include "%s"
-"""%(headerfilepath)
-
-    fileContent += """
-/**************************************************************************/
-/* Declaration of mapped variables                                        */
-/**************************************************************************/
-""" + mappedVariableContent
-
-    fileContent += """
-/**************************************************************************/
-/* Declaration of value range types                                       */
-/**************************************************************************/
-""" + valueRangeContent
-
-    fileContent += """
+def GenerateNodeDataContent(texts):
+    content = """
 /**************************************************************************/
 /* The node id                                                            */
 /**************************************************************************/
@@ -545,36 +613,18 @@ const UNS8 %(NodeName)s_iam_a_slave = %(iam_a_slave)d;
     if texts["heartBeatTimers_number"] > 0:
         declaration = "TIMER_HANDLE %(NodeName)s_heartBeatTimers[%(heartBeatTimers_number)d]"%texts
         initializer = "{TIMER_NONE" + ",TIMER_NONE" * (texts["heartBeatTimers_number"] - 1) + "}"
-        fileContent += declaration + " = " + initializer + ";\n"
+        content += declaration + " = " + initializer + ";\n"
     else:
-        fileContent += "TIMER_HANDLE %(NodeName)s_heartBeatTimers[1];\n"%texts
-    
-    fileContent += """
-/*
-$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$
-
-                               OBJECT DICTIONARY
-
-$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$
-*/
-"""%texts
-    contentlist = indexContents.keys()
-    contentlist.sort()
-    for index in contentlist:
-        fileContent += indexContents[index]
+        content += "TIMER_HANDLE %(NodeName)s_heartBeatTimers[1];\n"%texts
+    return content
 
-    fileContent += """
-/**************************************************************************/
-/* Declaration of pointed variables                                       */
-/**************************************************************************/
-""" + pointedVariableContent
-
-    fileContent += """
+def GenerateNavigationContent(texts, parts):
+    content = """
 const CONSTSTORE indextable %(NodeName)s_objdict[] = 
 {
 """%texts
-    fileContent += strDeclareIndex
-    fileContent += """};
+    content += parts["declareIndex"]
+    content += """};
 
 const CONSTSTORE indextable * %(NodeName)s_scanIndexOD (UNS16 wIndex, UNS32 * errorCode, ODCallback_t **callbacks)
 {
@@ -582,8 +632,8 @@ const CONSTSTORE indextable * %(NodeName)s_scanIndexOD (UNS16 wIndex, UNS32 * er
 	*callbacks = NULL;
 	switch(wIndex){
 """%texts
-    fileContent += strDeclareSwitch
-    fileContent += """		default:
+    content += parts["declareSwitch"]
+    content += """		default:
 			*errorCode = OD_NO_SUCH_OBJECT;
 			return NULL;
 	}
@@ -598,21 +648,22 @@ const CONSTSTORE indextable * %(NodeName)s_scanIndexOD (UNS16 wIndex, UNS32 * er
  */
 s_PDO_status %(NodeName)s_PDO_status[%(maxPDOtransmit)d] = {"""%texts
 
-    fileContent += ",".join(["s_PDO_status_Initializer"]*texts["maxPDOtransmit"]) + """};
+    content += ",".join(["s_PDO_status_Initializer"]*texts["maxPDOtransmit"]) + """};
 """
 
-    fileContent += strQuickIndex
-    fileContent += """
+    content += parts["quickIndex"]
+    content += """
 const CONSTSTORE UNS16 %(NodeName)s_ObjdictSize = sizeof(%(NodeName)s_objdict)/sizeof(%(NodeName)s_objdict[0]); 
+"""%texts
+    return content
 
+def GenerateNodeDataInitializer(texts):
+    return """
 CO_Data %(NodeName)s_Data = CANOPEN_NODE_DATA_INITIALIZER(%(NodeName)s);
 
 """%texts
 
-#-------------------------------------------------------------------------------
-#                          Write Header File Content
-#-------------------------------------------------------------------------------
-
+def GenerateHeaderFileContent(texts, parts, headerfilepath):
     texts["file_include_name"] = headerfilepath.replace(".", "_").upper()
     HeaderFileContent = generated_tag + """
 #ifndef %(file_include_name)s
@@ -627,22 +678,206 @@ const CONSTSTORE indextable * %(NodeName)s_scanIndexOD (UNS16 wIndex, UNS32 * er
 /* Master node data struct */
 extern CO_Data %(NodeName)s_Data;
 """%texts
-    HeaderFileContent += strDeclareHeader
+    HeaderFileContent += parts["declareHeader"]
     
     HeaderFileContent += "\n#endif // %(file_include_name)s\n"%texts
     
-    return fileContent,HeaderFileContent
+    return HeaderFileContent
+
+#-------------------------------------------------------------------------------
+#                            Write File Content
+#-------------------------------------------------------------------------------
+
+def GenerateFileContent(Node, headerfilepath, pointers_dict = {}):
+    """
+    pointers_dict = {(Idx,Sidx):"VariableName",...}
+    """
+    texts, parts = GenerateFileParts(Node, pointers_dict)
+    listIndex = parts["listIndex"]
+    
+    fileContent = generated_tag + """
+#include "%s"
+"""%(headerfilepath)
+
+    fileContent += """
+/**************************************************************************/
+/* Declaration of mapped variables                                        */
+/**************************************************************************/
+""" + "".join([parts["mappedVariableContents"][index] for index in listIndex])
+
+    fileContent += """
+/**************************************************************************/
+/* Declaration of value range types                                       */
+/**************************************************************************/
+""" + parts["valueRangeDefines"] + parts["valueRangeContent"]
+
+    fileContent += GenerateNodeDataContent(texts)
+    
+    fileContent += """
+/*
+$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$
+
+                               OBJECT DICTIONARY
+
+$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$
+*/
+"""%texts
+    contentlist = parts["indexContents"].keys()
+    contentlist.sort()
+    for index in contentlist:
+        fileContent += parts["indexContents"][index]
+
+    fileContent += """
+/**************************************************************************/
+/* Declaration of pointed variables                                       */
+/**************************************************************************/
+""" + "".join([parts["pointedVariableContents"][index] for index in listIndex])
+
+    fileContent += GenerateNavigationContent(texts, parts)
+    fileContent += GenerateNodeDataInitializer(texts)
+
+    return fileContent, GenerateHeaderFileContent(texts, parts, headerfilepath)
+
+#-------------------------------------------------------------------------------
+#                     Write Split File Content
+#-------------------------------------------------------------------------------
+
+"""
+Translation units generated in split mode, with the range of indexes whose
+definitions they contain. Navigation tables (index table, scanIndexOD, quick
+indexes) stay in the main file.
+"""
+split_categories = [("comm", 0x0000, 0x13FF), ("pdo", 0x1400, 0x1BFF), 
+                    ("comm", 0x1C00, 0x1FFF), ("manufacturer", 0x2000, 0x5FFF),
+                    ("profile", 0x6000, 0xFFFF)]
+split_files = ["comm", "pdo", "manufacturer", "profile"]
+
+def GetSplitCategory(index):
+    for cat, idx_min, idx_max in split_categories:
+        if idx_min <= index <= idx_max:
+            return cat
+    return None
+
+def GenerateSplitFileContent(Node, headerfilepath, pointers_dict = {}):
+    """
+    Generate the Object Dictionary split in several translation units sharing
+    a private header, so that a change in one area only recompiles this area.
+    Return the list of (filename, content) of the C files and private header,
+    and the public header content.
+    pointers_dict = {(Idx,Sidx):"VariableName",...}
+    """
+    texts, parts = GenerateFileParts(Node, pointers_dict)
+    listIndex = parts["listIndex"]
+    basename = os.path.splitext(headerfilepath)[0]
+    privateheaderpath = "%s_private.h"%basename
+    
+    # Private header shared by all the translation units
+    texts["private_include_name"] = privateheaderpath.replace(".", "_").upper()
+    privateContent = generated_tag + """
+#ifndef %(private_include_name)s
+#define %(private_include_name)s
+
+"""%texts
+    privateContent += "#include \"%s\"\n"%headerfilepath
+    privateContent += """
+/**************************************************************************/
+/* Declaration of value range types                                       */
+/**************************************************************************/
+""" + parts["valueRangeDefines"] + "\n"
+    privateContent += """
+/**************************************************************************/
+/* Declaration of object dictionary tables                                */
+/**************************************************************************/
+"""
+    for index in listIndex:
+        texts["index"] = index
+        texts["length"] = parts["indexLengths"][index]
+        privateContent += "extern const CONSTSTORE subindex %(NodeName)s_Index%(index)04X[%(length)d];\n"%texts
+        if index in parts["indexCallbackNames"]:
+            privateContent += "extern ODCallback_t %s_callbacks[%d];\n"%(parts["indexCallbackNames"][index], texts["length"])
+    privateContent += """
+extern const CONSTSTORE indextable %(NodeName)s_objdict[];
+extern s_PDO_status %(NodeName)s_PDO_status[%(maxPDOtransmit)d];
+extern const CONSTSTORE quick_index %(NodeName)s_firstIndex;
+extern const CONSTSTORE quick_index %(NodeName)s_lastIndex;
+extern const CONSTSTORE UNS16 %(NodeName)s_ObjdictSize;
+
+#endif // %(private_include_name)s
+"""%texts
+    
+    contents = {}
+    for cat in split_files:
+        contents[cat] = generated_tag + """
+#include "%s"
+"""%(privateheaderpath)
+    
+    contents["comm"] += """
+/**************************************************************************/
+/* Declaration of value range types                                       */
+/**************************************************************************/
+""" + parts["valueRangeContent"]
+    contents["comm"] += GenerateNodeDataContent(texts)
+    
+    for cat in ["manufacturer", "profile"]:
+        contents[cat] += """
+/**************************************************************************/
+/* Declaration of mapped variables                                        */
+/**************************************************************************/
+""" + "".join([parts["mappedVariableContents"][index] for index in listIndex if GetSplitCategory(index) == cat])
+    
+    contentlist = parts["indexContents"].keys()
+    contentlist.sort()
+    for index in contentlist:
+        contents[GetSplitCategory(index)] += parts["indexContents"][index]
+    
+    for cat in split_files:
+        pointed = [parts["pointedVariableContents"][index] for index in listIndex if GetSplitCategory(index) == cat]
+        if len(pointed) > 0:
+            contents[cat] += """
+/**************************************************************************/
+/* Declaration of pointed variables                                       */
+/**************************************************************************/
+""" + "".join(pointed)
+    
+    contents["comm"] += GenerateNodeDataInitializer(texts)
+    
+    mainContent = generated_tag + """
+#include "%s"
+"""%(privateheaderpath)
+    mainContent += GenerateNavigationContent(texts, parts)
+    
+    files = [("%s.c"%basename, mainContent), (privateheaderpath, privateContent)]
+    for cat in split_files:
+        files.append(("%s_%s.c"%(basename, cat), contents[cat]))
+    return files, GenerateHeaderFileContent(texts, parts, headerfilepath)
 
 #-------------------------------------------------------------------------------
 #                             Main Function
 #-------------------------------------------------------------------------------
 
-def GenerateFile(filepath, node, pointers_dict = {}):
+def WriteFileIfChanged(filepath, content):
+    # Keep file untouched if content is the same, so that make doesn't rebuild it
+    if os.path.isfile(filepath):
+        cfile = open(filepath, "r")
+        previous = cfile.read()
+        cfile.close()
+        if previous == content:
+            return
+    WriteFile(filepath, content)
+
+def GenerateFile(filepath, node, pointers_dict = {}, split = False):
     try:
         headerfilepath = os.path.splitext(filepath)[0]+".h"
-        content, header = GenerateFileContent(node, os.path.split(headerfilepath)[1], pointers_dict)
-        WriteFile(filepath, content)
-        WriteFile(headerfilepath, header)
+        if split:
+            dirname = os.path.dirname(filepath)
+            files, header = GenerateSplitFileContent(node, os.path.split(headerfilepath)[1], pointers_dict)
+            for filename, content in files:
+                WriteFileIfChanged(os.path.join(dirname, filename), content)
+            WriteFileIfChanged(headerfilepath, header)
+        else:
+            content, header = GenerateFileContent(node, os.path.split(headerfilepath)[1], pointers_dict)
+            WriteFile(filepath, content)
+            WriteFile(headerfilepath, header)
         return None
     except ValueError, message:
         return _("Unable to Generate C File\n%s")%message
@@ -0,0 +1,620 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+from types import *
+import os, sys, time
+
+from virtualcan import VirtualCanBus, CanEndpoint, CanFrame
+from networkcheck import GetCanID, GetSyncCanID, COBID_INVALID, COBID_SYNC_PRODUCER
+import pdocodec
+
+#-------------------------------------------------------------------------------
+#                              NMT Definitions
+#-------------------------------------------------------------------------------
+
+NMT_COBID = 0x000
+NMT_ERROR_CONTROL_BASE = 0x700
+
+# NMT states as sent in heartbeat messages
+NMT_BOOTUP = 0x00
+NMT_STOPPED = 0x04
+NMT_OPERATIONAL = 0x05
+NMT_PRE_OPERATIONAL = 0x7F
+
+# NMT commands
+NMT_START = 0x01
+NMT_STOP = 0x02
+NMT_ENTER_PRE_OPERATIONAL = 0x80
+NMT_RESET_NODE = 0x81
+NMT_RESET_COMMUNICATION = 0x82
+
+# Transmission types of PDOs
+TRANSMISSION_SYNC_ACYCLIC = 0
+TRANSMISSION_SYNC_MAX = 240
+TRANSMISSION_RTR_SYNC = 252
+TRANSMISSION_RTR_EVENT = 253
+TRANSMISSION_EVENT_SPECIFIC = 254
+TRANSMISSION_EVENT_PROFILE = 255
+
+"""
+Return the value of an entry of a node if it's a number, default otherwise
+"""
+def GetNumberEntry(node, index, subindex, default = 0):
+    if not node.IsEntry(index):
+        return default
+    value = node.GetEntry(index, subindex)
+    if isinstance(value, (IntType, LongType, BooleanType)):
+        return value
+    return default
+
+#-------------------------------------------------------------------------------
+#                          Definition of SimulatedTPDO Object
+#-------------------------------------------------------------------------------
+
+"""
+Class recording the configuration and the state of a transmit PDO of a node
+"""
+
+class SimulatedTPDO:
+
+    def __init__(self, index, cobid, transmission, layout):
+        self.Index = index
+        self.CobID = cobid
+        self.Transmission = transmission
+        self.Layout = layout
+        self.Keys = layout.GetKeys()
+        # Minimum time between two transmissions and period of event timer in s
+        self.InhibitTime = 0.
+        self.EventTime = 0.
+        self.Data = ""
+        self.Counter = 0
+        self.Changed = True
+        self.LastTime = None
+        self.Timer = None
+
+    def IsSynchronous(self):
+        return self.Transmission <= TRANSMISSION_SYNC_MAX
+
+    def IsEventDriven(self):
+        return self.Transmission >= TRANSMISSION_EVENT_SPECIFIC
+
+    def IsRemote(self):
+        return self.Transmission in [TRANSMISSION_RTR_SYNC, TRANSMISSION_RTR_EVENT]
+
+#-------------------------------------------------------------------------------
+#                          Definition of SimulatedNode Object
+#-------------------------------------------------------------------------------
+
+"""
+Class simulating the communication of a CANopen node on a VirtualCanBus from its
+object dictionary: NMT state machine, heartbeat producer (0x1017) and consumers
+(0x1016), SYNC producer (0x1005, 0x1006, 0x1019) and transmit PDOs according to
+their transmission type. Mapped values are read in the node and can be changed
+with SetValue without modifying the node.
+"""
+
+class SimulatedNode(CanEndpoint):
+
+    def __init__(self, node, nodeid, name = None, queue_size = 32, boot_delay = 0.):
+        if name is None:
+            name = "%s 0x%2.2X"%(node.GetNodeName(), nodeid)
+        CanEndpoint.__init__(self, name, queue_size)
+        self.Node = node
+        self.NodeID = nodeid
+        self.BootDelay = boot_delay
+        self.State = None
+        self.Values = {}
+        # Timers to cancel when communication is reset
+        self.Timers = []
+        # COB IDs received, fixed after configuration is read
+        self.CobIDs = set()
+        self.ReadConfiguration()
+        self.ResetStatistics()
+
+    def GetNodeID(self):
+        return self.NodeID
+
+    def GetState(self):
+        return self.State
+
+    def GetCobIDs(self):
+        return self.CobIDs
+
+    """
+    Read communication parameters in node object dictionary
+    """
+    def ReadConfiguration(self):
+        node = self.Node
+        self.HeartbeatTime = GetNumberEntry(node, 0x1017, 0) / 1000.
+        self.Consumers = {}
+        if node.IsEntry(0x1016):
+            for value in node.GetEntry(0x1016)[1:]:
+                if isinstance(value, (IntType, LongType)) and value & 0xFFFF and (value >> 16) & 0x7F:
+                    self.Consumers[(value >> 16) & 0x7F] = (value & 0xFFFF) / 1000.
+        sync_value = GetNumberEntry(node, 0x1005, 0, 0x80)
+        self.SyncCobID = GetSyncCanID(sync_value)
+        self.SyncPeriod = GetNumberEntry(node, 0x1006, 0) / 1000000.
+        self.SyncProducer = self.SyncCobID is not None and sync_value & COBID_SYNC_PRODUCER != 0 and self.SyncPeriod > 0
+        self.SyncOverflow = GetNumberEntry(node, 0x1019, 0)
+        self.TPDOs = []
+        self.RemotePDOs = {}
+        self.PDOsByVariable = {}
+        for index in xrange(0x1800, 0x1A00):
+            if not node.IsEntry(index) or not node.IsEntry(index + 0x200):
+                continue
+            cobid = GetCanID(GetNumberEntry(node, index, 1, COBID_INVALID))
+            if cobid is None:
+                continue
+            try:
+                layout = pdocodec.CompilePdoLayout(node, index + 0x200)
+            except ValueError:
+                continue
+            pdo = SimulatedTPDO(index, cobid, GetNumberEntry(node, index, 2, TRANSMISSION_EVENT_PROFILE), layout)
+            pdo.InhibitTime = GetNumberEntry(node, index, 3) / 10000.
+            pdo.EventTime = GetNumberEntry(node, index, 5) / 1000.
+            self.TPDOs.append(pdo)
+            if pdo.IsRemote():
+                self.RemotePDOs[cobid] = pdo
+            for key in pdo.Keys:
+                self.PDOsByVariable.setdefault(key, []).append(pdo)
+        self.SyncPDOs = [pdo for pdo in self.TPDOs if pdo.IsSynchronous()]
+        self.RPDOCobIDs = set()
+        for index in xrange(0x1400, 0x1600):
+            if node.IsEntry(index):
+                cobid = GetCanID(GetNumberEntry(node, index, 1, COBID_INVALID))
+                if cobid is not None:
+                    self.RPDOCobIDs.add(cobid)
+        self.CobIDs = set([NMT_COBID]) | self.RPDOCobIDs | set(self.RemotePDOs.keys())
+        self.CobIDs.update([NMT_ERROR_CONTROL_BASE + nodeid for nodeid in self.Consumers])
+        if len(self.SyncPDOs) > 0 and self.SyncCobID is not None:
+            self.CobIDs.add(self.SyncCobID)
+        self.ReceivedPDOs = {}
+
+    def ResetStatistics(self):
+        self.Statistics = {"frames" : 0, "pdos" : 0, "rpdos" : 0, "syncs" : 0,
+                           "pdo_latency_max" : 0., "pdo_latency_total" : 0.,
+                           "heartbeat_interval_max" : 0., "sync_interval_max" : 0.,
+                           "heartbeat_timeouts" : 0}
+        self.LastHeartbeat = None
+        self.LastSync = None
+
+    """
+    Return the statistics of the node as a dictionary
+    """
+    def GetStatistics(self):
+        statistics = self.Statistics.copy()
+        statistics["rejected"] = self.Rejected
+        statistics["pdo_latency_mean"] = 0.
+        if statistics["pdos"] > 0:
+            statistics["pdo_latency_mean"] = statistics["pdo_latency_total"] / statistics["pdos"]
+        statistics.pop("pdo_latency_total")
+        statistics["state"] = self.State
+        return statistics
+
+#-------------------------------------------------------------------------------
+#                              Mapped Values
+#-------------------------------------------------------------------------------
+
+    def GetValue(self, index, subindex):
+        value = self.Values.get((index, subindex), None)
+        if value is None:
+            value = self.Node.GetEntry(index, subindex)
+        return value
+
+    """
+    Change the value of a variable. Event driven PDOs mapping it are sent, after
+    their inhibit time if needed
+    """
+    def SetValue(self, index, subindex, value):
+        self.Values[(index, subindex)] = value
+        for pdo in self.PDOsByVariable.get((index, subindex), []):
+            self.UpdatePDOData(pdo)
+            if pdo.Changed and pdo.IsEventDriven() and self.State == NMT_OPERATIONAL:
+                self.TriggerPDO(pdo)
+
+    def UpdatePDOData(self, pdo):
+        values = []
+        for field in pdo.Layout.Variables:
+            value = self.GetValue(field.Index, field.SubIndex)
+            if field.Coding.IsNumber() and not isinstance(value, (IntType, LongType, FloatType, BooleanType)):
+                value = 0
+            elif value is None:
+                value = ""
+            values.append(value)
+        data = pdo.Layout.EncodeFrame(values)
+        if data != pdo.Data:
+            pdo.Data = data
+            pdo.Changed = True
+
+    """
+    Return the values of the RPDOs received as a dictionary {cobid : data}
+    """
+    def GetReceivedPDOs(self):
+        return self.ReceivedPDOs.copy()
+
+#-------------------------------------------------------------------------------
+#                              NMT State Machine
+#-------------------------------------------------------------------------------
+
+    def OnAttach(self, bus):
+        self.StartTimer(self.BootDelay, self.Boot)
+
+    def StartTimer(self, delay, callback, *args):
+        event = self.Bus.Schedule(delay, callback, *args)
+        self.Timers.append(event)
+        if len(self.Timers) > 4 * (len(self.TPDOs) + len(self.Consumers)) + 16:
+            # Forget timers already executed
+            self.Timers = [timer for timer in self.Timers if timer[2] is not None and timer[0] >= self.Bus.GetTime()]
+        return event
+
+    def CancelTimers(self):
+        for event in self.Timers:
+            self.Bus.Cancel(event)
+        self.Timers = []
+        for pdo in self.TPDOs:
+            pdo.Timer = None
+
+    """
+    Enter pre-operational state after initialisation, sending boot-up message
+    """
+    def Boot(self):
+        self.CancelTimers()
+        self.State = NMT_PRE_OPERATIONAL
+        self.SyncCounter = 0
+        for pdo in self.TPDOs:
+            pdo.Counter = 0
+            pdo.LastTime = None
+            self.UpdatePDOData(pdo)
+        self.Send(NMT_ERROR_CONTROL_BASE + self.NodeID, chr(NMT_BOOTUP))
+        if self.HeartbeatTime > 0:
+            self.StartTimer(self.HeartbeatTime, self.SendHeartbeat)
+        if self.SyncProducer:
+            self.StartTimer(self.SyncPeriod, self.SendSync)
+        self.ConsumerTimers = {}
+        self.OnBoot()
+
+    """
+    Called when node has sent its boot-up message
+    """
+    def OnBoot(self):
+        pass
+
+    def SetState(self, state):
+        if state == self.State:
+            return
+        self.State = state
+        for pdo in self.TPDOs:
+            self.Bus.Cancel(pdo.Timer)
+            pdo.Timer = None
+            if state == NMT_OPERATIONAL and pdo.IsEventDriven():
+                self.TriggerPDO(pdo)
+
+    def ProcessNMT(self, command, nodeid):
+        if nodeid not in [0, self.NodeID] or self.State is None:
+            return
+        if command == NMT_START:
+            self.SetState(NMT_OPERATIONAL)
+        elif command == NMT_STOP:
+            self.SetState(NMT_STOPPED)
+        elif command == NMT_ENTER_PRE_OPERATIONAL:
+            self.SetState(NMT_PRE_OPERATIONAL)
+        elif command in [NMT_RESET_NODE, NMT_RESET_COMMUNICATION]:
+            if command == NMT_RESET_NODE:
+                self.Values = {}
+            self.CancelTimers()
+            self.State = None
+            self.StartTimer(self.BootDelay, self.Boot)
+
+    """
+    Send an NMT command to a node, or to all nodes if nodeid is 0. Command is
+    also applied by this node when it's concerned
+    """
+    def SendNMT(self, command, nodeid = 0):
+        self.Send(NMT_COBID, chr(command) + chr(nodeid))
+        self.ProcessNMT(command, nodeid)
+
+#-------------------------------------------------------------------------------
+#                          Heartbeat and SYNC Producers
+#-------------------------------------------------------------------------------
+
+    def SendHeartbeat(self):
+        self.StartTimer(self.HeartbeatTime, self.SendHeartbeat)
+        self.Send(NMT_ERROR_CONTROL_BASE + self.NodeID, chr(self.State))
+
+    def SendSync(self):
+        self.StartTimer(self.SyncPeriod, self.SendSync)
+        if self.State == NMT_STOPPED:
+            return
+        if self.SyncOverflow > 1:
+            self.SyncCounter = self.SyncCounter % self.SyncOverflow + 1
+            self.Send(self.SyncCobID, chr(self.SyncCounter))
+        else:
+            self.Send(self.SyncCobID)
+
+    """
+    Called when a heartbeat of a node monitored isn't received in time
+    """
+    def OnHeartbeatTimeout(self, nodeid):
+        self.Statistics["heartbeat_timeouts"] += 1
+        self.ConsumerTimers.pop(nodeid, None)
+
+    def ProcessHeartbeat(self, nodeid, state):
+        timer = self.ConsumerTimers.get(nodeid, None)
+        if timer is not None:
+            self.Bus.Cancel(timer)
+        if state == NMT_BOOTUP:
+            # Monitoring starts with the first heartbeat
+            self.ConsumerTimers.pop(nodeid, None)
+        else:
+            self.ConsumerTimers[nodeid] = self.StartTimer(self.Consumers[nodeid], self.OnHeartbeatTimeout, nodeid)
+
+#-------------------------------------------------------------------------------
+#                              PDO Transmission
+#-------------------------------------------------------------------------------
+
+    def SendPDO(self, pdo, trigger):
+        frame = CanFrame(pdo.CobID, pdo.Data)
+        frame.Trigger = trigger
+        pdo.LastTime = self.Bus.GetTime()
+        pdo.Changed = False
+        self.Send(frame)
+
+    """
+    Send an event driven PDO when its inhibit time is elapsed and restart its
+    event timer
+    """
+    def TriggerPDO(self, pdo):
+        now = self.Bus.GetTime()
+        if pdo.LastTime is not None and pdo.InhibitTime > 0 and now < pdo.LastTime + pdo.InhibitTime:
+            if pdo.Timer is None or pdo.Timer[0] > pdo.LastTime + pdo.InhibitTime:
+                self.Bus.Cancel(pdo.Timer)
+                pdo.Timer = self.StartTimer(pdo.LastTime + pdo.InhibitTime - now, self.OnPDOTimer, pdo)
+            return
+        self.SendPDO(pdo, now)
+        self.Bus.Cancel(pdo.Timer)
+        pdo.Timer = None
+        if pdo.EventTime > 0:
+            pdo.Timer = self.StartTimer(pdo.EventTime, self.OnPDOTimer, pdo)
+
+    def OnPDOTimer(self, pdo):
+        pdo.Timer = None
+        if self.State == NMT_OPERATIONAL:
+            self.TriggerPDO(pdo)
+
+    def ProcessSync(self, frame):
+        if self.State != NMT_OPERATIONAL:
+            return
+        for pdo in self.SyncPDOs:
+            if pdo.Transmission == TRANSMISSION_SYNC_ACYCLIC:
+                if pdo.Changed:
+                    self.SendPDO(pdo, frame.Timestamp)
+            else:
+                pdo.Counter += 1
+                if pdo.Counter >= pdo.Transmission:
+                    pdo.Counter = 0
+                    self.SendPDO(pdo, frame.Timestamp)
+
+#-------------------------------------------------------------------------------
+#                              Frames Processing
+#-------------------------------------------------------------------------------
+
+    def Receive(self, frame):
+        cobid = frame.CobID
+        if cobid == NMT_COBID:
+            if len(frame.Data) >= 2:
+                self.ProcessNMT(ord(frame.Data[0]), ord(frame.Data[1]))
+        elif cobid == self.SyncCobID and not frame.RTR:
+            self.ProcessSync(frame)
+        elif frame.RTR and cobid in self.RemotePDOs:
+            if self.State == NMT_OPERATIONAL:
+                self.SendPDO(self.RemotePDOs[cobid], frame.Timestamp)
+        elif cobid in self.RPDOCobIDs:
+            if self.State == NMT_OPERATIONAL:
+                self.Statistics["rpdos"] += 1
+                self.ReceivedPDOs[cobid] = frame.Data
+        elif NMT_ERROR_CONTROL_BASE < cobid <= NMT_ERROR_CONTROL_BASE + 0x7F and len(frame.Data) > 0:
+            self.ProcessHeartbeat(cobid - NMT_ERROR_CONTROL_BASE, ord(frame.Data[0]) & 0x7F)
+
+    def OnTransmitted(self, frame):
+        now = frame.Timestamp
+        self.Statistics["frames"] += 1
+        trigger = getattr(frame, "Trigger", None)
+        if trigger is not None:
+            latency = now - trigger
+            self.Statistics["pdos"] += 1
+            self.Statistics["pdo_latency_total"] += latency
+            if latency > self.Statistics["pdo_latency_max"]:
+                self.Statistics["pdo_latency_max"] = latency
+        elif frame.CobID == NMT_ERROR_CONTROL_BASE + self.NodeID:
+            if self.LastHeartbeat is not None:
+                self.Statistics["heartbeat_interval_max"] = max(self.Statistics["heartbeat_interval_max"], now - self.LastHeartbeat)
+            self.LastHeartbeat = now
+        elif frame.CobID == self.SyncCobID and self.SyncProducer:
+            self.Statistics["syncs"] += 1
+            if self.LastSync is not None:
+                self.Statistics["sync_interval_max"] = max(self.Statistics["sync_interval_max"], now - self.LastSync)
+            self.LastSync = now
+            # Bus doesn't give frames back to their sender
+            self.ProcessSync(frame)
+
+"""
+Simulated node acting as NMT master: all the nodes are started once it has
+booted
+"""
+
+class SimulatedMaster(SimulatedNode):
+
+    def __init__(self, node, nodeid, name = None, queue_size = 32, boot_delay = 0., start_delay = 0.):
+        SimulatedNode.__init__(self, node, nodeid, name, queue_size, boot_delay)
+        self.StartDelay = start_delay
+
+    def OnBoot(self):
+        if self.StartDelay is not None:
+            self.StartTimer(self.StartDelay, self.SendNMT, NMT_START, 0)
+
+#-------------------------------------------------------------------------------
+#                          Definition of NetworkSimulator Object
+#-------------------------------------------------------------------------------
+
+# Columns of the statistics exported for each node
+STATISTICS_COLUMNS = ["frames", "pdos", "rpdos", "syncs", "rejected", "pdo_latency_mean", "pdo_latency_max",
+                      "heartbeat_interval_max", "sync_interval_max", "heartbeat_timeouts"]
+
+"""
+Class simulating the network of a NodeList project on a VirtualCanBus: master
+and slaves are simulated from their object dictionary, master starting all the
+nodes when it has booted
+"""
+
+class NetworkSimulator:
+
+    def __init__(self, nodelist = None, bitrate = 1000000, stuffing = True, queue_size = 32, start_delay = 0.):
+        self.Bus = VirtualCanBus(bitrate, stuffing)
+        self.QueueSize = queue_size
+        self.StartDelay = start_delay
+        self.Nodes = {}
+        self.WallTime = 0.
+        if nodelist is not None:
+            self.AddNodeList(nodelist)
+
+    def GetBus(self):
+        return self.Bus
+
+    def GetNode(self, nodeid):
+        return self.Nodes.get(nodeid, None)
+
+    def GetNodeIDs(self):
+        nodeids = self.Nodes.keys()
+        nodeids.sort()
+        return nodeids
+
+    def AddNode(self, node, nodeid, master = False, name = None):
+        if nodeid in self.Nodes:
+            raise ValueError, "Node 0x%2.2X is already simulated"%nodeid
+        if master:
+            simulated = SimulatedMaster(node, nodeid, name, self.QueueSize, start_delay = self.StartDelay)
+        else:
+            simulated = SimulatedNode(node, nodeid, name, self.QueueSize)
+        self.Nodes[nodeid] = self.Bus.Attach(simulated)
+        return simulated
+
+    def AddNodeList(self, nodelist):
+        for nodeid in nodelist.GetSlaveIDs():
+            self.AddNode(nodelist.SlaveNodes[nodeid]["Node"], nodeid, name = nodelist.GetSlaveName(nodeid))
+        master = nodelist.GetManager().CurrentNode
+        if master is not None:
+            self.AddNode(master, nodelist.GetMasterNodeID(), True)
+
+    """
+    Run the simulation during the simulated time given. Return the ratio
+    between simulated time and time really spent
+    """
+    def Run(self, duration):
+        start = time.time()
+        self.Bus.RunFor(duration)
+        elapsed = time.time() - start
+        self.WallTime += elapsed
+        if elapsed > 0:
+            return duration / elapsed
+        return None
+
+    """
+    Return the statistics of the simulation as a dictionary with the bus
+    statistics in "bus", the statistics of each node in "nodes" and the
+    time really spent in "wall"
+    """
+    def GetStatistics(self):
+        return {"bus" : self.Bus.GetStatistics(), "wall" : self.WallTime,
+                "nodes" : dict([(nodeid, node.GetStatistics()) for nodeid, node in self.Nodes.iteritems()])}
+
+    """
+    Write the statistics of each node in a CSV file
+    """
+    def ExportStatistics(self, filepath):
+        import csv
+        file = open(filepath, "wb")
+        writer = csv.writer(file)
+        writer.writerow(["nodeid", "name"] + STATISTICS_COLUMNS)
+        for nodeid in self.GetNodeIDs():
+            statistics = self.Nodes[nodeid].GetStatistics()
+            writer.writerow(["0x%2.2X"%nodeid, self.Nodes[nodeid].GetName()] + [statistics[column] for column in STATISTICS_COLUMNS])
+        file.close()
+
+#-------------------------------------------------------------------------------
+#                              Command Line
+#-------------------------------------------------------------------------------
+
+def usage():
+    print _("\nUsage of netsim.py :")
+    print "\n   %s [options] ProjectFolder\n"%sys.argv[0]
+    print _("   ProjectFolder : folder of the NodeList project of the network")
+    print _("   -b, --bitrate : bitrate of the bus in bit/s (default 1000000)")
+    print _("   -d, --duration : simulated time in seconds (default 1)")
+    print _("   -o, --output : CSV file where statistics of nodes are written\n")
+
+if __name__ == '__main__':
+    import getopt, __builtin__
+    # Loading a project needs translation function in other modules too
+    __builtin__.__dict__['_'] = lambda x: x
+
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "hb:d:o:", ["help", "bitrate=", "duration=", "output="])
+    except getopt.GetoptError:
+        usage()
+        sys.exit(2)
+    if len(args) != 1:
+        usage()
+        sys.exit()
+
+    bitrate = 1000000
+    duration = 1.
+    output = None
+    for o, a in opts:
+        if o in ("-h", "--help"):
+            usage()
+            sys.exit()
+        elif o in ("-b", "--bitrate"):
+            bitrate = int(a)
+        elif o in ("-d", "--duration"):
+            duration = float(a)
+        elif o in ("-o", "--output"):
+            output = a
+
+    from nodemanager import NodeManager
+    from nodelist import NodeList
+    nodelist = NodeList(NodeManager())
+    result = nodelist.LoadProject(args[0])
+    if result is not None:
+        print result
+        sys.exit(-1)
+    simulator = NetworkSimulator(nodelist, bitrate)
+    ratio = simulator.Run(duration)
+    statistics = simulator.GetStatistics()
+    bus = statistics["bus"]
+    print _("%d nodes, %d frames, bus load %.1f%%, %.1f times faster than real time")%(len(statistics["nodes"]), bus["frames"], bus["load"] * 100, ratio or 0)
+    if output is not None:
+        simulator.ExportStatistics(output)
+    else:
+        for nodeid in simulator.GetNodeIDs():
+            node = statistics["nodes"][nodeid]
+            print "0x%2.2X %s"%(nodeid, " ".join(["%s=%s"%(column, node[column]) for column in STATISTICS_COLUMNS]))
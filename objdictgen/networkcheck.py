@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+from types import *
+
+#-------------------------------------------------------------------------------
+#                            COB ID Definitions
+#-------------------------------------------------------------------------------
+
+PRODUCER = "producer"
+CONSUMER = "consumer"
+
+# Entries containing a COB ID: (first index, last index, subindex, service, role)
+CobIDEntries = [
+    (0x1014, 0x1014, 0, "EMCY", PRODUCER),
+    (0x1200, 0x127F, 1, "SDO server RX", CONSUMER),
+    (0x1200, 0x127F, 2, "SDO server TX", PRODUCER),
+    (0x1280, 0x12FF, 1, "SDO client TX", PRODUCER),
+    (0x1280, 0x12FF, 2, "SDO client RX", CONSUMER),
+    (0x1400, 0x15FF, 1, "RPDO", CONSUMER),
+    (0x1800, 0x19FF, 1, "TPDO", PRODUCER),
+]
+
+# Services that can be received by a node without any producer configured
+# (SDO servers are accessed by tools connected on demand)
+OptionalProducerServices = ["SDO server RX"]
+
+COBID_INVALID = 0x80000000
+COBID_SYNC_PRODUCER = 0x40000000
+COBID_EXTENDED = 0x20000000
+
+"""
+Return the CAN identifier of a COB ID entry value, None if COB ID isn't valid
+"""
+def GetCanID(value):
+    if not isinstance(value, (IntType, LongType)) or value & COBID_INVALID:
+        return None
+    if value & COBID_EXTENDED:
+        return value & 0x1FFFFFFF
+    return value & 0x7FF
+
+"""
+Return the CAN identifier of a SYNC COB ID entry value (0x1005), None if SYNC
+isn't configured. Bit 31 of SYNC COB ID isn't a validity flag and COB ID 0 is
+the NMT one
+"""
+def GetSyncCanID(value):
+    if not isinstance(value, (IntType, LongType)):
+        return None
+    cobid = GetCanID(value & ~COBID_INVALID)
+    if cobid == 0:
+        return None
+    return cobid
+
+#-------------------------------------------------------------------------------
+#                             COB ID Table
+#-------------------------------------------------------------------------------
+
+"""
+Class recording which node produces and consumes each COB ID of a network
+"""
+
+class CobIDTable:
+
+    def __init__(self):
+        # For each COB ID, list of (nodeid, index, subindex, service)
+        self.Producers = {}
+        self.Consumers = {}
+
+    def AddUser(self, role, cobid, nodeid, index, subIndex, service):
+        if role == PRODUCER:
+            table = self.Producers
+        else:
+            table = self.Consumers
+        table.setdefault(cobid, []).append((nodeid, index, subIndex, service))
+
+    """
+    Add the COB IDs of all the nodes in a NetworkIndex
+    """
+    def AddNetworkIndex(self, index):
+        for first, last, subIndex, service, role in CobIDEntries:
+            for (nodeid, entry_index), value in index.GetRangeValues(first, last, subIndex).iteritems():
+                cobid = GetCanID(value)
+                if cobid is not None:
+                    self.AddUser(role, cobid, nodeid, entry_index, subIndex, service)
+        for nodeid, value in index.GetEntryValues(0x1005, 0).iteritems():
+            cobid = GetSyncCanID(value)
+            if cobid is not None:
+                if value & COBID_SYNC_PRODUCER:
+                    self.AddUser(PRODUCER, cobid, nodeid, 0x1005, 0, "SYNC")
+                else:
+                    self.AddUser(CONSUMER, cobid, nodeid, 0x1005, 0, "SYNC")
+        # Every node sends its boot-up message on NMT error control COB ID,
+        # heartbeat is sent on the same COB ID when producer time isn't null
+        heartbeats = index.GetEntryValues(0x1017, 0)
+        for nodeid in index.GetNodeIDs():
+            if heartbeats.get(nodeid, 0):
+                self.AddUser(PRODUCER, 0x700 + nodeid, nodeid, 0x1017, 0, "Heartbeat")
+            else:
+                self.AddUser(PRODUCER, 0x700 + nodeid, nodeid, None, None, "Boot-up")
+        for (nodeid, entry_index), values in index.GetRangeValues(0x1016, 0x1016).iteritems():
+            for subIndex, value in enumerate(values[1:]):
+                if isinstance(value, (IntType, LongType)) and value & 0xFFFF and (value >> 16) & 0x7F:
+                    self.AddUser(CONSUMER, 0x700 + ((value >> 16) & 0x7F), nodeid, 0x1016, subIndex + 1, "Heartbeat")
+
+    """
+    Return the list of conflicts found in the table. Each conflict is a
+    dictionary with the conflict type ("duplicate", "unproduced" or
+    "unconsumed"), the COB ID and the list of (nodeid, index, subindex, service)
+    involved
+    """
+    def GetConflicts(self):
+        conflicts = []
+        for cobid, producers in self.Producers.iteritems():
+            if len(producers) > 1:
+                conflicts.append({"type" : "duplicate", "cobid" : cobid, "users" : producers[:]})
+        for cobid, consumers in self.Consumers.iteritems():
+            if cobid not in self.Producers:
+                users = [consumer for consumer in consumers if consumer[3] not in OptionalProducerServices and consumer[3] != "SYNC"]
+                if len(users) > 0:
+                    conflicts.append({"type" : "unproduced", "cobid" : cobid, "users" : users})
+            elif [producer for producer in self.Producers[cobid] if producer[3] == "Boot-up"]:
+                users = [consumer for consumer in consumers if consumer[3] == "Heartbeat"]
+                if len(users) > 0:
+                    conflicts.append({"type" : "unproduced", "cobid" : cobid, "users" : users})
+        for cobid, producers in self.Producers.iteritems():
+            if cobid not in self.Consumers:
+                users = [producer for producer in producers if producer[3] == "TPDO"]
+                if len(users) > 0:
+                    conflicts.append({"type" : "unconsumed", "cobid" : cobid, "users" : users})
+        conflicts.sort(lambda x, y: cmp((x["cobid"], x["type"]), (y["cobid"], y["type"])))
+        return conflicts
+
+#-------------------------------------------------------------------------------
+#                           Network COB ID Check
+#-------------------------------------------------------------------------------
+
+"""
+Return the COB ID table of a network: the slaves and the master node of the
+NodeList
+"""
+def BuildCobIDTable(nodelist):
+    table = CobIDTable()
+    for index in nodelist.GetNetworkIndexes():
+        table.AddNetworkIndex(index)
+    return table
+
+"""
+Return the list of COB ID conflicts of a network
+"""
+def GetCobIDConflicts(nodelist):
+    return BuildCobIDTable(nodelist).GetConflicts()
+
+"""
+Return a text describing a COB ID user
+"""
+def FormatCobIDUser(user):
+    nodeid, index, subIndex, service = user
+    if index is None:
+        return _("%s of node 0x%2.2X")%(service, nodeid)
+    return _("%s of node 0x%2.2X (0x%4.4X sub 0x%2.2X)")%(service, nodeid, index, subIndex)
+
+"""
+Return a message for each COB ID conflict given, only for the conflict types
+given if any
+"""
+def GetCobIDConflictsMessages(conflicts, types = None):
+    messages = []
+    for conflict in conflicts:
+        if types is not None and conflict["type"] not in types:
+            continue
+        users = ", ".join([FormatCobIDUser(user) for user in conflict["users"]])
+        if conflict["type"] == "duplicate":
+            messages.append(_("COB ID 0x%3.3X is produced by %s")%(conflict["cobid"], users))
+        elif conflict["type"] == "unproduced":
+            messages.append(_("COB ID 0x%3.3X is consumed by %s but isn't produced")%(conflict["cobid"], users))
+        else:
+            messages.append(_("COB ID 0x%3.3X is produced by %s but isn't consumed")%(conflict["cobid"], users))
+    return messages
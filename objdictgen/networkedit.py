@@ -444,6 +444,12 @@ class networkedit(wx.Frame, NetworkEditorTemplate):
                 message = wx.MessageDialog(self, result, _("Error"), wx.OK|wx.ICON_ERROR)
                 message.ShowModal()
                 message.Destroy()
+            else:
+                conflicts = self.NodeList.GetCobIDConflictsMessages(["duplicate"])
+                if len(conflicts) > 0:
+                    message = wx.MessageDialog(self, "\n".join(conflicts), _("COB ID conflicts"), wx.OK|wx.ICON_WARNING)
+                    message.ShowModal()
+                    message.Destroy()
         
     def OnCloseProjectMenu(self, event):
         if self.NodeList:
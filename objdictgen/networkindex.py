@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+from types import *
+import bisect
+
+try:
+    set
+except NameError:
+    from sets import Set as set
+
+#-------------------------------------------------------------------------------
+#                        Definition of NetworkIndex Object
+#-------------------------------------------------------------------------------
+
+"""
+Class indexing the entries of all the nodes of a CANOpen network so that
+questions about the whole network can be answered without looking in each node.
+Values are computed with the ID of each node when it is added in the index.
+"""
+
+class NetworkIndex:
+
+    def __init__(self):
+        self.Clear()
+
+    """
+    Remove all the nodes from the index
+    """
+    def Clear(self):
+        # Node indexed for each node ID
+        self.Nodes = {}
+        # Sorted list of node IDs indexed
+        self.NodeIDs = []
+        # Set of node IDs implementing each index
+        self.IndexNodes = {}
+        # Values of each entry for each node ID: {index : {nodeid : values}}
+        self.Entries = {}
+        # Sorted list of all indexes implemented in the network
+        self.SortedIndexes = None
+
+    """
+    Add a node in the index, replacing the node previously indexed with the
+    same node ID
+    """
+    def AddNode(self, nodeid, node):
+        if nodeid in self.Nodes:
+            self.RemoveNode(nodeid)
+        self.Nodes[nodeid] = node
+        bisect.insort(self.NodeIDs, nodeid)
+        for index in node.GetIndexes():
+            if index not in self.IndexNodes:
+                self.IndexNodes[index] = set()
+                self.Entries[index] = {}
+                self.SortedIndexes = None
+            self.IndexNodes[index].add(nodeid)
+            self.Entries[index][nodeid] = node.GetEntry(index, nodeid = nodeid)
+
+    """
+    Remove the node with the node ID given from the index
+    """
+    def RemoveNode(self, nodeid):
+        node = self.Nodes.pop(nodeid, None)
+        if node is None:
+            return
+        self.NodeIDs.remove(nodeid)
+        for index in self.Entries.keys():
+            entries = self.Entries[index]
+            if nodeid in entries:
+                entries.pop(nodeid)
+                self.IndexNodes[index].discard(nodeid)
+                if len(entries) == 0:
+                    self.Entries.pop(index)
+                    self.IndexNodes.pop(index)
+                    self.SortedIndexes = None
+
+    """
+    Return True if a node with the node ID given is indexed
+    """
+    def HasNode(self, nodeid):
+        return nodeid in self.Nodes
+
+    """
+    Return the sorted list of the node IDs indexed
+    """
+    def GetNodeIDs(self):
+        return self.NodeIDs[:]
+
+    """
+    Return the sorted list of all the indexes implemented in the network
+    """
+    def GetIndexes(self):
+        if self.SortedIndexes is None:
+            self.SortedIndexes = self.Entries.keys()
+            self.SortedIndexes.sort()
+        return self.SortedIndexes[:]
+
+    """
+    Return the sorted list of the node IDs of the nodes implementing index
+    """
+    def GetNodesWithIndex(self, index):
+        nodeids = list(self.IndexNodes.get(index, []))
+        nodeids.sort()
+        return nodeids
+
+    """
+    Return the value of an entry of the node with the node ID given as returned
+    by Node.GetEntry, None if the node or the entry doesn't exist
+    """
+    def GetNodeEntry(self, nodeid, index, subIndex = None):
+        values = self.Entries.get(index, {}).get(nodeid, None)
+        return self.ExtractValue(values, subIndex)
+
+    """
+    Return the value of a subindex from the values of an entry
+    """
+    def ExtractValue(self, values, subIndex):
+        if values is None:
+            return None
+        if type(values) == ListType:
+            if subIndex == None:
+                return values[:]
+            elif 0 <= subIndex < len(values):
+                return values[subIndex]
+            return None
+        elif not subIndex:
+            return values
+        return None
+
+    """
+    Return the values of an entry for all the nodes implementing it as a
+    dictionary {nodeid : value}
+    """
+    def GetEntryValues(self, index, subIndex = None):
+        result = {}
+        for nodeid, values in self.Entries.get(index, {}).iteritems():
+            value = self.ExtractValue(values, subIndex)
+            if value is not None:
+                result[nodeid] = value
+        return result
+
+    """
+    Return the values of a subindex of all the entries between min and max for
+    all the nodes as a dictionary {(nodeid, index) : value}
+    """
+    def GetRangeValues(self, min, max, subIndex = None):
+        result = {}
+        indexes = self.GetIndexes()
+        for index in indexes[bisect.bisect_left(indexes, min):bisect.bisect_right(indexes, max)]:
+            for nodeid, values in self.Entries[index].iteritems():
+                value = self.ExtractValue(values, subIndex)
+                if value is not None:
+                    result[(nodeid, index)] = value
+        return result
+
+    """
+    Return the sorted list of the node IDs of the nodes having the value given
+    in an entry
+    """
+    def FindNodesWithValue(self, index, subIndex, value):
+        nodeids = [nodeid for nodeid, nodevalue in self.GetEntryValues(index, subIndex).iteritems() if nodevalue == value]
+        nodeids.sort()
+        return nodeids
+
+    """
+    Return the COB IDs of all the transmit PDOs (or receive PDOs if transmit is
+    False) of the network as a dictionary {(nodeid, index) : cobid}
+    """
+    def GetPDOCobIDs(self, transmit = True):
+        if transmit:
+            return self.GetRangeValues(0x1800, 0x19FF, 1)
+        return self.GetRangeValues(0x1400, 0x15FF, 1)
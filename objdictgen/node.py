@@ -24,6 +24,7 @@
 import cPickle
 from types import *
 import re
+import profiles, concisedcf, endianness, formulas
 
 """
 Dictionary of translation between access symbol and their signification
@@ -497,6 +498,7 @@ class Node:
     Return the Specific Profile
     """
     def GetProfile(self):
+        self.ResolveProfiles()
         return self.Profile
     
     """
@@ -505,6 +507,16 @@ class Node:
     def SetProfile(self, profile):
         self.Profile = profile
     
+    """
+    Replace the profile references restored from a file or a copy by the shared
+    profile mappings
+    """
+    def ResolveProfiles(self):
+        if isinstance(self.Profile, profiles.ProfileReference):
+            self.Profile = profiles.ResolveProfile(self.Profile)
+        if isinstance(self.DS302, profiles.ProfileReference):
+            self.DS302 = profiles.ResolveProfile(self.DS302)
+    
     """
     Return the default string size
     """
@@ -527,6 +539,7 @@ class Node:
     Define the DS-302 Profile
     """
     def GetDS302Profile(self):
+        self.ResolveProfiles()
         return self.DS302
     
     """
@@ -552,6 +565,7 @@ class Node:
     Function which return the different Mappings available for this node
     """
     def GetMappings(self, userdefinedtoo = True):
+        self.ResolveProfiles()
         if userdefinedtoo:
             return [self.Profile, self.DS302, self.UserMapping]
         else:
@@ -656,25 +670,26 @@ class Node:
     
     """
     Returns the value of the entry asked. If the entry has the value "count", it
-    returns the number of subIndex in the entry except the first.
+    returns the number of subIndex in the entry except the first. Values depending
+    on node ID are computed with nodeid if given, with node ID otherwise.
     """
-    def GetEntry(self, index, subIndex = None, compute = True):
+    def GetEntry(self, index, subIndex = None, compute = True, nodeid = None):
         if index in self.Dictionary:
             if subIndex == None:
                 if type(self.Dictionary[index]) == ListType:
                     values = [len(self.Dictionary[index])]
                     for value in self.Dictionary[index]:
-                        values.append(self.CompileValue(value, index, compute))
+                        values.append(self.CompileValue(value, index, compute, nodeid))
                     return values
                 else:
-                    return self.CompileValue(self.Dictionary[index], index, compute)
+                    return self.CompileValue(self.Dictionary[index], index, compute, nodeid)
             elif subIndex == 0:
                 if type(self.Dictionary[index]) == ListType:
                     return len(self.Dictionary[index])
                 else:
-                    return self.CompileValue(self.Dictionary[index], index, compute)
+                    return self.CompileValue(self.Dictionary[index], index, compute, nodeid)
             elif type(self.Dictionary[index]) == ListType and 0 < subIndex <= len(self.Dictionary[index]):
-                return self.CompileValue(self.Dictionary[index][subIndex - 1], index, compute)
+                return self.CompileValue(self.Dictionary[index][subIndex - 1], index, compute, nodeid)
         return None
 
     """
@@ -881,6 +896,31 @@ class Node:
     """
     def Copy(self):
         return cPickle.loads(cPickle.dumps(self))
+    
+    """
+    Return the state to save in copies and files. Shared profile mappings are
+    replaced by their reference, other profile mappings by a modifiable copy
+    """
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ["Profile", "DS302"]:
+            reference = profiles.GetProfileReference(state.get(name))
+            if reference is not None:
+                state[name] = reference
+            elif isinstance(state.get(name), profiles.FrozenDict):
+                state[name] = profiles.ThawStructure(state[name])
+        return state
+
+    """
+    Restore the state saved in copies and files. Profile mappings saved as
+    modifiable copies are frozen again
+    """
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        for name in ["Profile", "DS302"]:
+            value = self.__dict__.get(name)
+            if isinstance(value, DictType) and not isinstance(value, profiles.FrozenDict):
+                self.__dict__[name] = profiles.FreezeStructure(value)
 
     """
     Return a sorted list of indexes in Object Dictionary
@@ -908,20 +948,12 @@ class Node:
                 for subidx, value in enumerate(values):
                     subentry_infos = self.GetSubentryInfos(index, subidx + 1)
                     if index == 0x1F22 and value:
-                        nb_params = BE_to_LE(value[:4])
-                        data = value[4:]
-                        value = "%d arg defined"%nb_params
-                        i = 0
-                        count = 1
-                        while i < len(data):
-                            value += "\n%04X %02X, arg %d: "%(index, subidx+1, count)
-                            value += "%04X"%BE_to_LE(data[i:i+2])
-                            value += " %02X"%BE_to_LE(data[i+2:i+3])
-                            size = BE_to_LE(data[i+3:i+7])
-                            value += " %08X"%size
-                            value += (" %0"+"%d"%(size * 2)+"X")%BE_to_LE(data[i+7:i+7+size])
-                            i += 7 + size
-                            count += 1
+                        dcf = concisedcf.ConciseDCF(value)
+                        value = "%d arg defined"%len(dcf)
+                        for count, (param_index, param_subindex, size, param_value) in enumerate(dcf.GetParameters()):
+                            value += "\n%04X %02X, arg %d: "%(index, subidx+1, count + 1)
+                            value += "%04X %02X %08X"%(param_index, param_subindex, size)
+                            value += (" %0"+"%d"%(size * 2)+"X")%param_value
                     elif isinstance(value, IntType):
                         value = "%X"%value
                     result += "%04X %02X (%s): %s\n"%(index, subidx+1, subentry_infos["name"], value)
@@ -931,19 +963,76 @@ class Node:
                 result += "%04X (%s): %s\n"%(index, name, values)
         return result
             
-    def CompileValue(self, value, index, compute = True):
-        if isinstance(value, (StringType, UnicodeType)) and value.upper().find("$NODEID") != -1:
-            base = self.GetBaseIndex(index)
-            try:
-                raw = eval(value)
-                if compute:
-                    return eval(raw.upper().replace("$NODEID","self.ID"))
-                return raw
-            except:
-                return 0
+    """
+    Return the value of an entry value for the node ID given, or the formula
+    string if compute is False. Raise ValueError if the formula is invalid
+    """
+    def CompileValue(self, value, index, compute = True, nodeid = None):
+        if formulas.IsFormula(value):
+            if nodeid is None:
+                nodeid = self.ID
+            raw = self.GetStoredValue(value, index)
+            # Formula can give a value that doesn't depend on node ID
+            if compute and isinstance(raw, (StringType, UnicodeType)):
+                return formulas.CompileFormula(raw).Evaluate(nodeid)
+            return raw
         else:
             return value
 
+    """
+    Return the formula string or the number given by a stored value depending
+    on node ID for the entry given
+    """
+    def GetStoredValue(self, value, index):
+        if formulas.NeedsBase(value):
+            return formulas.EvaluateStoredValue(value, self.GetBaseIndex(index))
+        return formulas.EvaluateStoredValue(value)
+
+    """
+    Return the compiled formula of a stored value for the entry given, None if
+    value doesn't depend on node ID or formula is invalid
+    """
+    def GetValueFormula(self, value, index):
+        if formulas.IsFormula(value):
+            try:
+                raw = self.GetStoredValue(value, index)
+                if isinstance(raw, (StringType, UnicodeType)):
+                    return formulas.CompileFormula(raw)
+            except:
+                pass
+        return None
+
+    """
+    Return the list of (index, subindex, NodeIDFormula) of all the values
+    depending on node ID
+    """
+    def GetFormulaEntries(self):
+        result = []
+        indexes = self.Dictionary.keys()
+        indexes.sort()
+        for index in indexes:
+            values = self.Dictionary[index]
+            if type(values) == ListType:
+                for subIndex, value in enumerate(values):
+                    formula = self.GetValueFormula(value, index)
+                    if formula is not None:
+                        result.append((index, subIndex + 1, formula))
+            else:
+                formula = self.GetValueFormula(values, index)
+                if formula is not None:
+                    result.append((index, 0, formula))
+        return result
+
+    """
+    Return the values depending on node ID computed for the node ID given (node
+    ID if not given) as a dictionary {(index, subindex) : value}
+    """
+    def ComputeFormulaValues(self, nodeid = None):
+        if nodeid is None:
+            nodeid = self.GetNodeID()
+        return dict([((index, subIndex), formula.Evaluate(nodeid))
+                     for index, subIndex, formula in self.GetFormulaEntries()])
+
 #-------------------------------------------------------------------------------
 #                         Node Informations Functions
 #-------------------------------------------------------------------------------
@@ -1136,6 +1225,155 @@ class Node:
         list = [_("None")] + [self.GenerateMapName(name, index, subIndex) for index, subIndex, size, name in self.GetMapVariableList()]
         return ",".join(list)
 
+#-------------------------------------------------------------------------------
+#                        Definition of NodeOverlay Object
+#-------------------------------------------------------------------------------
+
+"""
+Class giving a view of a shared base node with its own node ID and its own
+values. Only the values modified are recorded in the overlay, everything else
+is read in the base node without copying it, so many nodes using the same EDS
+share one parsed dictionary. The base node is never modified through the
+overlay and reading it doesn't change its node ID.
+"""
+
+# Attributes and methods of the base node that can't be used through an overlay,
+# because they give access to raw values or modify the shared base node
+OverlayBlockedAttributes = ["Dictionary", "AddEntry", "SetParamsEntry", "RemoveEntry",
+    "AddMappingEntry", "SetMappingEntry", "RemoveMappingEntry", "RemoveMapVariable",
+    "UpdateMapVariable", "RemoveLine", "RemoveUserType", "SetNodeName", "SetNodeType",
+    "SetNodeDescription", "SetProfileName", "SetProfile", "SetDS302Profile",
+    "SetSpecificMenu", "ExtendSpecificMenu", "SetDefaultStringSize"]
+
+# Base node methods reading values with GetEntry, run on the overlay so that
+# they use the overlay values. Other base node methods read the entries
+# structure, parameters and mappings, that are the ones of the base node
+OverlayValueMethods = ["GetCustomisedTypeValues", "IsStringType", "IsRealType",
+    "GetMapVariableList", "GetMapValue", "GetMapName", "GetMapList", "GenerateMapList"]
+
+class NodeOverlay:
+
+    def __init__(self, base, nodeid):
+        self.Base = base
+        self.ID = nodeid
+        # Raw values modified for this node {(index, subindex) : value}
+        self.Values = {}
+
+    """
+    Values not defined in overlay are read in base node
+    """
+    def __getattr__(self, name):
+        if name.startswith("__") or name == "Base":
+            raise AttributeError, name
+        if name in OverlayBlockedAttributes:
+            raise AttributeError, "\"%s\" can't be used on a node overlay, base node is shared"%name
+        return getattr(self.Base, name)
+
+    """
+    Return a standalone copy of the base node with the overlay node ID and values
+    """
+    def Copy(self):
+        node = self.Base.Copy()
+        node.SetNodeID(self.ID)
+        for (index, subIndex), value in self.Values.iteritems():
+            node.SetEntry(index, subIndex, value)
+        return node
+
+    def Print(self):
+        print self.PrintString()
+
+    def PrintString(self):
+        return self.Copy().PrintString()
+
+    def GetBaseNode(self):
+        return self.Base
+
+    def GetNodeID(self):
+        return self.ID
+
+    def SetNodeID(self, id):
+        self.ID = id
+
+    def GetChangedValues(self):
+        return self.Values.copy()
+
+    def ResetValues(self):
+        self.Values = {}
+
+    """
+    Returns the value of a subentry as it's stored, taking the overlay values
+    into account
+    """
+    def GetRawValue(self, index, subIndex):
+        if (index, subIndex) in self.Values:
+            return self.Values[(index, subIndex)]
+        if type(self.Base.Dictionary[index]) == ListType:
+            return self.Base.Dictionary[index][subIndex - 1]
+        return self.Base.Dictionary[index]
+
+    """
+    Returns the value of the entry asked, as Node.GetEntry does. Values depending
+    on node ID are computed with the overlay node ID if nodeid isn't given.
+    """
+    def GetEntry(self, index, subIndex = None, compute = True, nodeid = None):
+        if nodeid is None:
+            nodeid = self.ID
+        if len(self.Values) == 0 or not self.Base.IsEntry(index):
+            return self.Base.GetEntry(index, subIndex, compute, nodeid)
+        if subIndex == None and type(self.Base.Dictionary[index]) == ListType:
+            values = self.Base.GetEntry(index, None, False)
+            for i in xrange(1, len(values)):
+                values[i] = self.Base.CompileValue(self.GetRawValue(index, i), index, compute, nodeid)
+            return values
+        if subIndex == None:
+            subIndex = 0
+        if (index, subIndex) in self.Values and (subIndex > 0 or type(self.Base.Dictionary[index]) != ListType):
+            return self.Base.CompileValue(self.Values[(index, subIndex)], index, compute, nodeid)
+        return self.Base.GetEntry(index, subIndex, compute, nodeid)
+
+    """
+    Return the list of (index, subindex, NodeIDFormula) of all the values
+    depending on node ID, taking the overlay values into account
+    """
+    def GetFormulaEntries(self):
+        result = [(index, subIndex, formula) for index, subIndex, formula in self.Base.GetFormulaEntries()
+                  if (index, subIndex) not in self.Values]
+        for (index, subIndex), value in self.Values.iteritems():
+            formula = self.Base.GetValueFormula(value, index)
+            if formula is not None:
+                result.append((index, subIndex, formula))
+        result.sort()
+        return result
+
+    def ComputeFormulaValues(self, nodeid = None):
+        if nodeid is None:
+            nodeid = self.ID
+        return dict([((index, subIndex), formula.Evaluate(nodeid))
+                     for index, subIndex, formula in self.GetFormulaEntries()])
+
+    """
+    Set the value of an existing subentry in the overlay, value being given as
+    Node.SetEntry stores it. Returns True if the value is set, False if
+    subentry doesn't exist
+    """
+    def SetEntry(self, index, subIndex = None, value = None):
+        if subIndex == None:
+            subIndex = 0
+        if value is None or not self.Base.IsEntry(index):
+            return False
+        if type(self.Base.Dictionary[index]) == ListType:
+            if not 0 < subIndex <= len(self.Base.Dictionary[index]):
+                return False
+        elif subIndex != 0:
+            return False
+        self.Values.pop((index, subIndex), None)
+        if value != self.GetRawValue(index, subIndex):
+            self.Values[(index, subIndex)] = value
+        return True
+
+for name in OverlayValueMethods:
+    setattr(NodeOverlay, name, Node.__dict__[name])
+
 def BE_to_LE(value):
     """
     Convert Big Endian to Little Endian 
@@ -1144,9 +1382,7 @@ def BE_to_LE(value):
     @return: a string containing the value converted
     """
     
-    data = [char for char in value]
-    data.reverse()
-    return int("".join(["%2.2X"%ord(char) for char in data]), 16)
+    return endianness.LittleEndianToInt(value)
 
 def LE_to_BE(value, size):
     """
@@ -1156,8 +1392,5 @@ def LE_to_BE(value, size):
     @return: a string containing the value converted
     """
     
-    data = ("%" + str(size * 2) + "." + str(size * 2) + "X") % value
-    list_car = [data[i:i+2] for i in xrange(0, len(data), 2)]
-    list_car.reverse()
-    return "".join([chr(int(car, 16)) for car in list_car])
+    return endianness.IntToLittleEndian(value, size)
 
@@ -22,8 +22,10 @@
 #Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
 
 from node import *
-import eds_utils
-import os, shutil, types
+from networkindex import NetworkIndex
+from concisedcf import DCFBuilder
+import eds_utils, networkcheck, busload, syncschedule
+import os, shutil, types, ast
 
 #-------------------------------------------------------------------------------
 #                          Definition of NodeList Object
@@ -41,6 +43,7 @@ class NodeList:
         self.NetworkName = netname
         self.SlaveNodes = {}
         self.EDSNodes = {}
+        self.Index = NetworkIndex()
         self.CurrentSelected = None
         self.Changed = False
     
@@ -88,6 +91,19 @@ class NodeList:
         nodes.sort()
         return ["0x%2.2X %s"%(idx, self.SlaveNodes[idx]["Name"]) for idx in nodes]
     
+    def GetNetworkIndex(self):
+        return self.Index
+    
+    def GetNetworkIndexes(self):
+        indexes = [self.Index]
+        master = self.Manager.CurrentNode
+        if master is not None:
+            # Master node can be modified at any time, it's indexed on demand
+            masterindex = NetworkIndex()
+            masterindex.AddNode(master.GetNodeID(), master)
+            indexes.append(masterindex)
+        return indexes
+    
     def GetSlaveIDs(self):
         nodes = self.SlaveNodes.keys()
         nodes.sort()
@@ -102,6 +118,7 @@ class NodeList:
     def LoadProject(self, root, netname = None):
         self.SlaveNodes = {}
         self.EDSNodes = {}
+        self.Index.Clear()
         
         self.Root = root
         if not os.path.exists(self.Root):
@@ -128,6 +145,10 @@ class NodeList:
         if result != None:
             return result
         
+        result = self.LoadSlaveValues(netname)
+        if result != None:
+            return result
+        
         self.NetworkName = netname
     
     def SaveProject(self, netname = None):
@@ -138,6 +159,10 @@ class NodeList:
         result = self.SaveNodeList(netname)
         if result != None:
             return result
+        
+        result = self.SaveSlaveValues(netname)
+        if result != None:
+            return result
     
     def ImportEDSFile(self, edspath, force = False):
         dir, file = os.path.split(edspath)
@@ -160,8 +185,11 @@ class NodeList:
     
     def AddSlaveNode(self, nodeName, nodeID, eds):
         if eds in self.EDSNodes.keys():
-            slave = {"Name" : nodeName, "EDS" : eds, "Node" : self.EDSNodes[eds]}
+            # EDS node is shared by all the slaves using it, each slave having
+            # its own node ID and values in an overlay
+            slave = {"Name" : nodeName, "EDS" : eds, "Node" : NodeOverlay(self.EDSNodes[eds], nodeID)}
             self.SlaveNodes[nodeID] = slave
+            self.Index.AddNode(nodeID, slave["Node"])
             self.Changed = True
             return None
         else:
@@ -170,6 +198,7 @@ class NodeList:
     def RemoveSlaveNode(self, index):
         if index in self.SlaveNodes.keys():
             self.SlaveNodes.pop(index)
+            self.Index.RemoveNode(index)
             self.Changed = True
             return None
         else:
@@ -238,10 +267,81 @@ class NodeList:
         except:
             return _("Fail to save node list")
     
+    def GetSlaveValuesPath(self, netname = None):
+        if netname:
+            return os.path.join(self.Root, "%s_slavevalues.ini"%netname)
+        return os.path.join(self.Root, "slavevalues.ini")
+    
+    """
+    Load the values modified in slave overlays, saved in one section by slave
+    with lines "<index>sub<subindex>=<value>"
+    """
+    def LoadSlaveValues(self, netname = None):
+        valuespath = self.GetSlaveValuesPath(netname)
+        if not os.path.isfile(valuespath):
+            return None
+        try:
+            file = open(valuespath, "r")
+            content = file.read()
+            file.close()
+            for section_name, assignments in eds_utils.ExtractSections(content):
+                section_name = section_name.upper()
+                if not section_name.startswith("NODE") or not section_name[4:].isdigit():
+                    raise SyntaxError, _("\"[%s]\" is not a valid section")%section_name
+                nodeid = int(section_name[4:])
+                if nodeid not in self.SlaveNodes:
+                    continue
+                node = self.SlaveNodes[nodeid]["Node"]
+                for assignment in assignments:
+                    assignment = assignment.strip()
+                    if assignment == "" or assignment.startswith(";"):
+                        continue
+                    key, value = [part.strip() for part in assignment.split("=", 1)]
+                    result = eds_utils.subindex_model.match(key.upper())
+                    if result is None:
+                        raise SyntaxError, _("\"%s\" is not a valid subentry")%key
+                    index, subindex = [int(group, 16) for group in result.groups()]
+                    node.SetEntry(index, subindex, ast.literal_eval(value))
+                self.Index.AddNode(nodeid, node)
+        except (SyntaxError, ValueError), message:
+            return _("Unable to load slave values\n%s")%message
+        return None
+    
+    def SaveSlaveValues(self, netname = None):
+        valuespath = self.GetSlaveValuesPath(netname)
+        content = ""
+        for nodeid in self.GetSlaveIDs():
+            values = self.SlaveNodes[nodeid]["Node"].GetChangedValues()
+            if len(values) > 0:
+                content += "[Node%d]\n"%nodeid
+                for (index, subindex), value in sorted(values.items()):
+                    content += "%4.4Xsub%X=%r\n"%(index, subindex, value)
+                content += "\n"
+        try:
+            if content != "":
+                file = open(valuespath, "w")
+                file.write(content)
+                file.close()
+            elif os.path.isfile(valuespath):
+                os.remove(valuespath)
+            return None
+        except (IOError, OSError):
+            return _("Fail to save slave values")
+    
     def GetSlaveNodeEntry(self, nodeid, index, subindex = None):
         if nodeid in self.SlaveNodes.keys():
-            self.SlaveNodes[nodeid]["Node"].SetNodeID(nodeid)
-            return self.SlaveNodes[nodeid]["Node"].GetEntry(index, subindex)
+            return self.Index.GetNodeEntry(nodeid, index, subindex)
+        else:
+            return _("Node 0x%2.2X doesn't exist")%nodeid
+
+    def SetSlaveNodeEntry(self, nodeid, index, subindex = None, value = None):
+        if nodeid in self.SlaveNodes.keys():
+            node = self.SlaveNodes[nodeid]["Node"]
+            if not node.SetEntry(index, subindex, value):
+                return _("Node 0x%2.2X has no entry 0x%4.4X sub 0x%2.2X")%(nodeid, index, subindex or 0)
+            self.Index.AddNode(nodeid, node)
+            self.Changed = True
+            return None
         else:
             return _("Node 0x%2.2X doesn't exist")%nodeid
 
@@ -251,6 +351,48 @@ class NodeList:
     def SetMasterNodeEntry(self, index, subindex = None, value = None):
         self.Manager.SetCurrentEntry(index, subindex, value)
     
+    def GetCobIDConflicts(self):
+        return networkcheck.GetCobIDConflicts(self)
+    
+    def GetCobIDConflictsMessages(self, types = None):
+        return networkcheck.GetCobIDConflictsMessages(self.GetCobIDConflicts(), types)
+    
+    def GetBusLoad(self, stuffing = True):
+        return busload.GetNetworkBusLoad(self, stuffing)
+    
+    def GetSyncSchedule(self, baudrate = None, convert = False):
+        return syncschedule.GetNetworkSyncSchedule(self, baudrate, convert)
+    
+    def ApplySyncSchedule(self, schedule):
+        # All the modifications are made in one undo step
+        master = self.Manager.CurrentNode
+        masterid = self.GetMasterNodeID()
+        builder = DCFBuilder()
+        for nodeid, index, subindex, size, value in schedule.GetChanges():
+            if nodeid == masterid:
+                if not master.IsEntry(index):
+                    self.Manager.ManageEntriesOfCurrent([index], [], master)
+                master.SetEntry(index, subindex, value)
+            else:
+                builder.Add(nodeid, index, subindex, size, value)
+        # Records already in DCF for the same parameters are replaced, so that
+        # applying a schedule twice doesn't change anything
+        result = None
+        if builder.IsEmpty():
+            self.Manager.BufferCurrentNode()
+        else:
+            result = self.Manager.AddDCFBuilderToCurrent(builder, True)
+        if result is None:
+            # Slave values are updated as they will be once DCF is downloaded
+            for nodeid in builder.GetNodeIDs():
+                if nodeid in self.SlaveNodes:
+                    node = self.SlaveNodes[nodeid]["Node"]
+                    for index, subindex, size, value in builder.GetRecords(nodeid):
+                        node.SetEntry(index, subindex, value)
+                    self.Index.AddNode(nodeid, node)
+                    self.Changed = True
+        return result
+    
     def GetOrderNumber(self, nodeid):
         nodeindexes = self.SlaveNodes.keys()
         nodeindexes.sort()
@@ -271,7 +413,6 @@ class NodeList:
             else:
                 node = self.SlaveNodes[self.CurrentSelected]["Node"]
                 if node:
-                    node.SetNodeID(self.CurrentSelected)
                     return node.IsEntry(index)
         return False
     
@@ -282,7 +423,6 @@ class NodeList:
             else:
                 node = self.SlaveNodes[self.CurrentSelected]["Node"]
                 if node:
-                    node.SetNodeID(self.CurrentSelected)
                     return node.GetEntryInfos(index)
         return None
 
@@ -293,7 +433,6 @@ class NodeList:
             else:
                 node = self.SlaveNodes[self.CurrentSelected]["Node"]
                 if node:
-                    node.SetNodeID(self.CurrentSelected)
                     return node.GetSubentryInfos(index, subindex)
         return None
 
@@ -304,7 +443,6 @@ class NodeList:
             else:
                 node = self.SlaveNodes[self.CurrentSelected]["Node"]
                 if node:
-                    node.SetNodeID(self.CurrentSelected)
                     validindexes = []
                     for index in node.GetIndexes():
                         if min <= index <= max:
@@ -318,12 +456,17 @@ class NodeList:
         if self.CurrentSelected != None:
             node = self.SlaveNodes[self.CurrentSelected]["Node"]
             if node:
-                node.SetNodeID(self.CurrentSelected)
                 return self.Manager.GetNodeEntryValues(node, index)
             else:
                 print _("Can't find node")
         return [], []
     
+    def AddManyToMasterDCF(self, records):
+        # Adding all DCF entries into Master node at once
+        builder = DCFBuilder()
+        builder.AddRecords(records)
+        return self.Manager.AddDCFBuilderToCurrent(builder)
+    
     def AddToMasterDCF(self, node_id, index, subindex, size, value):
         # Adding DCF entry into Master node
         if not self.Manager.IsCurrentEntry(0x1F22):
@@ -26,7 +26,7 @@ from gnosis.xml.pickle.util import setParanoia
 setParanoia(0)
 
 from node import *
-import eds_utils, gen_cfile
+import eds_utils, gen_cfile, profiles, pdopacking, concisedcf, formulas
 
 from types import *
 import os, re
@@ -211,9 +211,9 @@ class NodeManager:
                     # Charging DS-302 profile if choosen by user
                     if os.path.isfile(DS302Path):
                         try:
-                            execfile(DS302Path)
+                            Mapping, AddMenuEntries = profiles.LoadProfile(DS302Path)
                             self.CurrentNode.SetDS302Profile(Mapping)
-                            self.CurrentNode.ExtendSpecificMenu(AddMenuEntries)
+                            self.CurrentNode.ExtendSpecificMenu(profiles.CopyMenuEntries(AddMenuEntries))
                         except:
                             return _("Problem with DS-302! Syntax Error.")
                     else:
@@ -255,10 +255,10 @@ class NodeManager:
         if profile != "None":
             # Try to charge the profile given
             try:
-                execfile(filepath)
+                Mapping, AddMenuEntries = profiles.LoadProfile(filepath)
                 node.SetProfileName(profile)
                 node.SetProfile(Mapping)
-                node.SetSpecificMenu(AddMenuEntries)
+                node.SetSpecificMenu(profiles.CopyMenuEntries(AddMenuEntries))
                 return None
             except:
                 return _("Syntax Error\nBad OD Profile file!")
@@ -278,6 +278,7 @@ class NodeManager:
             file = open(filepath, "r")
             node = load(file)
             file.close()
+            node.ResolveProfiles()
             self.CurrentNode = node
             self.CurrentNode.SetNodeID(0)
             # Add a new buffer and defining current state
@@ -351,9 +352,9 @@ class NodeManager:
     """
     Build the C definition of Object Dictionary for current node 
     """
-    def ExportCurrentToCFile(self, filepath):
+    def ExportCurrentToCFile(self, filepath, split = False):
         if self.CurrentNode:
-            return gen_cfile.GenerateFile(filepath, self.CurrentNode)
+            return gen_cfile.GenerateFile(filepath, self.CurrentNode, split = split)
 
 #-------------------------------------------------------------------------------
 #                        Add Entries to Current Functions
@@ -449,6 +450,39 @@ class NodeManager:
         if None not in indexlist:
             self.ManageEntriesOfCurrent(indexlist, [])
 
+    """
+    Map the variables given in rates, a dictionary {(index, subindex) : period in
+    ms}, in the fewest transmit PDOs of current node. New PDOs are event driven
+    with the period as event timer and the COB ID of the predefined connection
+    set, so at most 4 PDOs can be packed. They use the transmit PDOs without
+    mapping, the other ones are kept unless replace is True, in which case all
+    transmit PDOs are replaced
+    """
+    def PackCurrentTPDOs(self, rates, replace = False):
+        pdos = pdopacking.PackNodeVariables(self.CurrentNode, rates)
+        if isinstance(pdos, (StringType, UnicodeType)):
+            return pdos
+        if replace:
+            free = range(pdopacking.PDO_PREDEFINED_NUMBER)
+        else:
+            free = pdopacking.GetFreeTPDOs(self.CurrentNode)
+        if len(pdos) > len(free):
+            return _("%d PDOs are needed, only %d transmit PDOs with a predefined COB ID are available")%(len(pdos), len(free))
+        if replace:
+            for index in self.CurrentNode.GetIndexes():
+                if 0x1800 <= index <= 0x1BFF:
+                    self.CurrentNode.RemoveEntry(index)
+        for i, (period, mapped) in zip(free, pdos):
+            for index in [0x1800 + i, 0x1A00 + i]:
+                if not self.CurrentNode.IsEntry(index):
+                    self.ManageEntriesOfCurrent([index], [], self.CurrentNode)
+            self.CurrentNode.SetEntry(0x1800 + i, 1, pdopacking.GetPredefinedCobID(i))
+            self.CurrentNode.SetEntry(0x1800 + i, 2, pdopacking.TRANSMISSION_EVENT_DRIVEN)
+            self.CurrentNode.SetEntry(0x1800 + i, 5, period)
+            self.CurrentNode.SetEntry(0x1A00 + i, None, [pdopacking.GetMappingValue(index, subindex, size) for index, subindex, size in mapped])
+        self.BufferCurrentNode()
+        return None
+
     """
     Add a list of entries defined in profile for menu item selected to current node
     """
@@ -715,6 +749,8 @@ class NodeManager:
                     if dic[type] == 0:
                         try:
                             if value.startswith("$NODEID"):
+                                # Invalid formulas are refused like invalid numbers
+                                formulas.CompileFormula(value)
                                 value = "\"%s\""%value
                             elif value.startswith("0x"):
                                 value = int(value, 16)
@@ -1125,14 +1161,51 @@ class NodeManager:
     def AddToDCF(self, node_id, index, subindex, size, value):
         if self.CurrentNode.IsEntry(0x1F22, node_id):
             dcf_value = self.CurrentNode.GetEntry(0x1F22, node_id)
-            if dcf_value != "":
-                nbparams = BE_to_LE(dcf_value[:4])
-            else:
-                nbparams = 0
-            new_value = LE_to_BE(nbparams + 1, 4) + dcf_value[4:]
-            new_value += LE_to_BE(index, 2) + LE_to_BE(subindex, 1) + LE_to_BE(size, 4) + LE_to_BE(value, size)
+            new_value = concisedcf.AppendRecord(dcf_value, index, subindex, size, value)
             self.CurrentNode.SetEntry(0x1F22, node_id, new_value)
 
+    """
+    Return the DCF of a node in the master DCF (0x1F22) of current node as a
+    ConciseDCF giving random access to its parameters, None if not defined
+    """
+    def GetCurrentDCF(self, node_id):
+        if self.CurrentNode.IsEntry(0x1F22, node_id) and node_id > 0:
+            return concisedcf.ConciseDCF(self.CurrentNode.GetEntry(0x1F22, node_id))
+        return None
+
+    """
+    Store a ConciseDCF as the DCF of a node in the master DCF (0x1F22) of
+    current node
+    """
+    def SetCurrentDCF(self, node_id, dcf):
+        if self.CurrentNode.IsEntry(0x1F22, node_id) and node_id > 0:
+            self.CurrentNode.SetEntry(0x1F22, node_id, dcf.GetString())
+            self.BufferCurrentNode()
+            return None
+        return _("Node ID 0x%2.2X can't be configured by master DCF")%node_id
+
+    """
+    Add all the parameters of a DCFBuilder at the end of the DCF of their node in
+    the master DCF (0x1F22) of current node, in one undo step
+    """
+    def AddDCFBuilderToCurrent(self, builder, replace = False):
+        if builder.IsEmpty():
+            return None
+        # Node IDs are checked before current node is modified
+        for node_id in builder.GetNodeIDs():
+            if not 0 < node_id <= 0x7F:
+                return _("Node ID 0x%2.2X can't be configured by master DCF")%node_id
+        if not self.CurrentNode.IsEntry(0x1F22):
+            self.ManageEntriesOfCurrent([0x1F22], [], self.CurrentNode)
+        self.AddSubentriesToCurrent(0x1F22, 127, self.CurrentNode)
+        existing = {}
+        for node_id in builder.GetNodeIDs():
+            existing[node_id] = self.CurrentNode.GetEntry(0x1F22, node_id)
+        for node_id, dcf_value in builder.Encode(existing, replace).iteritems():
+            self.CurrentNode.SetEntry(0x1F22, node_id, dcf_value)
+        self.BufferCurrentNode()
+        return None
+
 #-------------------------------------------------------------------------------
 #                         Node Informations Functions
 #-------------------------------------------------------------------------------
@@ -21,28 +21,33 @@
 #License along with this library; if not, write to the Free Software
 #Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
 
-import getopt,sys,os
+import getopt,sys,os,__builtin__
 from types import *
 
-from nodemanager import *
+# Modules used need translation function too
+__builtin__.__dict__['_'] = lambda x: x
 
-_ = lambda x: x
+from nodemanager import *
 
 def usage():
     print _("\nUsage of objdictgen.py :")
-    print "\n   %s XMLFilePath CFilePath\n"%sys.argv[0]
+    print "\n   %s [-s] XMLFilePath CFilePath\n"%sys.argv[0]
+    print _("   -s, --split : split the Object Dictionary into several C files\n")
 
 try:
-    opts, args = getopt.getopt(sys.argv[1:], "h", ["help"])
+    opts, args = getopt.getopt(sys.argv[1:], "hs", ["help", "split"])
 except getopt.GetoptError:
     # print help information and exit:
     usage()
     sys.exit(2)
 
+split = False
 for o, a in opts:
     if o in ("-h", "--help"):
         usage()
         sys.exit()
+    if o in ("-s", "--split"):
+        split = True
 
 fileIn = ""
 fileOut = ""        
@@ -68,7 +73,7 @@ if __name__ == '__main__':
             print _("%s is not a valid file!")%fileIn
             sys.exit(-1)
         print _("Writing output file")
-        result = manager.ExportCurrentToCFile(fileOut)
+        result = manager.ExportCurrentToCFile(fileOut, split)
         if isinstance(result, (UnicodeType, StringType)):
             print result
             sys.exit(-1)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+from types import *
+import re, struct
+
+from endianness import LittleEndianToInt, IntToLittleEndian
+
+#-------------------------------------------------------------------------------
+#                          Data Types Coding
+#-------------------------------------------------------------------------------
+
+type_model = re.compile('([\_A-Z]*)([0-9]*)')
+
+# Struct formats of the real types
+REAL_FORMATS = {4 : "<f", 8 : "<d"}
+
+# Index of the first and last types defined by user (range and sized strings)
+CUSTOM_TYPES_MIN = 0xA0
+CUSTOM_TYPES_MAX = 0xFF
+
+"""
+Class describing how values of a data type are transmitted on CAN. Kind is one
+of "unsigned", "integer", "real", "boolean", "string" and "domain". Size is
+the number of bytes of the value, None if it's variable. Minimum and Maximum
+are the limits of a range type, None if not defined.
+"""
+
+class TypeCoding:
+
+    def __init__(self, name, kind, size = None, minimum = None, maximum = None):
+        self.Name = name
+        self.Kind = kind
+        self.Size = size
+        self.Minimum = minimum
+        self.Maximum = maximum
+
+    def IsNumber(self):
+        return self.Kind in ["unsigned", "integer", "real", "boolean"]
+
+    """
+    Return the number of bits of the value, 0 if size is variable
+    """
+    def GetBitLength(self):
+        if self.Kind == "boolean":
+            return 1
+        return (self.Size or 0) * 8
+
+    """
+    Return the data of a value of this type
+    """
+    def Encode(self, value):
+        if self.Kind in ["unsigned", "integer"]:
+            return IntToLittleEndian(int(value), self.Size)
+        elif self.Kind == "boolean":
+            return chr(value and 1 or 0)
+        elif self.Kind == "real":
+            return struct.pack(REAL_FORMATS[self.Size], value)
+        if isinstance(value, UnicodeType):
+            value = value.encode("utf-8")
+        return str(value)
+
+    """
+    Return the value given by data of this type
+    """
+    def Decode(self, data):
+        data = str(data)
+        if self.Kind == "unsigned":
+            return LittleEndianToInt(data)
+        elif self.Kind == "integer":
+            value = LittleEndianToInt(data)
+            if len(data) > 0 and value >= 1 << (8 * len(data) - 1):
+                value -= 1 << (8 * len(data))
+            return value
+        elif self.Kind == "boolean":
+            return LittleEndianToInt(data) != 0
+        elif self.Kind == "real":
+            return struct.unpack(REAL_FORMATS[len(data)], data)[0]
+        elif self.Kind == "string":
+            return data.rstrip("\x00")
+        return data
+
+    """
+    Return None if value can be stored in this type, a reason otherwise among
+    "length", "high" and "low"
+    """
+    def CheckValue(self, value, length = None):
+        if self.Size is not None and length is not None and length != self.Size and self.IsNumber():
+            return "length"
+        if self.Kind in ["unsigned", "integer"]:
+            bits = 8 * self.Size
+            if self.Kind == "unsigned":
+                minimum, maximum = 0, (1 << bits) - 1
+            else:
+                minimum, maximum = -(1 << (bits - 1)), (1 << (bits - 1)) - 1
+            if self.Minimum is not None:
+                minimum = max(minimum, self.Minimum)
+            if self.Maximum is not None:
+                maximum = min(maximum, self.Maximum)
+            if value > maximum:
+                return "high"
+            if value < minimum:
+                return "low"
+        elif self.Kind == "real":
+            if self.Maximum is not None and value > self.Maximum:
+                return "high"
+            if self.Minimum is not None and value < self.Minimum:
+                return "low"
+        elif self.Size is not None and length is not None and length > self.Size:
+            return "length"
+        return None
+
+# Codings already computed for each type name
+TypeCodings = {}
+
+"""
+Return the TypeCoding of a standard type name, raise ValueError if type isn't
+supported
+"""
+def GetTypeCoding(typename):
+    coding = TypeCodings.get(typename, None)
+    if coding is not None:
+        return coding
+    result = type_model.match(typename)
+    name, length = result.groups()
+    if length != "":
+        length = int(length)
+    if name in ["UNSIGNED", "INTEGER"] and length in [i * 8 for i in xrange(1, 9)]:
+        coding = TypeCoding(typename, name == "UNSIGNED" and "unsigned" or "integer", length / 8)
+    elif name == "REAL" and length in [32, 64]:
+        coding = TypeCoding(typename, "real", length / 8)
+    elif name == "BOOLEAN":
+        coding = TypeCoding(typename, "boolean", 1)
+    elif name in ["VISIBLE_STRING", "OCTET_STRING", "UNICODE_STRING"]:
+        coding = TypeCoding(typename, "string", length or None)
+    elif name == "DOMAIN":
+        coding = TypeCoding(typename, "domain")
+    elif name in ["TIME_OF_DAY", "TIME_DIFFERENCE"]:
+        coding = TypeCoding(typename, "unsigned", 6)
+    else:
+        raise ValueError, "%s isn't a supported type"%typename
+    TypeCodings[typename] = coding
+    return coding
+
+"""
+Return the TypeCoding of a type index of a node. Types defined by user between
+0xA0 and 0xFF are resolved to their base type with their range or their size
+"""
+def GetNodeTypeCoding(node, typeindex):
+    if CUSTOM_TYPES_MIN <= typeindex <= CUSTOM_TYPES_MAX and node.IsEntry(typeindex):
+        values = node.GetEntry(typeindex)
+        base = GetNodeTypeCoding(node, values[1])
+        if base.IsNumber() and len(values) > 3:
+            return TypeCoding(node.GetTypeName(typeindex), base.Kind, base.Size, values[2], values[3])
+        elif not base.IsNumber() and len(values) > 2:
+            return TypeCoding(node.GetTypeName(typeindex), base.Kind, values[2] or None)
+        return base
+    typename = node.GetTypeName(typeindex)
+    if typename is None:
+        raise ValueError, "Type 0x%2.2X isn't defined"%typeindex
+    return GetTypeCoding(typename)
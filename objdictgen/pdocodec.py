@@ -0,0 +1,370 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+from types import *
+import struct
+
+from endianness import LittleEndianToInt, IntToLittleEndian
+from odtypes import GetNodeTypeCoding, REAL_FORMATS
+from networkcheck import GetCanID
+from pdopacking import PDO_MAX_BITS
+
+# NumPy is only needed to decode or encode arrays of frames at once, frames are
+# processed one by one without it
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+#-------------------------------------------------------------------------------
+#                          Definition of PdoField Object
+#-------------------------------------------------------------------------------
+
+# Biggest index of the dummy entries that can be mapped to leave a gap in a PDO
+DUMMY_INDEX_MAX = 0x0007
+
+# NumPy formats of the byte aligned numbers by kind and size
+NUMPY_FORMATS = {("unsigned", 1) : "u1", ("unsigned", 2) : "<u2", ("unsigned", 4) : "<u4", ("unsigned", 8) : "<u8",
+                 ("integer", 1) : "i1", ("integer", 2) : "<i2", ("integer", 4) : "<i4", ("integer", 8) : "<i8",
+                 ("real", 4) : "<f4", ("real", 8) : "<f8", ("boolean", 1) : "u1"}
+
+"""
+Class describing a variable mapped in a PDO. Offset and Length are the position
+of the variable in the PDO data in bits
+"""
+
+class PdoField:
+
+    def __init__(self, index, subindex, offset, length, coding = None, name = None):
+        self.Index = index
+        self.SubIndex = subindex
+        self.Offset = offset
+        self.Length = length
+        self.Coding = coding
+        self.Name = name
+        self.Mask = (1 << length) - 1
+
+    def IsDummy(self):
+        return self.Coding is None
+
+    def IsByteAligned(self):
+        return self.Offset % 8 == 0 and self.Length % 8 == 0
+
+    def GetKey(self):
+        return (self.Index, self.SubIndex)
+
+    """
+    Return the value of the field given by the bits extracted from the PDO data
+    """
+    def DecodeBits(self, bits):
+        kind = self.Coding.Kind
+        if kind == "unsigned":
+            return bits
+        elif kind == "integer":
+            if bits >> (self.Length - 1):
+                bits -= 1 << self.Length
+            return bits
+        elif kind == "boolean":
+            return bits != 0
+        elif kind == "real":
+            return struct.unpack(REAL_FORMATS[self.Length / 8], IntToLittleEndian(bits, self.Length / 8))[0]
+        return IntToLittleEndian(bits, self.Length / 8).rstrip("\x00")
+
+    """
+    Return the bits to store in the PDO data for a value of the field
+    """
+    def EncodeBits(self, value):
+        kind = self.Coding.Kind
+        if kind in ["unsigned", "integer"]:
+            return int(value) & self.Mask
+        elif kind == "boolean":
+            return value and 1 or 0
+        elif kind == "real":
+            return LittleEndianToInt(struct.pack(REAL_FORMATS[self.Length / 8], value))
+        return LittleEndianToInt(str(value)[:self.Length / 8].ljust(self.Length / 8, "\x00"))
+
+    def __repr__(self):
+        return "0x%4.4X sub 0x%2.2X bits %d-%d"%(self.Index, self.SubIndex, self.Offset, self.Offset + self.Length - 1)
+
+#-------------------------------------------------------------------------------
+#                          Definition of PdoLayout Object
+#-------------------------------------------------------------------------------
+
+"""
+Class coding and decoding the data of a PDO. Frames are given as a string of
+the data of all the frames following each other, a list of data strings or, if
+NumPy is available, an array of bytes with one frame per line. Values are given
+as a dictionary {(index, subindex) : column of values}, a column being a NumPy
+array if NumPy is available and a list otherwise.
+"""
+
+class PdoLayout:
+
+    def __init__(self, fields):
+        self.Fields = fields
+        self.Variables = [field for field in fields if not field.IsDummy()]
+        bits = sum([field.Length for field in fields])
+        if bits > PDO_MAX_BITS:
+            raise ValueError, "PDO mapping is %d bits long, more than %d"%(bits, PDO_MAX_BITS)
+        self.Length = (bits + 7) / 8
+        self.Dtype = None
+        self.Names = None
+        if numpy is not None:
+            self.Dtype, self.Names = self.ComputeDtype()
+
+    def GetLength(self):
+        return self.Length
+
+    def GetFields(self):
+        return self.Fields[:]
+
+    def GetKeys(self):
+        return [field.GetKey() for field in self.Variables]
+
+    """
+    Return the NumPy structured dtype of the PDO data and the name of each
+    variable in it, None if a variable isn't byte aligned or has a size that
+    NumPy can't represent
+    """
+    def ComputeDtype(self):
+        names, formats, offsets = [], [], []
+        for field in self.Variables:
+            if not field.IsByteAligned():
+                return None, None
+            size = field.Length / 8
+            if field.Coding.IsNumber():
+                format = NUMPY_FORMATS.get((field.Coding.Kind, size), None)
+                if format is None:
+                    return None, None
+            else:
+                format = "S%d"%size
+            names.append("v%d_%4.4X_%2.2X"%(len(names), field.Index, field.SubIndex))
+            formats.append(format)
+            offsets.append(field.Offset / 8)
+        dtype = numpy.dtype({"names" : names, "formats" : formats, "offsets" : offsets, "itemsize" : max(self.Length, 1)})
+        return dtype, names
+
+    def GetDtype(self):
+        return self.Dtype
+
+    """
+    Return the values of the data of one frame as a list ordered like the
+    variables mapped
+    """
+    def DecodeFrame(self, data):
+        if len(data) < self.Length:
+            raise ValueError, "PDO data is %d bytes long, %d expected"%(len(data), self.Length)
+        bits = LittleEndianToInt(data[:self.Length])
+        return [field.DecodeBits((bits >> field.Offset) & field.Mask) for field in self.Variables]
+
+    """
+    Return the data of one frame containing the values given as a list ordered
+    like the variables mapped
+    """
+    def EncodeFrame(self, values):
+        bits = 0
+        for field, value in zip(self.Variables, values):
+            bits |= field.EncodeBits(value) << field.Offset
+        return IntToLittleEndian(bits, self.Length)
+
+#-------------------------------------------------------------------------------
+#                              Arrays Decoding
+#-------------------------------------------------------------------------------
+
+    """
+    Return the data of frames as one string, checking their length
+    """
+    def JoinFrames(self, frames):
+        if isinstance(frames, (ListType, TupleType)):
+            for data in frames:
+                if len(data) != self.Length:
+                    raise ValueError, "PDO data is %d bytes long, %d expected"%(len(data), self.Length)
+            return "".join(frames)
+        if numpy is not None and isinstance(frames, numpy.ndarray):
+            return frames.astype(numpy.uint8).tostring()
+        frames = str(frames)
+        if self.Length > 0 and len(frames) % self.Length:
+            raise ValueError, "Frames data length isn't a multiple of %d"%self.Length
+        return frames
+
+    """
+    Return the values of the frames given as a dictionary {(index, subindex) :
+    column}
+    """
+    def Unpack(self, frames):
+        buffer = self.JoinFrames(frames)
+        if self.Length == 0:
+            return {}
+        if numpy is None:
+            rows = [self.DecodeFrame(buffer[offset:offset + self.Length]) for offset in xrange(0, len(buffer), self.Length)]
+            return dict([(field.GetKey(), list(column)) for field, column in zip(self.Variables, zip(*rows) or [[]] * len(self.Variables))])
+        if self.Dtype is not None:
+            records = numpy.frombuffer(buffer, self.Dtype)
+            columns = {}
+            for field, name in zip(self.Variables, self.Names):
+                column = records[name]
+                if field.Coding.Kind == "boolean":
+                    column = column != 0
+                columns[field.GetKey()] = column.copy()
+            return columns
+        return self.UnpackBits(buffer)
+
+    """
+    Decode frames by extracting the bits of each variable from the data of the
+    frames read as 64 bits integers
+    """
+    def UnpackBits(self, buffer):
+        data = numpy.zeros((len(buffer) / self.Length, 8), numpy.uint8)
+        data[:, :self.Length] = numpy.frombuffer(buffer, numpy.uint8).reshape(-1, self.Length)
+        words = data.view("<u8")[:, 0]
+        columns = {}
+        for field in self.Variables:
+            bits = (words >> numpy.uint64(field.Offset)) & numpy.uint64(field.Mask)
+            kind = field.Coding.Kind
+            if kind == "unsigned":
+                column = bits
+            elif kind == "integer":
+                column = bits.astype(numpy.int64)
+                if field.Length < 64:
+                    column = numpy.where(column >> (field.Length - 1), column - (1 << field.Length), column)
+            elif kind == "boolean":
+                column = bits != 0
+            elif kind == "real" and field.Length == 32:
+                column = bits.astype("<u4").view("<f4")
+            elif kind == "real":
+                column = bits.view("<f8")
+            else:
+                size = field.Length / 8
+                column = bits.astype("<u8").view(numpy.uint8).reshape(-1, 8)[:, :size].copy().view("S%d"%size)[:, 0]
+            columns[field.GetKey()] = column
+        return columns
+
+#-------------------------------------------------------------------------------
+#                              Arrays Encoding
+#-------------------------------------------------------------------------------
+
+    """
+    Return the data of the frames containing the values given as a dictionary
+    {(index, subindex) : column} as one string. Variables without values are
+    set to 0. Raise ValueError if columns don't have the same length
+    """
+    def Pack(self, columns):
+        lengths = set([len(column) for column in columns.itervalues()])
+        if len(lengths) > 1:
+            raise ValueError, "Columns of values don't have the same length"
+        number = lengths and lengths.pop() or 0
+        fields = [(field, columns[field.GetKey()]) for field in self.Variables if field.GetKey() in columns]
+        if numpy is None:
+            frames = []
+            for row in xrange(number):
+                bits = 0
+                for field, column in fields:
+                    bits |= field.EncodeBits(column[row]) << field.Offset
+                frames.append(IntToLittleEndian(bits, self.Length))
+            return "".join(frames)
+        words = numpy.zeros(number, "<u8")
+        strings = []
+        for field, column in fields:
+            kind = field.Coding.Kind
+            if kind in ["unsigned", "integer"]:
+                values = numpy.asarray(column)
+                if values.dtype.kind in "iub":
+                    bits = values.astype(numpy.uint64)
+                else:
+                    # NumPy converts integers that don't fit in 64 bits signed
+                    # integers to floats, they are encoded one by one
+                    bits = numpy.array([field.EncodeBits(value) for value in column], numpy.uint64)
+            elif kind == "boolean":
+                bits = (numpy.asarray(column) != 0).astype(numpy.uint64)
+            elif kind == "real" and field.Length == 32:
+                bits = numpy.asarray(column).astype("<f4").view("<u4").astype(numpy.uint64)
+            elif kind == "real":
+                bits = numpy.asarray(column).astype("<f8").view("<u8")
+            else:
+                strings.append((field, column))
+                continue
+            words |= (bits & numpy.uint64(field.Mask)) << numpy.uint64(field.Offset)
+        data = words.view(numpy.uint8).reshape(-1, 8)[:, :self.Length].copy()
+        for field, column in strings:
+            size = field.Length / 8
+            values = numpy.asarray(column).astype("S%d"%size)
+            data[:, field.Offset / 8:field.Offset / 8 + size] = numpy.frombuffer(values.tostring(), numpy.uint8).reshape(-1, size)
+        return data.tostring()
+
+    """
+    Return the data of frames packed by Pack as a list of data strings
+    """
+    def SplitFrames(self, buffer):
+        return [buffer[offset:offset + self.Length] for offset in xrange(0, len(buffer), max(self.Length, 1))]
+
+#-------------------------------------------------------------------------------
+#                          Node PDOs Layouts Compilation
+#-------------------------------------------------------------------------------
+
+"""
+Return the layout of the PDO defined by a mapping entry of a node (0x1600-0x17FF
+or 0x1A00-0x1BFF). Raise ValueError if mapping is invalid
+"""
+def CompilePdoLayout(node, mapping_index):
+    values = node.GetEntry(mapping_index)
+    if not isinstance(values, ListType) or len(values) == 0:
+        raise ValueError, "0x%4.4X isn't a PDO mapping entry"%mapping_index
+    fields = []
+    offset = 0
+    for value in values[1:values[0] + 1]:
+        index, subindex, length = value >> 16, (value >> 8) & 0xFF, value & 0xFF
+        # Mapping subentries not used are left to 0
+        if length == 0:
+            continue
+        elif index <= DUMMY_INDEX_MAX:
+            fields.append(PdoField(index, subindex, offset, length))
+        else:
+            infos = node.GetSubentryInfos(index, subindex)
+            if infos is None:
+                raise ValueError, "Variable 0x%4.4X sub 0x%2.2X mapped in 0x%4.4X isn't defined"%(index, subindex, mapping_index)
+            coding = GetNodeTypeCoding(node, infos["type"])
+            if coding.Kind != "boolean" and coding.GetBitLength() not in [0, length]:
+                raise ValueError, "Variable 0x%4.4X sub 0x%2.2X can't be mapped on %d bits"%(index, subindex, length)
+            if not coding.IsNumber() and (offset % 8 or length % 8):
+                raise ValueError, "Variable 0x%4.4X sub 0x%2.2X must be byte aligned"%(index, subindex)
+            fields.append(PdoField(index, subindex, offset, length, coding, infos["name"]))
+        offset += length
+    return PdoLayout(fields)
+
+"""
+Return the layouts of the PDOs of a node as a dictionary {cobid : PdoLayout},
+for transmit PDOs or receive PDOs if transmit is False. PDOs not valid are
+ignored
+"""
+def CompileNodePdos(node, transmit = True):
+    if transmit:
+        comm_range = xrange(0x1800, 0x1A00)
+    else:
+        comm_range = xrange(0x1400, 0x1600)
+    layouts = {}
+    for comm_index in comm_range:
+        if node.IsEntry(comm_index) and node.IsEntry(comm_index + 0x200):
+            cobid = GetCanID(node.GetEntry(comm_index, 1))
+            if cobid is not None:
+                layouts[cobid] = CompilePdoLayout(node, comm_index + 0x200)
+    return layouts
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+from types import *
+
+#-------------------------------------------------------------------------------
+#                              PDO Packing
+#-------------------------------------------------------------------------------
+
+# Number of bits that can be mapped in a PDO
+PDO_MAX_BITS = 64
+
+# Number of variables that can be mapped in a PDO
+PDO_MAX_VARIABLES = 0x40
+
+# Number of transmit PDOs having a COB ID in the predefined connection set. Only
+# these ones are used for packing, other PDOs would need a COB ID allocated
+# on the network
+PDO_PREDEFINED_NUMBER = 4
+
+# Transmission type of event driven PDOs
+TRANSMISSION_EVENT_DRIVEN = 0xFF
+
+"""
+Pack variables into PDOs. variables is a list of (index, subindex, size in bits)
+and rates a dictionary giving for each (index, subindex) the period in ms at
+which the variable must be sent. Variables with the same period are packed in
+the fewest PDOs possible (first fit decreasing bin packing). Return a list of
+PDOs sorted by period, each PDO being a (period, [(index, subindex, size), ...])
+"""
+def PackVariables(variables, rates):
+    groups = {}
+    for index, subIndex, size in variables:
+        if (index, subIndex) in rates:
+            groups.setdefault(rates[(index, subIndex)], []).append((index, subIndex, size))
+    pdos = []
+    periods = groups.keys()
+    periods.sort()
+    for period in periods:
+        # Biggest variables first, then by index so that result is stable
+        group = groups[period]
+        group.sort(lambda x, y: cmp((-x[2], x[0], x[1]), (-y[2], y[0], y[1])))
+        bins = []
+        for variable in group:
+            for bin in bins:
+                if bin[0] + variable[2] <= PDO_MAX_BITS and len(bin[1]) < PDO_MAX_VARIABLES:
+                    bin[0] += variable[2]
+                    bin[1].append(variable)
+                    break
+            else:
+                bins.append([variable[2], [variable]])
+        for size, mapped in bins:
+            mapped.sort()
+            pdos.append((period, mapped))
+    return pdos
+
+"""
+Return the value of a PDO mapping entry for a variable
+"""
+def GetMappingValue(index, subIndex, size):
+    return (index << 16) + (subIndex << 8) + size
+
+"""
+Return the stored value of the COB ID of a transmit PDO (0 for the first one)
+in the predefined connection set
+"""
+def GetPredefinedCobID(number):
+    return "\"$NODEID+0x%X80\""%(number + 1)
+
+"""
+Return the numbers of the transmit PDOs with a predefined COB ID that can be
+used for new PDOs in a node, the ones not defined or without any variable mapped
+"""
+def GetFreeTPDOs(node):
+    free = []
+    for number in xrange(PDO_PREDEFINED_NUMBER):
+        mapping = node.GetEntry(0x1A00 + number, compute = False)
+        if not isinstance(mapping, ListType) or not any(mapping[1:]):
+            free.append(number)
+    return free
+
+"""
+Pack the PDO mappable variables of a node given in rates into PDOs. Return the
+list of PDOs as returned by PackVariables, or an error message if a variable
+isn't mappable or too big for a PDO, or if more PDOs than the ones of the
+predefined connection set are needed
+"""
+def PackNodeVariables(node, rates):
+    variables = [(index, subIndex, size) for index, subIndex, size, name in node.GetMapVariableList()]
+    mappable = dict([((index, subIndex), size) for index, subIndex, size in variables])
+    for (index, subIndex), period in rates.iteritems():
+        if not 0 < period <= 0xFFFF:
+            return _("Period of variable 0x%4.4X sub 0x%2.2X must be between 1 and 65535 ms")%(index, subIndex)
+        if (index, subIndex) not in mappable:
+            return _("Variable 0x%4.4X sub 0x%2.2X can't be mapped in a PDO")%(index, subIndex)
+        if mappable[(index, subIndex)] > PDO_MAX_BITS:
+            return _("Variable 0x%4.4X sub 0x%2.2X is too big to be mapped in a PDO")%(index, subIndex)
+    pdos = PackVariables(variables, rates)
+    if len(pdos) > PDO_PREDEFINED_NUMBER:
+        return _("%d PDOs are needed, only %d transmit PDOs have a predefined COB ID")%(len(pdos), PDO_PREDEFINED_NUMBER)
+    return pdos
@@ -0,0 +1,299 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+import os, imp, marshal
+from types import *
+
+try:
+    from hashlib import sha1 as HashFunction
+except ImportError:
+    from sha import new as HashFunction
+
+import node
+
+#-------------------------------------------------------------------------------
+#                             Immutable Containers
+#-------------------------------------------------------------------------------
+
+"""
+Dictionary that can't be modified once built. Profile mappings are shared
+between all the nodes using the same profile, so any modification must be done
+on a copy (copy method returns a standard dictionary)
+"""
+
+class FrozenDict(dict):
+
+    def _ReadOnly(self, *args, **kwargs):
+        raise TypeError, "Profile mapping can't be modified"
+
+    __setitem__ = __delitem__ = _ReadOnly
+    clear = pop = popitem = setdefault = update = _ReadOnly
+
+    def copy(self):
+        return dict(self)
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+"""
+Return a frozen copy of the structure given. Dictionaries are converted into
+FrozenDict and lists into tuples
+"""
+def FreezeStructure(value):
+    if isinstance(value, DictType):
+        return FrozenDict([(key, FreezeStructure(item)) for key, item in value.iteritems()])
+    elif isinstance(value, (ListType, TupleType)):
+        return tuple([FreezeStructure(item) for item in value])
+    return value
+
+"""
+Return a modifiable copy of the frozen structure given. FrozenDict are converted
+into dictionaries and tuples into lists
+"""
+def ThawStructure(value):
+    if isinstance(value, DictType):
+        return dict([(key, ThawStructure(item)) for key, item in value.iteritems()])
+    elif isinstance(value, (ListType, TupleType)):
+        return [ThawStructure(item) for item in value]
+    return value
+
+"""
+Return a modifiable copy of the menu entries given, as expected by Node
+SetSpecificMenu and ExtendSpecificMenu
+"""
+def CopyMenuEntries(menuentries):
+    return [(text, list(indexes)) for text, indexes in menuentries]
+
+#-------------------------------------------------------------------------------
+#                        Compilation of Profile Files
+#-------------------------------------------------------------------------------
+
+# Header of profile cache files, changes with the Python bytecode version since
+# marshal format isn't guaranteed between versions
+CacheMagic = "CFPRF001" + imp.get_magic()
+CacheExtension = ".prfc"
+
+"""
+Return the digest identifying the content of a profile source
+"""
+def GetSourceDigest(source):
+    return HashFunction(source).hexdigest()
+
+"""
+Execute a profile source and return its Mapping and AddMenuEntries
+"""
+def CompileProfile(source, filepath = "<profile>"):
+    namespace = dict([(name, getattr(node, name)) for name in dir(node) if not name.startswith("_")])
+    namespace["Mapping"] = {}
+    namespace["AddMenuEntries"] = []
+    exec compile(source.replace("\r\n", "\n"), filepath, "exec") in namespace
+    return namespace["Mapping"], namespace["AddMenuEntries"]
+
+"""
+Check that the profile mapping and menu entries are well formed. Raise a
+ValueError describing the first problem found
+"""
+def ValidateProfile(mapping, menuentries):
+    if not isinstance(mapping, DictType):
+        raise ValueError, "Profile Mapping must be a dictionary"
+    for index, infos in mapping.iteritems():
+        if not isinstance(index, (IntType, LongType)):
+            raise ValueError, "Invalid index \"%s\" in profile Mapping"%repr(index)
+        if not isinstance(infos, DictType):
+            raise ValueError, "Entry 0x%04X of profile Mapping must be a dictionary"%index
+        for key in ["name", "struct", "values"]:
+            if key not in infos:
+                raise ValueError, "Entry 0x%04X of profile Mapping has no \"%s\""%(index, key)
+        if not isinstance(infos["values"], ListType):
+            raise ValueError, "Values of entry 0x%04X of profile Mapping must be a list"%index
+        for subindex_infos in infos["values"]:
+            if not isinstance(subindex_infos, DictType):
+                raise ValueError, "Subentries of entry 0x%04X of profile Mapping must be dictionaries"%index
+            for key in ["name", "type", "access", "pdo"]:
+                if key not in subindex_infos:
+                    raise ValueError, "A subentry of entry 0x%04X of profile Mapping has no \"%s\""%(index, key)
+    if not isinstance(menuentries, ListType):
+        raise ValueError, "Profile AddMenuEntries must be a list"
+    for menuentry in menuentries:
+        if not isinstance(menuentry, (ListType, TupleType)) or len(menuentry) != 2:
+            raise ValueError, "Profile AddMenuEntries must contain (text, indexes) pairs"
+        text, indexes = menuentry
+        if not isinstance(text, StringTypes) or not isinstance(indexes, (ListType, TupleType)):
+            raise ValueError, "Profile AddMenuEntries must contain (text, indexes) pairs"
+        for index in indexes:
+            if not isinstance(index, (IntType, LongType)):
+                raise ValueError, "Invalid index \"%s\" in profile AddMenuEntries"%repr(index)
+    try:
+        marshal.dumps((mapping, menuentries))
+    except ValueError:
+        raise ValueError, "Profile contains values that can't be serialized"
+
+#-------------------------------------------------------------------------------
+#                            Profile Cache Files
+#-------------------------------------------------------------------------------
+
+"""
+Return the user folder where profile cache files are stored. Profile folder is
+never used since objdictgen can be installed in a read only folder
+"""
+def GetUserCacheFolder():
+    cachehome = os.environ.get("XDG_CACHE_HOME", "")
+    if not cachehome:
+        cachehome = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cachehome, "canfestival", "profiles")
+
+"""
+Return the path of the cache file of a profile source
+"""
+def GetCacheFilePath(digest):
+    return os.path.join(GetUserCacheFolder(), digest + CacheExtension)
+
+"""
+Return the Mapping and AddMenuEntries stored in a cache file if it was generated
+from a source with the digest given, None otherwise
+"""
+def ReadCacheFile(cachepath, digest):
+    try:
+        cachefile = open(cachepath, "rb")
+        try:
+            header = cachefile.read(len(CacheMagic) + len(digest))
+            if header != CacheMagic + digest:
+                return None
+            return marshal.loads(cachefile.read())
+        finally:
+            cachefile.close()
+    except (IOError, OSError, EOFError, ValueError, TypeError):
+        return None
+
+"""
+Store a compiled profile in a cache file. Return True if succeed
+"""
+def WriteCacheFile(cachepath, digest, profile):
+    try:
+        folder = os.path.dirname(cachepath)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+        # Write in a temporary file first so that a concurrent reader never
+        # sees a partial cache file
+        temppath = "%s.%d.tmp"%(cachepath, os.getpid())
+        cachefile = open(temppath, "wb")
+        try:
+            cachefile.write(CacheMagic + digest)
+            cachefile.write(marshal.dumps(profile))
+        finally:
+            cachefile.close()
+        if os.name == "nt" and os.path.exists(cachepath):
+            os.remove(cachepath)
+        os.rename(temppath, cachepath)
+        return True
+    except (IOError, OSError):
+        return False
+
+#-------------------------------------------------------------------------------
+#                              Profile Loading
+#-------------------------------------------------------------------------------
+
+# Folder containing the profiles distributed with objdictgen
+ProfileFolder = os.path.join(os.path.split(__file__)[0], "config")
+
+# Profiles already loaded, indexed by source digest
+LoadedProfiles = {}
+
+# References of the shared profile mappings, indexed by mapping identity
+SharedProfiles = {}
+
+"""
+Class recording the profile a node uses instead of its mapping. Nodes save it
+in copies and files so that all of them share the same profile mapping once
+loaded
+"""
+
+class ProfileReference:
+
+    def __init__(self, name, digest):
+        self.Name = name
+        self.Digest = digest
+
+    def __repr__(self):
+        return "<ProfileReference %s %s>"%(self.Name, self.Digest)
+
+"""
+Return the Mapping and AddMenuEntries of the profile file given. The profile is
+only executed the first time its content is seen, then stored in a cache file
+in the user cache folder. The Mapping and AddMenuEntries
+returned are frozen and shared between all the callers, use CopyMenuEntries
+before giving the menu entries to a node
+"""
+def LoadProfile(filepath):
+    sourcefile = open(filepath, "rb")
+    try:
+        source = sourcefile.read()
+    finally:
+        sourcefile.close()
+    digest = GetSourceDigest(source)
+    if digest in LoadedProfiles:
+        return LoadedProfiles[digest]
+
+    cachepath = GetCacheFilePath(digest)
+    profile = ReadCacheFile(cachepath, digest)
+    if profile is None:
+        profile = CompileProfile(source, filepath)
+        ValidateProfile(*profile)
+        # Profile is compiled again next time if cache file can't be written
+        WriteCacheFile(cachepath, digest, profile)
+
+    mapping, menuentries = profile
+    mapping = FreezeStructure(mapping)
+    LoadedProfiles[digest] = (mapping, FreezeStructure(menuentries))
+    # Only distributed profiles can be referenced, nodes using a profile from
+    # another folder keep a copy of it so that they can be opened anywhere
+    folder, filename = os.path.split(os.path.realpath(filepath))
+    if os.path.normcase(folder) == os.path.normcase(os.path.realpath(ProfileFolder)):
+        SharedProfiles[id(mapping)] = ProfileReference(os.path.splitext(filename)[0], digest)
+    return LoadedProfiles[digest]
+
+"""
+Return the reference of the profile mapping given if it's a shared one, None
+otherwise
+"""
+def GetProfileReference(mapping):
+    return SharedProfiles.get(id(mapping), None)
+
+"""
+Return the profile mapping corresponding to the value given. Value is returned
+unchanged if it isn't a profile reference
+"""
+def ResolveProfile(value):
+    if isinstance(value, ProfileReference):
+        if value.Digest in LoadedProfiles:
+            return LoadedProfiles[value.Digest][0]
+        # Profile file may have been updated since reference was made
+        return LoadProfile(os.path.join(ProfileFolder, value.Name + ".prf"))[0]
+    return value
+
+"""
+Forget all the profiles loaded
+"""
+def ClearLoadedProfiles():
+    LoadedProfiles.clear()
+    SharedProfiles.clear()
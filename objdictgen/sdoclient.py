@@ -0,0 +1,516 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+from types import *
+from collections import deque
+import struct
+
+from virtualcan import CanEndpoint
+from concisedcf import ConciseDCF
+from sdoserver import *
+
+#-------------------------------------------------------------------------------
+#                          Definition of SdoRequest Object
+#-------------------------------------------------------------------------------
+
+# Smallest number of bytes downloaded or uploaded with a block transfer
+BLOCK_THRESHOLD = 8
+
+"""
+Class recording a SDO request of a client. Data is the data to download, None
+for an upload. When request is completed, Data is the data uploaded and Abort
+the abort code if transfer failed, None otherwise
+"""
+
+class SdoRequest:
+
+    def __init__(self, nodeid, index, subindex, data = None, callback = None, block = True):
+        self.NodeID = nodeid
+        self.Index = index
+        self.SubIndex = subindex
+        self.Upload = data is None
+        self.Data = data
+        self.Callback = callback
+        self.Block = block
+        self.Abort = None
+        self.Completed = False
+        self.StartTime = None
+        self.EndTime = None
+
+    def GetAbortMessage(self):
+        if self.Abort is None:
+            return None
+        return AbortMessages.get(self.Abort, "Abort code 0x%8.8X"%self.Abort)
+
+    def __repr__(self):
+        if self.Upload:
+            kind = "Upload"
+        else:
+            kind = "Download"
+        return "%s 0x%2.2X 0x%4.4X sub 0x%2.2X"%(kind, self.NodeID, self.Index, self.SubIndex)
+
+#-------------------------------------------------------------------------------
+#                          Definition of SdoClient Object
+#-------------------------------------------------------------------------------
+
+"""
+Class recording the state of the client channel connected to a server
+"""
+
+class SdoChannel:
+
+    def __init__(self, nodeid, txcobid, rxcobid):
+        self.NodeID = nodeid
+        self.TxCobID = txcobid
+        self.RxCobID = rxcobid
+        self.Requests = deque()
+        self.Current = None
+        self.State = None
+        self.Offset = 0
+        self.Toggle = 0
+        self.Size = None
+        self.CRC = False
+        self.BlockSize = BLOCK_SIZE_MAX
+        self.Sequence = 0
+        self.BlockStart = 0
+        self.Timer = None
+        # Server doesn't support block transfers
+        self.NoBlock = False
+        self.Statistics = {"requests" : 0, "aborts" : 0, "bytes" : 0, "start" : None, "end" : None}
+
+"""
+Class transferring data to and from SDO servers on a VirtualCanBus. Requests to
+a server are executed one after the other, requests to different servers are
+executed at the same time. Block transfers are used for big data when server
+supports them.
+"""
+
+class SdoClient(CanEndpoint):
+
+    def __init__(self, name = "SDO client", timeout = 1., queue_size = 32, block = True):
+        CanEndpoint.__init__(self, name, queue_size)
+        self.Timeout = timeout
+        self.Block = block
+        # Channels by server node ID and by COB ID received
+        self.Channels = {}
+        self.ChannelsByCobID = {}
+        # Frames waiting for room in transmit queue
+        self.Postponed = deque()
+
+    """
+    Define the COB IDs used to communicate with a server, default ones being
+    used if not defined
+    """
+    def SetChannel(self, nodeid, txcobid = None, rxcobid = None):
+        if txcobid is None:
+            txcobid = SDO_RX_BASE + nodeid
+        if rxcobid is None:
+            rxcobid = SDO_TX_BASE + nodeid
+        channel = self.Channels.get(nodeid, None)
+        if channel is not None:
+            self.ChannelsByCobID.pop(channel.RxCobID)
+        channel = self.Channels[nodeid] = SdoChannel(nodeid, txcobid, rxcobid)
+        self.ChannelsByCobID[rxcobid] = channel
+        return channel
+
+    def GetChannel(self, nodeid):
+        channel = self.Channels.get(nodeid, None)
+        if channel is None:
+            channel = self.SetChannel(nodeid)
+        return channel
+
+    def Accept(self, frame):
+        return frame.CobID in self.ChannelsByCobID
+
+#-------------------------------------------------------------------------------
+#                              Requests Queuing
+#-------------------------------------------------------------------------------
+
+    def AddRequest(self, request):
+        channel = self.GetChannel(request.NodeID)
+        channel.Requests.append(request)
+        if channel.Current is None:
+            if self.Bus is not None:
+                self.Bus.Schedule(0, self.StartNextRequest, channel)
+            else:
+                raise ValueError, "SDO client isn't attached to a bus"
+        return request
+
+    def Download(self, nodeid, index, subindex, data, callback = None, block = None):
+        if block is None:
+            block = self.Block
+        return self.AddRequest(SdoRequest(nodeid, index, subindex, str(data), callback, block))
+
+    def Upload(self, nodeid, index, subindex, callback = None, block = None):
+        if block is None:
+            block = self.Block
+        return self.AddRequest(SdoRequest(nodeid, index, subindex, None, callback, block))
+
+    """
+    Download every parameter of a concise DCF in a node. Return the list of
+    requests
+    """
+    def DownloadConciseDCF(self, nodeid, dcf, callback = None):
+        if not isinstance(dcf, ConciseDCF):
+            dcf = ConciseDCF(dcf)
+        return [self.Download(nodeid, index, subindex, str(dcf.Buffer[offset:offset + size]), callback)
+                for index, subindex, size, offset in dcf.Records]
+
+    """
+    Download in each slave of a NodeList the concise DCF defined for it in the
+    master node (0x1F22). Return the list of requests
+    """
+    def DownloadNodeListDCFs(self, nodelist, callback = None):
+        requests = []
+        master = nodelist.GetManager().CurrentNode
+        if master is None or not master.IsEntry(0x1F22):
+            return requests
+        for nodeid in nodelist.GetSlaveIDs():
+            dcf = master.GetEntry(0x1F22, nodeid)
+            if dcf:
+                requests.extend(self.DownloadConciseDCF(nodeid, dcf, callback))
+        return requests
+
+    def IsIdle(self):
+        for channel in self.Channels.itervalues():
+            if channel.Current is not None or len(channel.Requests) > 0:
+                return False
+        return True
+
+    """
+    Run the bus until all the requests are completed
+    """
+    def RunUntilIdle(self, limit = None):
+        while not self.IsIdle():
+            if not self.Bus.Step():
+                break
+            if limit is not None and self.Bus.GetTime() > limit:
+                break
+        return self.IsIdle()
+
+#-------------------------------------------------------------------------------
+#                              Statistics
+#-------------------------------------------------------------------------------
+
+    """
+    Return the statistics of the transfers with a node as a dictionary, with
+    the bytes transferred per second in "throughput"
+    """
+    def GetNodeStatistics(self, nodeid):
+        statistics = self.GetChannel(nodeid).Statistics.copy()
+        statistics["throughput"] = 0.
+        if statistics["start"] is not None and statistics["end"] > statistics["start"]:
+            statistics["throughput"] = statistics["bytes"] / (statistics["end"] - statistics["start"])
+        return statistics
+
+    """
+    Return the statistics of the transfers with all the nodes, with the bytes
+    transferred per second on the whole bus in "throughput"
+    """
+    def GetStatistics(self):
+        statistics = {"requests" : 0, "aborts" : 0, "bytes" : 0, "start" : None, "end" : None, "throughput" : 0.}
+        for channel in self.Channels.itervalues():
+            for key in ["requests", "aborts", "bytes"]:
+                statistics[key] += channel.Statistics[key]
+            if channel.Statistics["start"] is not None:
+                if statistics["start"] is None or channel.Statistics["start"] < statistics["start"]:
+                    statistics["start"] = channel.Statistics["start"]
+                if statistics["end"] is None or channel.Statistics["end"] > statistics["end"]:
+                    statistics["end"] = channel.Statistics["end"]
+        if statistics["start"] is not None and statistics["end"] > statistics["start"]:
+            statistics["throughput"] = statistics["bytes"] / (statistics["end"] - statistics["start"])
+        return statistics
+
+#-------------------------------------------------------------------------------
+#                              Transfers
+#-------------------------------------------------------------------------------
+
+    """
+    Send a request to a server, frames are kept in order until there is room in
+    the transmit queue
+    """
+    def Transmit(self, channel, command, data = ""):
+        data = BuildSDOData(command, data)
+        if len(self.Postponed) > 0 or self.IsQueueFull():
+            self.Postponed.append((channel.TxCobID, data))
+        else:
+            self.Send(channel.TxCobID, data)
+
+    def OnQueueReady(self):
+        while len(self.Postponed) > 0 and not self.IsQueueFull():
+            self.Send(*self.Postponed.popleft())
+
+    def StartNextRequest(self, channel):
+        if channel.Current is not None or len(channel.Requests) == 0:
+            return
+        request = channel.Current = channel.Requests.popleft()
+        request.StartTime = self.Bus.GetTime()
+        if channel.Statistics["start"] is None:
+            channel.Statistics["start"] = request.StartTime
+        channel.Offset = 0
+        channel.Toggle = 0
+        channel.Sequence = 0
+        channel.BlockStart = 0
+        channel.BlockSize = BLOCK_SIZE_MAX
+        channel.Size = None
+        multiplexer = GetMultiplexer(request.Index, request.SubIndex)
+        block = request.Block and not channel.NoBlock
+        if request.Upload:
+            request.Data = ""
+            if block:
+                channel.State = "block_upload_initiate"
+                self.Transmit(channel, (CCS_BLOCK_UPLOAD << 5) | 0x04 | BLOCK_INITIATE, multiplexer + chr(BLOCK_SIZE_MAX) + chr(0))
+            else:
+                channel.State = "upload_initiate"
+                self.Transmit(channel, CCS_INITIATE_UPLOAD << 5, multiplexer)
+        else:
+            size = len(request.Data)
+            if 0 < size <= 4:
+                channel.State = "download_expedited"
+                self.Transmit(channel, (CCS_INITIATE_DOWNLOAD << 5) | ((4 - size) << 2) | 0x03, multiplexer + request.Data)
+            elif block and size >= BLOCK_THRESHOLD:
+                channel.State = "block_download_initiate"
+                self.Transmit(channel, (CCS_BLOCK_DOWNLOAD << 5) | 0x04 | 0x02 | BLOCK_INITIATE, multiplexer + struct.pack("<I", size))
+            else:
+                channel.State = "download_initiate"
+                self.Transmit(channel, (CCS_INITIATE_DOWNLOAD << 5) | 0x01, multiplexer + struct.pack("<I", size))
+        self.RestartTimer(channel)
+
+    def EndRequest(self, channel, abort = None):
+        request = channel.Current
+        channel.Current = None
+        channel.State = None
+        if self.Bus is not None:
+            self.Bus.Cancel(channel.Timer)
+        request.Abort = abort
+        request.Completed = True
+        request.EndTime = self.Bus.GetTime()
+        channel.Statistics["requests"] += 1
+        channel.Statistics["end"] = request.EndTime
+        if abort is None:
+            channel.Statistics["bytes"] += len(request.Data)
+        else:
+            channel.Statistics["aborts"] += 1
+        if request.Callback is not None:
+            request.Callback(request)
+        self.StartNextRequest(channel)
+
+    def AbortRequest(self, channel, code):
+        request = channel.Current
+        self.Transmit(channel, CCS_ABORT << 5, GetMultiplexer(request.Index, request.SubIndex) + struct.pack("<I", code))
+        self.EndRequest(channel, code)
+
+    def RestartTimer(self, channel):
+        if self.Timeout:
+            self.Bus.Cancel(channel.Timer)
+            channel.Timer = self.Bus.Schedule(self.Timeout, self.OnTimeout, channel, channel.Current)
+
+    def OnTimeout(self, channel, request):
+        if channel.Current is request:
+            self.AbortRequest(channel, SDO_ABORT_TIMEOUT)
+
+    def Receive(self, frame):
+        channel = self.ChannelsByCobID[frame.CobID]
+        if channel.Current is None:
+            return
+        data = frame.Data.ljust(8, "\x00")
+        command = ord(data[0])
+        request = channel.Current
+        # Block upload segments have no command specifier, sequence number 0
+        # isn't valid so an abort can still be recognized
+        if channel.State == "block_upload_data" and command != SCS_ABORT << 5:
+            return self.BlockUploadSegment(channel, request, command, data)
+        if command >> 5 == SCS_ABORT:
+            code = struct.unpack_from("<I", data, 4)[0]
+            if channel.State in ["block_download_initiate", "block_upload_initiate"] and code == SDO_ABORT_COMMAND:
+                # Server doesn't support block transfers, request is made again
+                channel.NoBlock = True
+                channel.Current = None
+                channel.Requests.appendleft(request)
+                return self.StartNextRequest(channel)
+            return self.EndRequest(channel, code)
+        self.RestartTimer(channel)
+        method = getattr(self, "On_" + channel.State, None)
+        if method is None:
+            return self.AbortRequest(channel, SDO_ABORT_COMMAND)
+        method(channel, request, command, data)
+
+#-------------------------------------------------------------------------------
+#                              Download
+#-------------------------------------------------------------------------------
+
+    def On_download_expedited(self, channel, request, command, data):
+        if command >> 5 != SCS_INITIATE_DOWNLOAD:
+            return self.AbortRequest(channel, SDO_ABORT_COMMAND)
+        self.EndRequest(channel)
+
+    def On_download_initiate(self, channel, request, command, data):
+        if command >> 5 != SCS_INITIATE_DOWNLOAD:
+            return self.AbortRequest(channel, SDO_ABORT_COMMAND)
+        channel.State = "download_segment"
+        self.SendDownloadSegment(channel, request)
+
+    def SendDownloadSegment(self, channel, request):
+        segment = request.Data[channel.Offset:channel.Offset + 7]
+        channel.Offset += len(segment)
+        command = (CCS_DOWNLOAD_SEGMENT << 5) | (channel.Toggle << 4) | ((7 - len(segment)) << 1)
+        if channel.Offset >= len(request.Data):
+            command |= 0x01
+        self.Transmit(channel, command, segment)
+
+    def On_download_segment(self, channel, request, command, data):
+        if command >> 5 != SCS_DOWNLOAD_SEGMENT:
+            return self.AbortRequest(channel, SDO_ABORT_COMMAND)
+        if (command >> 4) & 0x01 != channel.Toggle:
+            return self.AbortRequest(channel, SDO_ABORT_TOGGLE)
+        channel.Toggle ^= 1
+        if channel.Offset >= len(request.Data):
+            self.EndRequest(channel)
+        else:
+            self.SendDownloadSegment(channel, request)
+
+    def On_block_download_initiate(self, channel, request, command, data):
+        if command >> 5 != SCS_BLOCK_DOWNLOAD or command & 0x03 != BLOCK_INITIATE:
+            return self.AbortRequest(channel, SDO_ABORT_COMMAND)
+        channel.CRC = command & 0x04 != 0
+        channel.BlockSize = ord(data[4])
+        if not 0 < channel.BlockSize <= BLOCK_SIZE_MAX:
+            return self.AbortRequest(channel, SDO_ABORT_BLOCK_SIZE)
+        channel.State = "block_download_data"
+        self.SendDownloadBlock(channel, request)
+
+    """
+    Send the segments of the next block of a block download
+    """
+    def SendDownloadBlock(self, channel, request):
+        channel.BlockStart = channel.Offset
+        channel.Sequence = 0
+        offset = channel.Offset
+        while channel.Sequence < channel.BlockSize:
+            segment = request.Data[offset:offset + 7]
+            offset += 7
+            channel.Sequence += 1
+            command = channel.Sequence
+            if offset >= len(request.Data):
+                command |= 0x80
+            self.Transmit(channel, command, segment)
+            if command & 0x80:
+                break
+
+    def On_block_download_data(self, channel, request, command, data):
+        if command >> 5 != SCS_BLOCK_DOWNLOAD or command & 0x03 != BLOCK_ACK:
+            return self.AbortRequest(channel, SDO_ABORT_COMMAND)
+        acknowledged = ord(data[1])
+        channel.BlockSize = ord(data[2])
+        if acknowledged > channel.Sequence or not 0 < channel.BlockSize <= BLOCK_SIZE_MAX:
+            return self.AbortRequest(channel, SDO_ABORT_SEQUENCE)
+        channel.Offset = min(channel.BlockStart + acknowledged * 7, len(request.Data))
+        if channel.Offset >= len(request.Data):
+            channel.State = "block_download_end"
+            unused = (7 - len(request.Data) % 7) % 7
+            crc = 0
+            if channel.CRC:
+                crc = ComputeCRC(request.Data)
+            self.Transmit(channel, (CCS_BLOCK_DOWNLOAD << 5) | (unused << 2) | BLOCK_END, struct.pack("<H", crc))
+        else:
+            self.SendDownloadBlock(channel, request)
+
+    def On_block_download_end(self, channel, request, command, data):
+        if command >> 5 != SCS_BLOCK_DOWNLOAD or command & 0x03 != BLOCK_END:
+            return self.AbortRequest(channel, SDO_ABORT_COMMAND)
+        self.EndRequest(channel)
+
+#-------------------------------------------------------------------------------
+#                              Upload
+#-------------------------------------------------------------------------------
+
+    def On_upload_initiate(self, channel, request, command, data):
+        if command >> 5 != SCS_INITIATE_UPLOAD:
+            return self.AbortRequest(channel, SDO_ABORT_COMMAND)
+        if command & 0x02:
+            # Expedited transfer
+            if command & 0x01:
+                request.Data = data[4:8 - ((command >> 2) & 0x03)]
+            else:
+                request.Data = data[4:8]
+            return self.EndRequest(channel)
+        if command & 0x01:
+            channel.Size = struct.unpack_from("<I", data, 4)[0]
+        channel.State = "upload_segment"
+        self.Transmit(channel, (CCS_UPLOAD_SEGMENT << 5) | (channel.Toggle << 4))
+
+    def On_upload_segment(self, channel, request, command, data):
+        if command >> 5 != SCS_UPLOAD_SEGMENT:
+            return self.AbortRequest(channel, SDO_ABORT_COMMAND)
+        if (command >> 4) & 0x01 != channel.Toggle:
+            return self.AbortRequest(channel, SDO_ABORT_TOGGLE)
+        request.Data += data[1:8 - ((command >> 1) & 0x07)]
+        channel.Toggle ^= 1
+        if command & 0x01:
+            if channel.Size is not None and channel.Size != len(request.Data):
+                return self.AbortRequest(channel, SDO_ABORT_LENGTH)
+            self.EndRequest(channel)
+        else:
+            self.Transmit(channel, (CCS_UPLOAD_SEGMENT << 5) | (channel.Toggle << 4))
+
+    def On_block_upload_initiate(self, channel, request, command, data):
+        if command >> 5 == SCS_INITIATE_UPLOAD:
+            # Server chose a normal upload
+            channel.State = "upload_initiate"
+            return self.On_upload_initiate(channel, request, command, data)
+        if command >> 5 != SCS_BLOCK_UPLOAD or command & 0x01 != BLOCK_INITIATE:
+            return self.AbortRequest(channel, SDO_ABORT_COMMAND)
+        channel.CRC = command & 0x04 != 0
+        if command & 0x02:
+            channel.Size = struct.unpack_from("<I", data, 4)[0]
+        channel.State = "block_upload_data"
+        channel.Sequence = 0
+        self.Transmit(channel, (CCS_BLOCK_UPLOAD << 5) | BLOCK_START)
+
+    def BlockUploadSegment(self, channel, request, command, data):
+        self.RestartTimer(channel)
+        sequence = command & 0x7F
+        last = command & 0x80 != 0
+        if sequence == channel.Sequence + 1:
+            channel.Sequence = sequence
+            request.Data += data[1:8]
+        elif sequence == 0 or sequence > channel.BlockSize:
+            return self.AbortRequest(channel, SDO_ABORT_SEQUENCE)
+        if last or sequence >= channel.BlockSize:
+            self.Transmit(channel, (CCS_BLOCK_UPLOAD << 5) | BLOCK_ACK, chr(channel.Sequence) + chr(channel.BlockSize))
+            if last and sequence == channel.Sequence:
+                channel.State = "block_upload_end"
+            channel.Sequence = 0
+
+    def On_block_upload_end(self, channel, request, command, data):
+        if command >> 5 != SCS_BLOCK_UPLOAD or command & 0x03 != BLOCK_END:
+            return self.AbortRequest(channel, SDO_ABORT_COMMAND)
+        unused = (command >> 2) & 0x07
+        if unused:
+            request.Data = request.Data[:-unused]
+        if channel.CRC and struct.unpack_from("<H", data, 1)[0] != ComputeCRC(request.Data):
+            return self.AbortRequest(channel, SDO_ABORT_CRC)
+        if channel.Size is not None and channel.Size != len(request.Data):
+            return self.AbortRequest(channel, SDO_ABORT_LENGTH)
+        self.Transmit(channel, (CCS_BLOCK_UPLOAD << 5) | BLOCK_END)
+        self.EndRequest(channel)
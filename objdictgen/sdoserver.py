@@ -0,0 +1,609 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+from types import *
+import struct, weakref
+
+from virtualcan import CanEndpoint
+from networkcheck import GetCanID
+from odtypes import GetNodeTypeCoding
+
+#-------------------------------------------------------------------------------
+#                              SDO Protocol
+#-------------------------------------------------------------------------------
+
+# Default COB IDs of the SDO server channel
+SDO_RX_BASE = 0x600
+SDO_TX_BASE = 0x580
+
+# Client command specifiers
+CCS_DOWNLOAD_SEGMENT = 0
+CCS_INITIATE_DOWNLOAD = 1
+CCS_INITIATE_UPLOAD = 2
+CCS_UPLOAD_SEGMENT = 3
+CCS_ABORT = 4
+CCS_BLOCK_UPLOAD = 5
+CCS_BLOCK_DOWNLOAD = 6
+
+# Server command specifiers
+SCS_UPLOAD_SEGMENT = 0
+SCS_DOWNLOAD_SEGMENT = 1
+SCS_INITIATE_UPLOAD = 2
+SCS_INITIATE_DOWNLOAD = 3
+SCS_ABORT = 4
+SCS_BLOCK_DOWNLOAD = 5
+SCS_BLOCK_UPLOAD = 6
+
+# Sub-commands of block transfers
+BLOCK_INITIATE = 0
+BLOCK_END = 1
+BLOCK_ACK = 2
+BLOCK_START = 3
+
+# Number of segments of a block, biggest value allowed
+BLOCK_SIZE_MAX = 127
+
+# Abort codes
+SDO_ABORT_TOGGLE = 0x05030000
+SDO_ABORT_TIMEOUT = 0x05040000
+SDO_ABORT_COMMAND = 0x05040001
+SDO_ABORT_BLOCK_SIZE = 0x05040002
+SDO_ABORT_SEQUENCE = 0x05040003
+SDO_ABORT_CRC = 0x05040004
+SDO_ABORT_WRITE_ONLY = 0x06010001
+SDO_ABORT_READ_ONLY = 0x06010002
+SDO_ABORT_NO_OBJECT = 0x06020000
+SDO_ABORT_LENGTH = 0x06070010
+SDO_ABORT_LENGTH_HIGH = 0x06070012
+SDO_ABORT_LENGTH_LOW = 0x06070013
+SDO_ABORT_NO_SUBINDEX = 0x06090011
+SDO_ABORT_VALUE_HIGH = 0x06090031
+SDO_ABORT_VALUE_LOW = 0x06090032
+SDO_ABORT_GENERAL = 0x08000000
+
+AbortMessages = {
+    SDO_ABORT_TOGGLE : "Toggle bit not alternated",
+    SDO_ABORT_TIMEOUT : "SDO protocol timed out",
+    SDO_ABORT_COMMAND : "Client/server command specifier not valid or unknown",
+    SDO_ABORT_BLOCK_SIZE : "Invalid block size",
+    SDO_ABORT_SEQUENCE : "Invalid sequence number",
+    SDO_ABORT_CRC : "CRC error",
+    SDO_ABORT_WRITE_ONLY : "Attempt to read a write only object",
+    SDO_ABORT_READ_ONLY : "Attempt to write a read only object",
+    SDO_ABORT_NO_OBJECT : "Object does not exist in the object dictionary",
+    SDO_ABORT_LENGTH : "Length of service parameter does not match",
+    SDO_ABORT_LENGTH_HIGH : "Length of service parameter too high",
+    SDO_ABORT_LENGTH_LOW : "Length of service parameter too low",
+    SDO_ABORT_NO_SUBINDEX : "Sub-index does not exist",
+    SDO_ABORT_VALUE_HIGH : "Value of parameter written too high",
+    SDO_ABORT_VALUE_LOW : "Value of parameter written too low",
+    SDO_ABORT_GENERAL : "General error",
+}
+
+# Abort codes of the reasons given by TypeCoding.CheckValue
+CheckAborts = {"length" : SDO_ABORT_LENGTH, "high" : SDO_ABORT_VALUE_HIGH, "low" : SDO_ABORT_VALUE_LOW}
+
+"""
+Return the CRC of data used by block transfers (CRC-16-CCITT, initial value 0)
+"""
+def ComputeCRC(data, crc = 0):
+    for char in data:
+        crc ^= ord(char) << 8
+        for i in xrange(8):
+            if crc & 0x8000:
+                crc = ((crc << 1) ^ 0x1021) & 0xFFFF
+            else:
+                crc = (crc << 1) & 0xFFFF
+    return crc
+
+def GetMultiplexer(index, subindex):
+    return struct.pack("<HB", index, subindex)
+
+"""
+Return a SDO frame data of 8 bytes with the command byte and data given
+"""
+def BuildSDOData(command, data = ""):
+    return (chr(command) + data).ljust(8, "\x00")
+
+def BuildAbortData(index, subindex, code):
+    return BuildSDOData(CCS_ABORT << 5, GetMultiplexer(index, subindex) + struct.pack("<I", code))
+
+#-------------------------------------------------------------------------------
+#                          Objects Access Table
+#-------------------------------------------------------------------------------
+
+# Accesses allowing reading and writing a subentry
+READ_ACCESSES = ["ro", "rw", "rww", "rwr", "const"]
+WRITE_ACCESSES = ["wo", "rw", "rww", "rwr"]
+
+"""
+Class giving the coding and access rights of the subentries of a node. The
+informations of a subentry are computed the first time it's accessed, so that
+a transfer doesn't search the mappings of the node. A table is shared by all
+the nodes using the same base node.
+"""
+
+class ObjectTable:
+
+    def __init__(self, node):
+        self.Node = node
+        # {(index, subindex) : (coding, readable, writable) or abort code}
+        self.Objects = {}
+
+    """
+    Return the (coding, readable, writable) of a subentry, or an abort code if
+    it doesn't exist
+    """
+    def GetObject(self, index, subindex):
+        result = self.Objects.get((index, subindex), None)
+        if result is None:
+            result = self.Objects[(index, subindex)] = self.ComputeObject(index, subindex)
+        return result
+
+    def ComputeObject(self, index, subindex):
+        node = self.Node
+        if not node.IsEntry(index):
+            return SDO_ABORT_NO_OBJECT
+        values = node.GetEntry(index, compute = False)
+        if isinstance(values, ListType):
+            if subindex >= len(values):
+                return SDO_ABORT_NO_SUBINDEX
+        elif subindex != 0:
+            return SDO_ABORT_NO_SUBINDEX
+        infos = node.GetSubentryInfos(index, subindex)
+        if infos is None:
+            return SDO_ABORT_NO_SUBINDEX
+        try:
+            coding = GetNodeTypeCoding(node, infos["type"])
+        except ValueError:
+            return SDO_ABORT_GENERAL
+        access = infos.get("access", "rw")
+        return coding, access in READ_ACCESSES, access in WRITE_ACCESSES
+
+# Tables of the base nodes
+ObjectTables = weakref.WeakKeyDictionary()
+
+"""
+Return the ObjectTable of a node, node variants sharing the table of their
+base node
+"""
+def GetObjectTable(node):
+    base = getattr(node, "Base", None) or node
+    table = ObjectTables.get(base, None)
+    if table is None:
+        table = ObjectTables[base] = ObjectTable(base)
+    return table
+
+#-------------------------------------------------------------------------------
+#                          Definition of SdoServer Object
+#-------------------------------------------------------------------------------
+
+"""
+Class recording the state of a transfer in progress on a SDO channel
+"""
+
+class SdoTransfer:
+
+    def __init__(self, mode, index, subindex, coding):
+        self.Mode = mode
+        self.Index = index
+        self.SubIndex = subindex
+        self.Coding = coding
+        self.Data = ""
+        self.Offset = 0
+        self.Size = None
+        self.Toggle = 0
+        self.CRC = False
+        self.BlockSize = BLOCK_SIZE_MAX
+        self.Sequence = 0
+        self.BlockStart = 0
+        self.Timer = None
+
+"""
+Class serving the object dictionary of a node with the SDO protocol on a
+VirtualCanBus. Expedited, segmented and block transfers are supported on every
+SDO server channel defined by the node (the default channel if none). Values
+are read and written with Node.GetEntry and Node.SetEntry, so a NodeOverlay can
+be served without modifying the node it's based on.
+"""
+
+class SdoServer(CanEndpoint):
+
+    def __init__(self, node, nodeid = None, name = None, timeout = 1., queue_size = 32):
+        if nodeid is None:
+            nodeid = node.GetNodeID()
+        if name is None:
+            name = "SDO server 0x%2.2X"%nodeid
+        CanEndpoint.__init__(self, name, queue_size)
+        self.Node = node
+        self.NodeID = nodeid
+        self.Timeout = timeout
+        self.Table = GetObjectTable(node)
+        # {rx cobid : tx cobid} of the server channels
+        self.Channels = self.GetChannels()
+        # {rx cobid : SdoTransfer} of the transfers in progress
+        self.Transfers = {}
+        # Block upload segments waiting for room in transmit queue
+        self.Postponed = []
+        self.Statistics = {"uploads" : 0, "downloads" : 0, "aborts" : 0, "bytes" : 0}
+
+    def GetChannels(self):
+        channels = {}
+        for index in xrange(0x1200, 0x1280):
+            if self.Node.IsEntry(index):
+                rx = GetCanID(self.Node.GetEntry(index, 1, nodeid = self.NodeID))
+                tx = GetCanID(self.Node.GetEntry(index, 2, nodeid = self.NodeID))
+                if rx is not None and tx is not None:
+                    channels[rx] = tx
+        if len(channels) == 0:
+            channels[SDO_RX_BASE + self.NodeID] = SDO_TX_BASE + self.NodeID
+        return channels
+
+    def GetStatistics(self):
+        return self.Statistics.copy()
+
+    def Accept(self, frame):
+        return frame.CobID in self.Channels and not frame.RTR
+
+    """
+    Called when a value has been written by a client
+    """
+    def OnWrite(self, index, subindex, value):
+        pass
+
+    """
+    Send a response on a channel, responses are kept in order until there is
+    room in the transmit queue
+    """
+    def Reply(self, channel, data):
+        if len(self.Postponed) > 0 or self.IsQueueFull():
+            self.Postponed.append((channel, data))
+        else:
+            self.Send(self.Channels[channel], data)
+
+    def Abort(self, channel, index, subindex, code):
+        self.EndTransfer(channel)
+        self.Statistics["aborts"] += 1
+        self.Reply(channel, BuildAbortData(index, subindex, code))
+
+    def StartTransfer(self, channel, transfer):
+        self.EndTransfer(channel)
+        self.Transfers[channel] = transfer
+        self.RestartTimer(channel, transfer)
+        return transfer
+
+    def EndTransfer(self, channel):
+        transfer = self.Transfers.pop(channel, None)
+        if transfer is not None and self.Bus is not None:
+            self.Bus.Cancel(transfer.Timer)
+        self.Postponed = [segment for segment in self.Postponed if segment[0] != channel]
+
+    def RestartTimer(self, channel, transfer):
+        if self.Timeout and self.Bus is not None:
+            self.Bus.Cancel(transfer.Timer)
+            transfer.Timer = self.Bus.Schedule(self.Timeout, self.OnTimeout, channel, transfer)
+
+    def OnTimeout(self, channel, transfer):
+        if self.Transfers.get(channel, None) is transfer:
+            self.Abort(channel, transfer.Index, transfer.SubIndex, SDO_ABORT_TIMEOUT)
+
+#-------------------------------------------------------------------------------
+#                              Values Access
+#-------------------------------------------------------------------------------
+
+    """
+    Return the data of a subentry, or an abort code
+    """
+    def ReadObject(self, index, subindex):
+        result = self.Table.GetObject(index, subindex)
+        if not isinstance(result, TupleType):
+            return result
+        coding, readable, writable = result
+        if not readable:
+            return SDO_ABORT_WRITE_ONLY
+        value = self.Node.GetEntry(index, subindex, nodeid = self.NodeID)
+        if value is None:
+            return SDO_ABORT_NO_SUBINDEX
+        try:
+            return coding.Encode(value)
+        except (ValueError, TypeError, struct.error):
+            return SDO_ABORT_GENERAL
+
+    """
+    Return the coding of a subentry if it can be written, an abort code
+    otherwise
+    """
+    def GetWritableCoding(self, index, subindex):
+        result = self.Table.GetObject(index, subindex)
+        if not isinstance(result, TupleType):
+            return result
+        coding, readable, writable = result
+        if not writable:
+            return SDO_ABORT_READ_ONLY
+        return coding
+
+    """
+    Write the data of a subentry, return None or an abort code
+    """
+    def WriteObject(self, index, subindex, coding, data):
+        if coding.IsNumber() and coding.Size is not None:
+            if len(data) > coding.Size:
+                return SDO_ABORT_LENGTH_HIGH
+            elif len(data) < coding.Size:
+                return SDO_ABORT_LENGTH_LOW
+        try:
+            value = coding.Decode(data)
+        except (ValueError, struct.error):
+            return SDO_ABORT_LENGTH
+        reason = coding.CheckValue(value, len(data))
+        if reason is not None:
+            return CheckAborts[reason]
+        if not self.Node.SetEntry(index, subindex, value):
+            return SDO_ABORT_NO_SUBINDEX
+        self.Statistics["downloads"] += 1
+        self.Statistics["bytes"] += len(data)
+        self.OnWrite(index, subindex, value)
+        return None
+
+#-------------------------------------------------------------------------------
+#                              Requests Processing
+#-------------------------------------------------------------------------------
+
+    def Receive(self, frame):
+        channel = frame.CobID
+        data = frame.Data.ljust(8, "\x00")
+        command = ord(data[0])
+        ccs = command >> 5
+        transfer = self.Transfers.get(channel, None)
+        # Block download segments have no command specifier, sequence number 0
+        # isn't valid so an abort can still be recognized
+        if transfer is not None and transfer.Mode == "block_download_data" and command != CCS_ABORT << 5:
+            self.BlockDownloadSegment(channel, transfer, command, data)
+        elif ccs == CCS_ABORT:
+            self.EndTransfer(channel)
+        elif ccs == CCS_INITIATE_DOWNLOAD:
+            self.InitiateDownload(channel, command, data)
+        elif ccs == CCS_DOWNLOAD_SEGMENT:
+            self.DownloadSegment(channel, transfer, command, data)
+        elif ccs == CCS_INITIATE_UPLOAD:
+            self.InitiateUpload(channel, data)
+        elif ccs == CCS_UPLOAD_SEGMENT:
+            self.UploadSegment(channel, transfer, command)
+        elif ccs == CCS_BLOCK_DOWNLOAD:
+            self.BlockDownload(channel, transfer, command, data)
+        elif ccs == CCS_BLOCK_UPLOAD:
+            self.BlockUpload(channel, transfer, command, data)
+        else:
+            index, subindex = struct.unpack_from("<HB", data, 1)
+            self.Abort(channel, index, subindex, SDO_ABORT_COMMAND)
+
+    def InitiateDownload(self, channel, command, data):
+        index, subindex = struct.unpack_from("<HB", data, 1)
+        self.EndTransfer(channel)
+        coding = self.GetWritableCoding(index, subindex)
+        if isinstance(coding, (IntType, LongType)):
+            return self.Abort(channel, index, subindex, coding)
+        if command & 0x02:
+            # Expedited transfer, size indicated or not
+            if command & 0x01:
+                length = 4 - ((command >> 2) & 0x03)
+            elif coding.Size is not None and coding.Size <= 4:
+                length = coding.Size
+            else:
+                length = 4
+            result = self.WriteObject(index, subindex, coding, data[4:4 + length])
+            if result is not None:
+                return self.Abort(channel, index, subindex, result)
+        else:
+            transfer = self.StartTransfer(channel, SdoTransfer("download", index, subindex, coding))
+            if command & 0x01:
+                transfer.Size = struct.unpack_from("<I", data, 4)[0]
+        self.Reply(channel, BuildSDOData(SCS_INITIATE_DOWNLOAD << 5, GetMultiplexer(index, subindex)))
+
+    def DownloadSegment(self, channel, transfer, command, data):
+        if transfer is None or transfer.Mode != "download":
+            return self.Abort(channel, 0, 0, SDO_ABORT_COMMAND)
+        toggle = (command >> 4) & 0x01
+        if toggle != transfer.Toggle:
+            return self.Abort(channel, transfer.Index, transfer.SubIndex, SDO_ABORT_TOGGLE)
+        transfer.Data += data[1:8 - ((command >> 1) & 0x07)]
+        transfer.Toggle ^= 1
+        if command & 0x01:
+            self.EndTransfer(channel)
+            if transfer.Size is not None and transfer.Size != len(transfer.Data):
+                return self.Abort(channel, transfer.Index, transfer.SubIndex, SDO_ABORT_LENGTH)
+            result = self.WriteObject(transfer.Index, transfer.SubIndex, transfer.Coding, transfer.Data)
+            if result is not None:
+                return self.Abort(channel, transfer.Index, transfer.SubIndex, result)
+        else:
+            self.RestartTimer(channel, transfer)
+        self.Reply(channel, BuildSDOData((SCS_DOWNLOAD_SEGMENT << 5) | (toggle << 4)))
+
+    def InitiateUpload(self, channel, data):
+        index, subindex = struct.unpack_from("<HB", data, 1)
+        self.EndTransfer(channel)
+        value = self.ReadObject(index, subindex)
+        if not isinstance(value, StringType):
+            return self.Abort(channel, index, subindex, value)
+        self.Statistics["uploads"] += 1
+        self.Statistics["bytes"] += len(value)
+        multiplexer = GetMultiplexer(index, subindex)
+        if 0 < len(value) <= 4:
+            command = (SCS_INITIATE_UPLOAD << 5) | ((4 - len(value)) << 2) | 0x03
+            self.Reply(channel, BuildSDOData(command, multiplexer + value))
+        else:
+            transfer = self.StartTransfer(channel, SdoTransfer("upload", index, subindex, None))
+            transfer.Data = value
+            transfer.Size = len(value)
+            command = (SCS_INITIATE_UPLOAD << 5) | 0x01
+            self.Reply(channel, BuildSDOData(command, multiplexer + struct.pack("<I", len(value))))
+
+    def UploadSegment(self, channel, transfer, command):
+        if transfer is None or transfer.Mode != "upload":
+            return self.Abort(channel, 0, 0, SDO_ABORT_COMMAND)
+        toggle = (command >> 4) & 0x01
+        if toggle != transfer.Toggle:
+            return self.Abort(channel, transfer.Index, transfer.SubIndex, SDO_ABORT_TOGGLE)
+        segment = transfer.Data[transfer.Offset:transfer.Offset + 7]
+        transfer.Offset += len(segment)
+        transfer.Toggle ^= 1
+        command = (SCS_UPLOAD_SEGMENT << 5) | (toggle << 4) | ((7 - len(segment)) << 1)
+        if transfer.Offset >= len(transfer.Data):
+            command |= 0x01
+            self.EndTransfer(channel)
+        else:
+            self.RestartTimer(channel, transfer)
+        self.Reply(channel, BuildSDOData(command, segment))
+
+#-------------------------------------------------------------------------------
+#                              Block Download
+#-------------------------------------------------------------------------------
+
+    def BlockDownload(self, channel, transfer, command, data):
+        subcommand = command & 0x01
+        if subcommand == BLOCK_INITIATE:
+            index, subindex = struct.unpack_from("<HB", data, 1)
+            self.EndTransfer(channel)
+            coding = self.GetWritableCoding(index, subindex)
+            if isinstance(coding, (IntType, LongType)):
+                return self.Abort(channel, index, subindex, coding)
+            transfer = self.StartTransfer(channel, SdoTransfer("block_download_data", index, subindex, coding))
+            transfer.CRC = command & 0x04 != 0
+            if command & 0x02:
+                transfer.Size = struct.unpack_from("<I", data, 4)[0]
+            command = (SCS_BLOCK_DOWNLOAD << 5) | 0x04 | BLOCK_INITIATE
+            self.Reply(channel, BuildSDOData(command, GetMultiplexer(index, subindex) + chr(transfer.BlockSize)))
+        elif transfer is None or transfer.Mode != "block_download_end":
+            self.Abort(channel, 0, 0, SDO_ABORT_COMMAND)
+        else:
+            # Bytes of last segment that don't contain data are removed
+            unused = (command >> 2) & 0x07
+            if unused:
+                transfer.Data = transfer.Data[:-unused]
+            self.EndTransfer(channel)
+            if transfer.CRC and struct.unpack_from("<H", data, 1)[0] != ComputeCRC(transfer.Data):
+                return self.Abort(channel, transfer.Index, transfer.SubIndex, SDO_ABORT_CRC)
+            if transfer.Size is not None and transfer.Size != len(transfer.Data):
+                return self.Abort(channel, transfer.Index, transfer.SubIndex, SDO_ABORT_LENGTH)
+            result = self.WriteObject(transfer.Index, transfer.SubIndex, transfer.Coding, transfer.Data)
+            if result is not None:
+                return self.Abort(channel, transfer.Index, transfer.SubIndex, result)
+            self.Reply(channel, BuildSDOData((SCS_BLOCK_DOWNLOAD << 5) | BLOCK_END))
+
+    def BlockDownloadSegment(self, channel, transfer, command, data):
+        sequence = command & 0x7F
+        last = command & 0x80 != 0
+        if sequence == transfer.Sequence + 1:
+            transfer.Sequence = sequence
+            transfer.Data += data[1:8]
+        elif sequence == 0 or sequence > transfer.BlockSize:
+            return self.Abort(channel, transfer.Index, transfer.SubIndex, SDO_ABORT_SEQUENCE)
+        # Segments out of sequence are ignored, client repeats them after
+        # acknowledge
+        if last or sequence >= transfer.BlockSize:
+            command = (SCS_BLOCK_DOWNLOAD << 5) | BLOCK_ACK
+            self.Reply(channel, BuildSDOData(command, chr(transfer.Sequence) + chr(transfer.BlockSize)))
+            if last and sequence == transfer.Sequence:
+                transfer.Mode = "block_download_end"
+            transfer.Sequence = 0
+        self.RestartTimer(channel, transfer)
+
+#-------------------------------------------------------------------------------
+#                              Block Upload
+#-------------------------------------------------------------------------------
+
+    def BlockUpload(self, channel, transfer, command, data):
+        subcommand = command & 0x03
+        if subcommand == BLOCK_INITIATE:
+            index, subindex = struct.unpack_from("<HB", data, 1)
+            self.EndTransfer(channel)
+            blocksize = ord(data[4])
+            if not 0 < blocksize <= BLOCK_SIZE_MAX:
+                return self.Abort(channel, index, subindex, SDO_ABORT_BLOCK_SIZE)
+            value = self.ReadObject(index, subindex)
+            if not isinstance(value, StringType):
+                return self.Abort(channel, index, subindex, value)
+            transfer = self.StartTransfer(channel, SdoTransfer("block_upload_initiate", index, subindex, None))
+            transfer.Data = value
+            transfer.Size = len(value)
+            transfer.BlockSize = blocksize
+            transfer.CRC = command & 0x04 != 0
+            self.Statistics["uploads"] += 1
+            self.Statistics["bytes"] += len(value)
+            command = (SCS_BLOCK_UPLOAD << 5) | 0x04 | 0x02 | BLOCK_INITIATE
+            self.Reply(channel, BuildSDOData(command, GetMultiplexer(index, subindex) + struct.pack("<I", len(value))))
+        elif transfer is None or not transfer.Mode.startswith("block_upload"):
+            self.Abort(channel, 0, 0, SDO_ABORT_COMMAND)
+        elif subcommand == BLOCK_START and transfer.Mode == "block_upload_initiate":
+            transfer.Mode = "block_upload_data"
+            self.SendUploadBlock(channel, transfer)
+        elif subcommand == BLOCK_ACK and transfer.Mode == "block_upload_data":
+            acknowledged = ord(data[1])
+            blocksize = ord(data[2])
+            if not 0 < blocksize <= BLOCK_SIZE_MAX or acknowledged > transfer.Sequence:
+                return self.Abort(channel, transfer.Index, transfer.SubIndex, SDO_ABORT_BLOCK_SIZE)
+            transfer.Offset = min(transfer.BlockStart + acknowledged * 7, len(transfer.Data))
+            transfer.BlockSize = blocksize
+            if transfer.Offset >= len(transfer.Data) and (len(transfer.Data) > 0 or acknowledged > 0):
+                transfer.Mode = "block_upload_end"
+                if len(transfer.Data) > 0:
+                    unused = (7 - len(transfer.Data) % 7) % 7
+                else:
+                    unused = 7
+                crc = 0
+                if transfer.CRC:
+                    crc = ComputeCRC(transfer.Data)
+                command = (SCS_BLOCK_UPLOAD << 5) | (unused << 2) | BLOCK_END
+                self.Reply(channel, BuildSDOData(command, struct.pack("<H", crc)))
+            else:
+                self.SendUploadBlock(channel, transfer)
+            self.RestartTimer(channel, transfer)
+        elif subcommand == BLOCK_END and transfer.Mode == "block_upload_end":
+            self.EndTransfer(channel)
+        else:
+            self.Abort(channel, transfer.Index, transfer.SubIndex, SDO_ABORT_COMMAND)
+
+    """
+    Send the segments of the next block of a block upload, segments that don't
+    fit in transmit queue are sent when it's ready
+    """
+    def SendUploadBlock(self, channel, transfer):
+        transfer.BlockStart = transfer.Offset
+        transfer.Sequence = 0
+        offset = transfer.Offset
+        while transfer.Sequence < transfer.BlockSize:
+            segment = transfer.Data[offset:offset + 7]
+            offset += 7
+            transfer.Sequence += 1
+            command = transfer.Sequence
+            if offset >= len(transfer.Data):
+                command |= 0x80
+            self.Postponed.append((channel, BuildSDOData(command, segment)))
+            if command & 0x80:
+                break
+        self.OnQueueReady()
+
+    def OnQueueReady(self):
+        while len(self.Postponed) > 0 and not self.IsQueueFull():
+            channel, data = self.Postponed.pop(0)
+            self.Send(self.Channels[channel], data)
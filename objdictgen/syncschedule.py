@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+from types import *
+from networkcheck import GetCanID, COBID_EXTENDED, COBID_SYNC_PRODUCER
+from busload import GetFrameBits, GetTPDOLength, GetNumberValue
+
+#-------------------------------------------------------------------------------
+#                          Synchronous PDOs Extraction
+#-------------------------------------------------------------------------------
+
+# Biggest value of the SYNC counter (0x1019)
+MAX_SYNC_COUNTER = 240
+
+TRANSMISSION_SYNC_ACYCLIC = 0
+TRANSMISSION_SYNC_MAX = 240
+TRANSMISSION_EVENT_SPECIFIC = 0xFE
+TRANSMISSION_EVENT_PROFILE = 0xFF
+
+def gcd(a, b):
+    while b:
+        a, b = b, a % b
+    return a
+
+def lcm(a, b):
+    return a * b / gcd(a, b)
+
+"""
+Return the synchronous TPDOs of the nodes of a NetworkIndex. Each PDO is a
+dictionary with:
+  - "nodeid" and "index" of its communication parameter
+  - "bits" the length of the frame on the bus
+  - "divider" the number of SYNC between two transmissions
+  - "phase" the first SYNC (starting from 0) on which PDO is transmitted
+  - "configurable" True if the phase can be chosen with the SYNC start value
+  - "transmission" the transmission type to apply if PDO isn't synchronous yet
+If syncperiod is given (in seconds), event driven PDOs with an event timer
+multiple of the SYNC period are made cyclic synchronous with the same period.
+SYNC start values are only used if synccounter, the SYNC counter overflow value
+(0x1019) of the SYNC producer, is bigger than 1.
+"""
+def GetIndexSyncPDOs(index, syncperiod = None, stuffing = True, synccounter = 0):
+    pdos = []
+    for (nodeid, comm_index), cobid_value in index.GetRangeValues(0x1800, 0x19FF, 1).iteritems():
+        if GetCanID(cobid_value) is None:
+            continue
+        length = GetTPDOLength(index, nodeid, comm_index)
+        pdo = {"nodeid" : nodeid, "index" : comm_index,
+               "bits" : GetFrameBits(length, cobid_value & COBID_EXTENDED != 0, stuffing),
+               "configurable" : index.GetNodeEntry(nodeid, comm_index, 6) is not None,
+               "transmission" : None}
+        transmission = GetNumberValue(index, nodeid, comm_index, 2, TRANSMISSION_EVENT_PROFILE)
+        if transmission == TRANSMISSION_SYNC_ACYCLIC:
+            # Acyclic PDOs can be sent on every SYNC and their phase can't be set
+            pdo["divider"] = 1
+            pdo["configurable"] = False
+        elif transmission <= TRANSMISSION_SYNC_MAX:
+            pdo["divider"] = transmission
+        elif transmission in [TRANSMISSION_EVENT_SPECIFIC, TRANSMISSION_EVENT_PROFILE] and syncperiod:
+            event_timer = GetNumberValue(index, nodeid, comm_index, 5)
+            divider = int(round(event_timer / 1000. / syncperiod))
+            if event_timer == 0 or not 0 < divider <= TRANSMISSION_SYNC_MAX or abs(divider * syncperiod * 1000 - event_timer) > 1e-6:
+                continue
+            pdo["divider"] = divider
+            pdo["transmission"] = divider
+        else:
+            continue
+        # Without SYNC counter, SYNC start value is ignored. Without SYNC start
+        # value, a PDO is sent when its SYNC count reaches its divider
+        startvalue = GetNumberValue(index, nodeid, comm_index, 6)
+        if synccounter <= 1:
+            pdo["phase"] = 0
+        elif startvalue > 0:
+            pdo["phase"] = (startvalue - 1) % pdo["divider"]
+        else:
+            pdo["phase"] = pdo["divider"] - 1
+        pdos.append(pdo)
+    return pdos
+
+"""
+Return the node ID, SYNC period in seconds, SYNC window length in seconds and
+SYNC counter overflow value of the SYNC producer of the indexes given, None if
+there isn't any
+"""
+def GetSyncProducer(indexes):
+    for index in indexes:
+        for nodeid, value in index.GetEntryValues(0x1005, 0).iteritems():
+            if isinstance(value, (IntType, LongType)) and value & COBID_SYNC_PRODUCER:
+                period = GetNumberValue(index, nodeid, 0x1006, 0) / 1000000.
+                window = GetNumberValue(index, nodeid, 0x1007, 0) / 1000000.
+                counter = GetNumberValue(index, nodeid, 0x1019, 0)
+                return nodeid, period, window, counter
+    return None
+
+#-------------------------------------------------------------------------------
+#                          Phase Optimization
+#-------------------------------------------------------------------------------
+
+"""
+Return the number of SYNC after which the transmission pattern of the PDOs
+given repeats
+"""
+def GetHyperPeriod(pdos):
+    hyperperiod = 1
+    for pdo in pdos:
+        hyperperiod = lcm(hyperperiod, pdo["divider"])
+    return hyperperiod
+
+"""
+Return the bits and the frames sent after each SYNC of a hyperperiod for the
+phases given ({(nodeid, index) : phase}, PDO phase is used if not in phases)
+"""
+def GetSlotLoads(pdos, hyperperiod, phases = {}):
+    bits = [0] * hyperperiod
+    frames = [0] * hyperperiod
+    for pdo in pdos:
+        phase = phases.get((pdo["nodeid"], pdo["index"]), pdo["phase"])
+        for slot in xrange(phase, hyperperiod, pdo["divider"]):
+            bits[slot] += pdo["bits"]
+            frames[slot] += 1
+    return bits, frames
+
+"""
+Choose the phase of each configurable PDO so that the biggest number of bits
+sent after a SYNC is as small as possible. PDOs are placed from the most
+frequent and biggest ones, each one in the phase where the busiest SYNC it's
+sent in is the least loaded. Return a dictionary {(nodeid, index) : phase}
+"""
+def OptimizePhases(pdos, hyperperiod):
+    slots = [0] * hyperperiod
+    phases = {}
+    configurable = []
+    for pdo in pdos:
+        if pdo["configurable"]:
+            configurable.append(pdo)
+        else:
+            for slot in xrange(pdo["phase"], hyperperiod, pdo["divider"]):
+                slots[slot] += pdo["bits"]
+    configurable.sort(lambda x, y: cmp((x["divider"], -x["bits"], x["nodeid"], x["index"]),
+                                       (y["divider"], -y["bits"], y["nodeid"], y["index"])))
+    for pdo in configurable:
+        best_phase = None
+        best_cost = None
+        for phase in xrange(pdo["divider"]):
+            used = slots[phase::pdo["divider"]]
+            cost = (max(used), sum(used))
+            if best_cost is None or cost < best_cost:
+                best_phase, best_cost = phase, cost
+        for slot in xrange(best_phase, hyperperiod, pdo["divider"]):
+            slots[slot] += pdo["bits"]
+        phases[(pdo["nodeid"], pdo["index"])] = best_phase
+    return phases
+
+#-------------------------------------------------------------------------------
+#                        Definition of SyncSchedule Object
+#-------------------------------------------------------------------------------
+
+"""
+Class recording an optimized transmission schedule of the synchronous PDOs of a
+network, with the load after each SYNC before and after optimization
+"""
+
+class SyncSchedule:
+
+    def __init__(self, pdos, producer = None, baudrate = None):
+        self.PDOs = pdos
+        self.Producer = producer
+        self.Baudrate = baudrate
+        self.Messages = []
+        self.HyperPeriod = GetHyperPeriod(pdos)
+        if self.HyperPeriod > MAX_SYNC_COUNTER:
+            self.Messages.append(_("PDO periods repeat every %d SYNC, more than the SYNC counter can count: phases are not optimized")%self.HyperPeriod)
+            self.HyperPeriod = MAX_SYNC_COUNTER
+            self.Phases = {}
+        elif producer is None:
+            self.Messages.append(_("No SYNC producer in network: phases are not optimized"))
+            self.Phases = {}
+        else:
+            self.Phases = OptimizePhases(pdos, self.HyperPeriod)
+        self.Before = GetSlotLoads(pdos, self.HyperPeriod)
+        self.After = GetSlotLoads(pdos, self.HyperPeriod, self.Phases)
+        capacity = self.GetWindowCapacity()
+        if capacity is not None and max(self.After[0] + [0]) > capacity:
+            self.Messages.append(_("Synchronous PDOs sent after a SYNC don't fit in SYNC window"))
+
+    """
+    Return the number of bits that can be sent in the SYNC window, None if
+    unknown
+    """
+    def GetWindowCapacity(self):
+        if self.Producer is None or not self.Baudrate or not self.Producer[2]:
+            return None
+        return self.Producer[2] * self.Baudrate
+
+    """
+    Return the list of (nodeid, index, subindex, size, value) to write in nodes
+    to apply the schedule
+    """
+    def GetChanges(self):
+        changes = []
+        # SYNC start values are ignored until SYNC counter is enabled, all of
+        # them are written when enabling it
+        enabling = self.Producer is not None and self.Producer[3] <= 1 and self.HyperPeriod > 1
+        for pdo in self.PDOs:
+            if pdo["transmission"] is not None:
+                changes.append((pdo["nodeid"], pdo["index"], 2, 1, pdo["transmission"]))
+            phase = self.Phases.get((pdo["nodeid"], pdo["index"]), pdo["phase"])
+            if pdo["configurable"] and (phase != pdo["phase"] or pdo["transmission"] is not None or enabling):
+                changes.append((pdo["nodeid"], pdo["index"], 6, 1, phase + 1))
+        if len(changes) > 0 and self.HyperPeriod > 1:
+            changes.append((self.Producer[0], 0x1019, 0, 1, self.HyperPeriod))
+        changes.sort()
+        return changes
+
+    """
+    Return a text histogram of the load after each SYNC before and after
+    optimization
+    """
+    def GetHistogramReport(self, width = 40):
+        lines = []
+        maximum = max(self.Before[0] + self.After[0] + [1])
+        capacity = self.GetWindowCapacity()
+        lines.append(_("SYNC  Before (frames/bits)           After (frames/bits)"))
+        for slot in xrange(self.HyperPeriod):
+            texts = []
+            for bits, frames in [(self.Before[0][slot], self.Before[1][slot]), (self.After[0][slot], self.After[1][slot])]:
+                texts.append("%3d/%5d %s"%(frames, bits, ("#" * (bits * width / 2 / maximum)).ljust(width / 2)))
+            lines.append("%4d  %s  %s"%(slot + 1, texts[0], texts[1]))
+        lines.append(_("Busiest SYNC: %d bits before, %d bits after")%(max(self.Before[0] + [0]), max(self.After[0] + [0])))
+        if capacity is not None:
+            lines.append(_("SYNC window capacity: %d bits")%capacity)
+        lines.extend(self.Messages)
+        return "\n".join(lines)
+
+"""
+Return the optimized SyncSchedule of the synchronous PDOs of the slaves and the
+master node of a NodeList. If convert is True, event driven PDOs with an event
+timer multiple of the SYNC period are made cyclic synchronous
+"""
+def GetNetworkSyncSchedule(nodelist, baudrate = None, convert = False, stuffing = True):
+    indexes = nodelist.GetNetworkIndexes()
+    producer = GetSyncProducer(indexes)
+    syncperiod = None
+    synccounter = 0
+    if producer is not None:
+        synccounter = producer[3]
+        if convert:
+            syncperiod = producer[1]
+    pdos = []
+    for index in indexes:
+        pdos.extend(GetIndexSyncPDOs(index, syncperiod, stuffing, synccounter))
+    return SyncSchedule(pdos, producer, baudrate)
@@ -0,0 +1,405 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+from types import *
+import os, sys, random, string
+
+from node import var, array, rec, CustomisableTypes
+from odtypes import GetNodeTypeCoding
+from concisedcf import DCFBuilder
+from pdopacking import GetMappingValue, PDO_MAX_BITS, PDO_MAX_VARIABLES
+
+# Range of the manufacturer specific objects
+MANUFACTURER_MIN = 0x2000
+MANUFACTURER_MAX = 0x5FFF
+
+# Number of user types that can be defined (0xA0 to 0xFF)
+USER_TYPES_MAX = 0x60
+
+# Number of PDO lines of each direction
+PDO_LINES_MAX = 0x200
+
+# Number of subindexes of the biggest records
+RECORD_SUBINDEXES_MAX = 0xFE
+
+# Base types of the variables generated
+NUMBER_TYPES = ["UNSIGNED8", "UNSIGNED16", "UNSIGNED32", "UNSIGNED64",
+                "INTEGER8", "INTEGER16", "INTEGER32", "INTEGER64",
+                "REAL32", "REAL64", "BOOLEAN"]
+STRING_TYPES = ["VISIBLE_STRING", "OCTET_STRING"]
+DOMAIN_TYPE = "DOMAIN"
+
+# Transmission types given to PDOs
+TRANSMISSION_TYPES = [0, 1, 2, 10, 240, 254, 255]
+
+# Characters of the strings generated
+STRING_CHARACTERS = string.ascii_letters + string.digits + " _-"
+
+#-------------------------------------------------------------------------------
+#                          Definition of Generator Object
+#-------------------------------------------------------------------------------
+
+"""
+Class building a synthetic node in a NodeManager. All the choices are made with
+a random generator seeded with seed, so a node is reproduced from its seed and
+shape parameters
+"""
+
+class SyntheticNodeGenerator:
+
+    def __init__(self, manager, seed = 0):
+        self.Manager = manager
+        self.Random = random.Random(seed)
+        self.Node = None
+        # Names of the types variables can use
+        self.NumberTypes = NUMBER_TYPES[:]
+        self.StringTypes = STRING_TYPES[:]
+
+    """
+    Create the node in manager, as a slave with the DS-302 profile so that it
+    can hold a master DCF
+    """
+    def CreateNode(self, name, nodeid, description = ""):
+        result = self.Manager.CreateNewNode(name, nodeid, "slave", description, "None", "", "Heartbeat", ["DS302", "GenSYNC", "Emergency"])
+        if isinstance(result, (StringType, UnicodeType)):
+            raise ValueError, result
+        self.Node = self.Manager.CurrentNode
+        return self.Node
+
+#-------------------------------------------------------------------------------
+#                                 Values
+#-------------------------------------------------------------------------------
+
+    def GenerateString(self, length):
+        characters = [self.Random.choice(STRING_CHARACTERS) for i in xrange(length)]
+        # Strings start and end with a letter to be read back unchanged from EDS
+        if length > 0:
+            characters[0] = self.Random.choice(string.ascii_letters)
+            characters[-1] = self.Random.choice(string.ascii_letters)
+        return "".join(characters)
+
+    def GenerateDomain(self, length):
+        return "".join([chr(self.Random.randint(0, 255)) for i in xrange(length)])
+
+    """
+    Return a random value of a type of node. Strings and domains without a
+    defined size are at most max_length long
+    """
+    def GenerateValue(self, typeindex, max_length):
+        coding = GetNodeTypeCoding(self.Node, typeindex)
+        if coding.Kind in ["unsigned", "integer"]:
+            bits = 8 * coding.Size
+            if coding.Kind == "unsigned":
+                minimum, maximum = 0, (1 << bits) - 1
+            else:
+                minimum, maximum = -(1 << (bits - 1)), (1 << (bits - 1)) - 1
+            if coding.Minimum is not None:
+                minimum = max(minimum, coding.Minimum)
+            if coding.Maximum is not None:
+                maximum = min(maximum, coding.Maximum)
+            return self.Random.randint(minimum, maximum)
+        elif coding.Kind == "real":
+            minimum, maximum = coding.Minimum, coding.Maximum
+            if minimum is None or maximum is None or minimum > maximum:
+                minimum, maximum = -1000., 1000.
+            return round(self.Random.uniform(minimum, maximum), 3)
+        elif coding.Kind == "boolean":
+            return self.Random.random() < 0.5
+        elif coding.Kind == "string":
+            return self.GenerateString(self.Random.randint(0, coding.Size or max_length))
+        # Mapped domains can't be empty in generated C code
+        return self.GenerateDomain(self.Random.randint(1, max_length))
+
+#-------------------------------------------------------------------------------
+#                                User Types
+#-------------------------------------------------------------------------------
+
+    """
+    Define number user types with a random range and string user types with a
+    random length up to string_length
+    """
+    def AddUserTypes(self, number, string_length = 256):
+        manager = self.Manager
+        numbers = [typeindex for typeindex, valuetype in CustomisableTypes if valuetype == 0]
+        strings = [manager.GetTypeIndex(typename) for typename in STRING_TYPES]
+        for i in xrange(min(number, USER_TYPES_MAX)):
+            if i % 4 == 3:
+                typeindex = self.Random.choice(strings)
+                result = manager.AddUserTypeToCurrent(typeindex, 0, 0, self.Random.randint(1, string_length))
+            else:
+                typeindex = self.Random.choice(numbers)
+                coding = GetNodeTypeCoding(self.Node, typeindex)
+                if coding.Kind == "real":
+                    minimum = self.Random.randint(-1000, 0)
+                    maximum = self.Random.randint(1, 1000)
+                else:
+                    bits = 8 * coding.Size
+                    if coding.Kind == "unsigned":
+                        low, high = 0, (1 << bits) - 1
+                    else:
+                        low, high = -(1 << (bits - 1)), (1 << (bits - 1)) - 1
+                    minimum = self.Random.randint(low, high)
+                    maximum = self.Random.randint(minimum, high)
+                result = manager.AddUserTypeToCurrent(typeindex, minimum, maximum, 0)
+            if result is not None:
+                raise ValueError, result
+        for index in xrange(0xA0, 0x100):
+            if self.Node.IsEntry(index):
+                typename = self.Node.GetTypeName(index)
+                if GetNodeTypeCoding(self.Node, index).IsNumber():
+                    self.NumberTypes.append(typename)
+                else:
+                    self.StringTypes.append(typename)
+
+#-------------------------------------------------------------------------------
+#                          Manufacturer Objects
+#-------------------------------------------------------------------------------
+
+    """
+    Return the name of a random type, a string with string_ratio probability
+    and a domain with domain_ratio probability
+    """
+    def ChooseType(self, string_ratio, domain_ratio):
+        draw = self.Random.random()
+        if draw < domain_ratio:
+            return DOMAIN_TYPE
+        elif draw < domain_ratio + string_ratio:
+            return self.Random.choice(self.StringTypes)
+        return self.Random.choice(self.NumberTypes)
+
+    """
+    Set type and value of a subentry of a manufacturer object, strings and
+    domains aren't mappable in PDOs
+    """
+    def SetSubentry(self, index, subindex, typename, max_length):
+        manager, node = self.Manager, self.Node
+        manager.SetCurrentEntry(index, subindex, typename, "type", "type", node)
+        typeindex = manager.GetTypeIndex(typename)
+        if not GetNodeTypeCoding(node, typeindex).IsNumber():
+            manager.SetCurrentEntry(index, subindex, False, "pdo", None, node)
+        node.SetEntry(index, subindex, self.GenerateValue(typeindex, max_length))
+
+    """
+    Add objects manufacturer objects at random indexes between 0x2000 and
+    0x5FFF (at consecutive indexes if contiguous). A ratio of them are arrays
+    and records of at most max_subindexes subindexes, big_records of the
+    records having 254 subindexes
+    """
+    def AddManufacturerObjects(self, objects, array_ratio = 0.15, record_ratio = 0.15, max_subindexes = 16,
+                               big_records = 4, string_ratio = 0.05, domain_ratio = 0.01,
+                               string_length = 256, domain_length = 1024, contiguous = False):
+        manager, node = self.Manager, self.Node
+        available = [index for index in xrange(MANUFACTURER_MIN, MANUFACTURER_MAX + 1) if not node.IsEntry(index)]
+        objects = min(objects, len(available))
+        if contiguous:
+            indexes = available[:objects]
+        else:
+            indexes = self.Random.sample(available, objects)
+            indexes.sort()
+        big_records = min(big_records, objects)
+        for position, index in enumerate(indexes):
+            draw = self.Random.random()
+            if position < big_records or draw < record_ratio:
+                if position < big_records:
+                    number = RECORD_SUBINDEXES_MAX
+                else:
+                    number = self.Random.randint(1, max_subindexes)
+                manager.AddMapVariableToCurrent(index, "Record%4.4X"%index, rec, number, node)
+                typename = self.Random.choice(self.NumberTypes)
+                manager.SetCurrentEntry(index, 1, typename, "type", "type", node)
+                typeindex = manager.GetTypeIndex(typename)
+                for subindex in xrange(1, number + 1):
+                    node.SetEntry(index, subindex, self.GenerateValue(typeindex, string_length))
+            elif draw < record_ratio + array_ratio:
+                number = self.Random.randint(1, max_subindexes)
+                manager.AddMapVariableToCurrent(index, "Array%4.4X"%index, array, number, node)
+                for subindex in xrange(1, number + 1):
+                    manager.SetCurrentEntry(index, subindex, "Field%d"%subindex, "name", "string", node)
+                    typename = self.ChooseType(string_ratio, domain_ratio)
+                    self.SetSubentry(index, subindex, typename, typename == DOMAIN_TYPE and domain_length or string_length)
+            else:
+                manager.AddMapVariableToCurrent(index, "Variable%4.4X"%index, var, 0, node)
+                typename = self.ChooseType(string_ratio, domain_ratio)
+                self.SetSubentry(index, 0, typename, typename == DOMAIN_TYPE and domain_length or string_length)
+        return indexes
+
+#-------------------------------------------------------------------------------
+#                                  PDOs
+#-------------------------------------------------------------------------------
+
+    """
+    Define number receive and transmit PDOs with distinct COB IDs, random
+    transmission types and mappings of random mappable variables
+    """
+    def AddPDOs(self, number, max_variables = PDO_MAX_VARIABLES):
+        manager, node = self.Manager, self.Node
+        number = min(number, PDO_LINES_MAX)
+        variables = [(index, subindex, size) for index, subindex, size, name in node.GetMapVariableList()
+                     if MANUFACTURER_MIN <= index <= MANUFACTURER_MAX and 0 < size <= PDO_MAX_BITS]
+        for index in node.GetIndexes():
+            if 0x1400 <= index <= 0x1BFF:
+                node.RemoveEntry(index)
+        for parameter, mapping, cobid_base in [(0x1400, 0x1600, 0x380), (0x1800, 0x1A00, 0x180)]:
+            manager.ManageEntriesOfCurrent(range(parameter, parameter + number) + range(mapping, mapping + number), [], node)
+            for i in xrange(number):
+                node.SetEntry(parameter + i, 1, cobid_base + i)
+                transmission = self.Random.choice(TRANSMISSION_TYPES)
+                node.SetEntry(parameter + i, 2, transmission)
+                if transmission >= 254:
+                    node.SetEntry(parameter + i, 5, self.Random.choice([10, 100, 1000]))
+                bits = 0
+                subindex = 1
+                for j in xrange(self.Random.randint(1, max_variables)):
+                    if len(variables) == 0:
+                        break
+                    index, mapped, size = self.Random.choice(variables)
+                    if bits + size <= PDO_MAX_BITS:
+                        node.AddEntry(mapping + i, subindex, GetMappingValue(index, mapped, size))
+                        bits += size
+                        subindex += 1
+
+#-------------------------------------------------------------------------------
+#                               Master DCF
+#-------------------------------------------------------------------------------
+
+    """
+    Fill the master DCF (0x1F22) with a concise DCF of records parameters for
+    each node ID between 1 and 127 other than the one of node. Parameters are
+    the usual communication ones and manufacturer parameters
+    """
+    def AddMasterDCF(self, records = 16):
+        builder = DCFBuilder()
+        ownid = self.Node.GetNodeID()
+        for nodeid in xrange(1, 0x80):
+            if nodeid == ownid:
+                continue
+            builder.Add(nodeid, 0x1017, 0, 2, self.Random.choice([100, 250, 500, 1000]))
+            for i in xrange(records - 1):
+                kind = self.Random.randint(0, 3)
+                if kind == 0:
+                    line = self.Random.randint(0, 3)
+                    builder.Add(nodeid, 0x1800 + line, 1, 4, 0x180 + 0x100 * line + nodeid)
+                elif kind == 1:
+                    line = self.Random.randint(0, 3)
+                    builder.Add(nodeid, 0x1800 + line, 2, 1, self.Random.choice(TRANSMISSION_TYPES))
+                elif kind == 2:
+                    line = self.Random.randint(0, 3)
+                    builder.Add(nodeid, 0x1A00 + line, self.Random.randint(1, 8), 4,
+                                GetMappingValue(self.Random.randint(MANUFACTURER_MIN, MANUFACTURER_MAX), self.Random.randint(0, 8), 8 * self.Random.choice([1, 2, 4])))
+                else:
+                    builder.Add(nodeid, self.Random.randint(MANUFACTURER_MIN, MANUFACTURER_MAX), self.Random.randint(0, 8), 4, self.Random.randint(0, 0xFFFFFFFF))
+        result = self.Manager.AddDCFBuilderToCurrent(builder)
+        if result is not None:
+            raise ValueError, result
+
+"""
+Build a synthetic node in manager and return it. The shape parameters are the
+ones of SyntheticNodeGenerator methods: user_types user types, objects
+manufacturer objects, pdos receive and transmit PDOs, and a master DCF of
+dcf_records parameters for each node if dcf_records isn't 0
+"""
+def GenerateSyntheticNode(manager, name = "Synthetic", nodeid = 0x01, seed = 0, objects = 1000,
+                          user_types = 32, pdos = PDO_LINES_MAX, dcf_records = 16,
+                          array_ratio = 0.15, record_ratio = 0.15, max_subindexes = 16, big_records = 4,
+                          string_ratio = 0.05, domain_ratio = 0.01, string_length = 256,
+                          domain_length = 1024, contiguous = False):
+    generator = SyntheticNodeGenerator(manager, seed)
+    node = generator.CreateNode(name, nodeid, "Synthetic node generated with seed %d"%seed)
+    generator.AddUserTypes(user_types, string_length)
+    generator.AddManufacturerObjects(objects, array_ratio, record_ratio, max_subindexes, big_records,
+                                     string_ratio, domain_ratio, string_length, domain_length, contiguous)
+    generator.AddPDOs(pdos)
+    if dcf_records > 0:
+        generator.AddMasterDCF(dcf_records)
+    manager.BufferCurrentNode()
+    return node
+
+"""
+Write the node of manager in basepath.od and basepath.eds. Return None, or an
+error message if the EDS file can't be generated
+"""
+def WriteSyntheticFiles(manager, basepath):
+    folder = os.path.dirname(basepath)
+    if folder != "" and not os.path.isdir(folder):
+        os.makedirs(folder)
+    manager.SaveCurrentInFile(basepath + ".od")
+    return manager.ExportCurrentToEDSFile(basepath + ".eds")
+
+def usage():
+    print _("\nUsage of synthod.py :")
+    print "\n   %s [options] BasePath\n"%sys.argv[0]
+    print _("   BasePath : path of the files generated, without the .od and .eds extensions")
+    print _("   -s, --seed : seed of the random generator (default 0)")
+    print _("   -n, --objects : number of manufacturer objects (default 1000)")
+    print _("   -u, --user-types : number of user types (default 32)")
+    print _("   -p, --pdos : number of receive and transmit PDOs (default 512)")
+    print _("   -d, --dcf-records : parameters of each node in master DCF, 0 for no DCF (default 16)")
+    print _("   -b, --big-records : number of records with 254 subindexes (default 4)")
+    print _("   -c, --contiguous : manufacturer objects at consecutive indexes\n")
+
+if __name__ == '__main__':
+    import getopt, __builtin__
+    # Building a node needs translation function in other modules too
+    __builtin__.__dict__['_'] = lambda x: x
+
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "hs:n:u:p:d:b:c", ["help", "seed=", "objects=", "user-types=", "pdos=", "dcf-records=", "big-records=", "contiguous"])
+    except getopt.GetoptError:
+        usage()
+        sys.exit(2)
+    if len(args) != 1:
+        usage()
+        sys.exit()
+
+    parameters = {}
+    for o, a in opts:
+        if o in ("-h", "--help"):
+            usage()
+            sys.exit()
+        elif o in ("-s", "--seed"):
+            parameters["seed"] = int(a)
+        elif o in ("-n", "--objects"):
+            parameters["objects"] = int(a)
+        elif o in ("-u", "--user-types"):
+            parameters["user_types"] = int(a)
+        elif o in ("-p", "--pdos"):
+            parameters["pdos"] = int(a)
+        elif o in ("-d", "--dcf-records"):
+            parameters["dcf_records"] = int(a)
+        elif o in ("-b", "--big-records"):
+            parameters["big_records"] = int(a)
+        elif o in ("-c", "--contiguous"):
+            parameters["contiguous"] = True
+
+    from nodemanager import NodeManager
+    manager = NodeManager()
+    try:
+        node = GenerateSyntheticNode(manager, os.path.basename(args[0]), **parameters)
+    except ValueError, message:
+        print message
+        sys.exit(-1)
+    result = WriteSyntheticFiles(manager, args[0])
+    if result is not None:
+        print result
+        sys.exit(-1)
+    print _("%d entries written in %s.od and %s.eds")%(len(node.GetIndexes()), args[0], args[0])
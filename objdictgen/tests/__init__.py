@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+# Tests of objdictgen modules, run from objdictgen folder with:
+#   python -m unittest discover -s tests -t .
+
+import os, sys, __builtin__
+
+ObjdictgenDirectory = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+if ObjdictgenDirectory not in sys.path:
+    sys.path.insert(0, ObjdictgenDirectory)
+
+# Modules of objdictgen need the translation function
+if "_" not in __builtin__.__dict__:
+    __builtin__.__dict__['_'] = lambda x: x
+
+ExamplesDirectory = os.path.join(ObjdictgenDirectory, "examples")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+
+import unittest
+
+from benchcompare import *
+
+def Result(name, times):
+    times = map(float, times)
+    return {"name" : name, "times" : times, "median" : sorted(times)[len(times) / 2]}
+
+class MannWhitneyTests(unittest.TestCase):
+
+    def testRanks(self):
+        self.assertEqual(ComputeRanks([3, 1, 2]), ([3., 1., 2.], []))
+        self.assertEqual(ComputeRanks([1, 2, 2, 3, 2]), ([1., 3., 3., 5., 3.], [3]))
+
+    def testUDistribution(self):
+        self.assertEqual(GetUDistribution(2, 2), [1, 1, 2, 1, 1])
+        self.assertEqual(GetUDistribution(1, 3), [1, 1, 1, 1])
+        for m, n in [(3, 5), (7, 7), (10, 4)]:
+            counts = GetUDistribution(m, n)
+            self.assertEqual(len(counts), m * n + 1)
+            self.assertEqual(counts, counts[::-1])
+            self.assertEqual(sum(counts), math.factorial(m + n) / math.factorial(m) / math.factorial(n))
+
+    def testExact(self):
+        self.assertEqual(MannWhitneyTest([4, 5, 6], [1, 2, 3]), (9, 0.05, 1.))
+        self.assertEqual(MannWhitneyTest([1, 2, 3], [4, 5, 6]), (0, 1., 0.05))
+        u, greater, smaller = MannWhitneyTest([1, 4, 5], [2, 3, 6])
+        self.assertEqual(u, 4)
+        self.assertAlmostEqual(greater, 0.65)
+        self.assertAlmostEqual(smaller, 0.5)
+        self.assertAlmostEqual(GetMinimumPValue(3, 3), 0.05)
+
+    def testNormalApproximation(self):
+        # Ties in samples
+        u, greater, smaller = MannWhitneyTest([2, 3, 3, 4, 5, 6], [1, 1, 2, 2, 3, 3])
+        self.assertEqual(u, 31.)
+        self.assertTrue(greater < 0.05 < smaller, (greater, smaller))
+        # Big samples
+        sample, reference = range(100, 140), range(0, 60, 2)
+        u, greater, smaller = MannWhitneyTest(sample, reference)
+        self.assertEqual(u, 40 * 30)
+        self.assertTrue(greater < 1e-6 and smaller > 0.999)
+        self.assertEqual(MannWhitneyTest([1, 1], [1, 1, 1]), (3., 1., 1.))
+
+    def testEmptySamples(self):
+        self.assertRaises(ValueError, MannWhitneyTest, [], [1])
+
+class CompareTests(unittest.TestCase):
+
+    def setUp(self):
+        self.Baseline = {"results" : [Result("same", xrange(100, 120)), Result("slower", xrange(100, 120)),
+                                      Result("faster", xrange(100, 120)), Result("noisy", xrange(100, 120)),
+                                      Result("broken", xrange(100, 120)), Result("removed", xrange(100, 120))]}
+        self.Results = {"results" : [Result("same", xrange(101, 121)), Result("slower", xrange(130, 150)),
+                                     Result("faster", xrange(50, 70)), Result("noisy", range(100, 119) + [1000]),
+                                     {"name" : "broken", "error" : "failed"}, Result("added", xrange(10))]}
+
+    def testStatus(self):
+        comparisons = CompareResults(self.Results, self.Baseline)
+        self.assertEqual([(comparison["name"], comparison["status"]) for comparison in comparisons],
+                         [("same", UNCHANGED), ("slower", REGRESSION), ("faster", FASTER), ("noisy", UNCHANGED),
+                          ("broken", ERROR), ("added", NEW), ("removed", MISSING)])
+        self.assertTrue(HasFailures(comparisons))
+        self.assertAlmostEqual(comparisons[1]["delta"], 30. / 110)
+        self.assertEqual(GenerateSummary(comparisons), "1 regression, 1 error, 1 faster, 2 unchanged, 1 new, 1 missing")
+
+    def testThreshold(self):
+        comparisons = CompareResults(self.Results, self.Baseline, threshold = 0.4)
+        self.assertEqual(comparisons[1]["status"], UNCHANGED)
+        self.assertEqual(comparisons[2]["status"], FASTER)
+
+    def testUnreachableSignificance(self):
+        baseline = {"results" : [Result("small", [1., 1.1])]}
+        results = {"results" : [Result("small", [2., 2.1])]}
+        comparison = CompareResults(results, baseline)[0]
+        self.assertEqual((comparison["status"], comparison["reachable"]), (UNCHANGED, False))
+        self.assertTrue("*" in GenerateComparisonTable([comparison]))
+
+    def testTable(self):
+        table = GenerateComparisonTable(CompareResults(self.Results, self.Baseline), True)
+        lines = table.splitlines()
+        self.assertTrue(lines[2].startswith("slower"))
+        self.assertFalse("same" in table)
+        self.assertTrue("ERROR (failed)" in table)
+
+    def testMergeResults(self):
+        merged = MergeResults(self.Baseline, {"results" : [Result("same", [1])], "machine" : {}})
+        self.assertEqual([result["name"] for result in merged["results"]],
+                         ["slower", "faster", "noisy", "broken", "removed", "same"])
+        self.assertEqual(merged["machine"], {})
+        self.assertEqual(MergeResults(None, self.Results), self.Results)
+
+class FormatTests(unittest.TestCase):
+
+    def testFormatTime(self):
+        self.assertEqual(FormatTime(None), "-")
+        self.assertEqual(FormatTime(2.5), "2.500 s")
+        self.assertEqual(FormatTime(0.0025), "2.500 ms")
+        self.assertEqual(FormatTime(2.5e-6), "2.500 us")
+        self.assertEqual(FormatTime(2.5e-8), "25.0 ns")
+
+    def testFingerprint(self):
+        machine = {"system" : "Linux", "machine" : "x86_64", "processor" : "x86_64", "cpus" : 4,
+                   "implementation" : "CPython", "python" : "2.7.18", "node" : "host1"}
+        fingerprint = GetMachineFingerprint(machine)
+        self.assertTrue(fingerprint.startswith("linux_x86_64_"))
+        machine["node"] = "host2"
+        self.assertEqual(GetMachineFingerprint(machine), fingerprint)
+        machine["cpus"] = 8
+        self.assertNotEqual(GetMachineFingerprint(machine), fingerprint)
+
+if __name__ == '__main__':
+    unittest.main()
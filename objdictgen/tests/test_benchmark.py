@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+
+import unittest, os, shutil, tempfile
+
+import benchmark
+
+class StatisticsTests(unittest.TestCase):
+
+    def testComputeStatistics(self):
+        statistics = benchmark.ComputeStatistics([4., 1., 3., 2.])
+        self.assertEqual((statistics["mean"], statistics["median"], statistics["min"], statistics["max"]), (2.5, 2.5, 1., 4.))
+        self.assertAlmostEqual(statistics["variance"], 5. / 3)
+        statistics = benchmark.ComputeStatistics([3., 1., 2.])
+        self.assertEqual(statistics["median"], 2.)
+        self.assertEqual(benchmark.ComputeStatistics([1.])["stdev"], 0.)
+
+    def testMeasureFunction(self):
+        calls = []
+        number, times = benchmark.MeasureFunction(lambda: calls.append(None), 1, 3, 0.001)
+        self.assertTrue(number >= 1)
+        self.assertEqual(len(times), 3)
+        self.assertTrue(len(calls) >= 4 * number)
+
+class SuiteTests(unittest.TestCase):
+
+    def setUp(self):
+        self.Directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.Directory)
+
+    def testRunSuite(self):
+        results = benchmark.RunBenchmarkSuite([20], False, 1, 2, 0.001, "Copy|GenerateCContent")
+        names = [result["name"] for result in results["results"]]
+        self.assertTrue(len(names) >= 2, names)
+        for result in results["results"]:
+            self.assertFalse("error" in result, result)
+            self.assertEqual(len(result["times"]), 2)
+            self.assertTrue(result["min"] <= result["median"] <= result["max"])
+        filepath = os.path.join(self.Directory, "results.json")
+        benchmark.SaveResults(results, filepath)
+        self.assertEqual(benchmark.LoadResults(filepath)["results"][0]["name"], names[0])
+
+    def testErrorsReported(self):
+        def Fail():
+            raise ValueError("broken\nsecond line")
+        result = {"name" : "fail", "number" : 1, "times" : []}
+        try:
+            Fail()
+        except ValueError, exception:
+            benchmark.SetBenchmarkError(result, exception)
+        self.assertEqual(result, {"name" : "fail", "error" : "ValueError: broken"})
+
+    def testInvalidResultsFile(self):
+        filepath = os.path.join(self.Directory, "results.json")
+        open(filepath, "w").write("{\"format\" : 0}")
+        self.assertRaises(ValueError, benchmark.LoadResults, filepath)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+
+import unittest
+
+from tests.test_nodelist import NodeListTestCase, SlaveEDSName
+from busload import *
+
+class FrameBitsTests(unittest.TestCase):
+
+    def testFrameBits(self):
+        self.assertEqual(GetFrameBits(0, stuffing = False), 47)
+        self.assertEqual(GetFrameBits(8, stuffing = False), 111)
+        self.assertEqual(GetFrameBits(8, True, False), 131)
+        self.assertEqual(GetFrameBits(0), 55)
+        self.assertEqual(GetFrameBits(8), 135)
+        self.assertEqual(GetFrameBits(8, True), 160)
+
+class BusLoadTests(unittest.TestCase):
+
+    def setUp(self):
+        self.Frames = [{"nodeid" : 1, "cobid" : 0x80, "bits" : 55, "sync" : 1, "period" : None, "unbounded" : False},
+                       {"nodeid" : 2, "cobid" : 0x182, "bits" : 100, "sync" : 4, "period" : None, "unbounded" : False},
+                       {"nodeid" : 2, "cobid" : 0x702, "bits" : 65, "sync" : None, "period" : 0.1, "unbounded" : False}]
+        self.BusLoad = BusLoad(self.Frames, 0.01)
+
+    def testBitRate(self):
+        self.assertAlmostEqual(self.BusLoad.GetBitRate(), 5500 + 2500 + 650)
+        self.assertAlmostEqual(self.BusLoad.GetBitRate(0.001), 55000 + 25000 + 650)
+        self.assertAlmostEqual(BusLoad(self.Frames).GetBitRate(), 650)
+        self.assertAlmostEqual(self.BusLoad.GetTotalLoad(125000), 8650 / 125000.)
+
+    def testSweep(self):
+        loads = self.BusLoad.Sweep([125000, 250000], [0.01, 0.001])
+        self.assertEqual(len(loads), 4)
+        self.assertAlmostEqual(loads[(250000, 0.001)], 80650 / 250000.)
+        self.assertEqual(self.BusLoad.GetMinimalBaudrate(0.7, [10000, 20000, 50000]), 20000)
+        self.assertEqual(self.BusLoad.GetMinimalBaudrate(0.7, [10000]), None)
+
+    def testLoadsBy(self):
+        loads = self.BusLoad.GetNodeLoads(125000)
+        self.assertEqual(sorted(loads.keys()), [1, 2])
+        frames, bits, load = loads[2]
+        self.assertAlmostEqual(frames, 35)
+        self.assertAlmostEqual(bits, 3150)
+        self.assertAlmostEqual(load, 3150 / 125000.)
+        self.assertEqual(sorted(self.BusLoad.GetCobIDLoads(125000).keys()), [0x80, 0x182, 0x702])
+
+class NetworkBusLoadTests(NodeListTestCase):
+
+    def setUp(self):
+        NodeListTestCase.setUp(self)
+        manager = self.NodeList.GetManager()
+        manager.CreateNewNode("Master", 0x01, "master", "", "None", "", "heartbeat", ["DS302"])
+        manager.ManageEntriesOfCurrent([0x1005, 0x1006], [])
+        manager.CurrentNode.SetEntry(0x1005, 0, 0x40000080)
+        manager.CurrentNode.SetEntry(0x1006, 0, 10000)
+        self.NodeList.AddSlaveNode("Slave", 2, SlaveEDSName)
+        for subindex, value in [(2, 0xFF), (5, 20)]:
+            self.NodeList.SetSlaveNodeEntry(2, 0x1800, subindex, value)
+        for subindex, value in [(2, 0xFF), (3, 100), (5, 1000)]:
+            self.NodeList.SetSlaveNodeEntry(2, 0x1801, subindex, value)
+        for subindex, value in [(2, 0xFE), (5, 0)]:
+            self.NodeList.SetSlaveNodeEntry(2, 0x1802, subindex, value)
+
+    def testFrames(self):
+        frames = []
+        for index in self.NodeList.GetNetworkIndexes():
+            frames.extend(GetIndexFrames(index))
+        frames = dict([(frame["cobid"], frame) for frame in frames])
+        self.assertEqual(sorted(frames.keys()), [0x80, 0x182, 0x282, 0x382])
+        self.assertEqual((frames[0x80]["service"], frames[0x80]["sync"], frames[0x80]["bits"]), ("SYNC", 1, 55))
+        self.assertEqual((frames[0x182]["length"], frames[0x182]["period"]), (1, 0.02))
+        # Inhibit time is the shortest period
+        self.assertEqual((frames[0x282]["length"], frames[0x282]["period"]), (8, 0.01))
+        self.assertTrue(frames[0x382]["unbounded"])
+
+    def testNetworkBusLoad(self):
+        busload = GetNetworkBusLoad(self.NodeList)
+        self.assertEqual(busload.SyncPeriod, 0.01)
+        self.assertAlmostEqual(busload.GetBitRate(), 55 / 0.01 + 65 / 0.02 + 135 / 0.01)
+        self.assertEqual([frame["cobid"] for frame in busload.GetUnboundedFrames()], [0x382])
+        self.assertTrue("Warning" in busload.GetReport(125000).splitlines()[-1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+
+import unittest, os, shutil, tempfile
+from types import *
+
+from tests import ObjdictgenDirectory
+from nodemanager import NodeManager
+import cbridge
+
+"""
+Return True if the C stack can be compiled on this system
+"""
+def HasCompiler():
+    for folder in os.environ.get("PATH", "").split(os.pathsep):
+        if os.path.isfile(os.path.join(folder, "gcc")):
+            return True
+    return False
+
+class SplitBuildTests(unittest.TestCase):
+
+    def setUp(self):
+        self.Directory = tempfile.mkdtemp()
+        self.Manager = NodeManager()
+        self.Manager.OpenFileInCurrent(os.path.join(os.path.dirname(ObjdictgenDirectory), "examples", "TestMasterSlave", "TestSlave.od"))
+        self.Node = self.Manager.CurrentNode
+
+    def tearDown(self):
+        shutil.rmtree(self.Directory)
+
+    @unittest.skipUnless(HasCompiler(), "gcc isn't available")
+    def testSameDictionary(self):
+        bridges = [cbridge.StackBridge(cbridge.BuildStackLibrary(self.Node, self.Directory, split), self.Node)
+                   for split in [False, True]]
+        count = 0
+        for index in self.Node.GetIndexes():
+            values = self.Node.GetEntry(index, compute = False)
+            if isinstance(values, ListType):
+                subindexes = xrange(len(values))
+            else:
+                subindexes = [0]
+            for subindex in subindexes:
+                monolithic, split = [bridge.ReadEntry(index, subindex) for bridge in bridges]
+                self.assertEqual(split, monolithic, "0x%4.4X sub 0x%2.2X"%(index, subindex))
+                if monolithic[0] == cbridge.OD_SUCCESSFUL:
+                    count += 1
+        self.assertTrue(count > 50, count)
+        # Dictionaries are independent
+        self.assertEqual(bridges[1].SetValue(0x2000, 0, True), cbridge.OD_SUCCESSFUL)
+        self.assertEqual([bridge.GetValue(0x2000, 0) for bridge in bridges], [False, True])
+
+if __name__ == '__main__':
+    unittest.main()
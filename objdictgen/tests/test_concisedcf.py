@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+import unittest, struct
+
+from concisedcf import *
+
+class EncodingTests(unittest.TestCase):
+
+    def testEncodeConciseDCF(self):
+        records = [(0x1800, 1, 4, 0x80000182), (0x1017, 0, 2, 1000), (0x2000, 0, 3, -1), (0x2001, 0, 5, "abc")]
+        self.assertEqual(EncodeConciseDCF(records),
+                         struct.pack("<I", 4) +
+                         struct.pack("<HBII", 0x1800, 1, 4, 0x80000182) +
+                         struct.pack("<HBIH", 0x1017, 0, 2, 1000) +
+                         struct.pack("<HBI", 0x2000, 0, 3) + "\xff\xff\xff" +
+                         struct.pack("<HBI", 0x2001, 0, 5) + "abc\x00\x00")
+
+    def testRoundTrip(self):
+        records = [(0x1800 + i, i % 6, [1, 2, 3, 4, 6, 8][i % 6], i * 0x01020304 & ((1 << (8 * [1, 2, 3, 4, 6, 8][i % 6])) - 1))
+                   for i in xrange(50)]
+        dcf = EncodeConciseDCF(records)
+        self.assertEqual(GetRecordsNumber(dcf), 50)
+        self.assertEqual(DecodeConciseDCF(dcf), records)
+        self.assertEqual(DecodeConciseDCF(ExtendConciseDCF(dcf, [(0x2000, 0, 1, 5)])), records + [(0x2000, 0, 1, 5)])
+        self.assertEqual(DecodeConciseDCF(AppendRecord("", 0x2000, 0, 1, 5)), [(0x2000, 0, 1, 5)])
+        self.assertEqual(DecodeConciseDCF(""), [])
+
+class ConciseDCFTests(unittest.TestCase):
+
+    def setUp(self):
+        self.Records = [(0x1800, 1, 4, 0x182), (0x1800, 2, 1, 0xFF), (0x1800, 1, 4, 0x80000182), (0x1A00, 0, 1, 2)]
+        self.DCF = ConciseDCF(EncodeConciseDCF(self.Records))
+
+    def testRandomAccess(self):
+        self.assertEqual(len(self.DCF), 4)
+        self.assertEqual(self.DCF.GetValue(0x1800, 1), 0x80000182)
+        self.assertEqual(self.DCF.GetSize(0x1800, 2), 1)
+        self.assertEqual(self.DCF.GetData(0x1A00, 0).tobytes(), "\x02")
+        self.assertTrue(self.DCF.HasParameter(0x1800, 2))
+        self.assertFalse(self.DCF.HasParameter(0x1800, 3))
+        self.assertEqual(self.DCF.GetValue(0x1800, 3), None)
+        self.assertEqual(self.DCF.GetParameters(), self.Records)
+
+    def testSetValueInPlace(self):
+        self.DCF.SetValue(0x1800, 2, 1)
+        # Only the last definition of a parameter is modified
+        self.DCF.SetValue(0x1800, 1, 0x183)
+        self.assertEqual(self.DCF.GetValue(0x1800, 2), 1)
+        self.assertEqual(DecodeConciseDCF(self.DCF.GetString()),
+                         [(0x1800, 1, 4, 0x182), (0x1800, 2, 1, 1), (0x1800, 1, 4, 0x183), (0x1A00, 0, 1, 2)])
+
+    def testSetValueResized(self):
+        self.DCF.SetValue(0x1800, 2, 0x1234, 2)
+        self.assertEqual(self.DCF.GetValue(0x1A00, 0), 2)
+        self.assertEqual(DecodeConciseDCF(self.DCF.GetString()),
+                         [(0x1800, 1, 4, 0x182), (0x1800, 2, 2, 0x1234), (0x1800, 1, 4, 0x80000182), (0x1A00, 0, 1, 2)])
+
+    def testSetValueAdded(self):
+        self.assertRaises(ValueError, self.DCF.SetValue, 0x1A00, 1, 0x60000108)
+        self.DCF.SetValue(0x1A00, 1, 0x60000108, 4)
+        self.assertEqual(DecodeConciseDCF(self.DCF.GetString()), self.Records + [(0x1A00, 1, 4, 0x60000108)])
+        dcf = ConciseDCF()
+        dcf.SetValue(0x1017, 0, 100, 2)
+        self.assertEqual(DecodeConciseDCF(dcf.GetString()), [(0x1017, 0, 2, 100)])
+
+    def testTruncated(self):
+        data = EncodeConciseDCF(self.Records)
+        for length in [2, len(data) - 1, len(data) - 5]:
+            self.assertRaises(ValueError, ConciseDCF, data[:length])
+
+class DCFBuilderTests(unittest.TestCase):
+
+    def testEncodeExtends(self):
+        existing = {2 : EncodeConciseDCF([(0x1800, 2, 1, 1)])}
+        builder = DCFBuilder()
+        builder.Add(2, 0x1800, 2, 1, 2)
+        self.assertEqual(DecodeConciseDCF(builder.Encode(existing)[2]),
+                         [(0x1800, 2, 1, 1), (0x1800, 2, 1, 2)])
+
+    def testEncodeReplaces(self):
+        existing = {2 : EncodeConciseDCF([(0x1800, 2, 1, 1), (0x1801, 2, 1, 1)])}
+        builder = DCFBuilder()
+        builder.Add(2, 0x1800, 2, 1, 2)
+        builder.Add(2, 0x1802, 2, 1, 2)
+        builder.Add(3, 0x1800, 2, 1, 2)
+        result = builder.Encode(existing, True)
+        self.assertEqual(DecodeConciseDCF(result[2]),
+                         [(0x1800, 2, 1, 2), (0x1801, 2, 1, 1), (0x1802, 2, 1, 2)])
+        self.assertEqual(DecodeConciseDCF(result[3]), [(0x1800, 2, 1, 2)])
+        builder = DCFBuilder()
+        builder.Add(2, 0x1800, 2, 1, 2)
+        self.assertEqual(builder.Encode(result, True)[2], result[2])
+
+if __name__ == '__main__':
+    unittest.main()
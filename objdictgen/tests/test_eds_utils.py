@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+import unittest, os, shutil, tempfile
+
+from tests import ExamplesDirectory
+from nodemanager import NodeManager
+from node import var
+from concisedcf import EncodeConciseDCF
+import eds_utils
+
+class DomainValueTests(unittest.TestCase):
+
+    def testDomainValueText(self):
+        self.assertEqual(eds_utils.GetDomainValueText(""), "")
+        self.assertEqual(eds_utils.GetDomainValueText("abc"), "abc")
+        # Values that would be read as numbers, formulas or other text
+        for value, text in [("\x01\x02", "0x0102"), ("12", "0x3132"), ("-a", "0x2D61"),
+                            ("$NODEID", "0x244E4F44454944"), (" a", "0x2061"), ("a\n", "0x610A")]:
+            self.assertEqual(eds_utils.GetDomainValueText(value), text)
+            self.assertEqual(eds_utils.ParseDomainValueText(text), value)
+        self.assertRaises(ValueError, eds_utils.ParseDomainValueText, "0x123")
+
+    def testVerifyValue(self):
+        values = {"DATATYPE" : 0x0F, "DEFAULTVALUE" : 0x102}
+        eds_utils.VerifyValue(values, "2000", "DefaultValue", {"DEFAULTVALUE" : "0x0102"})
+        self.assertEqual(values["DEFAULTVALUE"], "\x01\x02")
+        values = {"DATATYPE" : 0x0F, "DEFAULTVALUE" : 0x123}
+        self.assertRaises(SyntaxError, eds_utils.VerifyValue, values, "2000", "DefaultValue", {"DEFAULTVALUE" : "0x123"})
+        # Values of user types are verified as values of their base type
+        values = {"DATATYPE" : 0xA0, "DEFAULTVALUE" : "1.5"}
+        eds_utils.VerifyValue(values, "2000", "DefaultValue", {}, 0x08)
+        self.assertEqual(values["DEFAULTVALUE"], 1.5)
+
+class RoundTripTests(unittest.TestCase):
+
+    def setUp(self):
+        self.Directory = tempfile.mkdtemp()
+        self.Manager = NodeManager()
+
+    def tearDown(self):
+        shutil.rmtree(self.Directory)
+
+    def RoundTrip(self, node):
+        edspath = os.path.join(self.Directory, "node.eds")
+        self.assertEqual(eds_utils.GenerateEDSFile(edspath, node), None)
+        result = eds_utils.GenerateNode(edspath)
+        self.assertFalse(isinstance(result, basestring), result)
+        return result
+
+    def testExample(self):
+        self.Manager.OpenFileInCurrent(os.path.join(ExamplesDirectory, "example_objdict.od"))
+        node = self.Manager.CurrentNode
+        result = self.RoundTrip(node)
+        for index in node.GetIndexes():
+            if index >= 0x1000:
+                self.assertEqual(result.GetEntry(index, compute = False), node.GetEntry(index, compute = False), "0x%4.4X"%index)
+
+    def testConciseDCF(self):
+        self.Manager.CreateNewNode("MasterNode", 0x00, "master", "", "None", "", "heartbeat", ["DS302"])
+        node = self.Manager.CurrentNode
+        self.Manager.ManageEntriesOfCurrent([0x1F22], [], node)
+        self.Manager.AddSubentriesToCurrent(0x1F22, 3, node)
+        dcf = EncodeConciseDCF([(0x1800, 2, 1, 1), (0x1017, 0, 2, 100)])
+        node.SetEntry(0x1F22, 2, dcf)
+        node.SetEntry(0x1F22, 3, "text")
+        result = self.RoundTrip(node)
+        self.assertEqual(result.GetEntry(0x1F22, 2), dcf)
+        self.assertEqual(result.GetEntry(0x1F22, 3), "text")
+
+    def testUserType(self):
+        self.Manager.CreateNewNode("Test", 0x01, "slave", "", "None", "", "heartbeat", [])
+        node = self.Manager.CurrentNode
+        self.Manager.AddUserTypeToCurrent(0x08, 0, 10, 0)
+        self.Manager.AddMapVariableToCurrent(0x2000, "Variable", var, 0)
+        node.SetMappingEntry(0x2000, 0, values = {"type" : 0xA0})
+        node.SetEntry(0x2000, 0, 1.5)
+        result = self.RoundTrip(node)
+        self.assertEqual(result.GetEntry(0x2000, 0), 1.5)
+        self.assertEqual(result.GetEntry(0xA0), [3, 0x08, 0., 10.])
+
+if __name__ == '__main__':
+    unittest.main()
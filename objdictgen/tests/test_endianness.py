@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+
+import unittest
+
+from endianness import *
+
+class LittleEndianTests(unittest.TestCase):
+
+    def testRoundTrip(self):
+        for size in xrange(9):
+            for value in [0, 1, 0x5A, (1L << (8 * size)) - 1, 0x0123456789ABCDEFL & ((1L << (8 * size)) - 1)]:
+                data = IntToLittleEndian(value, size)
+                self.assertEqual(len(data), size)
+                self.assertEqual(LittleEndianToInt(data), value & ((1L << (8 * size)) - 1))
+
+    def testByteOrder(self):
+        self.assertEqual(IntToLittleEndian(0x123456, 3), "\x56\x34\x12")
+        self.assertEqual(IntToLittleEndian(0x0102030405, 5), "\x05\x04\x03\x02\x01")
+        self.assertEqual(LittleEndianToInt("\x56\x34\x12"), 0x123456)
+        self.assertEqual(LittleEndianToInt(""), 0)
+
+    def testTruncation(self):
+        self.assertEqual(IntToLittleEndian(-1, 2), "\xff\xff")
+        self.assertEqual(IntToLittleEndian(-2, 3), "\xfe\xff\xff")
+        self.assertEqual(IntToLittleEndian(0x123456, 2), "\x56\x34")
+
+    def testFromBuffer(self):
+        data = "\x00\x01\x02\x03\x04\x05\x06\x07"
+        self.assertEqual(LittleEndianToIntFrom(data, 1, 2), 0x0201)
+        self.assertEqual(LittleEndianToIntFrom(buffer(data), 2, 3), 0x040302)
+        self.assertEqual(LittleEndianToIntFrom(bytearray(data), 1, 6), 0x060504030201)
+
+class ArrayTests(unittest.TestCase):
+
+    def testRoundTrip(self):
+        for size in [1, 2, 3, 4, 6, 8]:
+            values = [(i * 0x1234567) & ((1L << (8 * size)) - 1) for i in xrange(10)]
+            data = IntsToLittleEndianArray(values, size)
+            self.assertEqual(len(data), 10 * size)
+            self.assertEqual(LittleEndianArrayToInts(data, size), values)
+            self.assertEqual(LittleEndianArrayToInts(data, size, 3, 2 * size), values[2:5])
+
+    def testNegativeValues(self):
+        self.assertEqual(IntsToLittleEndianArray([-1, 1], 2), "\xff\xff\x01\x00")
+        self.assertEqual(IntsToLittleEndianArray([-1, 1], 3), "\xff\xff\xff\x01\x00\x00")
+
+    def testMixedSizes(self):
+        values = [(0x01, 1), (0x0302, 2), (0x060504, 3), (0x0A090807, 4), (-1, 1)]
+        self.assertEqual(MixedToLittleEndian(values), "\x01\x02\x03\x04\x05\x06\x07\x08\x09\x0a\xff")
+        self.assertEqual(MixedToLittleEndian([]), "")
+
+if __name__ == '__main__':
+    unittest.main()
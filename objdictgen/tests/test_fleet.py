@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+import unittest, os, sys, shutil, tempfile, subprocess
+
+from tests import ObjdictgenDirectory, ExamplesDirectory
+import fleet
+from fleet import ParseNodeIDs, ParseOverride, LoadNodeFile, GenerateFleet
+
+class ParseTests(unittest.TestCase):
+
+    def testNodeIDs(self):
+        self.assertEqual(ParseNodeIDs("1-3,0x20,2"), [1, 2, 3, 0x20])
+        for text in ["0-3", "a", "1-2-3", "0x80"]:
+            self.assertTrue(isinstance(ParseNodeIDs(text), basestring), text)
+
+    def testOverrides(self):
+        self.assertEqual(ParseOverride("1-2:1800:1=0x182", [1, 2, 3]),
+                         {1 : {(0x1800, 1) : 0x182}, 2 : {(0x1800, 1) : 0x182}})
+        self.assertEqual(ParseOverride("*:1800:1=$NODEID+0x200", [1, 2], {1 : {(0x1017, 0) : 100}}),
+                         {1 : {(0x1017, 0) : 100, (0x1800, 1) : "\"$NODEID+0x200\""},
+                          2 : {(0x1800, 1) : "\"$NODEID+0x200\""}})
+        self.assertTrue(isinstance(ParseOverride("1:1017=1", [1]), basestring))
+
+class GenerateFleetTests(unittest.TestCase):
+
+    def setUp(self):
+        self.Directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.Directory)
+
+    def testParallelGeneration(self):
+        node = LoadNodeFile(os.path.join(ExamplesDirectory, "example_objdict.od"))
+        results = GenerateFleet(node, [1, 2, 3], self.Directory, ["c"], jobs = 2)
+        # Generation processes get the node from their initializer
+        self.assertEqual(fleet.FleetArguments, None)
+        for nodeid in [1, 2, 3]:
+            self.assertTrue(isinstance(results[nodeid], list), results[nodeid])
+            for filepath in results[nodeid]:
+                self.assertTrue(os.path.isfile(filepath))
+        self.assertEqual(results, GenerateFleet(node, [1, 2, 3], self.Directory, ["c"]))
+        self.assertEqual(fleet.FleetArguments, None)
+
+class CommandLineTests(unittest.TestCase):
+
+    def setUp(self):
+        self.Directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.Directory)
+
+    def RunFleet(self, *args):
+        process = subprocess.Popen([sys.executable, os.path.join(ObjdictgenDirectory, "fleet.py")] + list(args),
+                                   stdout = subprocess.PIPE, stderr = subprocess.STDOUT)
+        return process.communicate()[0], process.returncode
+
+    def testInvalidEDS(self):
+        edspath = os.path.join(self.Directory, "invalid.eds")
+        file = open(edspath, "w")
+        file.write("[1000]\nParameterName=Device Type\nObjectType=0x7\nDataType=0x0007\nAccessType=ro\nDefaultValue=foo\n")
+        file.close()
+        output, returncode = self.RunFleet(edspath, os.path.join(self.Directory, "out"), "1-2")
+        self.assertNotEqual(returncode, 0)
+        self.assertTrue("Unable to import EDS file" in output, output)
+        self.assertFalse("NameError" in output, output)
+
+    def testInvalidJobs(self):
+        for jobs in ["x", "0"]:
+            output, returncode = self.RunFleet("-j", jobs, "missing.od", os.path.join(self.Directory, "out"), "1")
+            self.assertEqual(returncode, 2)
+            self.assertTrue("Invalid number of jobs" in output, output)
+            self.assertFalse("Traceback" in output, output)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+import unittest
+
+import formulas
+from formulas import NodeIDFormula, ExpressionFormula, CompileFormula, ParseFormula
+from node import Node
+
+class FormulaTests(unittest.TestCase):
+
+    def testLinearFormulas(self):
+        self.assertEqual(ParseFormula("$NODEID+0x180"), NodeIDFormula(0x180, 1))
+        self.assertEqual(ParseFormula("0x600 + $NODEID * 2"), NodeIDFormula(0x600, 2))
+        self.assertEqual(ParseFormula("-$NODEID+0x100"), NodeIDFormula(0x100, -1))
+        self.assertEqual(ParseFormula("$NODEID+0x180L"), NodeIDFormula(0x180, 1))
+
+    def testNonLinearFormulas(self):
+        self.assertRaises(ValueError, ParseFormula, "$NODEID*$NODEID")
+        self.assertRaises(ValueError, ParseFormula, "($NODEID+0x180)")
+        self.assertEqual(CompileFormula("$NODEID*$NODEID").Evaluate(3), 9)
+
+    def testBaselineFormulas(self):
+        # Formulas that baseline eval accepted give the same values
+        for text, value in [("($NODEID+0x180)", 389), ("$NODEID+0x180L", 389),
+                            ("$NODEID+0x180|0x40000000", 1073742213), ("$nodeid+0x180", 389),
+                            ("($NODEID+0x80)&0x7FF", 133), ("0x200+$NODEID<<1", 0x40A)]:
+            self.assertEqual(CompileFormula(text).Evaluate(5), value)
+
+    def testInvalidFormulas(self):
+        for text in ["$NODEID+", "$NODEID+foo", "$NODEID+\"a\"", "__import__('os')+$NODEID", "$NODEID.real",
+                     "$NODEID**2", "2**2**64+$NODEID", "$NODEID+NODEID", "$NODEID+(lambda:1)()"]:
+            self.assertRaises(ValueError, CompileFormula, text)
+
+    def testExpressionFormula(self):
+        formula = CompileFormula("$NODEID+0x180|0x40000000")
+        self.assertTrue(isinstance(formula, ExpressionFormula))
+        self.assertEqual(formula.Evaluate(0x7F), 0x400001FF)
+
+class CompileValueTests(unittest.TestCase):
+
+    def setUp(self):
+        self.Node = Node(id = 5)
+
+    def testStoredFormulas(self):
+        for stored, value in [("\"$NODEID+0x180\"", 389), ("\"($NODEID+0x180)\"", 389),
+                              ("\"$NODEID+0x180L\"", 389), ("\"$NODEID+0x180|0x40000000\"", 1073742213)]:
+            self.assertEqual(self.Node.CompileValue(stored, 0x1800), value)
+            self.assertEqual(self.Node.CompileValue(stored, 0x1800, nodeid = 6), value + 1)
+
+    def testUncomputedFormula(self):
+        self.assertEqual(self.Node.CompileValue("\"($NODEID+0x180)\"", 0x1800, False), "($NODEID+0x180)")
+
+    def testBaseExpression(self):
+        self.assertEqual(self.Node.CompileValue("\"$NODEID+0x%X00\"%(base+2)", 0x1801), 0x305)
+
+    def testConstantResult(self):
+        # Default COB ID of PDO 5 and above doesn't depend on node ID
+        stored = "{True:\"$NODEID+0x%X80\"%(base+1),False:0x80000000}[base<4]"
+        self.assertEqual(self.Node.CompileValue(stored, 0x1800), 0x185)
+        self.assertEqual(self.Node.CompileValue(stored, 0x1804), 0x80000000)
+        self.assertEqual(self.Node.CompileValue(stored, 0x1804, False), 0x80000000)
+
+    def testInvalidFormula(self):
+        self.assertRaises(ValueError, self.Node.CompileValue, "\"$NODEID+foo\"", 0x1800)
+
+    def testInvalidStoredValues(self):
+        for stored in ["__import__('os').getpid()+0*len(\"$NODEID\")", "\"$NODEID+0x%X\"%(base**99)",
+                       "{True:\"$NODEID\"}[base>4]", "\"$NODEID\"+"]:
+            self.assertRaises(ValueError, self.Node.CompileValue, stored, 0x1800)
+
+    def testStoredValueCompiledOnce(self):
+        stored = "{True:\"$NODEID+0x%X80\"%(base+1),False:0x80000000}[base<4]"
+        self.assertEqual(self.Node.CompileValue(stored, 0x1801), 0x285)
+        code = formulas.CompiledStoredValues[stored]
+        self.assertEqual(self.Node.CompileValue(stored, 0x1802), 0x385)
+        self.assertTrue(formulas.CompiledStoredValues[stored] is code)
+
+if __name__ == '__main__':
+    unittest.main()
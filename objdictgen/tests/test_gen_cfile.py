@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+import unittest, os, sys, shutil, tempfile, subprocess
+
+from tests import ObjdictgenDirectory
+from nodemanager import NodeManager
+from node import var, rec
+import gen_cfile
+from gen_cfile import SymbolTable
+
+class ComputeValueTests(unittest.TestCase):
+
+    def testNumbers(self):
+        self.assertEqual(gen_cfile.ComputeValue("int16", 0x12), ("0x12", "\t/* 18 */"))
+        self.assertEqual(gen_cfile.ComputeValue("int16", -18), ("-0x12", "\t/* -18 */"))
+        self.assertEqual(gen_cfile.ComputeValue("real32", 1.5), ("1.500000", ""))
+        # Values of range types based on a REAL type are floats
+        self.assertEqual(gen_cfile.ComputeValue("int32", -2.5), ("-2.500000", ""))
+
+    def testStrings(self):
+        self.assertEqual(gen_cfile.ComputeValue("visible_string", "abc"), ("\"abc\"", ""))
+        self.assertEqual(gen_cfile.ComputeValue("domain", "\x01A"), ("\"\\x01\\x41\"", ""))
+
+class NegativeValuesTests(unittest.TestCase):
+
+    def testGenerateFileContent(self):
+        manager = NodeManager()
+        manager.CreateNewNode("Test", 0x01, "slave", "", "None", "", "heartbeat", [])
+        node = manager.CurrentNode
+        manager.AddMapVariableToCurrent(0x2000, "Variable", var, 0)
+        manager.AddMapVariableToCurrent(0x2001, "Array", rec, 2)
+        for index in [0x2000, 0x2001]:
+            for subindex in [0, 1]:
+                node.SetMappingEntry(index, subindex, values = {"type" : 0x03})
+        node.SetEntry(0x2000, 0, -3)
+        node.SetEntry(0x2001, 1, -0x10)
+        content, header = gen_cfile.GenerateFileContent(node, "Test.h")
+        self.assertTrue("INTEGER16 Variable = -0x3;" in content)
+        self.assertTrue("-0x10" in content)
+        self.assertFalse("0x-" in content)
+
+class SymbolTableTests(unittest.TestCase):
+
+    def testCollisionsMessage(self):
+        symbols = SymbolTable()
+        symbols.Declare("my_var", 0x2000, 0)
+        symbols.Declare("my_var", 0x2000, 0)
+        self.assertFalse(symbols.HasCollisions())
+        symbols.Declare("my_var", 0x2001, 0)
+        symbols.Declare("my_array", 0x2002)
+        symbols.Declare("my_array", 0x2003)
+        self.assertTrue(symbols.HasCollisions())
+        self.assertEqual(symbols.GetCollisionsMessage(),
+            "!!! C symbol \"my_var\" is generated for index 0x2000 subindex 0x00 and index 0x2001 subindex 0x00\n"
+            "!!! C symbol \"my_array\" is generated for index 0x2002 and index 0x2003")
+
+    def testNamesCache(self):
+        symbols = SymbolTable()
+        self.assertEqual(symbols.FormatName("my var-1"), "my_var_1")
+        self.assertEqual(symbols.UnDigitName("1st"), "_1st")
+        self.assertEqual(symbols.UnDigitName("first"), "first")
+
+class CollisionTests(unittest.TestCase):
+
+    def setUp(self):
+        self.Directory = tempfile.mkdtemp()
+        self.Manager = NodeManager()
+        self.Manager.CreateNewNode("Test", 0x01, "slave", "", "None", "", "heartbeat", [])
+        self.Manager.AddMapVariableToCurrent(0x2000, "my var", var, 0)
+        self.Manager.AddMapVariableToCurrent(0x2001, "my_var", var, 0)
+
+    def tearDown(self):
+        shutil.rmtree(self.Directory)
+
+    def testGenerateFileContent(self):
+        self.assertRaises(ValueError, gen_cfile.GenerateFileContent, self.Manager.CurrentNode, "Test.h")
+        result = gen_cfile.GenerateFile(os.path.join(self.Directory, "Test.c"), self.Manager.CurrentNode)
+        self.assertTrue("C symbol \"my_var\"" in result)
+        self.assertFalse(os.path.exists(os.path.join(self.Directory, "Test.c")))
+
+    def testCommandLine(self):
+        odpath = os.path.join(self.Directory, "Test.od")
+        self.Manager.SaveCurrentInFile(odpath)
+        process = subprocess.Popen([sys.executable, os.path.join(ObjdictgenDirectory, "objdictgen.py"),
+                                    odpath, os.path.join(self.Directory, "Test.c")],
+                                   stdout = subprocess.PIPE, stderr = subprocess.STDOUT)
+        output = process.communicate()[0]
+        self.assertNotEqual(process.returncode, 0)
+        self.assertTrue("!!! C symbol \"my_var\" is generated for index 0x2000 subindex 0x00 and index 0x2001 subindex 0x00" in output, output)
+        self.assertFalse("NameError" in output, output)
+
+class SplitTests(unittest.TestCase):
+
+    def setUp(self):
+        self.Directory = tempfile.mkdtemp()
+        self.Manager = NodeManager()
+        self.Manager.OpenFileInCurrent(os.path.join(os.path.dirname(ObjdictgenDirectory), "examples", "TestMasterSlave", "TestSlave.od"))
+        self.Node = self.Manager.CurrentNode
+        self.FilePath = os.path.join(self.Directory, "TestSlave.c")
+
+    def tearDown(self):
+        shutil.rmtree(self.Directory)
+
+    def testFiles(self):
+        self.assertEqual(gen_cfile.GenerateFile(self.FilePath, self.Node, split = True), None)
+        self.assertEqual(sorted(os.listdir(self.Directory)),
+                         ["TestSlave.c", "TestSlave.h", "TestSlave_comm.c", "TestSlave_manufacturer.c",
+                          "TestSlave_pdo.c", "TestSlave_private.h", "TestSlave_profile.c"])
+        content, header = gen_cfile.GenerateFileContent(self.Node, "TestSlave.h")
+        self.assertEqual(open(os.path.join(self.Directory, "TestSlave.h")).read(), header)
+        self.assertTrue("TestSlave_Index2000[] =" in open(os.path.join(self.Directory, "TestSlave_manufacturer.c")).read())
+        self.assertTrue("TestSlave_Index1800[] =" in open(os.path.join(self.Directory, "TestSlave_pdo.c")).read())
+        self.assertTrue("TestSlave_scanIndexOD" in open(self.FilePath).read())
+
+    def testUnchangedFilesKept(self):
+        self.assertEqual(gen_cfile.GenerateFile(self.FilePath, self.Node, split = True), None)
+        for filename in os.listdir(self.Directory):
+            os.utime(os.path.join(self.Directory, filename), (0, 0))
+        self.Node.SetEntry(0x2000, 0, 5)
+        self.assertEqual(gen_cfile.GenerateFile(self.FilePath, self.Node, split = True), None)
+        modified = [filename for filename in sorted(os.listdir(self.Directory))
+                    if os.path.getmtime(os.path.join(self.Directory, filename)) != 0]
+        self.assertEqual(modified, ["TestSlave_manufacturer.c"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+
+import unittest, os
+
+from tests.test_nodelist import NodeListTestCase, SlaveEDSName
+from virtualcan import RecorderEndpoint
+from netsim import *
+
+class NetworkSimulatorTests(NodeListTestCase):
+
+    def setUp(self):
+        NodeListTestCase.setUp(self)
+        manager = self.NodeList.GetManager()
+        manager.CreateNewNode("Master", 0x01, "master", "", "None", "", "heartbeat", ["DS302"])
+        manager.ManageEntriesOfCurrent([0x1005, 0x1006, 0x1017], [])
+        for index, value in [(0x1005, 0x40000080), (0x1006, 10000), (0x1017, 100)]:
+            manager.CurrentNode.SetEntry(index, 0, value)
+        for nodeid in [2, 3]:
+            self.NodeList.AddSlaveNode("Slave%d"%nodeid, nodeid, SlaveEDSName)
+            self.NodeList.SetSlaveNodeEntry(nodeid, 0x1017, 0, 100)
+        # First TPDO of node 3 is event driven with an inhibit time of 5 ms
+        self.NodeList.SetSlaveNodeEntry(3, 0x1800, 2, TRANSMISSION_EVENT_PROFILE)
+        self.NodeList.SetSlaveNodeEntry(3, 0x1800, 3, 50)
+        self.Simulator = NetworkSimulator(self.NodeList)
+        self.Recorder = self.Simulator.GetBus().Attach(RecorderEndpoint())
+
+    def GetCobIDCounts(self):
+        counts = {}
+        for frame in self.Recorder.GetFrames():
+            counts[frame.CobID] = counts.get(frame.CobID, 0) + 1
+        return counts
+
+    def testStartup(self):
+        self.Simulator.Run(1.)
+        self.assertEqual(self.Simulator.GetNodeIDs(), [1, 2, 3])
+        counts = self.GetCobIDCounts()
+        self.assertEqual(counts[0x000], 1)
+        self.assertEqual(counts[0x080], 99)
+        # Boot-up and heartbeats
+        self.assertEqual([counts[0x700 + nodeid] for nodeid in [1, 2, 3]], [10, 10, 10])
+        # Synchronous PDOs are sent after every SYNC
+        self.assertEqual([counts[cobid] for cobid in [0x182, 0x282, 0x382, 0x283, 0x383]], [99] * 5)
+        self.assertEqual(counts[0x183], 1)
+        statistics = self.Simulator.GetStatistics()
+        self.assertEqual([statistics["nodes"][nodeid]["state"] for nodeid in [1, 2, 3]], [NMT_OPERATIONAL] * 3)
+        self.assertEqual(statistics["nodes"][1]["syncs"], 99)
+        self.assertEqual(statistics["bus"]["frames"], sum(counts.values()))
+
+    def testValueChanges(self):
+        self.Simulator.Run(0.1)
+        self.Recorder.Clear()
+        self.Simulator.GetNode(2).SetValue(0x6000, 1, 0x55)
+        for value in [1, 2, 3]:
+            self.Simulator.GetNode(3).SetValue(0x6000, 1, value)
+        self.Simulator.Run(0.02)
+        self.assertEqual([frame.Data for frame in self.Recorder.GetFrames() if frame.CobID == 0x182], ["\x55", "\x55"])
+        # Event driven PDO is sent at once, then after inhibit time with the last value
+        frames = [frame for frame in self.Recorder.GetFrames() if frame.CobID == 0x183]
+        self.assertEqual([frame.Data for frame in frames], ["\x01", "\x03"])
+        self.assertTrue(0.105 <= frames[1].Timestamp < 0.106, frames[1].Timestamp)
+
+    def testNMTStop(self):
+        self.Simulator.Run(0.1)
+        self.Simulator.GetNode(1).SendNMT(NMT_STOP, 2)
+        self.Simulator.Run(0.1)
+        self.Recorder.Clear()
+        self.Simulator.Run(0.1)
+        counts = self.GetCobIDCounts()
+        self.assertFalse(0x182 in counts)
+        self.assertEqual(counts[0x282 + 1], 10)
+        self.assertEqual(self.Simulator.GetNode(2).GetState(), NMT_STOPPED)
+
+    def testExportStatistics(self):
+        self.Simulator.Run(0.1)
+        filepath = os.path.join(self.Root, "statistics.csv")
+        self.Simulator.ExportStatistics(filepath)
+        lines = open(filepath).read().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].startswith("nodeid,name,"))
+        self.assertTrue(lines[2].startswith("0x02,Slave2,"))
+
+if __name__ == '__main__':
+    unittest.main()
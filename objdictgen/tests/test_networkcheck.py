@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+import unittest
+
+from tests.test_nodelist import NodeListTestCase, SlaveEDSName
+from networkcheck import GetCanID, GetSyncCanID, BuildCobIDTable
+
+class CanIDTests(unittest.TestCase):
+
+    def testCanID(self):
+        self.assertEqual(GetCanID(0x181), 0x181)
+        self.assertEqual(GetCanID(0x80000181), None)
+        self.assertEqual(GetCanID(0x20012345), 0x12345)
+        self.assertEqual(GetCanID("$NODEID+0x180"), None)
+
+    def testSyncCanID(self):
+        self.assertEqual(GetSyncCanID(0x80), 0x80)
+        self.assertEqual(GetSyncCanID(0xC0000080), 0x80)
+        self.assertEqual(GetSyncCanID(0), None)
+        self.assertEqual(GetSyncCanID(0x40000000), None)
+        self.assertEqual(GetSyncCanID(None), None)
+
+class CobIDTableTests(NodeListTestCase):
+
+    def testSyncNotConfigured(self):
+        self.NodeList.AddSlaveNode("Slave2", 2, SlaveEDSName)
+        self.NodeList.AddSlaveNode("Slave3", 3, SlaveEDSName)
+        self.NodeList.SetSlaveNodeEntry(2, 0x1005, 0, 0)
+        table = BuildCobIDTable(self.NodeList)
+        self.assertFalse(0 in table.Producers or 0 in table.Consumers)
+        self.assertEqual([user[0] for user in table.Consumers[0x80]], [3])
+
+    def testDuplicateProducers(self):
+        self.NodeList.AddSlaveNode("Slave2", 2, SlaveEDSName)
+        self.NodeList.AddSlaveNode("Slave3", 3, SlaveEDSName)
+        self.NodeList.SetSlaveNodeEntry(3, 0x1800, 1, 0x182)
+        conflicts = [conflict for conflict in self.NodeList.GetCobIDConflicts() if conflict["type"] == "duplicate"]
+        self.assertEqual([(conflict["cobid"], sorted([user[0] for user in conflict["users"]])) for conflict in conflicts],
+                         [(0x182, [2, 3])])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+import unittest, os, shutil, tempfile
+
+from tests import ObjdictgenDirectory
+from nodemanager import NodeManager
+from nodelist import NodeList
+from concisedcf import ConciseDCF
+from node import Node, NodeOverlay, OverlayValueMethods
+
+SlaveEDS = os.path.join(os.path.dirname(ObjdictgenDirectory), "examples", "DS401_Slave_Gui", "DS401_Slave_Gui.eds")
+SlaveEDSName = os.path.basename(SlaveEDS)
+
+class NodeListTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.Root = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.Root, "eds"))
+        shutil.copy(SlaveEDS, os.path.join(self.Root, "eds"))
+        self.NodeList = self.LoadProject()
+
+    def tearDown(self):
+        shutil.rmtree(self.Root)
+
+    def LoadProject(self, netname = None):
+        nodelist = NodeList(NodeManager())
+        self.assertEqual(nodelist.LoadProject(self.Root, netname), None)
+        return nodelist
+
+class SlaveValuesTests(NodeListTestCase):
+
+    def testValuesSavedAndLoaded(self):
+        self.assertEqual(self.NodeList.AddSlaveNode("Slave", 3, SlaveEDSName), None)
+        self.assertEqual(self.NodeList.GetSlaveNodeEntry(3, 0x1800, 1), 0x183)
+        self.assertEqual(self.NodeList.SetSlaveNodeEntry(3, 0x1800, 1, 0x182), None)
+        self.assertEqual(self.NodeList.SaveProject(), None)
+
+        nodelist = self.LoadProject()
+        self.assertEqual(nodelist.GetSlaveNodeEntry(3, 0x1800, 1), 0x182)
+        self.assertEqual(nodelist.SlaveNodes[3]["Node"].GetEntry(0x1800, 1), 0x182)
+        self.assertFalse(nodelist.HasChanged())
+
+    def testFormulaValuesSavedAndLoaded(self):
+        self.NodeList.AddSlaveNode("Slave", 3, SlaveEDSName)
+        self.NodeList.SetSlaveNodeEntry(3, 0x1800, 1, "\"$NODEID+0x180|0x80000000\"")
+        self.NodeList.SaveProject()
+
+        nodelist = self.LoadProject()
+        self.assertEqual(nodelist.GetSlaveNodeEntry(3, 0x1800, 1), 0x80000183)
+
+    def testValuesFileRemovedWhenUnchanged(self):
+        self.NodeList.AddSlaveNode("Slave", 3, SlaveEDSName)
+        self.NodeList.SetSlaveNodeEntry(3, 0x1800, 1, 0x182)
+        self.NodeList.SaveProject()
+        self.assertTrue(os.path.isfile(self.NodeList.GetSlaveValuesPath()))
+        self.NodeList.SetSlaveNodeEntry(3, 0x1800, 1, "\"$NODEID+0x180\"")
+        self.NodeList.SaveProject()
+        self.assertFalse(os.path.isfile(self.NodeList.GetSlaveValuesPath()))
+
+    def testSharedBaseNode(self):
+        self.NodeList.AddSlaveNode("Slave3", 3, SlaveEDSName)
+        self.NodeList.AddSlaveNode("Slave4", 4, SlaveEDSName)
+        self.NodeList.SetSlaveNodeEntry(3, 0x1800, 1, 0x182)
+        self.assertEqual(self.NodeList.GetSlaveNodeEntry(4, 0x1800, 1), 0x184)
+        self.assertEqual(self.NodeList.EDSNodes[SlaveEDSName].GetEntry(0x1800, 1, False), "$NODEID+0x180")
+
+class NodeOverlayTests(NodeListTestCase):
+
+    def setUp(self):
+        NodeListTestCase.setUp(self)
+        self.NodeList.AddSlaveNode("Slave", 3, SlaveEDSName)
+        self.NodeList.SetSlaveNodeEntry(3, 0x1800, 1, 0x182)
+        self.Overlay = self.NodeList.SlaveNodes[3]["Node"]
+
+    def testCopy(self):
+        node = self.Overlay.Copy()
+        self.assertEqual(node.GetNodeID(), 3)
+        self.assertEqual(node.GetEntry(0x1800, 1), 0x182)
+        self.assertEqual(node.GetEntry(0x1801, 1), 0x283)
+        self.assertEqual(self.Overlay.PrintString(), node.PrintString())
+
+    def testBaseModificationsBlocked(self):
+        for name in ["Dictionary", "AddEntry", "RemoveEntry", "SetNodeName", "SetParamsEntry"]:
+            self.assertRaises(AttributeError, getattr, self.Overlay, name)
+        self.assertEqual(self.Overlay.GetEntryName(0x1800), self.NodeList.EDSNodes[SlaveEDSName].GetEntryName(0x1800))
+
+    def testValueMethodsUseOverlay(self):
+        for name in OverlayValueMethods:
+            self.assertTrue(getattr(self.Overlay, name).im_self is self.Overlay, name)
+        self.assertEqual(self.Overlay.GetMapVariableList(), self.NodeList.EDSNodes[SlaveEDSName].GetMapVariableList())
+
+    def testOverriddenTypeEntry(self):
+        # Customised type whose base type is overridden
+        base = Node(id = 1)
+        for subindex, value in enumerate([0x07, 0, 100]):
+            base.AddEntry(0xA0, subindex + 1, value)
+        overlay = NodeOverlay(base, 2)
+        self.assertTrue(overlay.SetEntry(0xA0, 1, 0x09))
+        self.assertTrue(overlay.IsStringType(0xA0))
+        self.assertFalse(base.IsStringType(0xA0))
+        self.assertEqual(overlay.GetCustomisedTypeValues(0xA0)[0][1], 0x09)
+
+class SyncScheduleTests(NodeListTestCase):
+
+    def setUp(self):
+        NodeListTestCase.setUp(self)
+        master = self.NodeList.Manager.CurrentNode
+        self.NodeList.Manager.ManageEntriesOfCurrent([0x1005, 0x1006], [], master)
+        master.SetEntry(0x1005, 0, 0x40000080)
+        master.SetEntry(0x1006, 0, 10000)
+        # Event driven TPDOs with a 20 ms event timer, sent every 2 SYNC once
+        # converted
+        for nodeid in (2, 3):
+            self.NodeList.AddSlaveNode("Slave%d"%nodeid, nodeid, SlaveEDSName)
+            for index in (0x1800, 0x1801):
+                self.NodeList.SetSlaveNodeEntry(nodeid, index, 2, 0xFF)
+                self.NodeList.SetSlaveNodeEntry(nodeid, index, 5, 20)
+
+    def testSlaveValuesUpdated(self):
+        schedule = self.NodeList.GetSyncSchedule(convert = True)
+        self.assertTrue((2, 0x1800, 2, 1, 2) in schedule.GetChanges())
+        self.assertEqual(self.NodeList.ApplySyncSchedule(schedule), None)
+        self.assertEqual(self.NodeList.GetSlaveNodeEntry(2, 0x1800, 2), 2)
+        self.assertEqual(self.NodeList.GetSlaveNodeEntry(3, 0x1801, 2), 2)
+        self.assertEqual(self.NodeList.GetSyncSchedule(convert = True).GetChanges(), [])
+
+    def testApplyTwice(self):
+        schedule = self.NodeList.GetSyncSchedule(convert = True)
+        self.NodeList.ApplySyncSchedule(schedule)
+        dcf = self.NodeList.GetMasterNodeEntry(0x1F22, 2)
+        self.assertEqual(len(ConciseDCF(dcf)), 2)
+        self.NodeList.ApplySyncSchedule(schedule)
+        self.assertEqual(self.NodeList.GetMasterNodeEntry(0x1F22, 2), dcf)
+
+if __name__ == '__main__':
+    unittest.main()
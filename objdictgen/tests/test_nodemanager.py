@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+import unittest
+
+from nodemanager import NodeManager
+from concisedcf import DCFBuilder, DecodeConciseDCF
+
+class DCFBuilderToCurrentTests(unittest.TestCase):
+
+    def setUp(self):
+        self.Manager = NodeManager()
+        self.Manager.CreateNewNode("MasterNode", 0x00, "master", "", "None", "", "heartbeat", ["DS302"])
+
+    def testInvalidNodeID(self):
+        state = self.Manager.GetCurrentBufferState()
+        for nodeid in [0, 0x80]:
+            builder = DCFBuilder()
+            builder.Add(2, 0x1800, 2, 1, 1)
+            builder.Add(nodeid, 0x1800, 2, 1, 1)
+            self.assertTrue(isinstance(self.Manager.AddDCFBuilderToCurrent(builder), basestring))
+            self.assertFalse(self.Manager.IsCurrentEntry(0x1F22))
+            self.assertEqual(self.Manager.GetCurrentBufferState(), state)
+
+    def testUndo(self):
+        builder = DCFBuilder()
+        builder.Add(2, 0x1800, 2, 1, 1)
+        builder.Add(5, 0x1017, 0, 2, 100)
+        self.assertEqual(self.Manager.AddDCFBuilderToCurrent(builder), None)
+        self.assertEqual(DecodeConciseDCF(self.Manager.GetCurrentEntry(0x1F22, 2)), [(0x1800, 2, 1, 1)])
+        self.assertEqual(DecodeConciseDCF(self.Manager.GetCurrentEntry(0x1F22, 5)), [(0x1017, 0, 2, 100)])
+        self.assertEqual(self.Manager.GetCurrentEntry(0x1F22, 0), 127)
+        self.Manager.LoadCurrentPrevious()
+        self.assertFalse(self.Manager.IsCurrentEntry(0x1F22))
+
+if __name__ == '__main__':
+    unittest.main()
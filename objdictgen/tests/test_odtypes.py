@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+
+import unittest
+
+from nodemanager import NodeManager
+from node import var
+from odtypes import GetTypeCoding, GetNodeTypeCoding
+
+class TypeCodingTests(unittest.TestCase):
+
+    def testRoundTrip(self):
+        for typename, values in [("UNSIGNED8", [0, 0xFF]), ("UNSIGNED24", [0, 0x123456, 0xFFFFFF]),
+                                 ("UNSIGNED64", [0, 0xFFFFFFFFFFFFFFFFL]), ("INTEGER16", [-0x8000, -1, 0, 0x7FFF]),
+                                 ("INTEGER40", [-(1L << 39), -2, 0x7FFFFFFFFFL]), ("REAL32", [0., -1.5, 1024.25]),
+                                 ("REAL64", [0.1, -1e300]), ("BOOLEAN", [True, False]),
+                                 ("VISIBLE_STRING", ["", "abc"]), ("DOMAIN", ["", "\x00\x01\xff"])]:
+            coding = GetTypeCoding(typename)
+            for value in values:
+                data = coding.Encode(value)
+                if coding.Size is not None:
+                    self.assertEqual(len(data), coding.Size, typename)
+                self.assertEqual(coding.Decode(data), value, typename)
+
+    def testDecode(self):
+        self.assertEqual(GetTypeCoding("INTEGER24").Decode("\xfe\xff\xff"), -2)
+        self.assertEqual(GetTypeCoding("UNSIGNED24").Decode("\xfe\xff\xff"), 0xFFFFFE)
+        self.assertEqual(GetTypeCoding("VISIBLE_STRING").Decode("ab\x00\x00"), "ab")
+        self.assertEqual(GetTypeCoding("UNICODE_STRING").Encode(u"\xe9"), "\xc3\xa9")
+
+    def testBitLength(self):
+        self.assertEqual(GetTypeCoding("BOOLEAN").GetBitLength(), 1)
+        self.assertEqual(GetTypeCoding("INTEGER24").GetBitLength(), 24)
+        self.assertEqual(GetTypeCoding("TIME_OF_DAY").GetBitLength(), 48)
+        self.assertEqual(GetTypeCoding("DOMAIN").GetBitLength(), 0)
+
+    def testCheckValue(self):
+        coding = GetTypeCoding("INTEGER8")
+        self.assertEqual(coding.CheckValue(-128, 1), None)
+        self.assertEqual(coding.CheckValue(128, 1), "high")
+        self.assertEqual(coding.CheckValue(-129, 1), "low")
+        self.assertEqual(coding.CheckValue(0, 2), "length")
+        coding = GetTypeCoding("VISIBLE_STRING")
+        self.assertEqual(coding.CheckValue("abc", 3), None)
+
+    def testUnsupportedTypes(self):
+        for typename in ["UNSIGNED12", "INTEGER72", "REAL16", "PDO_COMMUNICATION_PARAMETER"]:
+            self.assertRaises(ValueError, GetTypeCoding, typename)
+
+class NodeTypeCodingTests(unittest.TestCase):
+
+    def setUp(self):
+        self.Manager = NodeManager()
+        self.Manager.CreateNewNode("Test", 0x01, "slave", "", "None", "", "heartbeat", [])
+        self.Node = self.Manager.CurrentNode
+
+    def testStandardType(self):
+        coding = GetNodeTypeCoding(self.Node, 0x07)
+        self.assertEqual((coding.Name, coding.Kind, coding.Size), ("UNSIGNED32", "unsigned", 4))
+        self.assertRaises(ValueError, GetNodeTypeCoding, self.Node, 0x9F)
+
+    def testUserTypes(self):
+        self.Manager.AddUserTypeToCurrent(0x03, -10, 10, 0)
+        self.Manager.AddUserTypeToCurrent(0x09, 0, 0, 12)
+        coding = GetNodeTypeCoding(self.Node, 0xA0)
+        self.assertEqual((coding.Kind, coding.Size, coding.Minimum, coding.Maximum), ("integer", 2, -10, 10))
+        self.assertEqual(coding.CheckValue(11, 2), "high")
+        self.assertEqual(coding.CheckValue(-11, 2), "low")
+        self.assertEqual(coding.CheckValue(10, 2), None)
+        coding = GetNodeTypeCoding(self.Node, 0xA1)
+        self.assertEqual((coding.Kind, coding.Size), ("string", 12))
+        self.assertEqual(coding.CheckValue("a" * 13, 13), "length")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+import unittest
+
+import pdocodec
+from pdocodec import PdoField, PdoLayout
+from odtypes import GetTypeCoding
+
+def BuildLayout(types):
+    fields = []
+    offset = 0
+    for i, (typename, length) in enumerate(types):
+        fields.append(PdoField(0x2000 + i, 0, offset, length, GetTypeCoding(typename)))
+        offset += length
+    return PdoLayout(fields)
+
+class PdoCodecTestCase(unittest.TestCase):
+
+    """
+    Return the result of a method of a layout with and without NumPy, checking
+    that both give the same result
+    """
+    def CallBoth(self, layout, method, *args):
+        numpy = pdocodec.numpy
+        try:
+            pdocodec.numpy = None
+            result = getattr(layout, method)(*args)
+        finally:
+            pdocodec.numpy = numpy
+        if numpy is not None:
+            other = getattr(layout, method)(*args)
+            if isinstance(result, dict):
+                self.AssertColumnsEqual(other, dict([(key, list(column)) for key, column in result.iteritems()]))
+            else:
+                self.assertEqual(other, result)
+        return result
+
+    def AssertRaisesBoth(self, layout, method, *args):
+        numpy = pdocodec.numpy
+        try:
+            pdocodec.numpy = None
+            self.assertRaises(ValueError, getattr(layout, method), *args)
+        finally:
+            pdocodec.numpy = numpy
+        self.assertRaises(ValueError, getattr(layout, method), *args)
+
+    def AssertColumnsEqual(self, columns, expected):
+        self.assertEqual(sorted(columns.keys()), sorted(expected.keys()))
+        for key, column in expected.iteritems():
+            self.assertEqual(list(columns[key]), column)
+
+class FrameTests(PdoCodecTestCase):
+
+    def testEncodeDecodeFrame(self):
+        layout = BuildLayout([("UNSIGNED16", 16), ("INTEGER8", 8), ("BOOLEAN", 1), ("UNSIGNED8", 8)])
+        data = layout.EncodeFrame([0x1234, -2, True, 9])
+        self.assertEqual(data, "\x34\x12\xfe\x13\x00")
+        self.assertEqual(layout.DecodeFrame(data), [0x1234, -2, True, 9])
+        self.assertRaises(ValueError, layout.DecodeFrame, "\x34\x12")
+
+    def testTooLong(self):
+        self.assertRaises(ValueError, BuildLayout, [("UNSIGNED64", 64), ("UNSIGNED8", 8)])
+
+class ArrayTests(PdoCodecTestCase):
+
+    def testAlignedRoundTrip(self):
+        layout = BuildLayout([("UNSIGNED16", 16), ("INTEGER8", 8), ("REAL32", 32), ("VISIBLE_STRING8", 8)])
+        columns = {(0x2000, 0) : [1, 0xFFFF], (0x2001, 0) : [-128, 127],
+                   (0x2002, 0) : [0.5, -2.25], (0x2003, 0) : ["a", "b"]}
+        data = self.CallBoth(layout, "Pack", columns)
+        self.assertEqual(len(data), 2 * layout.GetLength())
+        self.AssertColumnsEqual(self.CallBoth(layout, "Unpack", data), columns)
+
+    def testBitsRoundTrip(self):
+        # Variables following a boolean aren't byte aligned
+        layout = BuildLayout([("BOOLEAN", 1), ("UNSIGNED8", 8), ("INTEGER16", 16), ("BOOLEAN", 1), ("UNSIGNED32", 32)])
+        self.assertEqual(layout.GetDtype(), None)
+        columns = {(0x2000, 0) : [True, False, True], (0x2001, 0) : [0xFF, 0, 5],
+                   (0x2002, 0) : [-0x8000, 0x7FFF, -1], (0x2003, 0) : [False, True, True],
+                   (0x2004, 0) : [0xFFFFFFFF, 0, 0x12345678]}
+        data = self.CallBoth(layout, "Pack", columns)
+        self.AssertColumnsEqual(self.CallBoth(layout, "Unpack", data), columns)
+        self.assertEqual(layout.SplitFrames(data), [layout.EncodeFrame(row) for row in zip(*[columns[key] for key in layout.GetKeys()])])
+
+    def testUnsigned64(self):
+        layout = BuildLayout([("UNSIGNED64", 64)])
+        for column in [[2 ** 63 + 1, 5], [2 ** 64 - 1, 5], [0, 2 ** 64 - 1]]:
+            data = self.CallBoth(layout, "Pack", {(0x2000, 0) : column})
+            self.assertEqual(data, "".join([layout.EncodeFrame([value]) for value in column]))
+            self.AssertColumnsEqual(self.CallBoth(layout, "Unpack", data), {(0x2000, 0) : column})
+
+    def testMissingColumns(self):
+        layout = BuildLayout([("UNSIGNED8", 8), ("VISIBLE_STRING16", 16)])
+        self.assertEqual(self.CallBoth(layout, "Pack", {(0x2000, 0) : [1, 2]}), "\x01\x00\x00\x02\x00\x00")
+        self.assertEqual(self.CallBoth(layout, "Pack", {(0x2001, 0) : ["ab", "c"]}), "\x00ab\x00c\x00")
+        self.assertEqual(self.CallBoth(layout, "Pack", {}), "")
+
+    def testColumnLengths(self):
+        layout = BuildLayout([("UNSIGNED8", 8), ("UNSIGNED8", 8)])
+        self.AssertRaisesBoth(layout, "Pack", {(0x2000, 0) : [1, 2], (0x2001, 0) : [1]})
+        self.AssertRaisesBoth(layout, "Pack", {(0x2000, 0) : [1, 2], (0x2005, 0) : [1, 2, 3]})
+
+    def testFramesLength(self):
+        layout = BuildLayout([("UNSIGNED16", 16)])
+        self.AssertRaisesBoth(layout, "Unpack", "\x00\x01\x02")
+        self.AssertRaisesBoth(layout, "Unpack", ["\x00\x01", "\x02"])
+
+if __name__ == '__main__':
+    unittest.main()
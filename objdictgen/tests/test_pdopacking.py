@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+import unittest, os
+
+from tests import ExamplesDirectory
+from nodemanager import NodeManager
+import pdopacking
+from pdopacking import PackVariables, GetMappingValue
+
+class PackVariablesTests(unittest.TestCase):
+
+    def testPacking(self):
+        variables = [(0x2000, 1, 8), (0x2000, 2, 8), (0x2001, 0, 32), (0x2002, 0, 32), (0x2003, 0, 64)]
+        rates = {(0x2000, 1) : 100, (0x2000, 2) : 100, (0x2001, 0) : 100, (0x2002, 0) : 100, (0x2003, 0) : 10}
+        self.assertEqual(PackVariables(variables, rates),
+                         [(10, [(0x2003, 0, 64)]),
+                          (100, [(0x2001, 0, 32), (0x2002, 0, 32)]),
+                          (100, [(0x2000, 1, 8), (0x2000, 2, 8)])])
+
+    def testVariablesWithoutRate(self):
+        self.assertEqual(PackVariables([(0x2000, 1, 8)], {}), [])
+
+class PackCurrentTPDOsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.Manager = NodeManager()
+        self.Manager.OpenFileInCurrent(os.path.join(ExamplesDirectory, "example_objdict.od"))
+        self.Node = self.Manager.CurrentNode
+        self.Rates = {(0x2000, 1) : 100, (0x2000, 2) : 100, (0x2001, 0) : 100, (0x2002, 0) : 50}
+
+    def GetTPDOs(self):
+        return [index for index in self.Node.GetIndexes() if 0x1800 <= index <= 0x1BFF]
+
+    def testPackInFreeTPDOs(self):
+        self.assertEqual(self.Manager.PackCurrentTPDOs(self.Rates), None)
+        self.assertEqual(self.GetTPDOs(), [0x1800, 0x1801, 0x1A00, 0x1A01])
+        self.assertEqual(self.Node.GetEntry(0x1800, 1, nodeid = 3), 0x183)
+        self.assertEqual(self.Node.GetEntry(0x1801, 1, nodeid = 3), 0x283)
+        self.assertEqual(self.Node.GetEntry(0x1800, 5), 50)
+        self.assertEqual(self.Node.GetEntry(0x1A00), [1, GetMappingValue(0x2002, 0, 32)])
+        self.assertEqual(self.Node.GetEntry(0x1A01), [3, GetMappingValue(0x2000, 1, 8), GetMappingValue(0x2000, 2, 8),
+                                                     GetMappingValue(0x2001, 0, 32)])
+
+    def testUserTPDOsKept(self):
+        mapping = [GetMappingValue(0x2000, 4, 8)]
+        self.Node.SetEntry(0x1A00, None, mapping)
+        self.assertEqual(self.Manager.PackCurrentTPDOs(self.Rates), None)
+        self.assertEqual(self.Node.GetEntry(0x1A00), [1] + mapping)
+        self.assertEqual(self.Node.GetEntry(0x1A01), [1, GetMappingValue(0x2002, 0, 32)])
+        self.assertEqual(self.Node.GetEntry(0x1802, 1, nodeid = 3), 0x383)
+
+    def testReplace(self):
+        self.Node.SetEntry(0x1A00, None, [GetMappingValue(0x2000, 4, 8)])
+        self.Manager.ManageEntriesOfCurrent([0x1806, 0x1A06], [], self.Node)
+        self.assertEqual(self.Manager.PackCurrentTPDOs(self.Rates, True), None)
+        self.assertEqual(self.GetTPDOs(), [0x1800, 0x1801, 0x1A00, 0x1A01])
+        self.assertEqual(self.Node.GetEntry(0x1A00), [1, GetMappingValue(0x2002, 0, 32)])
+
+    def testTooManyPDOs(self):
+        self.Node.SetEntry(0x1A00, None, [GetMappingValue(0x2000, 4, 8)])
+        rates = {(0x2000, 1) : 10, (0x2000, 2) : 20, (0x2001, 0) : 30, (0x2002, 0) : 40}
+        self.assertTrue(isinstance(self.Manager.PackCurrentTPDOs(rates), basestring))
+        self.assertEqual(self.GetTPDOs(), [0x1800, 0x1801, 0x1A00, 0x1A01])
+        self.assertEqual(self.Manager.PackCurrentTPDOs(rates, True), None)
+        self.assertEqual(len(self.GetTPDOs()), 2 * pdopacking.PDO_PREDEFINED_NUMBER)
+        for number in xrange(pdopacking.PDO_PREDEFINED_NUMBER):
+            self.assertEqual(self.Node.GetEntry(0x1800 + number, 1, nodeid = 1), 0x181 + 0x100 * number)
+
+    def testMorePDOsThanPredefined(self):
+        rates = {(0x2000, 1) : 10, (0x2000, 2) : 20, (0x2000, 3) : 30, (0x2000, 4) : 40, (0x2001, 0) : 50}
+        tpdos = self.GetTPDOs()
+        self.assertTrue(isinstance(pdopacking.PackNodeVariables(self.Node, rates), basestring))
+        self.assertTrue(isinstance(self.Manager.PackCurrentTPDOs(rates, True), basestring))
+        self.assertEqual(self.GetTPDOs(), tpdos)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+import unittest, os, shutil, tempfile
+
+import profiles
+from nodemanager import NodeManager
+
+ProfilePath = os.path.join(profiles.ProfileFolder, "DS-401.prf")
+
+class ProfileCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.Directory = tempfile.mkdtemp()
+        self.CacheHome = os.environ.get("XDG_CACHE_HOME", None)
+        os.environ["XDG_CACHE_HOME"] = self.Directory
+        profiles.ClearLoadedProfiles()
+
+    def tearDown(self):
+        if self.CacheHome is None:
+            del os.environ["XDG_CACHE_HOME"]
+        else:
+            os.environ["XDG_CACHE_HOME"] = self.CacheHome
+        profiles.ClearLoadedProfiles()
+        shutil.rmtree(self.Directory)
+
+    def GetCacheFiles(self):
+        folder = profiles.GetUserCacheFolder()
+        if not os.path.isdir(folder):
+            return []
+        return os.listdir(folder)
+
+    def testCacheInUserFolder(self):
+        mapping, menuentries = profiles.LoadProfile(ProfilePath)
+        self.assertEqual(len(self.GetCacheFiles()), 1)
+        self.assertFalse(os.path.exists(os.path.splitext(ProfilePath)[0] + profiles.CacheExtension))
+        self.assertTrue(profiles.LoadProfile(ProfilePath)[0] is mapping)
+        profiles.ClearLoadedProfiles()
+        self.assertEqual(profiles.LoadProfile(ProfilePath), (mapping, menuentries))
+
+    def testInvalidCacheFile(self):
+        mapping = profiles.LoadProfile(ProfilePath)[0]
+        cachepath = os.path.join(profiles.GetUserCacheFolder(), self.GetCacheFiles()[0])
+        file = open(cachepath, "wb")
+        file.write(profiles.CacheMagic + "garbage")
+        file.close()
+        profiles.ClearLoadedProfiles()
+        self.assertEqual(profiles.LoadProfile(ProfilePath)[0], mapping)
+
+    def testCacheFolderNotWritable(self):
+        # Cache folder can't be created under a file
+        path = os.path.join(self.Directory, "file")
+        open(path, "w").close()
+        os.environ["XDG_CACHE_HOME"] = path
+        mapping = profiles.LoadProfile(ProfilePath)[0]
+        self.assertEqual(self.GetCacheFiles(), [])
+        profiles.ClearLoadedProfiles()
+        self.assertEqual(profiles.LoadProfile(ProfilePath)[0], mapping)
+
+    def testSaveProfileOutsideProfileFolder(self):
+        profilepath = os.path.join(self.Directory, "Custom.prf")
+        shutil.copy(ProfilePath, profilepath)
+        filepath = os.path.join(self.Directory, "Slave.od")
+        manager = NodeManager()
+        manager.CreateNewNode("Slave", 0x01, "slave", "", "Custom", profilepath, "heartbeat", [])
+        mapping = manager.CurrentNode.GetProfile()
+        self.assertTrue(profiles.GetProfileReference(mapping) is None)
+        self.assertTrue(manager.SaveCurrentInFile(filepath))
+        profiles.ClearLoadedProfiles()
+        manager = NodeManager()
+        self.assertFalse(isinstance(manager.OpenFileInCurrent(filepath), (str, unicode)))
+        profile = manager.CurrentNode.GetProfile()
+        self.assertTrue(isinstance(profile, profiles.FrozenDict))
+        self.assertEqual(profile, mapping)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+
+import unittest
+
+from tests.test_sdoserver import SdoServerTestCase
+from nodemanager import NodeManager
+from virtualcan import VirtualCanBus
+from concisedcf import EncodeConciseDCF
+from sdoserver import *
+from sdoclient import SdoClient
+
+"""
+Server not supporting block transfers
+"""
+
+class NoBlockServer(SdoServer):
+
+    def BlockDownload(self, channel, transfer, command, data):
+        self.Abort(channel, 0, 0, SDO_ABORT_COMMAND)
+
+    def BlockUpload(self, channel, transfer, command, data):
+        self.Abort(channel, 0, 0, SDO_ABORT_COMMAND)
+
+class SdoClientTestCase(SdoServerTestCase):
+
+    def setUp(self):
+        SdoServerTestCase.setUp(self)
+        self.Data = "".join([chr(i % 251) for i in xrange(1000)])
+
+    def CreateClient(self, bitrate = None, server_class = SdoServer, **options):
+        bus = VirtualCanBus(bitrate)
+        bus.Attach(server_class(self.Node))
+        return bus.Attach(SdoClient(**options))
+
+    """
+    Download and upload big data, return the requests
+    """
+    def RoundTrip(self, client, block):
+        requests = [client.Download(5, 0x2001, 0, self.Data, block = block),
+                    client.Upload(5, 0x2001, 0, block = block)]
+        self.assertTrue(client.RunUntilIdle())
+        return requests
+
+class TransferTests(SdoClientTestCase):
+
+    def testExpedited(self):
+        client = self.CreateClient()
+        requests = [client.Download(5, 0x2000, 0, "\x04\x03\x02\x01"), client.Upload(5, 0x2000, 0)]
+        self.assertTrue(client.RunUntilIdle())
+        self.assertEqual([(request.Completed, request.Abort) for request in requests], [(True, None)] * 2)
+        self.assertEqual(requests[1].Data, "\x04\x03\x02\x01")
+        self.assertEqual(self.Node.GetEntry(0x2000, 0), 0x01020304)
+
+    def testRoundTrips(self):
+        for bitrate in [None, 125000]:
+            for block in [False, True]:
+                self.Node.SetEntry(0x2001, 0, "")
+                client = self.CreateClient(bitrate)
+                download, upload = self.RoundTrip(client, block)
+                self.assertEqual((download.Abort, upload.Abort), (None, None))
+                self.assertEqual(upload.Data, self.Data)
+                self.assertEqual(self.Node.GetEntry(0x2001, 0), self.Data)
+                statistics = client.GetStatistics()
+                self.assertEqual((statistics["requests"], statistics["bytes"]), (2, 2000))
+
+    def testEmptyData(self):
+        self.Node.SetEntry(0x2001, 0, "")
+        for block in [False, True]:
+            client = self.CreateClient()
+            request = client.Upload(5, 0x2001, 0, block = block)
+            self.assertTrue(client.RunUntilIdle())
+            self.assertEqual((request.Abort, request.Data), (None, ""))
+
+    def testBlockFallback(self):
+        client = self.CreateClient(server_class = NoBlockServer)
+        download, upload = self.RoundTrip(client, True)
+        self.assertEqual((download.Abort, upload.Abort), (None, None))
+        self.assertEqual(upload.Data, self.Data)
+        self.assertTrue(client.GetChannel(5).NoBlock)
+
+    def testBlockFaster(self):
+        durations = []
+        for block in [False, True]:
+            client = self.CreateClient(125000)
+            self.RoundTrip(client, block)
+            durations.append(client.GetBus().GetTime())
+        self.assertTrue(durations[1] < durations[0], durations)
+
+class AbortTests(SdoClientTestCase):
+
+    def testServerAborts(self):
+        client = self.CreateClient()
+        requests = [client.Upload(5, 0x3000, 0), client.Download(5, 0x2002, 0, "\x01\x00"),
+                    client.Download(5, 0x2000, 0, "\x01\x00"), client.Upload(5, 0x2000, 0)]
+        self.assertTrue(client.RunUntilIdle())
+        self.assertEqual([request.Abort for request in requests],
+                         [SDO_ABORT_NO_OBJECT, SDO_ABORT_READ_ONLY, SDO_ABORT_LENGTH_LOW, None])
+        self.assertEqual(requests[0].GetAbortMessage(), "Object does not exist in the object dictionary")
+        self.assertEqual(client.GetNodeStatistics(5)["aborts"], 3)
+
+    def testTimeout(self):
+        client = VirtualCanBus().Attach(SdoClient(timeout = 0.5))
+        completed = []
+        request = client.Upload(6, 0x1000, 0, callback = completed.append)
+        self.assertTrue(client.RunUntilIdle())
+        self.assertEqual((request.Abort, completed), (SDO_ABORT_TIMEOUT, [request]))
+        self.assertEqual(client.GetBus().GetTime(), 0.5)
+
+    def testNotAttached(self):
+        self.assertRaises(ValueError, SdoClient().Upload, 5, 0x1000, 0)
+
+class DCFDownloadTests(SdoClientTestCase):
+
+    def testDownloadConciseDCF(self):
+        client = self.CreateClient()
+        # Parameters following a parameter that can't be written are downloaded
+        dcf = EncodeConciseDCF([(0x1017, 0, 2, 100), (0x2000, 0, 4, 0xCAFE), (0x2001, 0, 3, "abc")])
+        requests = client.DownloadConciseDCF(5, dcf)
+        self.assertTrue(client.RunUntilIdle())
+        self.assertEqual([request.Abort for request in requests], [SDO_ABORT_NO_OBJECT, None, None])
+        self.assertEqual([self.Node.GetEntry(index, 0) for index in [0x2000, 0x2001]], [0xCAFE, "abc"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+
+import unittest, struct
+
+from nodemanager import NodeManager
+from node import var
+from virtualcan import VirtualCanBus, CallbackEndpoint
+from sdoserver import *
+
+class SdoServerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.Manager = NodeManager()
+        self.Manager.CreateNewNode("Test", 0x05, "slave", "", "None", "", "heartbeat", [])
+        self.Node = self.Manager.CurrentNode
+        for index, name, typeindex, access in [(0x2000, "Value", 0x07, "rw"), (0x2001, "Data", 0x0F, "rw"),
+                                               (0x2002, "Constant", 0x06, "ro")]:
+            self.Manager.AddMapVariableToCurrent(index, name, var, 0)
+            self.Node.SetMappingEntry(index, 0, values = {"type" : typeindex, "access" : access})
+        self.Node.SetEntry(0x2000, 0, 0x12345678)
+        self.Node.SetEntry(0x2001, 0, "0123456789")
+        self.Node.SetEntry(0x2002, 0, 0x1234)
+        self.Bus = VirtualCanBus()
+        self.Server = self.Bus.Attach(SdoServer(self.Node, timeout = 1.))
+        self.Responses = []
+        self.Client = self.Bus.Attach(CallbackEndpoint(self.Responses.append, "client", cobids = [0x585]))
+
+    """
+    Send requests to server and return the data of its responses, before
+    server transfers time out
+    """
+    def Request(self, *requests):
+        self.Responses[:] = []
+        for data in requests:
+            self.Client.Send(0x605, data.ljust(8, "\x00"))
+        self.Bus.RunFor(0.1)
+        return [frame.Data for frame in self.Responses]
+
+    def Abort(self, index, subindex, code):
+        return BuildAbortData(index, subindex, code)
+
+class ProtocolTests(unittest.TestCase):
+
+    def testCRC(self):
+        self.assertEqual(ComputeCRC("123456789"), 0x31C3)
+        self.assertEqual(ComputeCRC(""), 0)
+        self.assertEqual(ComputeCRC("56789", ComputeCRC("1234")), 0x31C3)
+
+    def testBuildSDOData(self):
+        self.assertEqual(BuildSDOData(0x40, GetMultiplexer(0x1018, 1)), "\x40\x18\x10\x01\x00\x00\x00\x00")
+        self.assertEqual(BuildAbortData(0x1018, 1, SDO_ABORT_NO_SUBINDEX), "\x80\x18\x10\x01\x11\x00\x09\x06")
+
+class ExpeditedTests(SdoServerTestCase):
+
+    def testUpload(self):
+        self.assertEqual(self.Request("\x40\x00\x20\x00"), ["\x43\x00\x20\x00\x78\x56\x34\x12"])
+        self.assertEqual(self.Request("\x40\x02\x20\x00"), ["\x4b\x02\x20\x00\x34\x12\x00\x00"])
+
+    def testDownload(self):
+        self.assertEqual(self.Request("\x23\x00\x20\x00\x04\x03\x02\x01"), ["\x60\x00\x20\x00\x00\x00\x00\x00"])
+        self.assertEqual(self.Node.GetEntry(0x2000, 0), 0x01020304)
+        # Size not indicated, size of the type is used
+        self.assertEqual(self.Request("\x22\x00\x20\x00\x01\x00\x00\x00"), ["\x60\x00\x20\x00\x00\x00\x00\x00"])
+        self.assertEqual(self.Node.GetEntry(0x2000, 0), 1)
+        self.assertEqual(self.Server.GetStatistics()["downloads"], 2)
+
+    def testAborts(self):
+        self.assertEqual(self.Request("\x40\x00\x30\x00"), [self.Abort(0x3000, 0, SDO_ABORT_NO_OBJECT)])
+        self.assertEqual(self.Request("\x40\x00\x20\x01"), [self.Abort(0x2000, 1, SDO_ABORT_NO_SUBINDEX)])
+        self.assertEqual(self.Request("\x2b\x02\x20\x00\x01\x00"), [self.Abort(0x2002, 0, SDO_ABORT_READ_ONLY)])
+        self.assertEqual(self.Request("\x2b\x00\x20\x00\x01\x00"), [self.Abort(0x2000, 0, SDO_ABORT_LENGTH_LOW)])
+        self.assertEqual(self.Request("\xe0\x00\x20\x00"), [self.Abort(0x2000, 0, SDO_ABORT_COMMAND)])
+        self.assertEqual(self.Node.GetEntry(0x2000, 0), 0x12345678)
+        self.assertEqual(self.Server.GetStatistics()["aborts"], 5)
+
+class SegmentedTests(SdoServerTestCase):
+
+    def testUpload(self):
+        self.assertEqual(self.Request("\x40\x01\x20\x00", "\x60", "\x70"),
+                         ["\x41\x01\x20\x00\x0a\x00\x00\x00", "\x000123456", "\x19789\x00\x00\x00\x00"])
+
+    def testDownload(self):
+        self.assertEqual(self.Request("\x21\x01\x20\x00\x09\x00\x00\x00", "\x00abcdefg", "\x1bhi"),
+                         ["\x60\x01\x20\x00\x00\x00\x00\x00", "\x20\x00\x00\x00\x00\x00\x00\x00",
+                          "\x30\x00\x00\x00\x00\x00\x00\x00"])
+        self.assertEqual(self.Node.GetEntry(0x2001, 0), "abcdefghi")
+
+    def testSizeMismatch(self):
+        self.assertEqual(self.Request("\x21\x01\x20\x00\x09\x00\x00\x00", "\x09abc")[-1],
+                         self.Abort(0x2001, 0, SDO_ABORT_LENGTH))
+        self.assertEqual(self.Node.GetEntry(0x2001, 0), "0123456789")
+
+    def testToggleError(self):
+        self.assertEqual(self.Request("\x40\x01\x20\x00", "\x70")[-1], self.Abort(0x2001, 0, SDO_ABORT_TOGGLE))
+        # Transfer is ended by abort
+        self.assertEqual(self.Request("\x60"), [self.Abort(0, 0, SDO_ABORT_COMMAND)])
+
+    def testTimeout(self):
+        self.Request("\x40\x01\x20\x00")
+        self.assertEqual(self.Request("\x60"), ["\x000123456"])
+        # Timer is restarted by each segment
+        self.Bus.Run()
+        self.assertEqual([frame.Data for frame in self.Responses],
+                         ["\x000123456", self.Abort(0x2001, 0, SDO_ABORT_TIMEOUT)])
+        self.assertAlmostEqual(self.Responses[-1].Timestamp, 1.1)
+
+class BlockTests(SdoServerTestCase):
+
+    def BlockDownload(self, data, crc):
+        requests = ["\xc6\x01\x20\x00" + struct.pack("<I", len(data))]
+        segments = [data[offset:offset + 7] for offset in xrange(0, len(data), 7)]
+        for sequence, segment in enumerate(segments):
+            requests.append(chr((sequence + 1) | [0, 0x80][sequence == len(segments) - 1]) + segment)
+        unused = (7 - len(data) % 7) % 7
+        requests.append(chr(0xc1 | (unused << 2)) + struct.pack("<H", crc))
+        return self.Request(*requests)
+
+    def testDownload(self):
+        data = "abcdefghijklmnopq"
+        self.assertEqual(self.BlockDownload(data, ComputeCRC(data)),
+                         ["\xa4\x01\x20\x00\x7f\x00\x00\x00", "\xa2\x03\x7f\x00\x00\x00\x00\x00",
+                          "\xa1\x00\x00\x00\x00\x00\x00\x00"])
+        self.assertEqual(self.Node.GetEntry(0x2001, 0), data)
+
+    def testCRCError(self):
+        data = "abcdefghijklmnopq"
+        self.assertEqual(self.BlockDownload(data, ComputeCRC(data) ^ 1)[-1], self.Abort(0x2001, 0, SDO_ABORT_CRC))
+        self.assertEqual(self.Node.GetEntry(0x2001, 0), "0123456789")
+
+    def testUpload(self):
+        responses = self.Request("\xa4\x01\x20\x00\x7f", "\xa3")
+        self.assertEqual(responses, ["\xc6\x01\x20\x00\x0a\x00\x00\x00", "\x010123456", "\x82789\x00\x00\x00\x00"])
+        responses = self.Request("\xa2\x02\x7f")
+        self.assertEqual(responses, ["\xd1" + struct.pack("<H", ComputeCRC("0123456789")) + "\x00" * 5])
+        self.assertEqual(self.Request("\xa1"), [])
+
+    def testInvalidBlockSize(self):
+        self.assertEqual(self.Request("\xa4\x01\x20\x00\x80"), [self.Abort(0x2001, 0, SDO_ABORT_BLOCK_SIZE)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+
+import unittest
+
+from tests.test_nodelist import NodeListTestCase, SlaveEDSName
+from syncschedule import *
+
+def PDO(nodeid, index, divider, phase = None, bits = 100, configurable = True, transmission = None):
+    if phase is None:
+        phase = divider - 1
+    return {"nodeid" : nodeid, "index" : index, "bits" : bits, "divider" : divider, "phase" : phase,
+            "configurable" : configurable, "transmission" : transmission}
+
+class PhasesTests(unittest.TestCase):
+
+    def testHyperPeriod(self):
+        self.assertEqual(GetHyperPeriod([]), 1)
+        self.assertEqual(GetHyperPeriod([PDO(1, 0x1800, 4), PDO(1, 0x1801, 6), PDO(2, 0x1800, 1)]), 12)
+
+    def testSlotLoads(self):
+        pdos = [PDO(1, 0x1800, 2), PDO(2, 0x1800, 4, bits = 50)]
+        self.assertEqual(GetSlotLoads(pdos, 4), ([0, 100, 0, 150], [0, 1, 0, 2]))
+        self.assertEqual(GetSlotLoads(pdos, 4, {(2, 0x1800) : 0}), ([50, 100, 0, 100], [1, 1, 0, 1]))
+
+    def testOptimizePhases(self):
+        # Without SYNC start value, all the PDOs are sent after the same SYNC
+        pdos = [PDO(nodeid, 0x1800, 4) for nodeid in xrange(1, 9)]
+        self.assertEqual(max(GetSlotLoads(pdos, 4)[0]), 800)
+        phases = OptimizePhases(pdos, 4)
+        self.assertEqual(GetSlotLoads(pdos, 4, phases), ([200] * 4, [2] * 4))
+
+    def testFixedPhases(self):
+        pdos = [PDO(1, 0x1800, 2, 0, bits = 300, configurable = False), PDO(2, 0x1800, 2), PDO(3, 0x1800, 2)]
+        phases = OptimizePhases(pdos, 2)
+        self.assertFalse((1, 0x1800) in phases)
+        self.assertEqual(phases, {(2, 0x1800) : 1, (3, 0x1800) : 1})
+        self.assertEqual(GetSlotLoads(pdos, 2, phases)[0], [300, 200])
+
+    def testDeterministic(self):
+        pdos = [PDO(nodeid, 0x1800 + number, [1, 2, 3, 4, 6][(nodeid + number) % 5], bits = 50 + 10 * number)
+                for nodeid in xrange(1, 20) for number in xrange(4)]
+        hyperperiod = GetHyperPeriod(pdos)
+        phases = OptimizePhases(pdos, hyperperiod)
+        self.assertEqual(OptimizePhases(list(reversed(pdos)), hyperperiod), phases)
+        self.assertTrue(max(GetSlotLoads(pdos, hyperperiod, phases)[0]) < max(GetSlotLoads(pdos, hyperperiod)[0]))
+
+class SyncScheduleTests(unittest.TestCase):
+
+    def testChanges(self):
+        pdos = [PDO(2, 0x1800, 2), PDO(3, 0x1800, 2), PDO(4, 0x1800, 2, configurable = False),
+                PDO(5, 0x1800, 4, transmission = 4)]
+        schedule = SyncSchedule(pdos, (1, 0.01, 0.005, 4), 125000)
+        self.assertEqual(schedule.HyperPeriod, 4)
+        self.assertEqual(schedule.GetWindowCapacity(), 625)
+        changes = schedule.GetChanges()
+        self.assertTrue((1, 0x1019, 0, 1, 4) in changes)
+        self.assertTrue((5, 0x1800, 2, 1, 4) in changes)
+        self.assertFalse(4 in [change[0] for change in changes])
+        self.assertEqual(max(schedule.After[0]), 200)
+        self.assertEqual(schedule.Messages, [])
+
+    def testEnableCounter(self):
+        # Without SYNC counter, start values of all the PDOs are written
+        pdos = [PDO(2, 0x1800, 2, 0), PDO(3, 0x1800, 2, 0), PDO(4, 0x1800, 2, 0, configurable = False)]
+        changes = SyncSchedule(pdos, (1, 0.01, 0, 0)).GetChanges()
+        self.assertEqual([change[:4] for change in changes], [(1, 0x1019, 0, 1), (2, 0x1800, 6, 1), (3, 0x1800, 6, 1)])
+        self.assertEqual(sorted([change[4] for change in changes[1:]]), [1, 2])
+
+    def testNoProducer(self):
+        pdos = [PDO(2, 0x1800, 2), PDO(3, 0x1800, 2)]
+        schedule = SyncSchedule(pdos)
+        self.assertEqual((schedule.Phases, schedule.GetChanges()), ({}, []))
+        self.assertEqual(len(schedule.Messages), 1)
+
+    def testHyperPeriodTooLong(self):
+        pdos = [PDO(2, 0x1800, 239), PDO(3, 0x1800, 240)]
+        schedule = SyncSchedule(pdos, (1, 0.01, 0, 0))
+        self.assertEqual((schedule.HyperPeriod, schedule.Phases), (MAX_SYNC_COUNTER, {}))
+        self.assertEqual(len(schedule.Messages), 1)
+
+    def testWindowOverflow(self):
+        pdos = [PDO(2, 0x1800, 1, bits = 400), PDO(3, 0x1800, 1, bits = 400)]
+        schedule = SyncSchedule(pdos, (1, 0.01, 0.005, 4), 125000)
+        self.assertEqual(len(schedule.Messages), 1)
+        self.assertTrue(schedule.Messages[0] in schedule.GetHistogramReport())
+
+class NetworkSyncScheduleTests(NodeListTestCase):
+
+    def setUp(self):
+        NodeListTestCase.setUp(self)
+        manager = self.NodeList.GetManager()
+        manager.CreateNewNode("Master", 0x01, "master", "", "None", "", "heartbeat", ["DS302"])
+        manager.ManageEntriesOfCurrent([0x1005, 0x1006], [])
+        master = manager.CurrentNode
+        master.SetEntry(0x1005, 0, 0x40000080)
+        master.SetEntry(0x1006, 0, 10000)
+        for nodeid in [2, 3]:
+            self.NodeList.AddSlaveNode("Slave%d"%nodeid, nodeid, SlaveEDSName)
+            for index in [0x1800, 0x1801]:
+                self.NodeList.SetSlaveNodeEntry(nodeid, index, 2, 0xFF)
+                self.NodeList.SetSlaveNodeEntry(nodeid, index, 5, 20)
+
+    def testSyncProducer(self):
+        self.assertEqual(GetSyncProducer(self.NodeList.GetNetworkIndexes()), (1, 0.01, 0., 0))
+
+    def testConvertEventPDOs(self):
+        # Third TPDO of DS401 slaves is acyclic synchronous
+        schedule = GetNetworkSyncSchedule(self.NodeList)
+        self.assertEqual(sorted([(pdo["nodeid"], pdo["index"], pdo["divider"]) for pdo in schedule.PDOs]),
+                         [(2, 0x1802, 1), (3, 0x1802, 1)])
+        schedule = GetNetworkSyncSchedule(self.NodeList, 125000, convert = True)
+        self.assertEqual(sorted([(pdo["nodeid"], pdo["index"], pdo["divider"]) for pdo in schedule.PDOs]),
+                         [(2, 0x1800, 2), (2, 0x1801, 2), (2, 0x1802, 1),
+                          (3, 0x1800, 2), (3, 0x1801, 2), (3, 0x1802, 1)])
+        # DS401 TPDOs have no SYNC start value, their phase can't be chosen
+        self.assertEqual(schedule.After, schedule.Before)
+        self.assertEqual(schedule.GetChanges(), [(1, 0x1019, 0, 1, 2),
+                                                 (2, 0x1800, 2, 1, 2), (2, 0x1801, 2, 1, 2),
+                                                 (3, 0x1800, 2, 1, 2), (3, 0x1801, 2, 1, 2)])
+
+    def testSyncCounterDisabled(self):
+        # Master TPDO sent every 4 SYNC from the third one
+        manager = self.NodeList.GetManager()
+        master = manager.CurrentNode
+        manager.ManageEntriesOfCurrent([0x1019, 0x1800, 0x1A00], [])
+        master.SetEntry(0x1800, 2, 4)
+        master.SetEntry(0x1800, 6, 3)
+        master.SetEntry(0x1A00, None, [0x10050020])
+        for counter, phase in [(0, 0), (1, 0), (8, 2)]:
+            master.SetEntry(0x1019, 0, counter)
+            pdos = [pdo for pdo in GetNetworkSyncSchedule(self.NodeList).PDOs if pdo["nodeid"] == 1]
+            self.assertEqual([(pdo["index"], pdo["phase"], pdo["configurable"]) for pdo in pdos], [(0x1800, phase, True)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+
+import unittest
+from types import *
+
+from nodemanager import NodeManager
+from odtypes import GetNodeTypeCoding
+import gen_cfile
+import synthod
+
+class SyntheticNodeTests(unittest.TestCase):
+
+    def Generate(self, seed, **options):
+        manager = NodeManager()
+        node = synthod.GenerateSyntheticNode(manager, seed = seed, objects = 100, user_types = 8, pdos = 16,
+                                             dcf_records = 4, **options)
+        return manager, node
+
+    def testReproducible(self):
+        contents = [gen_cfile.GenerateFileContent(self.Generate(seed)[1], "Synthetic.h")[0] for seed in [1, 1, 2]]
+        self.assertEqual(contents[0], contents[1])
+        self.assertNotEqual(contents[0], contents[2])
+
+    def testShape(self):
+        manager, node = self.Generate(3)
+        manufacturer = [index for index in node.GetIndexes() if synthod.MANUFACTURER_MIN <= index <= synthod.MANUFACTURER_MAX]
+        self.assertEqual(len(manufacturer), 100)
+        self.assertEqual(len([index for index in node.GetIndexes() if 0xA0 <= index <= 0xFF]), 8)
+        self.assertEqual(len([index for index in node.GetIndexes() if 0x1A00 <= index <= 0x1BFF]), 16)
+        self.assertTrue(node.IsEntry(0x1F22))
+        manager, node = self.Generate(3, contiguous = True)
+        manufacturer = [index for index in node.GetIndexes() if synthod.MANUFACTURER_MIN <= index <= synthod.MANUFACTURER_MAX]
+        self.assertEqual(manufacturer, range(synthod.MANUFACTURER_MIN, synthod.MANUFACTURER_MIN + 100))
+
+    def testValuesInRange(self):
+        manager, node = self.Generate(4)
+        for index in node.GetIndexes():
+            if not synthod.MANUFACTURER_MIN <= index <= synthod.MANUFACTURER_MAX:
+                continue
+            values = node.GetEntry(index)
+            if not isinstance(values, ListType):
+                values = [values]
+            for subindex, value in enumerate(values):
+                coding = GetNodeTypeCoding(node, node.GetSubentryInfos(index, subindex)["type"])
+                if coding.Kind in ["unsigned", "integer", "real"]:
+                    self.assertEqual(coding.CheckValue(value), None, "0x%4.4X sub 0x%2.2X"%(index, subindex))
+                elif coding.Kind in ["string", "domain"] and coding.Size is not None:
+                    self.assertTrue(len(value) <= coding.Size)
+
+if __name__ == '__main__':
+    unittest.main()
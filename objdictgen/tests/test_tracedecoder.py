@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+import unittest, os, shutil, tempfile
+
+from tests.test_nodelist import NodeListTestCase, SlaveEDSName
+from tracedecoder import *
+from virtualcan import CanFrame
+
+class CandumpTests(unittest.TestCase):
+
+    def testLogLines(self):
+        frame = ParseCandumpLine("(1436509052.249713) can0 123#DEADBEEF")
+        self.assertEqual((frame.CobID, frame.Data, frame.Extended, frame.RTR), (0x123, "\xde\xad\xbe\xef", False, False))
+        self.assertEqual(frame.Timestamp, 1436509052.249713)
+        frame = ParseCandumpLine("(1.5) can0 00000181#R")
+        self.assertEqual((frame.CobID, frame.Data, frame.Extended, frame.RTR), (0x181, "", True, True))
+
+    def testPrintedLines(self):
+        frame = ParseCandumpLine("(1436509052.249713)  can0  123   [4]  DE AD BE EF")
+        self.assertEqual((frame.CobID, frame.Data, frame.Timestamp), (0x123, "\xde\xad\xbe\xef", 1436509052.249713))
+        frame = ParseCandumpLine("  can0  701   [1]  05")
+        self.assertEqual((frame.CobID, frame.Data, frame.Timestamp), (0x701, "\x05", None))
+        frame = ParseCandumpLine("  can0  181   [2]  remote request")
+        self.assertEqual((frame.CobID, frame.Data, frame.RTR), (0x181, "", True))
+
+    def testInvalidLines(self):
+        for line in ["", "garbage", "(1.0) can0 123#DEADBEE", "(1.0) can0 123#0102030405060708090A",
+                     "  can0  123   [4]  DE AD", "(1.0) can0 800#00"]:
+            self.assertEqual(ParseCandumpLine(line), None, line)
+
+class TraceFileTests(unittest.TestCase):
+
+    def setUp(self):
+        self.Directory = tempfile.mkdtemp()
+        self.Frames = [CanFrame(0x181 + number % 100, chr(number % 256) * (number % 9)) for number in xrange(500)]
+        self.Frames.append(CanFrame(0x1234567, "\x01\x02", extended = True))
+        self.Frames.append(CanFrame(0x701, rtr = True))
+        for number, frame in enumerate(self.Frames):
+            frame.Timestamp = number * 0.001
+
+    def tearDown(self):
+        shutil.rmtree(self.Directory)
+
+    def assertSameFrames(self, frames):
+        self.assertEqual([(frame.CobID, frame.Data, frame.Extended, frame.RTR) for frame in frames],
+                         [(frame.CobID, frame.Data, frame.Extended, frame.RTR) for frame in self.Frames])
+        for frame, expected in zip(frames, self.Frames):
+            self.assertAlmostEqual(frame.Timestamp, expected.Timestamp)
+
+    def testCandumpTrace(self):
+        filepath = os.path.join(self.Directory, "trace.log")
+        file = open(filepath, "w")
+        for frame in self.Frames:
+            if frame.RTR:
+                data = "R"
+            else:
+                data = frame.Data.encode("hex").upper()
+            file.write("(%.6f) can0 %s#%s\n"%(frame.Timestamp, ["%3.3X", "%8.8X"][frame.Extended]%frame.CobID, data))
+        file.write("invalid line")
+        file.close()
+        for mapped in [False, True]:
+            for chunk_size in [7, 1000, CHUNK_SIZE]:
+                self.assertSameFrames(list(ReadTraceFile(filepath, "candump", mapped, chunk_size)))
+
+    def testBinaryTrace(self):
+        filepath = os.path.join(self.Directory, "trace.bin")
+        file = open(filepath, "wb")
+        WriteBinaryTrace(file, self.Frames)
+        file.close()
+        self.assertEqual(os.path.getsize(filepath), len(self.Frames) * BINARY_RECORD_SIZE)
+        for mapped in [False, True]:
+            for chunk_size in [10, 50, 1000, CHUNK_SIZE]:
+                self.assertSameFrames(list(ReadTraceFile(filepath, "binary", mapped, chunk_size)))
+        self.assertRaises(ValueError, list, ReadTraceFile(filepath, "pcap"))
+
+class TraceDecoderTests(NodeListTestCase):
+
+    def setUp(self):
+        NodeListTestCase.setUp(self)
+        self.NodeList.AddSlaveNode("Slave", 2, SlaveEDSName)
+        self.Decoder = TraceDecoder(self.NodeList)
+
+    def Decode(self, cobid, data = "", rtr = False):
+        return FormatDecodedFrame(self.Decoder.DecodeFrame(CanFrame(cobid, data, rtr = rtr)))
+
+    def testServices(self):
+        self.assertEqual(self.Decode(0x82, "\x10\x81\x01"), "082 EMCY          0x02 Error 0x8110 register 0x01")
+        self.assertEqual(self.Decode(0x82, "\x00\x00\x00"), "082 EMCY          0x02 Error reset")
+        self.assertEqual(self.Decode(0x702, "\x05"), "702 Heartbeat     0x02 Operational")
+        self.assertEqual(self.Decode(0x702, "\x00"), "702 Boot-up       0x02 Boot-up")
+        self.assertEqual(self.Decode(0, "\x81\x00"), "000 NMT           Reset node all nodes")
+        self.assertEqual(self.Decode(0x703, "\x7f"), "703 Heartbeat     0x03 Pre-operational")
+
+    def testSDO(self):
+        self.assertEqual(self.Decode(0x602, "\x40\x00\x10\x00\x00\x00\x00\x00"),
+                         "602 SDO server RX 0x02 Initiate upload 0x1000 sub 0x00")
+        self.assertEqual(self.Decode(0x582, "\x80\x00\x10\x00\x00\x00\x02\x06"),
+                         "582 SDO server TX 0x02 Abort 0x1000 sub 0x00: Object does not exist in the object dictionary")
+        self.assertEqual(self.Decode(0x582, "\x00abcdefg"), "582 SDO server TX 0x02 Upload segment")
+
+    def testPDO(self):
+        result = self.Decoder.DecodeFrame(CanFrame(0x282, "\x01\x00\xff\xff\x03\x00\x04\x80"))
+        self.assertEqual([(name, value) for name, index, subindex, value in result["signals"]],
+                         [("Analogue Input 1", 1), ("Analogue Input 2", -1), ("Analogue Input 3", 3),
+                          ("Analogue Input 4", -0x7FFC)])
+        self.assertEqual(self.Decode(0x182, "\x05"), "182 TPDO          0x02 Read Inputs 0x1 to 0x8=5")
+        self.assertEqual(self.Decode(0x202, "\x01"), "202 RPDO          0x02 Write Outputs 0x1 to 0x8=1")
+        self.assertEqual(self.Decode(0x182, rtr = True), "182 TPDO          0x02 Remote request")
+        self.assertEqual(self.Decode(0x282, "\x01"), "282 TPDO          0x02 PDO is 1 bytes long, 8 expected")
+
+    def testDecodePDOs(self):
+        frames = [CanFrame(0x182, chr(number)) for number in xrange(10)] + [CanFrame(0x702, "\x05")]
+        for number, frame in enumerate(frames):
+            frame.Timestamp = float(number)
+        others = []
+        batches = list(self.Decoder.DecodePDOs(frames, 4, others.append))
+        self.assertEqual([len(batch["timestamps"]) for batch in batches], [4, 4, 2])
+        self.assertEqual(sum([list(batch["signals"]["Read Inputs 0x1 to 0x8"]) for batch in batches], []), range(10))
+        self.assertEqual(batches[2]["timestamps"], [8., 9.])
+        self.assertEqual(others, frames[-1:])
+
+class SyncNotConfiguredTests(NodeListTestCase):
+
+    def testSyncNotConfigured(self):
+        self.NodeList.AddSlaveNode("Slave", 2, SlaveEDSName)
+        self.NodeList.SetSlaveNodeEntry(2, 0x1005, 0, 0)
+        decoder = TraceDecoder(self.NodeList)
+        result = decoder.DecodeFrame(CanFrame(0, "\x01\x02"))
+        self.assertEqual((result["service"], result["nodeid"], result["info"]), ("NMT", 2, "Start"))
+        result = decoder.DecodeFrame(CanFrame(0x80, "\x01"))
+        self.assertEqual((result["service"], result["info"]), ("SYNC", "Counter 1"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+
+import unittest
+
+from virtualcan import *
+
+class FrameTests(unittest.TestCase):
+
+    def testFrame(self):
+        frame = CanFrame(0x181, [1, 2, 3])
+        self.assertEqual((frame.Data, frame.GetDLC(), frame.GetBytes()), ("\x01\x02\x03", 3, [1, 2, 3]))
+        self.assertEqual(repr(frame), "181 [3] 01 02 03")
+        CanFrame(0x1FFFFFFF, extended = True)
+
+    def testInvalidFrames(self):
+        self.assertRaises(ValueError, CanFrame, 0x800)
+        self.assertRaises(ValueError, CanFrame, 0x20000000, extended = True)
+        self.assertRaises(ValueError, CanFrame, 0x100, "\x00" * 9)
+
+    def testPriority(self):
+        frames = [CanFrame(0x101), CanFrame(0x100 << 18, extended = True), CanFrame(0x100, rtr = True), CanFrame(0x100)]
+        frames.sort(key = CanFrame.GetPriority)
+        self.assertEqual([(frame.CobID, frame.Extended, frame.RTR) for frame in frames],
+                         [(0x100, False, False), (0x100, False, True), (0x100 << 18, True, False), (0x101, False, False)])
+
+class VirtualCanBusTests(unittest.TestCase):
+
+    def setUp(self):
+        self.Bus = VirtualCanBus(125000)
+        self.Recorder = self.Bus.Attach(RecorderEndpoint())
+        self.Endpoints = [self.Bus.Attach(CanEndpoint("endpoint %d"%number, 2)) for number in xrange(3)]
+
+    def testArbitration(self):
+        for endpoint, cobid in zip(self.Endpoints, [0x300, 0x100, 0x200]):
+            endpoint.Send(cobid, "\x00" * 8)
+        self.Bus.Run()
+        frames = self.Recorder.GetFrames()
+        self.assertEqual([frame.CobID for frame in frames], [0x100, 0x200, 0x300])
+        self.assertEqual([frame.Sender for frame in frames], [self.Endpoints[1], self.Endpoints[2], self.Endpoints[0]])
+        duration = 135 / 125000.
+        for number, frame in enumerate(frames):
+            self.assertAlmostEqual(frame.Timestamp, (number + 1) * duration)
+        statistics = self.Bus.GetStatistics()
+        self.assertEqual((statistics["frames"], statistics["bits"]), (3, 405))
+        self.assertAlmostEqual(statistics["load"], 1.)
+
+    def testTransmitQueue(self):
+        ready = []
+        endpoint = self.Endpoints[0]
+        endpoint.OnQueueReady = lambda: ready.append(self.Bus.GetTime())
+        self.assertEqual([endpoint.Send(0x100 + number) for number in xrange(3)], [True, True, False])
+        self.assertEqual(endpoint.Rejected, 1)
+        self.Bus.Run()
+        self.assertEqual(ready, [0.])
+        self.assertEqual([frame.CobID for frame in self.Recorder.GetFrames()], [0x100, 0x101])
+        self.assertEqual(self.Bus.GetStatistics()["rejected"], 1)
+
+    def testSubscriptions(self):
+        received = []
+        self.Bus.Attach(CallbackEndpoint(received.append, cobids = [0x200]))
+        sender = self.Endpoints[0]
+        sender.Send(0x100)
+        sender.Send(0x200)
+        self.Bus.Run()
+        self.assertEqual([frame.CobID for frame in received], [0x200])
+        self.assertRaises(ValueError, self.Bus.Attach, sender)
+        self.Bus.Detach(sender)
+        self.assertRaises(ValueError, sender.Send, 0x100)
+
+    def testEvents(self):
+        calls = []
+        self.Bus.Schedule(0.2, calls.append, 2)
+        event = self.Bus.Schedule(0.1, calls.append, 1)
+        self.Bus.Schedule(0.3, calls.append, 3)
+        self.Bus.Cancel(event)
+        self.assertEqual(self.Bus.Run(0.25), 1)
+        self.assertEqual((calls, self.Bus.GetTime()), ([2], 0.25))
+        self.Bus.RunFor(1)
+        self.assertEqual((calls, self.Bus.GetTime()), ([2, 3], 1.25))
+
+    def testInstantBus(self):
+        bus = VirtualCanBus()
+        recorder = bus.Attach(RecorderEndpoint())
+        bus.Attach(CanEndpoint()).Send(0x100, "\x01")
+        bus.Run()
+        self.assertEqual([(frame.CobID, frame.Timestamp) for frame in recorder.GetFrames()], [(0x100, 0.)])
+
+if __name__ == '__main__':
+    unittest.main()
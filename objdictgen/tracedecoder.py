@@ -0,0 +1,482 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+from types import *
+import re, struct, os, sys
+
+from virtualcan import CanFrame
+from networkcheck import BuildCobIDTable, PRODUCER
+from sdoserver import AbortMessages
+import pdocodec
+
+#-------------------------------------------------------------------------------
+#                              Trace Reading
+#-------------------------------------------------------------------------------
+
+# Size of the blocks read from a trace file
+CHUNK_SIZE = 1 << 20
+
+# Line of a candump log file: "(1436509052.249713) can0 123#DEADBEEF"
+candump_log_model = re.compile("\s*\(([^)]*)\)\s+\S+\s+([0-9A-Fa-f]+)#(R[0-9A-Fa-f]?|[0-9A-Fa-f]*)\s*$")
+# Line printed by candump: "(1436509052.249713)  can0  123   [4]  DE AD BE EF",
+# timestamp being optional
+candump_model = re.compile("\s*(?:\(([^)]*)\)\s+)?\S+\s+([0-9A-Fa-f]+)\s+\[(\d)\]\s*(remote request|(?:[0-9A-Fa-f]{2}\s*)*)\s*$")
+
+# Identifiers of extended frames are written with 8 digits by candump
+EXTENDED_ID_DIGITS = 8
+
+"""
+Return the timestamp of a candump line as a float, None if it isn't a number
+"""
+def ParseTimestamp(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+"""
+Return the CanFrame described by a candump line, None if line doesn't describe
+a CAN frame
+"""
+def ParseCandumpLine(line):
+    result = candump_log_model.match(line)
+    if result is not None:
+        timestamp, identifier, data = result.groups()
+        rtr = data.startswith("R")
+        if rtr:
+            data = ""
+        else:
+            try:
+                data = data.decode("hex")
+            except TypeError:
+                return None
+    else:
+        result = candump_model.match(line)
+        if result is None:
+            return None
+        timestamp, identifier, length, data = result.groups()
+        rtr = data == "remote request"
+        if rtr:
+            data = ""
+        else:
+            data = "".join(data.split()).decode("hex")
+            # Line truncated
+            if len(data) != int(length):
+                return None
+    try:
+        frame = CanFrame(int(identifier, 16), data, len(identifier) >= EXTENDED_ID_DIGITS, rtr)
+    except ValueError:
+        return None
+    frame.Timestamp = ParseTimestamp(timestamp)
+    return frame
+
+"""
+Return a generator of the lines of a file read by blocks, or through a memory
+map if mapped is True. Memory used doesn't depend on file size
+"""
+def ReadLines(file, mapped = False, chunk_size = CHUNK_SIZE):
+    if mapped:
+        import mmap
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        buffer = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+        try:
+            for line in iter(buffer.readline, ""):
+                yield line
+        finally:
+            buffer.close()
+        return
+    rest = ""
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            break
+        lines = (rest + chunk).split("\n")
+        rest = lines.pop()
+        for line in lines:
+            yield line
+    if rest:
+        yield rest
+
+"""
+Return a generator of the frames of a candump trace file
+"""
+def ReadCandumpTrace(file, mapped = False, chunk_size = CHUNK_SIZE):
+    for line in ReadLines(file, mapped, chunk_size):
+        frame = ParseCandumpLine(line)
+        if frame is not None:
+            yield frame
+
+# Binary traces are a list of records made of a timestamp followed by a
+# SocketCAN can_frame structure
+BINARY_RECORD_FORMAT = "<dIB3x8s"
+BINARY_RECORD_SIZE = struct.calcsize(BINARY_RECORD_FORMAT)
+
+# Flags of SocketCAN identifiers
+CAN_EFF_FLAG = 0x80000000
+CAN_RTR_FLAG = 0x40000000
+CAN_ERR_FLAG = 0x20000000
+CAN_EFF_MASK = 0x1FFFFFFF
+CAN_SFF_MASK = 0x7FF
+
+"""
+Return a generator of the frames of a binary trace file. Error frames are
+ignored
+"""
+def ReadBinaryTrace(file, mapped = False, chunk_size = CHUNK_SIZE):
+    chunk_size = max(chunk_size - chunk_size % BINARY_RECORD_SIZE, BINARY_RECORD_SIZE)
+    if mapped:
+        import mmap
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        buffer = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+        try:
+            for frame in DecodeBinaryRecords(buffer, len(buffer) - len(buffer) % BINARY_RECORD_SIZE):
+                yield frame
+        finally:
+            buffer.close()
+        return
+    rest = ""
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            break
+        chunk = rest + chunk
+        length = len(chunk) - len(chunk) % BINARY_RECORD_SIZE
+        rest = chunk[length:]
+        for frame in DecodeBinaryRecords(chunk, length):
+            yield frame
+
+def DecodeBinaryRecords(buffer, length):
+    for offset in xrange(0, length, BINARY_RECORD_SIZE):
+        timestamp, identifier, dlc, data = struct.unpack_from(BINARY_RECORD_FORMAT, buffer, offset)
+        if identifier & CAN_ERR_FLAG:
+            continue
+        rtr = identifier & CAN_RTR_FLAG != 0
+        if identifier & CAN_EFF_FLAG:
+            frame = CanFrame(identifier & CAN_EFF_MASK, "", True, rtr)
+        else:
+            frame = CanFrame(identifier & CAN_SFF_MASK, "", False, rtr)
+        if not rtr:
+            frame.Data = data[:min(dlc, 8)]
+        frame.Timestamp = timestamp
+        yield frame
+
+"""
+Return the record of a frame in a binary trace file
+"""
+def EncodeBinaryRecord(frame):
+    identifier = frame.CobID
+    if frame.Extended:
+        identifier |= CAN_EFF_FLAG
+    if frame.RTR:
+        identifier |= CAN_RTR_FLAG
+    return struct.pack(BINARY_RECORD_FORMAT, frame.Timestamp or 0., identifier, len(frame.Data), frame.Data)
+
+"""
+Write frames in a binary trace file
+"""
+def WriteBinaryTrace(file, frames):
+    for frame in frames:
+        file.write(EncodeBinaryRecord(frame))
+
+# Readers of the trace formats
+TraceReaders = {"candump" : ReadCandumpTrace, "binary" : ReadBinaryTrace}
+
+"""
+Return a generator of the frames of a trace file, format being "candump" or
+"binary"
+"""
+def ReadTraceFile(filepath, format = "candump", mapped = False, chunk_size = CHUNK_SIZE):
+    reader = TraceReaders.get(format, None)
+    if reader is None:
+        raise ValueError, "Unknown trace format \"%s\""%format
+    file = open(filepath, "rb")
+    try:
+        for frame in reader(file, mapped, chunk_size):
+            yield frame
+    finally:
+        file.close()
+
+#-------------------------------------------------------------------------------
+#                              Frames Decoding
+#-------------------------------------------------------------------------------
+
+# Services of the predefined connection set by function code, used for the COB
+# IDs not configured in the project
+DefaultServices = {0x1 : "EMCY", 0x3 : "TPDO", 0x4 : "RPDO", 0x5 : "TPDO", 0x6 : "RPDO",
+                   0x7 : "TPDO", 0x8 : "RPDO", 0x9 : "TPDO", 0xA : "RPDO",
+                   0xB : "SDO server TX", 0xC : "SDO server RX", 0xE : "Heartbeat"}
+
+NMTCommands = {0x01 : "Start", 0x02 : "Stop", 0x80 : "Enter pre-operational",
+               0x81 : "Reset node", 0x82 : "Reset communication"}
+
+NMTStates = {0x00 : "Boot-up", 0x04 : "Stopped", 0x05 : "Operational", 0x7F : "Pre-operational"}
+
+# Names of the SDO commands by direction and command specifier
+SDOCommands = {True : {0 : "Download segment", 1 : "Initiate download", 2 : "Initiate upload",
+                       3 : "Upload segment", 4 : "Abort", 5 : "Block upload", 6 : "Block download"},
+               False : {0 : "Upload segment", 1 : "Download segment", 2 : "Initiate upload",
+                        3 : "Initiate download", 4 : "Abort", 5 : "Block download", 6 : "Block upload"}}
+
+"""
+Class decoding the frames of a network with the object dictionaries of the
+nodes of a NodeList project. Each frame is decoded into a dictionary with:
+  - "timestamp", "cobid" and "data" of the frame
+  - "service" and "nodeid" of the node that sent or, for NMT, RPDO and SDO
+    requests, receives the frame
+  - "info" a text describing the frame
+  - "signals" the list of (name, index, subindex, value) of a PDO
+"""
+
+class TraceDecoder:
+
+    def __init__(self, nodelist = None):
+        # For each COB ID, (service, nodeid)
+        self.Services = {}
+        # For each PDO COB ID, (PdoLayout, nodeid, names)
+        self.Pdos = {}
+        if nodelist is not None:
+            self.AddNodeList(nodelist)
+
+    """
+    Add the COB IDs and the PDOs configured in the nodes of a NodeList project
+    """
+    def AddNodeList(self, nodelist):
+        table = BuildCobIDTable(nodelist)
+        for role, users in [(PRODUCER, table.Producers), (None, table.Consumers)]:
+            for cobid, services in users.iteritems():
+                nodeid, index, subindex, service = services[0]
+                if service == "SYNC" and role != PRODUCER:
+                    nodeid = None
+                if role == PRODUCER or cobid not in table.Producers:
+                    self.Services.setdefault(cobid, (service, nodeid))
+        nodes = [(nodeid, nodelist.SlaveNodes[nodeid]["Node"]) for nodeid in nodelist.GetSlaveIDs()]
+        master = nodelist.GetManager().CurrentNode
+        if master is not None:
+            nodes.append((nodelist.GetMasterNodeID(), master))
+        for transmit in [True, False]:
+            for nodeid, node in nodes:
+                self.AddNodePdos(node, nodeid, transmit)
+
+    """
+    Add the PDOs of a node, transmit PDOs being preferred to receive PDOs using
+    the same COB ID
+    """
+    def AddNodePdos(self, node, nodeid, transmit = True):
+        for cobid, layout in pdocodec.CompileNodePdos(node, transmit).iteritems():
+            if cobid not in self.Pdos:
+                names = [field.Name or "0x%4.4X sub 0x%2.2X"%field.GetKey() for field in layout.Variables]
+                self.Pdos[cobid] = (layout, nodeid, names)
+
+    """
+    Return the (service, nodeid) of a COB ID
+    """
+    def GetService(self, cobid):
+        # COB ID 0 is always NMT, whatever the nodes configuration is
+        if cobid == 0:
+            return ("NMT", None)
+        service = self.Services.get(cobid, None)
+        if service is not None:
+            return service
+        if cobid == 0x80:
+            return ("SYNC", None)
+        elif cobid == 0x100:
+            return ("TIME", None)
+        elif cobid <= 0x7FF and cobid >> 7 in DefaultServices:
+            return (DefaultServices[cobid >> 7], cobid & 0x7F or None)
+        return ("Unknown", None)
+
+    def DecodeFrame(self, frame):
+        service, nodeid = self.GetService(frame.CobID)
+        result = {"timestamp" : frame.Timestamp, "cobid" : frame.CobID, "data" : frame.Data,
+                  "service" : service, "nodeid" : nodeid, "info" : "", "signals" : []}
+        data = frame.Data
+        if frame.RTR:
+            result["info"] = "Remote request"
+        elif service == "NMT" and len(data) >= 2:
+            result["nodeid"] = ord(data[1]) or None
+            result["info"] = NMTCommands.get(ord(data[0]), "Unknown command 0x%2.2X"%ord(data[0]))
+            if ord(data[1]) == 0:
+                result["info"] += " all nodes"
+        elif service == "SYNC" and len(data) > 0:
+            result["info"] = "Counter %d"%ord(data[0])
+        elif service in ["Heartbeat", "Boot-up"] and len(data) > 0:
+            state = ord(data[0]) & 0x7F
+            result["service"] = state and "Heartbeat" or "Boot-up"
+            result["info"] = NMTStates.get(state, "Unknown state 0x%2.2X"%state)
+        elif service == "EMCY" and len(data) >= 3:
+            code, register = struct.unpack_from("<HB", data)
+            if code == 0:
+                result["info"] = "Error reset"
+            else:
+                result["info"] = "Error 0x%4.4X register 0x%2.2X"%(code, register)
+        elif service.startswith("SDO") and len(data) > 0:
+            result["info"] = self.DecodeSDO(service, data)
+        elif frame.CobID in self.Pdos:
+            layout, nodeid, names = self.Pdos[frame.CobID]
+            result["nodeid"] = nodeid
+            if len(data) >= layout.Length:
+                values = layout.DecodeFrame(data)
+                result["signals"] = [(name, field.Index, field.SubIndex, value) for name, field, value in zip(names, layout.Variables, values)]
+            else:
+                result["info"] = "PDO is %d bytes long, %d expected"%(len(data), layout.Length)
+        return result
+
+    def DecodeSDO(self, service, data):
+        request = service in ["SDO server RX", "SDO client TX"]
+        command = ord(data[0]) >> 5
+        # Segments of block transfers have no command specifier
+        name = SDOCommands[request].get(command, "Command 0x%2.2X"%ord(data[0]))
+        if len(data) < 4 or name.endswith("segment") or name.startswith("Block") and command != 4:
+            return name
+        index, subindex = struct.unpack_from("<HB", data, 1)
+        info = "%s 0x%4.4X sub 0x%2.2X"%(name, index, subindex)
+        if command == 4 and len(data) >= 8:
+            code = struct.unpack_from("<I", data, 4)[0]
+            info += ": %s"%AbortMessages.get(code, "0x%8.8X"%code)
+        return info
+
+    """
+    Return a generator of the decoded frames
+    """
+    def Decode(self, frames):
+        for frame in frames:
+            yield self.DecodeFrame(frame)
+
+#-------------------------------------------------------------------------------
+#                              PDO Batch Decoding
+#-------------------------------------------------------------------------------
+
+    """
+    Return a generator of the PDOs of frames decoded by batches. Frames of each
+    PDO are decoded together when batch_size of them are collected, so PDOs are
+    given grouped by COB ID and not in trace order. Each batch is a dictionary
+    with "cobid", "nodeid", "timestamps" and "signals" a dictionary
+    {name : column of values}. Frames that aren't PDO are given to callback if
+    any
+    """
+    def DecodePDOs(self, frames, batch_size = 4096, callback = None):
+        batches = {}
+        for frame in frames:
+            pdo = self.Pdos.get(frame.CobID, None)
+            if pdo is None or frame.RTR or len(frame.Data) < pdo[0].Length:
+                if callback is not None:
+                    callback(frame)
+                continue
+            timestamps, datas = batches.setdefault(frame.CobID, ([], []))
+            timestamps.append(frame.Timestamp)
+            datas.append(frame.Data[:pdo[0].Length])
+            if len(datas) >= batch_size:
+                yield self.DecodePDOBatch(frame.CobID, timestamps, datas)
+                del timestamps[:]
+                del datas[:]
+        for cobid, (timestamps, datas) in batches.iteritems():
+            if len(datas) > 0:
+                yield self.DecodePDOBatch(cobid, timestamps, datas)
+
+    def DecodePDOBatch(self, cobid, timestamps, datas):
+        layout, nodeid, names = self.Pdos[cobid]
+        columns = layout.Unpack(datas)
+        return {"cobid" : cobid, "nodeid" : nodeid, "timestamps" : timestamps[:],
+                "signals" : dict([(name, columns[field.GetKey()]) for name, field in zip(names, layout.Variables)])}
+
+"""
+Return a line of text describing a decoded frame
+"""
+def FormatDecodedFrame(result):
+    if result["timestamp"] is None:
+        text = ""
+    else:
+        text = "%.6f "%result["timestamp"]
+    text += "%3.3X %-13s"%(result["cobid"], result["service"])
+    if result["nodeid"] is not None:
+        text += " 0x%2.2X"%result["nodeid"]
+    if result["info"]:
+        text += " %s"%result["info"]
+    if result["signals"]:
+        text += " " + ", ".join(["%s=%s"%(name, repr(value)) for name, index, subindex, value in result["signals"]])
+    return text
+
+#-------------------------------------------------------------------------------
+#                              Command Line
+#-------------------------------------------------------------------------------
+
+def usage():
+    print _("\nUsage of tracedecoder.py :")
+    print "\n   %s [options] ProjectFolder TraceFile\n"%sys.argv[0]
+    print _("   ProjectFolder : folder of the NodeList project of the network")
+    print _("   TraceFile : candump log or binary trace file")
+    print _("   -b, --binary : trace file is a binary trace")
+    print _("   -m, --mmap : read trace file through a memory map")
+    print _("   -p, --pdo : only count PDOs decoded by batches\n")
+
+if __name__ == '__main__':
+    import getopt, __builtin__
+    # Loading a project needs translation function in other modules too
+    __builtin__.__dict__['_'] = lambda x: x
+
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "hbmp", ["help", "binary", "mmap", "pdo"])
+    except getopt.GetoptError:
+        usage()
+        sys.exit(2)
+    if len(args) != 2:
+        usage()
+        sys.exit()
+    folder, filepath = args
+
+    format = "candump"
+    mapped = False
+    pdo_only = False
+    for o, a in opts:
+        if o in ("-h", "--help"):
+            usage()
+            sys.exit()
+        elif o in ("-b", "--binary"):
+            format = "binary"
+        elif o in ("-m", "--mmap"):
+            mapped = True
+        elif o in ("-p", "--pdo"):
+            pdo_only = True
+
+    from nodemanager import NodeManager
+    from nodelist import NodeList
+    nodelist = NodeList(NodeManager())
+    result = nodelist.LoadProject(folder)
+    if result is not None:
+        print result
+        sys.exit(-1)
+    decoder = TraceDecoder(nodelist)
+    frames = ReadTraceFile(filepath, format, mapped)
+    if pdo_only:
+        counts = {}
+        for batch in decoder.DecodePDOs(frames):
+            counts[batch["cobid"]] = counts.get(batch["cobid"], 0) + len(batch["timestamps"])
+        cobids = counts.keys()
+        cobids.sort()
+        for cobid in cobids:
+            print "%3.3X %d"%(cobid, counts[cobid])
+    else:
+        for result in decoder.Decode(frames):
+            print FormatDecodedFrame(result)
@@ -0,0 +1,445 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#This file is part of CanFestival, a library implementing CanOpen Stack.
+#
+#Copyright (C): Edouard TISSERANT, Francis DUPIN and Laurent BESSARD
+#
+#See COPYING file for copyrights details.
+#
+#This library is free software; you can redistribute it and/or
+#modify it under the terms of the GNU Lesser General Public
+#License as published by the Free Software Foundation; either
+#version 2.1 of the License, or (at your option) any later version.
+#
+#This library is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#Lesser General Public License for more details.
+#
+#You should have received a copy of the GNU Lesser General Public
+#License along with this library; if not, write to the Free Software
+#Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+from types import *
+from collections import deque
+import heapq, time
+
+from busload import GetFrameBits
+
+#-------------------------------------------------------------------------------
+#                          Definition of CanFrame Object
+#-------------------------------------------------------------------------------
+
+# Biggest standard and extended CAN identifiers
+CAN_MAX_STANDARD_ID = 0x7FF
+CAN_MAX_EXTENDED_ID = 0x1FFFFFFF
+
+# Number of data bytes of a CAN frame
+CAN_MAX_LENGTH = 8
+
+"""
+Class recording a CAN frame. Timestamp is the time on the bus at which the frame
+ended to be transmitted, None while it isn't sent
+"""
+
+class CanFrame:
+
+    def __init__(self, cobid, data = "", extended = False, rtr = False):
+        if isinstance(data, (ListType, TupleType)):
+            data = "".join(map(chr, data))
+        if len(data) > CAN_MAX_LENGTH:
+            raise ValueError, "CAN frame can't have more than %d data bytes"%CAN_MAX_LENGTH
+        if not 0 <= cobid <= [CAN_MAX_STANDARD_ID, CAN_MAX_EXTENDED_ID][extended]:
+            raise ValueError, "Invalid CAN identifier 0x%X"%cobid
+        self.CobID = cobid
+        self.Data = str(data)
+        self.Extended = extended
+        self.RTR = rtr
+        self.Timestamp = None
+        self.Sender = None
+
+    def GetDLC(self):
+        return len(self.Data)
+
+    def GetBytes(self):
+        return map(ord, self.Data)
+
+    """
+    Return the value used in arbitration, the smallest one wins. A standard frame
+    wins against an extended one with the same base identifier
+    """
+    def GetPriority(self):
+        if self.Extended:
+            return ((self.CobID >> 18) << 1 | 1, self.CobID & 0x3FFFF, self.RTR)
+        return (self.CobID << 1, 0, self.RTR)
+
+    def __repr__(self):
+        if self.Timestamp is None:
+            timestamp = ""
+        else:
+            timestamp = "%.6f "%self.Timestamp
+        return "%s%X [%d] %s"%(timestamp, self.CobID, len(self.Data), " ".join(["%2.2X"%ord(char) for char in self.Data]))
+
+#-------------------------------------------------------------------------------
+#                          Definition of CanEndpoint Object
+#-------------------------------------------------------------------------------
+
+"""
+Class connecting a simulated device to a VirtualCanBus. Frames sent are queued
+in a transmit queue of limited size, a device must wait for OnQueueReady when
+Send fails because the queue is full. Derived classes receive frames accepted
+by their filter in Receive. A device only interested in a fixed set of COB IDs
+can return them in GetCobIDs, bus then gives it only these frames.
+"""
+
+class CanEndpoint:
+
+    def __init__(self, name = "", queue_size = 32):
+        self.Name = name
+        self.Bus = None
+        self.QueueSize = queue_size
+        self.TransmitQueue = deque()
+        # Number of frames refused because transmit queue was full
+        self.Rejected = 0
+
+    def GetName(self):
+        return self.Name
+
+    def GetBus(self):
+        return self.Bus
+
+    """
+    Queue a frame to be sent on bus, frame being a CanFrame or a COB ID with
+    the data given. Return False if the transmit queue is full
+    """
+    def Send(self, frame, data = "", extended = False, rtr = False):
+        if not isinstance(frame, CanFrame):
+            frame = CanFrame(frame, data, extended, rtr)
+        if self.Bus is None:
+            raise ValueError, "Endpoint \"%s\" isn't attached to a bus"%self.Name
+        if self.QueueSize is not None and len(self.TransmitQueue) >= self.QueueSize:
+            self.Rejected += 1
+            return False
+        frame.Sender = self
+        self.TransmitQueue.append(frame)
+        if len(self.TransmitQueue) == 1:
+            self.Bus.AddContender(self)
+        self.Bus.RequestArbitration()
+        return True
+
+    def IsQueueFull(self):
+        return self.QueueSize is not None and len(self.TransmitQueue) >= self.QueueSize
+
+    """
+    Return the COB IDs of the frames to receive, None to receive the frames
+    accepted by Accept. Bus must be told by UpdateSubscriptions when it changes
+    """
+    def GetCobIDs(self):
+        return None
+
+    """
+    Return True if the frame must be given to Receive
+    """
+    def Accept(self, frame):
+        return True
+
+    """
+    Called for each frame sent on bus by another endpoint and accepted
+    """
+    def Receive(self, frame):
+        pass
+
+    """
+    Called when a frame of the endpoint has been sent
+    """
+    def OnTransmitted(self, frame):
+        pass
+
+    """
+    Called when a full transmit queue can accept a frame again
+    """
+    def OnQueueReady(self):
+        pass
+
+    """
+    Called when endpoint is attached to a bus
+    """
+    def OnAttach(self, bus):
+        pass
+
+"""
+Endpoint calling a function for each frame received
+"""
+
+class CallbackEndpoint(CanEndpoint):
+
+    def __init__(self, callback, name = "", queue_size = 32, cobids = None):
+        CanEndpoint.__init__(self, name, queue_size)
+        self.Callback = callback
+        if cobids is not None:
+            cobids = set(cobids)
+        self.CobIDs = cobids
+
+    def Accept(self, frame):
+        return self.CobIDs is None or frame.CobID in self.CobIDs
+
+    def Receive(self, frame):
+        self.Callback(frame)
+
+"""
+Endpoint recording every frame sent on bus
+"""
+
+class RecorderEndpoint(CanEndpoint):
+
+    def __init__(self, name = "recorder", limit = None):
+        CanEndpoint.__init__(self, name, 0)
+        self.Frames = deque(maxlen = limit)
+        self.Limit = limit
+
+    def Receive(self, frame):
+        self.Frames.append(frame)
+
+    def GetFrames(self):
+        return list(self.Frames)
+
+    def Clear(self):
+        self.Frames.clear()
+
+#-------------------------------------------------------------------------------
+#                          Definition of VirtualCanBus Object
+#-------------------------------------------------------------------------------
+
+"""
+Class simulating a CAN bus in memory. Time is simulated: events (timers and
+frame transmissions) are executed in order of their time, without waiting, so a
+simulation runs as fast as possible. If a bitrate is given, each frame occupies
+the bus for the time its bits take to be sent and frames waiting are sent in
+the order of CAN arbitration. Without bitrate, frames are sent instantly. With
+realtime, simulation is slowed down to follow the wall clock.
+"""
+
+class VirtualCanBus:
+
+    def __init__(self, bitrate = None, stuffing = True, realtime = False):
+        self.Bitrate = bitrate
+        self.Stuffing = stuffing
+        self.RealTime = realtime
+        self.Endpoints = []
+        # Endpoints filtering frames with Accept, and endpoints receiving the
+        # frames of some COB IDs by COB ID
+        self.Listeners = []
+        self.Subscribers = {}
+        # COB IDs registered for each endpoint
+        self.Subscriptions = {}
+        # First frames of the endpoints having frames to send, as a heap of
+        # [priority, sequence, endpoint, frame]
+        self.Contenders = []
+        self.Now = 0.
+        # Events are [time, sequence, callback, args], callback is set to None
+        # when event is cancelled
+        self.Events = []
+        self.Sequence = 0
+        self.Transmitting = None
+        self.ArbitrationPending = False
+        self.WallStart = time.time()
+        self.ResetStatistics()
+
+    def ResetStatistics(self):
+        self.StartTime = self.Now
+        self.FramesNumber = 0
+        self.BitsNumber = 0
+        self.BusyTime = 0.
+
+    def GetTime(self):
+        return self.Now
+
+    def GetBitrate(self):
+        return self.Bitrate
+
+    def Attach(self, endpoint):
+        if endpoint.Bus is not None:
+            raise ValueError, "Endpoint \"%s\" is already attached to a bus"%endpoint.Name
+        endpoint.Bus = self
+        self.Endpoints.append(endpoint)
+        self.UpdateSubscriptions(endpoint)
+        endpoint.OnAttach(self)
+        return endpoint
+
+    def Detach(self, endpoint):
+        if endpoint in self.Endpoints:
+            self.Endpoints.remove(endpoint)
+            self.RemoveSubscriptions(endpoint)
+            # Frames of endpoint left in contenders are ignored by Arbitrate
+            endpoint.TransmitQueue.clear()
+            endpoint.Bus = None
+
+    """
+    Register the COB IDs an endpoint receives
+    """
+    def UpdateSubscriptions(self, endpoint):
+        self.RemoveSubscriptions(endpoint)
+        cobids = endpoint.GetCobIDs()
+        if cobids is None:
+            self.Listeners.append(endpoint)
+        else:
+            self.Subscriptions[endpoint] = list(cobids)
+            for cobid in cobids:
+                self.Subscribers.setdefault(cobid, []).append(endpoint)
+
+    def RemoveSubscriptions(self, endpoint):
+        if endpoint in self.Listeners:
+            self.Listeners.remove(endpoint)
+        for cobid in self.Subscriptions.pop(endpoint, []):
+            endpoints = self.Subscribers[cobid]
+            endpoints.remove(endpoint)
+            if len(endpoints) == 0:
+                self.Subscribers.pop(cobid)
+
+    def GetEndpoints(self):
+        return self.Endpoints[:]
+
+#-------------------------------------------------------------------------------
+#                              Events Scheduling
+#-------------------------------------------------------------------------------
+
+    """
+    Call callback with args after delay seconds of simulated time. Return the
+    event that can be given to Cancel
+    """
+    def Schedule(self, delay, callback, *args):
+        return self.ScheduleAt(self.Now + max(delay, 0), callback, *args)
+
+    def ScheduleAt(self, date, callback, *args):
+        event = [max(date, self.Now), self.Sequence, callback, args]
+        self.Sequence += 1
+        heapq.heappush(self.Events, event)
+        return event
+
+    def Cancel(self, event):
+        if event is not None:
+            event[2] = None
+
+    """
+    Execute the next event. Return False if there isn't any event left
+    """
+    def Step(self):
+        while len(self.Events) > 0:
+            date, sequence, callback, args = heapq.heappop(self.Events)
+            if callback is None:
+                continue
+            if self.RealTime:
+                delay = self.WallStart + date - self.StartTime - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+            self.Now = date
+            callback(*args)
+            return True
+        return False
+
+    """
+    Execute events until there isn't any left or the simulated time given is
+    reached. Return the number of events executed
+    """
+    def Run(self, until = None):
+        self.WallStart = time.time() - (self.Now - self.StartTime)
+        count = 0
+        while len(self.Events) > 0:
+            if until is not None and self.Events[0][0] > until:
+                break
+            if self.Step():
+                count += 1
+        if until is not None and until > self.Now:
+            self.Now = until
+        return count
+
+    """
+    Execute events during the simulated time given
+    """
+    def RunFor(self, duration):
+        return self.Run(self.Now + duration)
+
+    def IsIdle(self):
+        return self.Transmitting is None and not self.ArbitrationPending
+
+#-------------------------------------------------------------------------------
+#                              Frames Transmission
+#-------------------------------------------------------------------------------
+
+    """
+    Return the time in seconds a frame occupies the bus
+    """
+    def GetFrameDuration(self, frame):
+        if not self.Bitrate:
+            return 0.
+        return float(GetFrameBits(len(frame.Data), frame.Extended, self.Stuffing)) / self.Bitrate
+
+    """
+    Ask for an arbitration when bus is free. Arbitration is made after all the
+    events of the current time, so that all frames queued at the same time
+    compete
+    """
+    def RequestArbitration(self):
+        if self.Transmitting is None and not self.ArbitrationPending:
+            self.ArbitrationPending = True
+            self.Schedule(0, self.Arbitrate)
+
+    """
+    Add the first frame of the transmit queue of an endpoint to the frames
+    competing in arbitration
+    """
+    def AddContender(self, endpoint):
+        frame = endpoint.TransmitQueue[0]
+        heapq.heappush(self.Contenders, [frame.GetPriority(), self.Sequence, endpoint, frame])
+        self.Sequence += 1
+
+    def Arbitrate(self):
+        self.ArbitrationPending = False
+        winner = None
+        while len(self.Contenders) > 0:
+            priority, sequence, endpoint, frame = heapq.heappop(self.Contenders)
+            # Endpoint may have been detached since its frame was added
+            if endpoint.Bus is self and len(endpoint.TransmitQueue) > 0 and endpoint.TransmitQueue[0] is frame:
+                winner = endpoint
+                break
+        if winner is not None:
+            full = winner.IsQueueFull()
+            frame = winner.TransmitQueue.popleft()
+            if len(winner.TransmitQueue) > 0:
+                self.AddContender(winner)
+            self.Transmitting = frame
+            duration = self.GetFrameDuration(frame)
+            self.Schedule(duration, self.EndTransmission, frame, duration)
+            if full:
+                winner.OnQueueReady()
+
+    def EndTransmission(self, frame, duration):
+        self.Transmitting = None
+        frame.Timestamp = self.Now
+        self.FramesNumber += 1
+        self.BitsNumber += GetFrameBits(len(frame.Data), frame.Extended, self.Stuffing)
+        self.BusyTime += duration
+        for endpoint in self.Subscribers.get(frame.CobID, []):
+            if endpoint is not frame.Sender:
+                endpoint.Receive(frame)
+        for endpoint in self.Listeners:
+            if endpoint is not frame.Sender and endpoint.Accept(frame):
+                endpoint.Receive(frame)
+        if frame.Sender is not None:
+            frame.Sender.OnTransmitted(frame)
+        if len(self.Contenders) > 0:
+            self.RequestArbitration()
+
+    """
+    Return the statistics of the bus since last reset as a dictionary
+    """
+    def GetStatistics(self):
+        elapsed = self.Now - self.StartTime
+        statistics = {"frames" : self.FramesNumber, "bits" : self.BitsNumber,
+                      "busy" : self.BusyTime, "elapsed" : elapsed,
+                      "rejected" : sum([endpoint.Rejected for endpoint in self.Endpoints]),
+                      "load" : 0.}
+        if elapsed > 0:
+            statistics["load"] = self.BusyTime / elapsed
+        return statistics